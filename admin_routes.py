@@ -21,6 +21,10 @@ from oracxpred_utils import (
     ensure_user_unique_id, check_and_expire_subscriptions
 )
 from prediction_manager import log_action
+from entitlements import invalidate_entitlement, invalidate_all_entitlements
+from alert_engine import alert_engine
+from stats_service import stats_service
+from notifications import create_notification, inbox_versions
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 
@@ -277,24 +281,18 @@ def admin_dashboard():
     """Tableau de bord admin principal"""
     admin_user = User.query.get(session.get('user_id'))
     
-    # Statistiques
-    total_users = User.query.count()
-    active_subscriptions = UserSubscription.query.filter(
-        UserSubscription.is_active == True,
-        UserSubscription.expires_at > datetime.utcnow()
-    ).count()
-    pending_approvals = User.query.filter_by(is_approved=False).count()
-    total_predictions = Prediction.query.count()
-    active_predictions = Prediction.query.filter_by(is_valid=True, is_locked=False).count()
-    
-    # Abonnements expirés récemment
-    recently_expired = UserSubscription.query.filter(
-        UserSubscription.is_active == False,
-        UserSubscription.expires_at > datetime.utcnow() - timedelta(days=7)
-    ).count()
-    
-    # Notifications non lues
-    unread_notifications = Notification.query.filter_by(is_read=False).count()
+    # Statistiques (une requête groupée par table, en cache)
+    stats = stats_service.dashboard()
+    total_users = stats['total_users']
+    active_subscriptions = stats['active_subscriptions']
+    pending_approvals = stats['pending_approvals']
+    total_predictions = stats['total_predictions']
+    active_predictions = stats['active_predictions']
+    recently_expired = stats['recently_expired']
+    unread_notifications = stats['unread_notifications']
+    
+    # Alertes ouvertes (index en mémoire)
+    open_alerts = alert_engine.get_open_counts()
     
     # Logs récents
     recent_logs = SystemLog.query.order_by(SystemLog.created_at.desc()).limit(20).all()
@@ -310,6 +308,7 @@ def admin_dashboard():
             active_predictions=active_predictions,
             recently_expired=recently_expired,
             unread_notifications=unread_notifications,
+            open_alerts=open_alerts,
             recent_logs=recent_logs
         )
     except Exception as e:
@@ -352,6 +351,7 @@ def admin_toggle_user_active(user_id):
     
     user.is_active = not user.is_active
     db.session.commit()
+    invalidate_entitlement(user_id)
     
     action = 'activé' if user.is_active else 'désactivé'
     log_action('admin_action', f"Utilisateur {user.username} {action}", 
@@ -370,6 +370,7 @@ def admin_approve_user(user_id):
     user.is_approved = True
     ensure_user_unique_id(user)  # Assurer l'ID unique
     db.session.commit()
+    invalidate_entitlement(user_id)
     
     log_action('admin_action', f"Utilisateur {user.username} approuvé", 
                user_id=user_id, admin_id=admin_id, severity='info')
@@ -413,6 +414,7 @@ def admin_set_subscription(user_id):
     )
     db.session.add(subscription)
     db.session.commit()
+    invalidate_entitlement(user_id)
     
     log_action('admin_action', f"Abonnement {plan.name} attribué à {user.username}", 
                user_id=user_id, admin_id=admin_id, severity='info')
@@ -485,6 +487,7 @@ def admin_update_plan(plan_id):
     plan.is_active = request.json.get('is_active', plan.is_active)
     
     db.session.commit()
+    invalidate_all_entitlements()  # Nom et limite du plan sont dans les droits en cache
     
     log_action('admin_action', f"Plan modifié: {plan.name}", admin_id=admin_id, severity='info')
     
@@ -565,11 +568,14 @@ def admin_invalidate_prediction(prediction_id):
     """Invalider une prédiction"""
     admin_id = session.get('user_id')
     prediction = Prediction.query.get_or_404(prediction_id)
+    was_active = prediction.is_valid and not prediction.is_locked
     
     prediction.is_valid = False
     prediction.invalidated_by = admin_id
     prediction.invalidated_at = datetime.utcnow()
     db.session.commit()
+    if was_active:
+        stats_service.prediction_deactivated()
     
     log_action('admin_action', f"Prédiction {prediction_id} invalidée", 
                admin_id=admin_id, severity='warning')
@@ -577,6 +583,32 @@ def admin_invalidate_prediction(prediction_id):
     return jsonify({'success': True})
 
 
+# ========== GESTION DES ALERTES ==========
+
+@admin_bp.route('/alerts/stats')
+@require_admin
+def admin_alerts_stats():
+    """Compteurs des alertes ouvertes (index en mémoire, sans lecture de la table)"""
+    return jsonify(alert_engine.get_open_counts())
+
+
+@admin_bp.route('/alert/<int:alert_id>/acknowledge', methods=['POST'])
+@require_admin
+def admin_acknowledge_alert(alert_id):
+    """Acquitter une alerte"""
+    admin_id = session.get('user_id')
+    alert = Alert.query.get_or_404(alert_id)
+    
+    if not alert.is_acknowledged:
+        alert.is_acknowledged = True
+        alert.acknowledged_by = admin_id
+        alert.acknowledged_at = datetime.utcnow()
+        db.session.commit()
+        alert_engine.acknowledged(alert)
+    
+    return jsonify({'success': True})
+
+
 # ========== GESTION DES NOTIFICATIONS ==========
 
 @admin_bp.route('/notifications')
@@ -605,37 +637,14 @@ def admin_create_notification():
     if not title or not message:
         return jsonify({'error': 'Titre et message requis'}), 400
     
-    # Si notification globale, créer pour tous les utilisateurs
-    if is_global:
-        users = User.query.filter_by(is_approved=True, is_active=True).all()
-        for user in users:
-            notification = Notification(
-                user_id=user.id,
-                is_global=True,
-                title=title,
-                message=message,
-                priority=priority,
-                notification_type=notification_type,
-                display_duration=display_duration,
-                created_by=admin_id
-            )
-            db.session.add(notification)
-    else:
-        if not user_id:
-            return jsonify({'error': 'user_id requis pour notification ciblée'}), 400
-        notification = Notification(
-            user_id=user_id,
-            is_global=False,
-            title=title,
-            message=message,
-            priority=priority,
-            notification_type=notification_type,
-            display_duration=display_duration,
-            created_by=admin_id
-        )
-        db.session.add(notification)
+    if not is_global and not user_id:
+        return jsonify({'error': 'user_id requis pour notification ciblée'}), 400
     
+    # Notification globale : une seule ligne, les lectures sont suivies par utilisateur
+    create_notification(title, message, admin_id, user_id=user_id, priority=priority,
+                        notification_type=notification_type, display_duration=display_duration)
     db.session.commit()
+    inbox_versions.changed(None if is_global else int(user_id))
     
     log_action('admin_action', f"Notification créée: {title}", admin_id=admin_id, severity='info')
     
@@ -722,32 +731,8 @@ def admin_matchs_collectes():
     )
     matches = matches_pagination.items
     
-    # Statistiques détaillées
-    stats = {
-        'total_matches': CollectedMatch.query.count(),
-        'by_status': {},
-        'by_game': {},
-        'by_source': {},
-        'last_24h': CollectedMatch.query.filter(
-            CollectedMatch.created_at >= datetime.now() - timedelta(hours=24)
-        ).count(),
-        'last_7d': CollectedMatch.query.filter(
-            CollectedMatch.created_at >= datetime.now() - timedelta(days=7)
-        ).count()
-    }
-    
-    # Statuts
-    for status in ['en_attente', 'en_cours', 'termine', 'annule']:
-        stats['by_status'][status] = CollectedMatch.query.filter_by(statut=status).count()
-    
-    # Jeux
-    for game in ['FIFA', 'eFootball', 'FC']:
-        stats['by_game'][game] = CollectedMatch.query.filter_by(jeu=game).count()
-    
-    # Sources
-    sources = db.session.query(CollectedMatch.source_donnees, db.func.count(CollectedMatch.id)).group_by(CollectedMatch.source_donnees).all()
-    for source, count in sources:
-        stats['by_source'][source or 'unknown'] = count
+    # Statistiques détaillées (statut, jeu, source, 24h, 7 jours en une requête groupée)
+    stats = stats_service.collected_matches()
     
     # Logs récents du système
     recent_logs = MatchCollectionLog.query.order_by(MatchCollectionLog.created_at.desc()).limit(20).all()
@@ -1040,6 +1025,19 @@ def admin_matchs_collectes():
     )
 
 
+def _settle_validated_matches(matches, admin_id):
+    """Règle en un lot les archives des matchs validés (matchs 1xbet avec score final)"""
+    from match_collector import archive_match_id
+    from archive_manager import settle_matches
+    
+    results = []
+    for match in matches:
+        archive_id = archive_match_id(match.unique_match_id)
+        if archive_id is not None and match.score_domicile is not None and match.score_exterieur is not None:
+            results.append((archive_id, match.score_domicile, match.score_exterieur))
+    return settle_matches(results, admin_id=admin_id)
+
+
 @admin_bp.route('/matchs-collectes/validate/<int:match_id>', methods=['POST'])
 @require_admin
 def admin_validate_match(match_id):
@@ -1057,8 +1055,43 @@ def admin_validate_match(match_id):
         db.session.commit()
         
         log_action('admin_action', f"Match validé: {match.unique_match_id}", admin_id=admin_id)
+        summary = _settle_validated_matches([match], admin_id)
         
-        return jsonify({'success': True, 'message': 'Match validé avec succès'})
+        return jsonify({'success': True, 'message': 'Match validé avec succès', 'settled': summary['settled']})
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@admin_bp.route('/matchs-collectes/validate', methods=['POST'])
+@require_admin
+def admin_validate_matches():
+    """Valide plusieurs matchs terminés et règle leurs archives en un lot (JSON {'ids': [...]})"""
+    
+    data = request.get_json(silent=True) or {}
+    ids = data.get('ids')
+    admin_id = session.get('user_id')
+    
+    if not isinstance(ids, list) or not ids:
+        return jsonify({'error': 'Liste d\'ID requise'}), 400
+    
+    try:
+        matches = CollectedMatch.query.filter(CollectedMatch.id.in_(ids)).all()
+        termines = [match for match in matches if match.statut == 'termine']
+        for match in termines:
+            match.collecte_par = f"validated_by_admin_{admin_id}"
+        db.session.commit()
+        
+        log_action('admin_action', f"{len(termines)} matchs validés en lot", admin_id=admin_id)
+        summary = _settle_validated_matches(termines, admin_id)
+        
+        return jsonify({
+            'success': True,
+            'validated': [match.id for match in termines],
+            'skipped': sorted(set(ids) - {match.id for match in termines}),
+            'settled': summary['settled'],
+        })
         
     except Exception as e:
         db.session.rollback()
@@ -1075,8 +1108,10 @@ def admin_delete_match(match_id):
     
     try:
         match_id_str = match.unique_match_id
+        counted = (match.statut, match.jeu, match.source_donnees, match.created_at)
         db.session.delete(match)
         db.session.commit()
+        stats_service.match_deleted(*counted)
         
         log_action('admin_action', f"Match supprimé: {match_id_str}", admin_id=admin_id, severity='warning')
         
@@ -1090,48 +1125,30 @@ def admin_delete_match(match_id):
 @admin_bp.route('/matchs-collectes/export')
 @require_admin
 def admin_export_matches():
-    """Exporte les matchs collectés en CSV"""
-    
-    import csv
-    from io import StringIO
-    from flask import Response
+    """
+    Exporte les matchs collectés en flux (CSV ou NDJSON, gzip optionnel)
     
-    matches = CollectedMatch.query.order_by(CollectedMatch.created_at.desc()).all()
+    Paramètres : format=csv|ndjson, gzip=1, jeu, statut, date_from, date_to (AAAA-MM-JJ)
+    """
     
-    output = StringIO()
-    writer = csv.writer(output)
+    from flask import Response, stream_with_context
+    from match_export import export_matches, parse_export_filters, EXPORT_FORMATS
     
-    # En-tête CSV
-    writer.writerow([
-        'ID', 'Jeu', 'Equipe Domicile', 'Equipe Exterieur', 
-        'Score Domicile', 'Score Exterieur', 'Equipe Gagnante',
-        'Statut', 'Heure Debut', 'Heure Fin', 'Source',
-        'Date Creation'
-    ])
+    fmt = request.args.get('format', 'csv')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'error': f"Format inconnu: {fmt}"}), 400
+    try:
+        filters = parse_export_filters(request.args)
+    except ValueError:
+        return jsonify({'error': 'Date invalide (format attendu: AAAA-MM-JJ)'}), 400
     
-    # Données
-    for match in matches:
-        writer.writerow([
-            match.unique_match_id,
-            match.jeu,
-            match.equipe_domicile,
-            match.equipe_exterieur,
-            match.score_domicile or '',
-            match.score_exterieur or '',
-            match.equipe_gagnante or '',
-            match.statut,
-            match.heure_debut.isoformat() if match.heure_debut else '',
-            match.heure_fin.isoformat() if match.heure_fin else '',
-            match.source_donnees or '',
-            match.created_at.isoformat() if match.created_at else ''
-        ])
-    
-    output.seek(0)
+    stream, mimetype, extension = export_matches(fmt, compress=request.args.get('gzip') == '1', filters=filters)
+    filename = 'matchs_collectes_' + datetime.now().strftime('%Y%m%d_%H%M%S') + '.' + extension
     
     return Response(
-        output.getvalue(),
-        mimetype='text/csv',
-        headers={'Content-Disposition': 'attachment; filename=matchs_collectes_' + datetime.now().strftime('%Y%m%d_%H%M%S') + '.csv'}
+        stream_with_context(stream),
+        mimetype=mimetype,
+        headers={'Content-Disposition': 'attachment; filename=' + filename}
     )
 
 
@@ -2,17 +2,33 @@
 🤖 GESTIONNAIRE DE MODÈLES IA ORACXPRED
 ========================================
 Gestion des modèles IA (.pkl) séparés des données utilisateurs
+
+Les modèles chargés restent en mémoire (registre LRU borné en octets, clé
+(nom, version)) et ne sont relus que si leur fichier change. Les poids
+numériques volumineux sont stockés à part (.weights) et lus par mmap : les
+processus qui chargent le même modèle partagent les mêmes pages.
 """
 
+import array
+import mmap
 import os
 import pickle
 import json
+import threading
+from collections import OrderedDict
 from datetime import datetime
 from flask import current_app
 
+try:
+    import fcntl  # Verrou entre processus pour les écritures de métadonnées (Unix)
+except ImportError:
+    fcntl = None
+
 
 MODELS_DIR = 'ai_models'
 MODELS_METADATA_FILE = 'models_metadata.json'
+REGISTRY_MAX_BYTES = 256 * 1024 * 1024  # Taille des modèles gardés en mémoire par processus
+WEIGHTS_ALIGNMENT = 8
 
 
 def ensure_models_directory():
@@ -22,7 +38,218 @@ def ensure_models_directory():
     return models_path
 
 
-def save_model(model, model_name, version=None, metadata=None):
+def _file_signature(path):
+    """(mtime_ns, taille, inode) : change à chaque réécriture ou remplacement du fichier"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+class LoadedModel:
+    """Entrée du registre : modèle désérialisé et poids mappés"""
+
+    def __init__(self, model, signature, size, weights=None, maps=None):
+        self.model = model
+        self.signature = signature
+        self.size = size
+        self.weights = weights or {}
+        self._maps = maps or []
+
+    def close(self):
+        self.weights = {}
+        for mapped in self._maps:
+            try:
+                mapped.close()
+            except BufferError:
+                pass  # Une vue est encore utilisée : la projection sera libérée avec elle
+        self._maps = []
+
+
+class ModelRegistry:
+    """Cache des modèles chargés par (nom, version), éviction LRU selon la taille"""
+
+    def __init__(self, models_path, max_bytes=REGISTRY_MAX_BYTES):
+        self.models_path = models_path
+        self.metadata_file = os.path.join(models_path, MODELS_METADATA_FILE)
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._pins = {}
+        self._metadata = {}
+        self._metadata_signature = None
+        self._lock = threading.RLock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.loads = 0
+
+    # ----- Métadonnées -----
+
+    def metadata(self):
+        """Index des modèles, relu seulement si le fichier a changé"""
+        with self._lock:
+            signature = _file_signature(self.metadata_file)
+            if signature != self._metadata_signature:
+                if signature is None:
+                    self._metadata = {}
+                else:
+                    with open(self.metadata_file, 'r') as f:
+                        self._metadata = json.load(f)
+                self._metadata_signature = signature
+            return self._metadata
+
+    def update_metadata(self, update):
+        """
+        Lit, modifie (update(all_metadata)) et réécrit l'index de façon atomique
+        
+        Verrou de fichier entre processus quand fcntl est disponible.
+        """
+        with self._lock, open(self.metadata_file + '.lock', 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            self._metadata_signature = None  # Relire l'état le plus récent
+            all_metadata = json.loads(json.dumps(self.metadata()))
+            result = update(all_metadata)
+            tmp_path = f"{self.metadata_file}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(all_metadata, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.metadata_file)
+            self._metadata_signature = None
+            return result
+
+    # ----- Versions -----
+
+    def pin(self, model_name, version):
+        """Épingle une version : load_model(model_name) la retourne au lieu de la dernière"""
+        with self._lock:
+            self._pins[model_name] = version
+
+    def unpin(self, model_name):
+        with self._lock:
+            self._pins.pop(model_name, None)
+
+    def resolve_version(self, model_name, version=None):
+        """Version demandée, sinon version épinglée, sinon dernière version ; None si introuvable"""
+        versions = self.metadata().get(model_name)
+        if not versions:
+            return None
+        version = version or self._pins.get(model_name) or max(versions.keys())
+        return version if version in versions else None
+
+    # ----- Chargement -----
+
+    def get_entry(self, model_name, version=None):
+        """Entrée chargée (paresseusement) pour (nom, version) ou None"""
+        with self._lock:
+            version = self.resolve_version(model_name, version)
+            if version is None:
+                return None
+            info = self.metadata()[model_name][version]
+            filepath = info['filepath']
+            signature = (_file_signature(filepath), _file_signature(info.get('weights_file', '')))
+            if signature[0] is None:
+                return None
+            
+            key = (model_name, version)
+            entry = self._entries.get(key)
+            if entry is not None and entry.signature == signature:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            
+            if entry is not None:
+                self._remove(key)
+            entry = self._load(info, signature)
+            self._entries[key] = entry
+            self.total_bytes += entry.size
+            self.loads += 1
+            # Éviction des moins récemment utilisés (le modèle demandé reste, même s'il dépasse seul la limite)
+            while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+                self._remove(next(iter(self._entries)))
+            return entry
+
+    def _load(self, info, signature):
+        with open(info['filepath'], 'rb') as f:
+            model = pickle.load(f)
+        weights, maps = {}, []
+        if info.get('weights_file') and signature[1] is not None:
+            with open(info['weights_file'], 'rb') as f:
+                if signature[1][1] > 0:
+                    mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                    maps.append(mapped)
+                    view = memoryview(mapped)
+                    for name, (typecode, offset, count) in info.get('weights', {}).items():
+                        itemsize = array.array(typecode).itemsize
+                        weights[name] = view[offset:offset + count * itemsize].cast(typecode)
+        # Les pages mappées sont partagées et récupérables par le système : seul le pickle compte
+        return LoadedModel(model, signature, signature[0][1], weights, maps)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self.total_bytes -= entry.size
+        entry.close()
+
+    def invalidate(self, model_name=None, version=None):
+        """Retire du cache un modèle (toutes versions si version est None), ou tout le cache"""
+        with self._lock:
+            for key in list(self._entries):
+                if model_name is None or (key[0] == model_name and version in (None, key[1])):
+                    self._remove(key)
+            self._metadata_signature = None
+
+    def get_stats(self):
+        """Statistiques du registre (pour monitoring)"""
+        with self._lock:
+            return {
+                'models': [f"{name} v{version}" for name, version in self._entries],
+                'total_bytes': self.total_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'loads': self.loads,
+                'pins': dict(self._pins),
+            }
+
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+
+def get_registry():
+    """Registre du dossier de modèles de l'application courante"""
+    models_path = ensure_models_directory()
+    with _registries_lock:
+        registry = _registries.get(models_path)
+        if registry is None:
+            registry = _registries[models_path] = ModelRegistry(
+                models_path, current_app.config.get('AI_MODELS_CACHE_MAX_BYTES', REGISTRY_MAX_BYTES)
+            )
+        return registry
+
+
+def _write_weights(filepath, weights):
+    """
+    Écrit les poids (nom -> array.array) bout à bout, alignés sur 8 octets
+    
+    Returns:
+        {nom: [typecode, décalage, nombre de valeurs]}
+    """
+    layout = {}
+    tmp_path = filepath + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        for name, values in weights.items():
+            if not isinstance(values, array.array):
+                values = array.array('d', values)
+            padding = -f.tell() % WEIGHTS_ALIGNMENT
+            f.write(b'\0' * padding)
+            layout[name] = [values.typecode, f.tell(), len(values)]
+            values.tofile(f)
+    os.replace(tmp_path, filepath)
+    return layout
+
+
+def save_model(model, model_name, version=None, metadata=None, weights=None):
     """
     Sauvegarde un modèle IA dans un fichier .pkl
     
@@ -31,6 +258,8 @@ def save_model(model, model_name, version=None, metadata=None):
         model_name: Nom du modèle (ex: 'prediction_1x2', 'prediction_alternatifs')
         version: Version du modèle (optionnel, auto-généré si None)
         metadata: Métadonnées supplémentaires (dict)
+        weights: Poids numériques volumineux (dict nom -> array.array ou liste de float),
+            stockés dans un fichier .weights lu par mmap (voir load_weights)
     
     Returns:
         Chemin du fichier sauvegardé
@@ -44,12 +273,19 @@ def save_model(model, model_name, version=None, metadata=None):
     filename = f"{model_name}_v{version}.pkl"
     filepath = os.path.join(models_path, filename)
     
-    # Sauvegarder le modèle
-    with open(filepath, 'wb') as f:
-        pickle.dump(model, f)
+    # Sauvegarder le modèle (fichier complet renommé : jamais de pickle partiel lu par un autre processus)
+    with open(filepath + '.tmp', 'wb') as f:
+        pickle.dump(model, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(filepath + '.tmp', filepath)
+    
+    weights_file = None
+    weights_layout = None
+    if weights:
+        weights_file = os.path.join(models_path, f"{model_name}_v{version}.weights")
+        weights_layout = _write_weights(weights_file, weights)
     
     # Mettre à jour les métadonnées
-    update_model_metadata(model_name, version, filepath, metadata)
+    update_model_metadata(model_name, version, filepath, metadata, weights_file, weights_layout)
     
     print(f"✅ Modèle sauvegardé: {filepath}")
     return filepath
@@ -61,86 +297,61 @@ def load_model(model_name, version=None):
     
     Args:
         model_name: Nom du modèle
-        version: Version spécifique (optionnel, charge la dernière si None)
+        version: Version spécifique (optionnel, version épinglée ou dernière si None)
     
     Returns:
         Le modèle chargé ou None si non trouvé
     """
-    models_path = ensure_models_directory()
-    metadata_file = os.path.join(models_path, MODELS_METADATA_FILE)
-    
-    # Charger les métadonnées
-    if os.path.exists(metadata_file):
-        with open(metadata_file, 'r') as f:
-            metadata = json.load(f)
-    else:
-        return None
-    
-    # Trouver le modèle
-    if model_name not in metadata:
-        return None
-    
-    model_versions = metadata[model_name]
-    
-    if version:
-        # Charger une version spécifique
-        if version in model_versions:
-            filepath = model_versions[version]['filepath']
-        else:
-            return None
-    else:
-        # Charger la dernière version
-        if not model_versions:
-            return None
-        latest_version = max(model_versions.keys())
-        filepath = model_versions[latest_version]['filepath']
-    
-    # Charger le modèle
-    if os.path.exists(filepath):
-        with open(filepath, 'rb') as f:
-            model = pickle.load(f)
-        return model
-    
-    return None
+    # Chargé une fois par processus, relu seulement si le fichier a changé
+    entry = get_registry().get_entry(model_name, version)
+    return entry.model if entry else None
 
 
-def update_model_metadata(model_name, version, filepath, metadata=None):
-    """Met à jour les métadonnées d'un modèle"""
-    models_path = ensure_models_directory()
-    metadata_file = os.path.join(models_path, MODELS_METADATA_FILE)
+def load_weights(model_name, version=None):
+    """
+    Poids numériques d'un modèle, en lecture seule et sans copie
     
-    # Charger les métadonnées existantes
-    if os.path.exists(metadata_file):
-        with open(metadata_file, 'r') as f:
-            all_metadata = json.load(f)
+    Returns:
+        dict nom -> memoryview typée sur le fichier mappé ({} si aucun), ou None si non trouvé
+    """
+    entry = get_registry().get_entry(model_name, version)
+    return entry.weights if entry else None
+
+
+def pin_model_version(model_name, version):
+    """Épingle la version chargée par défaut pour ce modèle (None pour revenir à la dernière)"""
+    registry = get_registry()
+    if version is None:
+        registry.unpin(model_name)
     else:
-        all_metadata = {}
-    
-    # Mettre à jour
-    if model_name not in all_metadata:
-        all_metadata[model_name] = {}
-    
-    all_metadata[model_name][version] = {
-        'filepath': filepath,
-        'created_at': datetime.now().isoformat(),
-        'metadata': metadata or {}
-    }
+        registry.pin(model_name, version)
+
+
+def update_model_metadata(model_name, version, filepath, metadata=None, weights_file=None, weights=None):
+    """Met à jour les métadonnées d'un modèle (écriture atomique de l'index)"""
+    registry = get_registry()
+
+    def update(all_metadata):
+        # Mettre à jour
+        if model_name not in all_metadata:
+            all_metadata[model_name] = {}
+        
+        all_metadata[model_name][version] = {
+            'filepath': filepath,
+            'created_at': datetime.now().isoformat(),
+            'metadata': metadata or {}
+        }
+        if weights_file:
+            all_metadata[model_name][version]['weights_file'] = weights_file
+            all_metadata[model_name][version]['weights'] = weights
     
-    # Sauvegarder
-    with open(metadata_file, 'w') as f:
-        json.dump(all_metadata, f, indent=2)
+    registry.update_metadata(update)
+    registry.invalidate(model_name, version)
 
 
 def list_models():
     """Liste tous les modèles disponibles"""
-    models_path = ensure_models_directory()
-    metadata_file = os.path.join(models_path, MODELS_METADATA_FILE)
-    
-    if not os.path.exists(metadata_file):
-        return {}
-    
-    with open(metadata_file, 'r') as f:
-        return json.load(f)
+    return json.loads(json.dumps(get_registry().metadata()))
 
 
 def get_latest_model_version(model_name):
@@ -158,37 +369,29 @@ def get_latest_model_version(model_name):
 
 def delete_model(model_name, version=None):
     """Supprime un modèle"""
-    models_path = ensure_models_directory()
-    metadata_file = os.path.join(models_path, MODELS_METADATA_FILE)
-    
-    if not os.path.exists(metadata_file):
-        return False
-    
-    with open(metadata_file, 'r') as f:
-        all_metadata = json.load(f)
+    registry = get_registry()
+
+    def update(all_metadata):
+        if model_name not in all_metadata:
+            return False
+        
+        if version:
+            # Supprimer une version spécifique
+            if version not in all_metadata[model_name]:
+                return False
+            removed = [all_metadata[model_name].pop(version)]
+        else:
+            # Supprimer toutes les versions
+            removed = list(all_metadata.pop(model_name).values())
+        
+        for data in removed:
+            for path in (data['filepath'], data.get('weights_file')):
+                if path and os.path.exists(path):
+                    os.remove(path)
+        return True
     
-    if model_name not in all_metadata:
+    if not os.path.exists(registry.metadata_file):
         return False
-    
-    if version:
-        # Supprimer une version spécifique
-        if version in all_metadata[model_name]:
-            filepath = all_metadata[model_name][version]['filepath']
-            if os.path.exists(filepath):
-                os.remove(filepath)
-            del all_metadata[model_name][version]
-        else:
-            return False
-    else:
-        # Supprimer toutes les versions
-        for v, data in all_metadata[model_name].items():
-            filepath = data['filepath']
-            if os.path.exists(filepath):
-                os.remove(filepath)
-        del all_metadata[model_name]
-    
-    # Sauvegarder les métadonnées mises à jour
-    with open(metadata_file, 'w') as f:
-        json.dump(all_metadata, f, indent=2)
-    
-    return True
+    deleted = registry.update_metadata(update)
+    registry.invalidate(model_name, version)
+    return deleted
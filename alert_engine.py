@@ -0,0 +1,260 @@
+"""
+🚨 MOTEUR D'ALERTES - ORACXPRED
+===============================
+Regroupe les alertes identiques (même type, même match) sur une fenêtre de
+temps : une seule ligne dans la table alerts, avec le nombre d'occurrences.
+Les alertes sont écrites par lots en arrière-plan et un index en mémoire des
+alertes ouvertes (non acquittées) sert les compteurs de l'administration.
+"""
+
+import atexit
+import json
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+from sqlalchemy import bindparam, func, insert, update
+
+from models import db, Alert
+
+
+ALERT_DEDUP_WINDOW_SECONDS = 600  # Alertes identiques regroupées pendant 10 minutes
+ALERT_FLUSH_SECONDS = 5
+
+
+class AlertRecord:
+    """Alerte en mémoire (avant et après écriture en base)"""
+
+    def __init__(self, alert_type, message, severity, prediction_id, match_id, extra_data, now):
+        self.alert_id = None  # Connu après écriture
+        self.alert_type = alert_type
+        self.message = message
+        self.severity = severity
+        self.prediction_id = prediction_id
+        self.match_id = match_id
+        self.extra_data = extra_data or {}
+        self.first_seen = now
+        self.last_seen = now
+        self.occurrences = 1
+
+    def serialize_extra(self):
+        extra = dict(self.extra_data)
+        if self.occurrences > 1:
+            extra['occurrences'] = self.occurrences
+            extra['last_seen'] = self.last_seen.isoformat()
+        return json.dumps(extra) if extra else None
+
+    def to_row(self):
+        return {
+            'alert_type': self.alert_type,
+            'message': self.message,
+            'severity': self.severity,
+            'prediction_id': self.prediction_id,
+            'match_id': self.match_id,
+            'extra_data': self.serialize_extra(),
+            'is_acknowledged': False,
+            'created_at': self.first_seen
+        }
+
+    def __repr__(self) -> str:
+        return f"<AlertRecord {self.alert_type} match:{self.match_id} x{self.occurrences}>"
+
+
+class AlertEngine:
+    """Déduplication, écriture par lots et index des alertes ouvertes"""
+
+    def __init__(self, window_seconds=ALERT_DEDUP_WINDOW_SECONDS, flush_interval=ALERT_FLUSH_SECONDS):
+        self.window = timedelta(seconds=window_seconds)
+        self.flush_interval = flush_interval
+        self.app = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._recent = {}  # (alert_type, match_id) -> AlertRecord dans la fenêtre
+        self._new = []  # Alertes à insérer
+        self._dirty = set()  # Alertes déjà écrites dont le compteur a changé
+        self._open_counts = Counter()  # (alert_type, severity) -> alertes non acquittées
+        self._thread = None
+        self.coalesced_count = 0
+
+    def init_app(self, app, start_thread=True):
+        """Reconstruit l'index depuis la table alerts et démarre l'écriture en arrière-plan"""
+        self.app = app
+        with app.app_context():
+            self.load()
+        atexit.register(self.flush)
+        if start_thread:
+            self.start()
+
+    def load(self):
+        """Recharge les compteurs d'alertes ouvertes et les alertes récentes (fenêtre de regroupement)"""
+        counts = db.session.query(
+            Alert.alert_type, Alert.severity, func.count(Alert.id)
+        ).filter(Alert.is_acknowledged == False).group_by(Alert.alert_type, Alert.severity).all()
+
+        since = datetime.utcnow() - self.window
+        recent = Alert.query.filter(
+            Alert.is_acknowledged == False,
+            Alert.match_id.isnot(None),
+            Alert.created_at >= since
+        ).all()
+
+        with self._lock:
+            self._open_counts = Counter({(alert_type, severity): n for alert_type, severity, n in counts})
+            for alert in recent:
+                extra = json.loads(alert.extra_data) if alert.extra_data else {}
+                record = AlertRecord(alert.alert_type, alert.message, alert.severity,
+                                     alert.prediction_id, alert.match_id, extra, alert.created_at)
+                record.occurrences = extra.pop('occurrences', 1)
+                last_seen = extra.pop('last_seen', None)
+                record.last_seen = datetime.fromisoformat(last_seen) if last_seen else alert.created_at
+                record.alert_id = alert.id
+                self._recent[(alert.alert_type, alert.match_id)] = record
+
+    # ----- Alertes -----
+
+    def raise_alert(self, alert_type, message, severity='warning', prediction_id=None, match_id=None, extra_data=None):
+        """
+        Enregistre une alerte, ou la regroupe avec une alerte identique récente
+
+        Les alertes sans match ne sont pas regroupées (impossible de savoir si elles concernent le même objet).
+
+        Returns:
+            (AlertRecord, True si nouvelle alerte / False si regroupée)
+        """
+        now = datetime.utcnow()
+        key = (alert_type, match_id)
+        with self._lock:
+            record = self._recent.get(key) if match_id is not None else None
+            if record is not None and now - record.first_seen < self.window:
+                record.occurrences += 1
+                record.last_seen = now
+                record.message = message
+                record.extra_data = extra_data or record.extra_data
+                self._dirty.add(record)
+                self.coalesced_count += 1
+                return record, False
+
+            record = AlertRecord(alert_type, message, severity, prediction_id, match_id, extra_data, now)
+            if match_id is not None:
+                self._recent[key] = record
+            self._new.append(record)
+            self._open_counts[(alert_type, severity)] += 1
+
+        if self.app is None:
+            # Scripts autonomes : écriture immédiate
+            self.flush()
+        return record, True
+
+    def acknowledged(self, alert):
+        """À appeler après l'acquittement d'une alerte en base (met à jour l'index)"""
+        with self._lock:
+            key = (alert.alert_type, alert.severity)
+            if self._open_counts[key] > 0:
+                self._open_counts[key] -= 1
+            record = self._recent.get((alert.alert_type, alert.match_id))
+            if record is not None and record.alert_id == alert.id:
+                # Une nouvelle occurrence créera une nouvelle alerte
+                del self._recent[(alert.alert_type, alert.match_id)]
+
+    def get_open_counts(self):
+        """Compteurs des alertes ouvertes (sans requête SQL)"""
+        with self._lock:
+            items = [(key, n) for key, n in self._open_counts.items() if n > 0]
+        by_type = Counter()
+        by_severity = Counter()
+        for (alert_type, severity), n in items:
+            by_type[alert_type] += n
+            by_severity[severity] += n
+        return {
+            'total': sum(by_type.values()),
+            'by_type': dict(by_type),
+            'by_severity': dict(by_severity),
+            'coalesced': self.coalesced_count
+        }
+
+    # ----- Écriture par lots -----
+
+    def pending_count(self):
+        with self._lock:
+            return len(self._new) + len(self._dirty)
+
+    def flush(self):
+        """Écrit les nouvelles alertes et les compteurs modifiés en une transaction ; retourne le nombre de lignes"""
+        with self._flush_lock:
+            with self._lock:
+                new = [(record, record.to_row()) for record in self._new]
+                self._new = []
+                updates = []
+                updated_records = []
+                for record in list(self._dirty):
+                    if record.alert_id is not None:
+                        updates.append({'alert_id': record.alert_id, 'extra': record.serialize_extra(),
+                                        'message': record.message})
+                        updated_records.append(record)
+                        self._dirty.discard(record)
+                    elif any(record is r for r, _ in new):
+                        self._dirty.discard(record)  # Compteur déjà inclus dans l'insertion
+                self._prune()
+            if not new and not updates:
+                return 0
+
+            try:
+                engine = self._get_engine()
+                table = Alert.__table__
+                with engine.begin() as connection:
+                    for record, row in new:
+                        result = connection.execute(insert(table).values(**row))
+                        record.alert_id = result.inserted_primary_key[0]
+                    if updates:
+                        connection.execute(
+                            update(table).where(table.c.id == bindparam('alert_id')).values(
+                                extra_data=bindparam('extra'), message=bindparam('message')),
+                            updates
+                        )
+            except Exception as e:
+                with self._lock:
+                    for record, _ in new:
+                        record.alert_id = None
+                    self._new[:0] = [record for record, _ in new]
+                    self._dirty.update(updated_records)
+                print(f"⚠️ Erreur lors de l'écriture des alertes: {e}")
+                return 0
+
+            for record, _ in new:
+                self._log_created(record)
+            return len(new) + len(updates)
+
+    def _prune(self):
+        """Oublie les alertes sorties de la fenêtre de regroupement (appelé sous verrou)"""
+        limit = datetime.utcnow() - self.window
+        for key in [k for k, r in self._recent.items() if r.first_seen < limit and r not in self._dirty]:
+            del self._recent[key]
+
+    def _log_created(self, record):
+        from prediction_manager import log_action
+        log_action('alert_created',
+                   f"Alerte créée: {record.alert_type} - {record.message}",
+                   severity=record.severity,
+                   extra_data={'alert_id': record.alert_id, 'alert_type': record.alert_type})
+
+    def _get_engine(self):
+        if self.app is not None:
+            with self.app.app_context():
+                return db.engine
+        return db.engine
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="alert-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+
+alert_engine = AlertEngine()
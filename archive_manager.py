@@ -7,6 +7,7 @@ Système de mémoire fiable pour apprentissage supervisé.
 
 from models import db, MatchArchive, PredictionArchive, ModelPerformance, AnomalyLog, Prediction
 from prediction_manager import log_action, create_alert
+from performance_accumulator import BucketDeltas, add_to_bucket, refresh_model_performance
 from datetime import datetime
 import json
 
@@ -35,6 +36,14 @@ def archive_match_before(match_id, jeu, ligue, equipe_1, equipe_2, date_heure_ma
     # Vérifier si le match existe déjà
     existing = MatchArchive.query.filter_by(match_id=match_id).first()
     
+    if existing and existing.is_locked:
+        # Match réglé : résultat et données d'entraînement figés
+        log_action('archive_update_blocked',
+                  f"Tentative de réarchivage d'un match verrouillé {match_id}",
+                  admin_id=admin_id,
+                  severity='warning')
+        return existing
+    
     if existing:
         # Mise à jour si match existe déjà
         existing.jeu = jeu
@@ -113,6 +122,13 @@ def archive_prediction_before(match_id, prediction_id, consensus_type, choix, pr
     # Vérifier si prédiction existe déjà
     existing = PredictionArchive.query.filter_by(match_id=match_id, consensus_type=consensus_type).first()
     
+    if existing and existing.finalized_at is not None:
+        # Prédiction réglée : la modifier fausserait son évaluation et les données exportées
+        log_action('archive_update_blocked',
+                  f"Tentative de modification d'une prédiction réglée (match {match_id}, {consensus_type})",
+                  severity='warning')
+        return existing
+    
     if existing:
         # Mise à jour
         existing.prediction_id = prediction_id
@@ -240,6 +256,50 @@ def update_match_after(match_id, score_final_equipe_1, score_final_equipe_2,
         raise
 
 
+def evaluate_prediction(pred, resultat_reel):
+    """
+    Détermine si une prédiction archivée est correcte (sans rien écrire)
+    
+    Returns:
+        (prediction_correcte, ecart_probabilite) - (None, None) si non évaluable
+    """
+    # Déterminer si la prédiction est correcte
+    prediction_correcte = None
+    ecart_probabilite = None
+    
+    if pred.consensus_type == '1X2':
+        # Pour 1X2, comparer le choix avec le résultat réel
+        choix_normalise = str(pred.choix).upper()
+        resultat_normalise = str(resultat_reel).upper()
+        
+        # Extraire le résultat prédit (1, X, 2)
+        if 'VICTOIRE' in choix_normalise or pred.choix.startswith('1'):
+            choix_extrait = '1'
+        elif 'NUL' in choix_normalise or 'X' in choix_normalise or pred.choix.startswith('X'):
+            choix_extrait = 'X'
+        elif pred.choix.startswith('2'):
+            choix_extrait = '2'
+        else:
+            choix_extrait = None
+        
+        if choix_extrait:
+            prediction_correcte = (choix_extrait == resultat_normalise)
+            
+            # Calculer l'écart de probabilité
+            if resultat_normalise == '1':
+                prob_reel = 100.0
+            elif resultat_normalise == 'X':
+                prob_reel = 100.0
+            elif resultat_normalise == '2':
+                prob_reel = 100.0
+            else:
+                prob_reel = 33.33  # Par défaut
+            
+            ecart_probabilite = abs(pred.probabilite - prob_reel)
+    
+    return prediction_correcte, ecart_probabilite
+
+
 def update_predictions_after_match(match_id, resultat_reel):
     """
     Met à jour toutes les prédictions archivées APRÈS le match (calcule si correct)
@@ -251,39 +311,10 @@ def update_predictions_after_match(match_id, resultat_reel):
     predictions = PredictionArchive.query.filter_by(match_id=match_id).all()
     
     for pred in predictions:
-        # Déterminer si la prédiction est correcte
-        prediction_correcte = None
-        ecart_probabilite = None
+        # Prédiction déjà réglée : la retirer de son compartiment avant de la régler à nouveau
+        add_to_bucket(pred, -1)
         
-        if pred.consensus_type == '1X2':
-            # Pour 1X2, comparer le choix avec le résultat réel
-            choix_normalise = str(pred.choix).upper()
-            resultat_normalise = str(resultat_reel).upper()
-            
-            # Extraire le résultat prédit (1, X, 2)
-            if 'VICTOIRE' in choix_normalise or pred.choix.startswith('1'):
-                choix_extrait = '1'
-            elif 'NUL' in choix_normalise or 'X' in choix_normalise or pred.choix.startswith('X'):
-                choix_extrait = 'X'
-            elif pred.choix.startswith('2'):
-                choix_extrait = '2'
-            else:
-                choix_extrait = None
-            
-            if choix_extrait:
-                prediction_correcte = (choix_extrait == resultat_normalise)
-                
-                # Calculer l'écart de probabilité
-                if resultat_normalise == '1':
-                    prob_reel = 100.0
-                elif resultat_normalise == 'X':
-                    prob_reel = 100.0
-                elif resultat_normalise == '2':
-                    prob_reel = 100.0
-                else:
-                    prob_reel = 33.33  # Par défaut
-                
-                ecart_probabilite = abs(pred.probabilite - prob_reel)
+        prediction_correcte, ecart_probabilite = evaluate_prediction(pred, resultat_reel)
         
         # Mettre à jour la prédiction
         pred.resultat_reel = resultat_reel
@@ -291,6 +322,7 @@ def update_predictions_after_match(match_id, resultat_reel):
         pred.ecart_probabilite = ecart_probabilite
         pred.finalized_at = datetime.utcnow()
         pred.updated_at = datetime.utcnow()
+        add_to_bucket(pred)  # Compteurs de performance en O(1), validés avec le règlement
         
         # Vérifier les anomalies
         if pred.consensus and not prediction_correcte:
@@ -315,35 +347,149 @@ def update_predictions_after_match(match_id, resultat_reel):
                   severity='info',
                   extra_data={'match_id': match_id, 'resultat': resultat_reel})
         
-        # Recalculer les performances
-        calculate_model_performance()
+        # Performance de la fenêtre glissante par somme des compartiments (sans relire l'archive)
+        refresh_model_performance()
         
     except Exception as e:
         db.session.rollback()
         log_action('predictions_update_error', f"Erreur lors de la mise à jour des prédictions: {str(e)}", severity='error')
 
 
-# ========== CALCUL DE PERFORMANCE ==========
+# ========== RÈGLEMENT EN LOT ==========
 
-def calculate_model_performance(date_debut=None, date_fin=None):
+SETTLEMENT_CHUNK_SIZE = 500  # Identifiants par requête IN
+
+
+def resultat_from_score(score_final_equipe_1, score_final_equipe_2):
+    """Résultat 1X2 d'un score final"""
+    if score_final_equipe_1 > score_final_equipe_2:
+        return '1'
+    if score_final_equipe_1 < score_final_equipe_2:
+        return '2'
+    return 'X'
+
+
+def _chunks(ids):
+    ids = list(ids)
+    for start in range(0, len(ids), SETTLEMENT_CHUNK_SIZE):
+        yield ids[start:start + SETTLEMENT_CHUNK_SIZE]
+
+
+def settle_matches(results, statut_final='terminé', admin_id=None):
     """
-    Calcule les performances du modèle sur une période donnée
+    Règle plusieurs matchs terminés en une seule transaction
+    
+    Même calcul que update_match_after() + update_predictions_after_match(), mais :
+    une requête IN par table, anomalies et règlements validés en un seul commit,
+    un seul log récapitulatif et une seule mise à jour de la performance.
     
     Args:
-        date_debut: Date de début (par défaut: il y a 30 jours)
-        date_fin: Date de fin (par défaut: maintenant)
+        results: Liste de (match_id, score_final_equipe_1, score_final_equipe_2)
+        statut_final: Statut final des matchs
+        admin_id: ID de l'admin qui règle (optionnel)
     
     Returns:
-        ModelPerformance object
+        dict {'settled', 'locked', 'missing'} (listes d'ID de match), 'predictions', 'anomalies'
     """
-    from datetime import timedelta
+    scores = {match_id: (score_1, score_2) for match_id, score_1, score_2 in results}
+    summary = {'settled': [], 'locked': [], 'missing': [], 'predictions': 0, 'anomalies': 0}
+    if not scores:
+        return summary
+    
+    matches = {}
+    for chunk in _chunks(scores):
+        for match_archive in MatchArchive.query.filter(MatchArchive.match_id.in_(chunk)):
+            matches[match_archive.match_id] = match_archive
+    
+    now = datetime.utcnow()
+    resultats = {}
+    for match_id, (score_1, score_2) in scores.items():
+        match_archive = matches.get(match_id)
+        if match_archive is None:
+            summary['missing'].append(match_id)
+            continue
+        if match_archive.is_locked:
+            summary['locked'].append(match_id)
+            continue
+        resultat_reel = resultat_from_score(score_1, score_2)
+        match_archive.score_final_equipe_1 = score_1
+        match_archive.score_final_equipe_2 = score_2
+        match_archive.resultat_reel = resultat_reel
+        match_archive.statut_final = statut_final
+        match_archive.updated_at = now
+        match_archive.is_locked = True  # Verrouiller après mise à jour
+        resultats[match_id] = resultat_reel
+        summary['settled'].append(match_id)
+    
+    predictions = []
+    for chunk in _chunks(resultats):
+        predictions.extend(PredictionArchive.query.filter(PredictionArchive.match_id.in_(chunk)).all())
+    
+    anomalies = []
+    deltas = BucketDeltas()
+    for pred in predictions:
+        resultat_reel = resultats[pred.match_id]
+        deltas.add(pred, -1)
+        pred.prediction_correcte, pred.ecart_probabilite = evaluate_prediction(pred, resultat_reel)
+        pred.resultat_reel = resultat_reel
+        pred.finalized_at = now
+        pred.updated_at = now
+        deltas.add(pred)
+        
+        if pred.consensus and not pred.prediction_correcte:
+            # Consensus annoncé mais résultat incohérent
+            anomalies.append(AnomalyLog(
+                anomaly_type='consensus_incoherent',
+                description=f"Consensus annoncé mais prédiction incorrecte pour match {pred.match_id}",
+                match_id=pred.match_id,
+                prediction_archive_id=pred.id,
+                severity='error',
+                context_data=json.dumps({
+                    'choix': pred.choix,
+                    'resultat_reel': resultat_reel,
+                    'probabilite': pred.probabilite,
+                    'confiance': pred.confiance
+                })
+            ))
+    db.session.add_all(anomalies)
     
-    if not date_debut:
-        date_fin = datetime.utcnow()
-        date_debut = date_fin - timedelta(days=30)
-    elif not date_fin:
-        date_fin = datetime.utcnow()
+    try:
+        deltas.apply()  # Un compartiment par (jour, votes, type), pas par prédiction
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        log_action('archive_update_error', f"Erreur lors du règlement en lot de {len(resultats)} matchs: {str(e)}", severity='error')
+        raise
     
+    summary['predictions'] = len(predictions)
+    summary['anomalies'] = len(anomalies)
+    log_action('matches_settled',
+              f"{len(resultats)} matchs réglés en lot ({len(predictions)} prédictions, {len(anomalies)} anomalies)",
+              admin_id=admin_id,
+              severity='warning' if summary['locked'] or summary['missing'] else 'info',
+              extra_data=summary)
+    
+    # Alertes admin (écrites par lots par alert_engine)
+    for anomaly in anomalies:
+        create_alert(anomaly.anomaly_type, anomaly.description, severity=anomaly.severity, match_id=anomaly.match_id)
+    
+    if predictions:
+        refresh_model_performance()
+    return summary
+
+
+# ========== CALCUL DE PERFORMANCE ==========
+
+def compute_model_performance(date_debut, date_fin):
+    """
+    Recalcul complet des métriques sur une période (relit toutes les prédictions finalisées)
+    
+    Les règlements tiennent à jour les compteurs de performance_accumulator ; ce recalcul
+    sert de contrôle de cohérence hors ligne (voir performance_accumulator.check_consistency).
+    
+    Returns:
+        dict des colonnes de ModelPerformance, ou None si aucune prédiction
+    """
     # Récupérer toutes les prédictions finalisées dans la période
     predictions = PredictionArchive.query.filter(
         PredictionArchive.finalized_at >= date_debut,
@@ -383,51 +529,63 @@ def calculate_model_performance(date_debut=None, date_fin=None):
     taux_reussite_1x2 = (sum(1 for p in preds_1x2 if p.prediction_correcte) / len(preds_1x2) * 100) if preds_1x2 else None
     taux_reussite_alternatifs = (sum(1 for p in preds_alternatifs if p.prediction_correcte) / len(preds_alternatifs) * 100) if preds_alternatifs else None
     
+    return {
+        'total_predictions': total,
+        'predictions_correctes': correctes,
+        'taux_reussite': taux_reussite,
+        'taux_reussite_statistique': taux_reussite_statistique,
+        'taux_reussite_cotes': taux_reussite_cotes,
+        'taux_reussite_simulation': taux_reussite_simulation,
+        'taux_reussite_forme': taux_reussite_forme,
+        'taux_reussite_consensus': taux_reussite_consensus,
+        'moyenne_confiance': moyenne_confiance,
+        'moyenne_probabilite': moyenne_probabilite,
+        'ecart_moyen_probabilite': ecart_moyen_probabilite,
+        'taux_reussite_1x2': taux_reussite_1x2,
+        'taux_reussite_alternatifs': taux_reussite_alternatifs,
+    }
+
+
+def calculate_model_performance(date_debut=None, date_fin=None):
+    """
+    Calcule les performances du modèle sur une période donnée
+    
+    Args:
+        date_debut: Date de début (par défaut: il y a 30 jours)
+        date_fin: Date de fin (par défaut: maintenant)
+    
+    Returns:
+        ModelPerformance object
+    """
+    from datetime import timedelta
+    
+    if not date_debut:
+        date_fin = datetime.utcnow()
+        date_debut = date_fin - timedelta(days=30)
+    elif not date_fin:
+        date_fin = datetime.utcnow()
+    
+    metrics = compute_model_performance(date_debut, date_fin)
+    if metrics is None:
+        return None
+    
     # Créer ou mettre à jour la performance
     performance = ModelPerformance.query.filter_by(date_debut=date_debut, date_fin=date_fin).first()
     
     if not performance:
-        performance = ModelPerformance(
-            date_debut=date_debut,
-            date_fin=date_fin,
-            total_predictions=total,
-            predictions_correctes=correctes,
-            taux_reussite=taux_reussite,
-            taux_reussite_statistique=taux_reussite_statistique,
-            taux_reussite_cotes=taux_reussite_cotes,
-            taux_reussite_simulation=taux_reussite_simulation,
-            taux_reussite_forme=taux_reussite_forme,
-            taux_reussite_consensus=taux_reussite_consensus,
-            moyenne_confiance=moyenne_confiance,
-            moyenne_probabilite=moyenne_probabilite,
-            ecart_moyen_probabilite=ecart_moyen_probabilite,
-            taux_reussite_1x2=taux_reussite_1x2,
-            taux_reussite_alternatifs=taux_reussite_alternatifs
-        )
+        performance = ModelPerformance(date_debut=date_debut, date_fin=date_fin)
         db.session.add(performance)
-    else:
-        performance.total_predictions = total
-        performance.predictions_correctes = correctes
-        performance.taux_reussite = taux_reussite
-        performance.taux_reussite_statistique = taux_reussite_statistique
-        performance.taux_reussite_cotes = taux_reussite_cotes
-        performance.taux_reussite_simulation = taux_reussite_simulation
-        performance.taux_reussite_forme = taux_reussite_forme
-        performance.taux_reussite_consensus = taux_reussite_consensus
-        performance.moyenne_confiance = moyenne_confiance
-        performance.moyenne_probabilite = moyenne_probabilite
-        performance.ecart_moyen_probabilite = ecart_moyen_probabilite
-        performance.taux_reussite_1x2 = taux_reussite_1x2
-        performance.taux_reussite_alternatifs = taux_reussite_alternatifs
-        performance.updated_at = datetime.utcnow()
+    for name, value in metrics.items():
+        setattr(performance, name, value)
+    performance.updated_at = datetime.utcnow()
     
     try:
         db.session.commit()
         
         log_action('performance_calculated',
-                  f"Performance calculée: {taux_reussite:.2f}% ({correctes}/{total})",
+                  f"Performance calculée: {metrics['taux_reussite']:.2f}% ({metrics['predictions_correctes']}/{metrics['total_predictions']})",
                   severity='info',
-                  extra_data={'date_debut': date_debut.isoformat(), 'date_fin': date_fin.isoformat(), 'taux_reussite': taux_reussite})
+                  extra_data={'date_debut': date_debut.isoformat(), 'date_fin': date_fin.isoformat(), 'taux_reussite': metrics['taux_reussite']})
         
         return performance
     except Exception as e:
@@ -0,0 +1,170 @@
+"""
+📝 JOURNAL D'AUDIT ASYNCHRONE - ORACXPRED
+=========================================
+File bornée d'entrées SystemLog / AccessLog écrites par un thread dédié,
+par INSERT groupés, sur sa propre connexion : un échec de journalisation
+ne peut plus annuler le travail de la requête appelante.
+Si la file est pleine, l'appelant attend brièvement puis l'entrée est
+abandonnée (et comptée).
+"""
+
+import atexit
+import queue
+import threading
+import time
+
+from flask import has_app_context
+from sqlalchemy import insert
+
+from models import db, SystemLog, AccessLog
+
+
+AUDIT_QUEUE_SIZE = 10000
+AUDIT_BATCH_SIZE = 500
+AUDIT_FLUSH_SECONDS = 1  # Délai max avant écriture d'une entrée
+AUDIT_PUT_TIMEOUT = 0.05  # Attente max de l'appelant quand la file est pleine
+
+
+class AuditWriter:
+    """Écrivain par lots des journaux d'audit"""
+
+    def __init__(self, queue_size=AUDIT_QUEUE_SIZE, batch_size=AUDIT_BATCH_SIZE,
+                 flush_interval=AUDIT_FLUSH_SECONDS, put_timeout=AUDIT_PUT_TIMEOUT):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.app = None
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._write_lock = threading.Lock()
+        self._thread = None
+        self.written = {SystemLog.__tablename__: 0, AccessLog.__tablename__: 0}
+        self.dropped = {SystemLog.__tablename__: 0, AccessLog.__tablename__: 0}
+        self.failed_batches = 0
+
+    def init_app(self, app, start_thread=True):
+        """Associe l'application et démarre le thread d'écriture (sans thread : flush() manuel)"""
+        self.app = app
+        atexit.register(self.flush)
+        if start_thread:
+            self.start()
+
+    # ----- Entrées -----
+
+    def submit(self, model, row):
+        """
+        Ajoute une entrée à écrire
+
+        Sans init_app() (scripts autonomes), l'entrée est écrite immédiatement
+        sur une connexion séparée de l'application courante ; hors de tout
+        contexte d'application, elle ne peut pas être écrite et est abandonnée.
+
+        Returns:
+            True si l'entrée est acceptée, False si elle est abandonnée
+        """
+        if self.app is None:
+            if not has_app_context():
+                self.dropped[model.__tablename__] += 1
+                print(f"⚠️ Journal {model.__tablename__} abandonné: aucune application Flask (init_app ou contexte)")
+                return False
+            return self._write([(model, row)]) == 1
+        try:
+            self._queue.put((model, row), timeout=self.put_timeout)
+            return True
+        except queue.Full:
+            self.dropped[model.__tablename__] += 1
+            return False
+
+    # ----- Écriture -----
+
+    def _drain(self, first=None):
+        batch = [first] if first is not None else []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        """Écrit un lot en une transaction (un INSERT groupé par table)"""
+        by_model = {}
+        for model, row in batch:
+            by_model.setdefault(model, []).append(row)
+        with self._write_lock:
+            try:
+                engine = self._get_engine()
+                with engine.begin() as connection:
+                    for model, rows in by_model.items():
+                        connection.execute(insert(model.__table__), rows)
+            except Exception as e:
+                self.failed_batches += 1
+                print(f"❌ Erreur lors de l'écriture du journal d'audit: {e}")
+                # Lot refusé : réessayer ligne par ligne pour isoler les entrées invalides
+                return self._write_one_by_one(by_model)
+        for model, rows in by_model.items():
+            self.written[model.__tablename__] += len(rows)
+        return len(batch)
+
+    def _write_one_by_one(self, by_model):
+        written = 0
+        try:
+            engine = self._get_engine()
+        except Exception:
+            for model, rows in by_model.items():
+                self.dropped[model.__tablename__] += len(rows)
+            return 0
+        for model, rows in by_model.items():
+            for row in rows:
+                try:
+                    with engine.begin() as connection:
+                        connection.execute(insert(model.__table__), [row])
+                    self.written[model.__tablename__] += 1
+                    written += 1
+                except Exception:
+                    self.dropped[model.__tablename__] += 1
+        return written
+
+    def _get_engine(self):
+        if self.app is not None:
+            with self.app.app_context():
+                return db.engine
+        return db.engine
+
+    def flush(self):
+        """Écrit immédiatement toutes les entrées en attente (synchrone) ; retourne le nombre écrit"""
+        if self.app is None:
+            return 0  # Rien n'est mis en file sans application associée
+        total = 0
+        while True:
+            batch = self._drain()
+            if not batch:
+                return total
+            total += self._write(batch)
+
+    def start(self):
+        with self._write_lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            # Laisser les entrées s'accumuler un court instant pour former un lot
+            time.sleep(min(self.flush_interval, 0.1))
+            self._write(self._drain(first))
+
+    def get_stats(self):
+        return {
+            'pending': self._queue.qsize(),
+            'written': dict(self.written),
+            'dropped': dict(self.dropped),
+            'failed_batches': self.failed_batches
+        }
+
+
+audit_writer = AuditWriter()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+⏱️ BENCHMARK DU CYCLE DE COLLECTE - ORACXPRED
+=============================================
+Compare l'ancien traitement match par match (une requête et un commit par
+match) et l'écriture groupée de MatchCollector._upsert_matches (une requête
+IN, un commit par cycle), de 10 à 5000 matchs par cycle : premier cycle
+(créations) puis second cycle (changements de statut et de score).
+
+Usage : python benchmark_collector.py [--sizes 10 100 1000 5000]
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from flask import Flask
+
+
+def make_app(db_path):
+    from models import db
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{db_path}"
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def make_matches(count, live=False):
+    """Matchs au format de MatchDataSource (à venir, ou en cours avec un score)"""
+    base = datetime(2025, 1, 1)
+    return [{
+        "unique_match_id": f"bench_{i}",
+        "jeu": ['FIFA', 'eFootball', 'FC'][i % 3],
+        "equipe_domicile": f"Equipe {i % 50}",
+        "equipe_exterieur": f"Equipe {(i + 7) % 50}",
+        "heure_debut": base + timedelta(minutes=i),
+        "heure_fin": None,
+        "score_domicile": i % 4 if live else None,
+        "score_exterieur": (i + 1) % 3 if live else None,
+        "statut": "en_cours" if live else "en_attente",
+        "source_donnees": "simulated",
+    } for i in range(count)]
+
+
+def legacy_cycle(matches):
+    """Ancien cycle : filter_by().first() puis commit pour chaque match"""
+    from models import db, CollectedMatch
+
+    for match_data in matches:
+        match = CollectedMatch.query.filter_by(unique_match_id=match_data["unique_match_id"]).first()
+        if match is None:
+            match = CollectedMatch(
+                unique_match_id=match_data["unique_match_id"],
+                jeu=match_data["jeu"],
+                equipe_domicile=match_data["equipe_domicile"],
+                equipe_exterieur=match_data["equipe_exterieur"],
+                heure_debut=match_data["heure_debut"],
+                statut=match_data["statut"],
+                source_donnees=match_data["source_donnees"],
+                collecte_par="systeme_auto"
+            )
+            db.session.add(match)
+        else:
+            match.statut = match_data["statut"]
+            match.score_domicile = match_data["score_domicile"]
+            match.score_exterieur = match_data["score_exterieur"]
+            match.updated_at = datetime.utcnow()
+        db.session.commit()
+
+
+def measure(db_path, mode, count):
+    """Durées (création, mise à jour) d'un cycle pour une base vide"""
+    from match_collector import MatchCollector
+
+    app = make_app(db_path)
+    timings = []
+    with app.app_context():
+        collector = MatchCollector(source_type="simulated")
+        for live in (False, True):
+            matches = make_matches(count, live)
+            start = time.perf_counter()
+            if mode == 'legacy':
+                legacy_cycle(matches)
+            else:
+                collector._upsert_matches(matches)
+            timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du cycle de collecte des matchs")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000, 5000])
+    args = parser.parse_args()
+    logging.getLogger('match_collector').setLevel(logging.WARNING)
+
+    print("⏱️ BENCHMARK CYCLE DE COLLECTE")
+    print("=" * 50)
+    print(f"  {'matchs':>6}  {'mode':<8} {'créations':>12} {'mises à jour':>14}")
+    tmp = tempfile.mkdtemp()
+    try:
+        for count in args.sizes:
+            for mode in ('legacy', 'groupé'):
+                db_path = os.path.join(tmp, f"{mode}_{count}.db")
+                created, updated = measure(db_path, mode, count)
+                print(f"  {count:>6}  {mode:<8} {created * 1000:9.1f} ms {updated * 1000:11.1f} ms")
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == "__main__":
+    main()
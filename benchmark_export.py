@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+⏱️ BENCHMARK DE L'EXPORT DES MATCHS COLLECTÉS - ORACXPRED
+=========================================================
+Compare l'ancien export (.all() + StringIO) et l'export en flux
+(match_export.py) : délai du premier octet, durée totale, pic mémoire (RSS).
+Chaque mesure tourne dans son propre processus.
+
+Usage : python benchmark_export.py [--rows 1000000] [--skip-legacy]
+"""
+
+import argparse
+import csv
+import multiprocessing
+import os
+import resource
+import shutil
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+from io import StringIO
+
+from flask import Flask
+
+
+def fill_database(db_path, rows):
+    """Insère les matchs directement en sqlite3 (plus rapide que l'ORM)"""
+    conn = sqlite3.connect(db_path)
+    base = datetime(2025, 1, 1)
+    batch = []
+    for i in range(rows):
+        created = (base + timedelta(seconds=i * 30)).isoformat(' ')
+        batch.append((f"m{i}", ['FIFA', 'eFootball', 'FC'][i % 3], f"Equipe {i % 50}", f"Equipe {(i + 7) % 50}",
+                      created, created, i % 5, (i + 2) % 4, "Match nul", ['termine', 'en_cours'][i % 2],
+                      'api', 'systeme_auto', created, created, created))
+        if len(batch) == 50000:
+            _insert(conn, batch)
+            batch = []
+    if batch:
+        _insert(conn, batch)
+    conn.commit()
+    conn.close()
+
+
+def _insert(conn, batch):
+    conn.executemany(
+        "INSERT INTO collected_matches (unique_match_id, jeu, equipe_domicile, equipe_exterieur, heure_debut, "
+        "heure_fin, score_domicile, score_exterieur, equipe_gagnante, statut, source_donnees, collecte_par, "
+        "timestamp_enregistrement, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        batch
+    )
+
+
+def legacy_export():
+    """Ancien export : toutes les lignes en objets ORM puis un seul tampon"""
+    from models import CollectedMatch
+
+    matches = CollectedMatch.query.order_by(CollectedMatch.created_at.desc()).all()
+    output = StringIO()
+    writer = csv.writer(output)
+    for match in matches:
+        writer.writerow([match.unique_match_id, match.jeu, match.equipe_domicile, match.equipe_exterieur,
+                         match.score_domicile, match.score_exterieur, match.equipe_gagnante, match.statut,
+                         match.heure_debut.isoformat(), match.heure_fin.isoformat() if match.heure_fin else '',
+                         match.source_donnees, match.created_at.isoformat()])
+    yield output.getvalue().encode('utf-8')
+
+
+def make_app(db_path):
+    from models import db
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{db_path}"
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    return app
+
+
+def make_stream(mode):
+    from match_export import export_matches
+
+    if mode == 'legacy':
+        return legacy_export()
+    if mode == 'gzip':
+        return export_matches('csv', compress=True)[0]
+    return export_matches(mode)[0]
+
+
+def _measure_main(db_path, mode, queue):
+    app = make_app(db_path)
+    with app.app_context():
+        start = time.perf_counter()
+        first_byte = None
+        total = 0
+        for chunk in make_stream(mode):
+            if first_byte is None:
+                first_byte = time.perf_counter() - start
+            total += len(chunk)
+        elapsed = time.perf_counter() - start
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024  # Kio sous Linux
+    queue.put((first_byte, elapsed, total, peak_rss))
+
+
+def measure(label, db_path, mode):
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_measure_main, args=(db_path, mode, queue))
+    process.start()
+    first_byte, elapsed, total, peak_rss = queue.get()
+    process.join()
+    print(f"  {label:<14} premier octet: {first_byte * 1000:8.1f} ms   total: {elapsed:6.1f} s   "
+          f"taille: {total / 1e6:7.1f} Mo   pic RSS: {peak_rss / 1e6:7.1f} Mo")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de l'export des matchs collectés")
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--skip-legacy', action='store_true', help="Ne pas mesurer l'ancien export (mémoire)")
+    args = parser.parse_args()
+
+    from models import db
+
+    print("⏱️ BENCHMARK EXPORT DES MATCHS COLLECTÉS")
+    print("=" * 50)
+    tmp = tempfile.mkdtemp()
+    try:
+        db_path = os.path.join(tmp, "export.db")
+        app = make_app(db_path)
+        with app.app_context():
+            db.create_all()
+            db.engine.dispose()
+
+        start = time.perf_counter()
+        fill_database(db_path, args.rows)
+        print(f"📦 {args.rows} matchs insérés en {time.perf_counter() - start:.1f} s\n")
+
+        measure("flux CSV", db_path, 'csv')
+        measure("flux NDJSON", db_path, 'ndjson')
+        measure("flux CSV gzip", db_path, 'gzip')
+        if not args.skip_legacy:
+            measure("ancien export", db_path, 'legacy')
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+⏱️ BENCHMARK DE CONCURRENCE SQLITE - ORACXPRED
+==============================================
+Compare les réglages par défaut et le profil de production (db_profile.py)
+avec plusieurs threads puis plusieurs processus qui lisent et écrivent
+en même temps (comme le web, le collecteur et les tâches planifiées).
+
+Usage : python benchmark_sqlite.py [--seconds 5] [--writers 4] [--readers 8] [--processes 4]
+"""
+
+import argparse
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from db_profile import SQLITE_POOL_OPTIONS, install_sqlite_profile
+
+
+def make_engine(db_path, profile):
+    if profile:
+        options = dict(SQLITE_POOL_OPTIONS)
+        engine = create_engine(f"sqlite:///{db_path}", **options)
+        install_sqlite_profile(engine)
+    else:
+        engine = create_engine(f"sqlite:///{db_path}", connect_args={'check_same_thread': False})
+    return engine
+
+
+def prepare_database(db_path, profile):
+    engine = make_engine(db_path, profile)
+    with engine.begin() as connection:
+        connection.exec_driver_sql(
+            "CREATE TABLE IF NOT EXISTS bench (id INTEGER PRIMARY KEY, worker TEXT, payload TEXT, created_at REAL)"
+        )
+        connection.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_bench_worker ON bench (worker)")
+    engine.dispose()
+
+
+def run_worker(engine, role, name, deadline, stats, lock):
+    """Boucle de lecture ou d'écriture jusqu'à l'échéance"""
+    done = 0
+    locked = 0
+    latencies = []
+    while time.time() < deadline:
+        start = time.perf_counter()
+        try:
+            with engine.begin() as connection:
+                if role == 'write':
+                    connection.execute(
+                        text("INSERT INTO bench (worker, payload, created_at) VALUES (:w, :p, :t)"),
+                        {'w': name, 'p': 'x' * 200, 't': time.time()}
+                    )
+                else:
+                    connection.execute(text("SELECT COUNT(*) FROM bench WHERE worker = :w"), {'w': name}).scalar()
+            done += 1
+            latencies.append(time.perf_counter() - start)
+        except OperationalError as e:
+            if 'locked' in str(e):
+                locked += 1
+            else:
+                raise
+    with lock:
+        stats[role] += done
+        stats['locked'] += locked
+        stats['max_latency_ms'] = max(stats['max_latency_ms'], max(latencies, default=0) * 1000)
+
+
+def bench_threads(db_path, profile, seconds, writers, readers):
+    engine = make_engine(db_path, profile)
+    stats = {'write': 0, 'read': 0, 'locked': 0, 'max_latency_ms': 0}
+    lock = threading.Lock()
+    deadline = time.time() + seconds
+    threads = [threading.Thread(target=run_worker, args=(engine, 'write', f"w{i}", deadline, stats, lock))
+               for i in range(writers)]
+    threads += [threading.Thread(target=run_worker, args=(engine, 'read', f"w{i % max(writers, 1)}", deadline, stats, lock))
+                for i in range(readers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    engine.dispose()
+    return stats
+
+
+def _process_main(args):
+    db_path, profile, role, name, seconds = args
+    engine = make_engine(db_path, profile)
+    stats = {'write': 0, 'read': 0, 'locked': 0, 'max_latency_ms': 0}
+    run_worker(engine, role, name, time.time() + seconds, stats, threading.Lock())
+    engine.dispose()
+    return stats
+
+
+def bench_processes(db_path, profile, seconds, processes):
+    jobs = [(db_path, profile, 'write' if i % 2 == 0 else 'read', f"p{i // 2}", seconds) for i in range(processes)]
+    with multiprocessing.Pool(processes) as pool:
+        results = pool.map(_process_main, jobs)
+    total = {'write': 0, 'read': 0, 'locked': 0, 'max_latency_ms': 0}
+    for stats in results:
+        total['write'] += stats['write']
+        total['read'] += stats['read']
+        total['locked'] += stats['locked']
+        total['max_latency_ms'] = max(total['max_latency_ms'], stats['max_latency_ms'])
+    return total
+
+
+def print_line(label, stats, seconds):
+    print(f"  {label:<10} écritures/s: {stats['write'] / seconds:8.0f}   lectures/s: {stats['read'] / seconds:8.0f}   "
+          f"'locked': {stats['locked']:5d}   latence max: {stats['max_latency_ms']:7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de concurrence SQLite")
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--processes', type=int, default=4)
+    args = parser.parse_args()
+
+    print("⏱️ BENCHMARK DE CONCURRENCE SQLITE")
+    print("=" * 50)
+    tmp = tempfile.mkdtemp()
+    try:
+        for label, profile in (("défaut", False), ("profil", True)):
+            db_path = os.path.join(tmp, f"bench_{label}.db")
+            prepare_database(db_path, profile)
+            print(f"\n🧵 Threads ({args.writers} écrivains, {args.readers} lecteurs) - {label}")
+            print_line(label, bench_threads(db_path, profile, args.seconds, args.writers, args.readers), args.seconds)
+            print(f"⚙️ Processus ({args.processes}, moitié écrivains) - {label}")
+            print_line(label, bench_processes(db_path, profile, args.seconds, args.processes), args.seconds)
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == "__main__":
+    main()
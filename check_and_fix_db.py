@@ -74,6 +74,13 @@ def check_and_fix_database(app):
                 conn.commit()
                 print(f"✅ Colonne 'unique_id' ajoutée ({len(users_without_id)} utilisateurs mis à jour)")
             
+            # Index composites des requêtes fréquentes
+            from migrate_indexes import create_composite_indexes
+            created = create_composite_indexes(cursor)
+            if created:
+                conn.commit()
+                print(f"✅ Index ajoutés: {', '.join(created)}")
+            
             conn.close()
             print("✅ Vérification de la base de données terminée")
             
@@ -0,0 +1,298 @@
+"""
+🛰️ COLLECTEUR MULTI-SOURCES ASYNCHRONE - ORACXPRED
+==================================================
+Interroge plusieurs sources de matchs en parallèle (flux 1xbet, API,
+cycles enregistrés) dans une boucle asyncio, chacune à son rythme et sous
+son propre délai maximal : une source lente ne retarde plus les autres.
+
+Les matchs reçus passent par une file bornée vidée par un seul écrivain,
+qui les écrit par lots (MatchCollector.process_matches : empreintes, une
+requête IN, un commit). File pleine : la mise à jour la plus ancienne est
+abandonnée (et comptée), la plus récente est gardée. Les éléments mal formés
+sont écartés à la réception (par source) ; un lot en échec est compté et
+l'écrivain continue.
+
+Les sources restent des fonctions bloquantes (requests) exécutées dans des
+threads via asyncio.to_thread ; une source dont l'appel précédent n'est pas
+terminé saute son tour au lieu d'empiler des threads.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from match_collector import MatchCollector, MatchDataSource
+
+
+logger = logging.getLogger(__name__)
+
+COLLECTOR_QUEUE_SIZE = 5000  # Mises à jour en attente d'écriture
+COLLECTOR_BATCH_SIZE = 500
+COLLECTOR_FLUSH_SECONDS = 0.5  # Attente max de l'écrivain avant de vérifier l'arrêt
+
+# Champs obligatoires d'un match (format de MatchDataSource) ; les autres sont facultatifs
+REQUIRED_MATCH_FIELDS = ('unique_match_id', 'jeu', 'equipe_domicile', 'equipe_exterieur', 'heure_debut', 'statut')
+
+
+class SourceSpec:
+    """Source interrogée périodiquement"""
+
+    def __init__(self, name: str, fetch: Callable[[], List[Dict]], interval: float, timeout: float):
+        """
+        Args:
+            name: Nom de la source (clé des métriques)
+            fetch: Fonction bloquante retournant des matchs au format du collecteur
+            interval: Secondes entre deux interrogations
+            timeout: Durée max d'une interrogation
+        """
+        self.name = name
+        self.fetch = fetch
+        self.interval = interval
+        self.timeout = timeout
+
+
+class SourceMetrics:
+    """Compteurs d'une source"""
+
+    def __init__(self):
+        self.polls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.skipped = 0  # Tours sautés, appel précédent encore en cours
+        self.matches = 0
+        self.invalid = 0  # Éléments mal formés ignorés
+        self.last_duration = None
+        self.last_success = None  # time.monotonic() de la dernière réponse
+
+    def to_dict(self):
+        return {
+            'polls': self.polls,
+            'errors': self.errors,
+            'timeouts': self.timeouts,
+            'skipped': self.skipped,
+            'matches': self.matches,
+            'invalid': self.invalid,
+            'last_duration': self.last_duration,
+            # Retard : âge des dernières données reçues de la source
+            'lag_seconds': None if self.last_success is None else time.monotonic() - self.last_success,
+        }
+
+
+def is_valid_match(match_data) -> bool:
+    """Élément utilisable par l'écrivain (les sources externes renvoient du JSON quelconque)"""
+    return (isinstance(match_data, dict)
+            and all(match_data.get(field) is not None for field in REQUIRED_MATCH_FIELDS)
+            and isinstance(match_data['heure_debut'], datetime))
+
+
+def default_sources(fixtures_path: Optional[str] = None) -> List[SourceSpec]:
+    """Flux 1xbet, API et, si un fichier est donné, cycles enregistrés"""
+    sources = [
+        SourceSpec("1xbet", MatchDataSource("1xbet").get_live_matches, interval=5, timeout=8),
+        SourceSpec("api", MatchDataSource("api").get_live_matches, interval=30, timeout=10),
+    ]
+    if fixtures_path:
+        sources.append(SourceSpec("fixtures", MatchDataSource("fixtures", fixtures_path).get_live_matches,
+                                  interval=5, timeout=5))
+    return sources
+
+
+class AsyncMatchCollector:
+    """Interrogation concurrente des sources, file bornée et écriture par lots"""
+
+    def __init__(self, app, sources: List[SourceSpec], queue_size: int = COLLECTOR_QUEUE_SIZE,
+                 batch_size: int = COLLECTOR_BATCH_SIZE, flush_interval: float = COLLECTOR_FLUSH_SECONDS):
+        self.app = app
+        self.sources = sources
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.writer = MatchCollector(source_type="multi_source")
+        self.metrics = {source.name: SourceMetrics() for source in sources}
+        self.dropped = 0
+        self.written_batches = 0
+        self.written_matches = 0
+        self.failed_batches = 0
+        self._queue = None
+        self._loop = None
+        self._stop = None
+        self._thread = None
+        self._pending = {}  # Nom de source -> appel en cours dans un thread
+
+    # ----- Sources -----
+
+    def _enqueue(self, match_data):
+        """Ajoute une mise à jour ; file pleine : la plus ancienne est abandonnée"""
+        try:
+            self._queue.put_nowait(match_data)
+        except asyncio.QueueFull:
+            self._queue.get_nowait()
+            self._queue.task_done()
+            self.dropped += 1
+            self._queue.put_nowait(match_data)
+
+    async def poll_once(self, source: SourceSpec):
+        """Une interrogation de la source, bornée par son délai maximal"""
+        metrics = self.metrics[source.name]
+        pending = self._pending.get(source.name)
+        if pending is not None and not pending.done():
+            metrics.skipped += 1
+            return
+        metrics.polls += 1
+        start = time.monotonic()
+        task = asyncio.ensure_future(asyncio.to_thread(source.fetch))
+        self._pending[source.name] = task
+        try:
+            # shield : au délai dépassé, le thread continue mais n'est plus attendu
+            matches = await asyncio.wait_for(asyncio.shield(task), source.timeout)
+        except asyncio.TimeoutError:
+            metrics.timeouts += 1
+            logger.warning(f"Source {source.name}: pas de réponse après {source.timeout} s")
+            return
+        except Exception as e:
+            metrics.errors += 1
+            logger.error(f"Source {source.name}: {e}")
+            return
+        if not isinstance(matches, list):
+            metrics.errors += 1
+            logger.error(f"Source {source.name}: réponse inattendue ({type(matches).__name__})")
+            return
+        metrics.last_duration = time.monotonic() - start
+        metrics.last_success = time.monotonic()
+        for match_data in matches:
+            # Un élément mal formé est ignoré ici : il ne doit pas faire échouer le lot entier
+            if not is_valid_match(match_data):
+                metrics.invalid += 1
+                continue
+            metrics.matches += 1
+            self._enqueue(match_data)
+
+    async def _poll_loop(self, source: SourceSpec):
+        while not self._stop.is_set():
+            await self.poll_once(source)
+            try:
+                await asyncio.wait_for(self._stop.wait(), source.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    # ----- Écriture -----
+
+    def _drain(self, first):
+        batch = [first]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        for _ in batch:
+            self._queue.task_done()
+        return batch
+
+    def _write_batch(self, batch):
+        """Écrit un lot (dans un thread, avec le contexte de l'application) ; une erreur est comptée, jamais propagée"""
+        try:
+            with self.app.app_context():
+                result = self.writer.process_matches(batch)
+        except Exception as e:
+            self.failed_batches += 1
+            logger.error(f"Échec d'écriture d'un lot de {len(batch)} matchs: {e}")
+            return None
+        if result['errors']:
+            self.failed_batches += 1
+        else:
+            self.written_batches += 1
+            self.written_matches += result['new'] + result['updated']
+        return result
+
+    async def _writer_loop(self):
+        while True:
+            try:
+                first = await asyncio.wait_for(self._queue.get(), self.flush_interval)
+            except asyncio.TimeoutError:
+                if self._stop.is_set():
+                    return
+                continue
+            await asyncio.to_thread(self._write_batch, self._drain(first))
+
+    async def flush(self):
+        """Écrit immédiatement toutes les mises à jour en attente"""
+        while not self._queue.empty():
+            await asyncio.to_thread(self._write_batch, self._drain(self._queue.get_nowait()))
+
+    # ----- Cycle de vie -----
+
+    async def run(self, duration: Optional[float] = None):
+        """Interroge les sources jusqu'à stop() (ou pendant duration secondes), puis vide la file"""
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._stop = asyncio.Event()
+        pollers = [asyncio.create_task(self._poll_loop(source)) for source in self.sources]
+        writer = asyncio.create_task(self._writer_loop())
+        logger.info(f"🛰️ Collecteur multi-sources démarré: {', '.join(s.name for s in self.sources)}")
+        try:
+            if duration is None:
+                await self._stop.wait()
+            else:
+                try:
+                    await asyncio.wait_for(self._stop.wait(), duration)
+                except asyncio.TimeoutError:
+                    self._stop.set()
+            await asyncio.gather(*pollers)
+            await writer
+            await self.flush()
+        finally:
+            for task in pollers + [writer]:
+                task.cancel()
+            logger.info("🛑 Collecteur multi-sources arrêté")
+
+    def stop(self):
+        """Demande l'arrêt (depuis n'importe quel thread)"""
+        if self._loop is not None and self._stop is not None:
+            self._loop.call_soon_threadsafe(self._stop.set)
+
+    def start(self):
+        """Démarre la boucle asyncio dans un thread dédié"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=asyncio.run, args=(self.run(),),
+                                        name="async-match-collector", daemon=True)
+        self._thread.start()
+
+    def get_metrics(self):
+        return {
+            'queue_depth': self._queue.qsize() if self._queue is not None else 0,
+            'queue_size': self.queue_size,
+            'dropped': self.dropped,
+            'written_batches': self.written_batches,
+            'written_matches': self.written_matches,
+            'failed_batches': self.failed_batches,
+            'fingerprints': len(self.writer.fingerprints),
+            'sources': {name: metrics.to_dict() for name, metrics in self.metrics.items()},
+        }
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    from flask import Flask
+    from models import db
+
+    parser = argparse.ArgumentParser(description="Collecteur multi-sources asynchrone")
+    parser.add_argument('--fixtures', help="Fichier JSON de cycles enregistrés à rejouer")
+    parser.add_argument('--duration', type=float, help="Durée en secondes (par défaut jusqu'à Ctrl+C)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///oracxpred.db')
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    collector = AsyncMatchCollector(app, default_sources(args.fixtures))
+    try:
+        asyncio.run(collector.run(args.duration))
+    except KeyboardInterrupt:
+        pass
+    print(f"📊 {collector.get_metrics()}")
@@ -0,0 +1,41 @@
+"""
+🧪 CONFIGURATION COMMUNE DES TESTS
+==================================
+Fabrique d'applications Flask de test (base SQLite en mémoire par défaut,
+tables créées), fournie aux fichiers test_*.py par la fixture make_app.
+Hors pytest (python test_xxx.py), les blocs __main__ passent create_test_app.
+"""
+
+import pytest
+from flask import Flask
+
+
+def create_test_app(uri='sqlite://', sqlite_profile=False, root_path=None):
+    """
+    Application de test avec ses tables
+
+    Args:
+        uri: Base de données (en mémoire par défaut ; sqlite:///chemin pour un fichier)
+        sqlite_profile: Appliquer le profil SQLite de production (db_profile)
+        root_path: Dossier de l'application (sauvegardes, archives)
+    """
+    from models import db
+    from db_profile import configure_database, install_sqlite_profile
+
+    app = Flask(__name__, root_path=root_path)
+    app.config['SQLALCHEMY_DATABASE_URI'] = uri
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    if sqlite_profile:
+        configure_database(app)
+    db.init_app(app)
+    with app.app_context():
+        if sqlite_profile:
+            install_sqlite_profile(db.engine)
+        db.create_all()
+    return app
+
+
+@pytest.fixture
+def make_app():
+    """Fabrique : make_app(uri='sqlite://', sqlite_profile=False, root_path=None)"""
+    return create_test_app
@@ -55,7 +55,7 @@ def create_default_admin():
             db.session.commit()
             
             # Logger la création
-            log_action("admin_creation", "Administrateur par défaut MKINGS créé", {
+            log_action("admin_creation", "Administrateur par défaut MKINGS créé", extra_data={
                 "username": "MKINGS",
                 "created_by": "system"
             })
@@ -0,0 +1,217 @@
+"""
+💾 SAUVEGARDES EN LIGNE DE LA BASE SQLITE - ORACXPRED
+=====================================================
+Copie par l'API de sauvegarde de SQLite (cohérente même en WAL et avec des
+écrivains concurrents) : N pages par étape, pause entre deux étapes pour ne
+jamais bloquer les écritures longtemps. La copie est vérifiée par
+PRAGMA integrity_check puis compressée en gzip par morceaux.
+
+Une écriture dans la base pendant la copie la fait repartir du début : après
+BACKUP_MAX_RESTARTS redémarrages (flux d'écritures continu), la copie est
+refaite en une seule étape, le verrou de lecture n'étant tenu que le temps
+de copier la base.
+
+Sauvegarde incrémentale optionnelle : seules les pages modifiées depuis la
+dernière sauvegarde complète sont écrites (fichier .delta.gz), restaurables
+par restore_backup().
+"""
+
+import gzip
+import json
+import os
+import shutil
+import sqlite3
+import struct
+import time
+from datetime import datetime
+
+BACKUP_PAGES_PER_STEP = 256
+BACKUP_PAUSE_SECONDS = 0.01
+BACKUP_MAX_RESTARTS = 3  # Redémarrages de la copie par étapes avant la copie en une étape
+BACKUP_CHUNK_BYTES = 1024 * 1024
+FULL_SUFFIX = '.db.gz'
+DELTA_SUFFIX = '.delta.gz'
+
+
+class BackupError(Exception):
+    """Sauvegarde impossible ou copie corrompue"""
+
+
+class _TooManyRestarts(Exception):
+    """Copie par étapes abandonnée : la base change plus vite qu'elle n'est copiée"""
+
+
+def online_copy(source_path, target_path, pages=BACKUP_PAGES_PER_STEP, pause=BACKUP_PAUSE_SECONDS,
+                max_restarts=BACKUP_MAX_RESTARTS):
+    """
+    Copie la base par l'API de sauvegarde, étape par étape
+
+    Au-delà de max_restarts redémarrages (base modifiée pendant la copie), la copie est
+    refaite en une seule étape (pages=-1).
+
+    Returns:
+        {'steps', 'restarts', 'single_step'} : étapes effectuées, redémarrages de la copie,
+        True si elle a été terminée en une seule étape
+    """
+    progress = {'steps': 0, 'restarts': 0, 'single_step': False}
+    remaining_before = []
+
+    def on_progress(status, remaining, total):
+        progress['steps'] += 1
+        # Le reste à copier ne diminue plus : SQLite a recommencé depuis la première page
+        if remaining_before and remaining >= remaining_before[0]:
+            progress['restarts'] += 1
+            if progress['restarts'] > max_restarts:
+                raise _TooManyRestarts()
+        remaining_before[:] = [remaining]
+        if remaining:
+            # sleep= de Connection.backup ne s'applique qu'aux étapes refusées (BUSY/LOCKED)
+            time.sleep(pause)
+
+    source = sqlite3.connect(f"file:{source_path}?mode=ro", uri=True, timeout=10)
+    target = sqlite3.connect(target_path)
+    try:
+        try:
+            source.backup(target, pages=pages, sleep=pause, progress=on_progress)
+        except _TooManyRestarts:
+            progress['single_step'] = True
+            source.backup(target, pages=-1)
+            progress['steps'] += 1
+    finally:
+        target.close()
+        source.close()
+    return progress
+
+
+def integrity_check(path):
+    """Retourne la liste des problèmes signalés par PRAGMA integrity_check (vide si la base est saine)"""
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        rows = [row[0] for row in conn.execute("PRAGMA integrity_check")]
+    finally:
+        conn.close()
+    return [] if rows == ['ok'] else rows
+
+
+def _page_size(path, opener=open):
+    """Taille de page lue dans l'en-tête SQLite (opener=gzip.open pour une sauvegarde compressée)"""
+    with opener(path, 'rb') as f:
+        header = f.read(100)
+    size = struct.unpack('>H', header[16:18])[0]
+    return 65536 if size == 1 else size  # 1 = 65536 octets dans l'en-tête SQLite
+
+
+def _compress(source_path, target_path):
+    """Compresse en gzip par morceaux, écrit dans un .tmp puis renomme (pas de fichier partiel)"""
+    tmp_path = target_path + '.tmp'
+    with open(source_path, 'rb') as src, gzip.open(tmp_path, 'wb', compresslevel=6) as dst:
+        shutil.copyfileobj(src, dst, BACKUP_CHUNK_BYTES)
+    os.replace(tmp_path, target_path)
+
+
+def _write_delta(snapshot_path, base_path, target_path):
+    """
+    Écrit les pages de snapshot_path qui diffèrent de la sauvegarde complète base_path
+
+    Format : une ligne JSON d'en-tête, puis (numéro de page sur 4 octets + page) par page modifiée.
+
+    Returns:
+        Nombre de pages écrites
+    """
+    page_size = _page_size(snapshot_path)
+    page_count = os.path.getsize(snapshot_path) // page_size
+    header = {'base': os.path.basename(base_path), 'page_size': page_size, 'page_count': page_count,
+              'created_at': datetime.utcnow().isoformat()}
+    changed = 0
+    tmp_path = target_path + '.tmp'
+    with open(snapshot_path, 'rb') as snapshot, gzip.open(base_path, 'rb') as base, \
+            gzip.open(tmp_path, 'wb', compresslevel=6) as out:
+        out.write(json.dumps(header).encode('utf-8') + b'\n')
+        for page_no in range(page_count):
+            page = snapshot.read(page_size)
+            if page != base.read(page_size):
+                out.write(struct.pack('>I', page_no) + page)
+                changed += 1
+    os.replace(tmp_path, target_path)
+    return changed
+
+
+def backup_database(source_path, target_prefix, base_path=None, pages=BACKUP_PAGES_PER_STEP,
+                    pause=BACKUP_PAUSE_SECONDS):
+    """
+    Sauvegarde en ligne, vérifiée et compressée
+
+    Args:
+        source_path: Base SQLite à sauvegarder
+        target_prefix: Chemin du fichier produit sans extension (.db.gz ou .delta.gz ajouté)
+        base_path: Dernière sauvegarde complète (.db.gz) pour une sauvegarde incrémentale ;
+            ignorée (sauvegarde complète) si la taille de page a changé depuis
+
+    Returns:
+        {'path', 'file_size', 'database_size', 'steps', 'restarts', 'single_step', 'changed_pages'}
+    """
+    if not os.path.exists(source_path):
+        raise BackupError(f"Base de données introuvable: {source_path}")
+
+    raw_path = target_prefix + '.raw'
+    target_path = None
+    try:
+        copy = online_copy(source_path, raw_path, pages, pause)
+        problems = integrity_check(raw_path)
+        if problems:
+            raise BackupError(f"Copie corrompue: {'; '.join(problems[:5])}")
+
+        changed_pages = None
+        if base_path and _page_size(raw_path) == _page_size(base_path, gzip.open):
+            target_path = target_prefix + DELTA_SUFFIX
+            changed_pages = _write_delta(raw_path, base_path, target_path)
+        else:
+            target_path = target_prefix + FULL_SUFFIX
+            _compress(raw_path, target_path)
+        return {
+            'path': target_path,
+            'file_size': os.path.getsize(target_path),
+            'database_size': os.path.getsize(raw_path),
+            'steps': copy['steps'],
+            'restarts': copy['restarts'],
+            'single_step': copy['single_step'],
+            'changed_pages': changed_pages,
+        }
+    finally:
+        for path in (raw_path, f"{target_path}.tmp"):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def read_delta_base(delta_path):
+    """Nom du fichier de la sauvegarde complète dont dépend une sauvegarde incrémentale"""
+    with gzip.open(delta_path, 'rb') as delta:
+        return json.loads(delta.readline())['base']
+
+
+def restore_backup(backup_path, target_path, backup_dir=None):
+    """
+    Restaure une sauvegarde complète (.db.gz) ou incrémentale (.delta.gz) dans target_path
+
+    La sauvegarde complète de référence d'un .delta.gz est cherchée dans le même dossier.
+    """
+    backup_dir = backup_dir or os.path.dirname(backup_path)
+    if not backup_path.endswith(DELTA_SUFFIX):
+        with gzip.open(backup_path, 'rb') as src, open(target_path, 'wb') as dst:
+            shutil.copyfileobj(src, dst, BACKUP_CHUNK_BYTES)
+        return target_path
+
+    with gzip.open(backup_path, 'rb') as delta:
+        header = json.loads(delta.readline())
+        restore_backup(os.path.join(backup_dir, header['base']), target_path)
+        page_size = header['page_size']
+        with open(target_path, 'r+b') as dst:
+            while True:
+                number = delta.read(4)
+                if not number:
+                    break
+                page_no = struct.unpack('>I', number)[0]
+                dst.seek(page_no * page_size)
+                dst.write(delta.read(page_size))
+            dst.truncate(header['page_count'] * page_size)
+    return target_path
@@ -0,0 +1,97 @@
+"""
+🗄️ PROFIL SQLITE DE PRODUCTION - ORACXPRED
+==========================================
+Réglages appliqués à chaque nouvelle connexion SQLite : journal WAL (lecteurs
+non bloqués par l'écrivain), synchronous=NORMAL, attente sur verrou au lieu de
+"database is locked", cache de pages et mmap dimensionnés.
+Le pool de connexions est dimensionné pour Flask en mode threaded, le
+collecteur et les tâches planifiées.
+"""
+
+from sqlalchemy import event
+
+
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 10000,  # ms d'attente max sur un verrou d'écriture
+    'cache_size': -32000,  # Négatif = en Kio (≈ 32 Mo par connexion)
+    'mmap_size': 268435456,  # 256 Mo lus par mmap
+    'temp_store': 'MEMORY',
+}
+
+# Valeurs renvoyées par SQLite à la lecture des PRAGMA (synchronous NORMAL = 1, temp_store MEMORY = 2)
+SQLITE_PRAGMAS_EXPECTED = {
+    'journal_mode': 'wal',
+    'synchronous': 1,
+    'busy_timeout': 10000,
+    'cache_size': -32000,
+    'mmap_size': 268435456,
+    'temp_store': 2,
+}
+
+SQLITE_POOL_OPTIONS = {
+    'pool_size': 10,
+    'max_overflow': 20,
+    'pool_timeout': 30,
+    'pool_recycle': 3600,
+    'connect_args': {
+        'timeout': 10,  # Attente du module sqlite3 (en secondes), cohérente avec busy_timeout
+        'check_same_thread': False,
+    },
+}
+
+
+def is_sqlite_file_uri(uri):
+    """Vrai pour une base SQLite sur fichier (pas en mémoire)"""
+    return uri.startswith('sqlite:///') and uri not in ('sqlite:///', 'sqlite:///:memory:')
+
+
+def configure_database(app):
+    """
+    Applique le profil SQLite à l'application (à appeler avant db.init_app)
+
+    Sans effet pour une base non SQLite ou en mémoire.
+    """
+    uri = app.config.get('SQLALCHEMY_DATABASE_URI', '')
+    if not is_sqlite_file_uri(uri):
+        return False
+    options = dict(SQLITE_POOL_OPTIONS)
+    options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+    return True
+
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record=None):
+    """Exécute les PRAGMA du profil sur une connexion sqlite3"""
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def install_sqlite_profile(engine):
+    """Branche les PRAGMA sur l'événement de connexion du moteur (avant toute connexion)"""
+    if engine.dialect.name != 'sqlite' or event.contains(engine, 'connect', apply_sqlite_pragmas):
+        return
+    event.listen(engine, 'connect', apply_sqlite_pragmas)
+
+
+def get_sqlite_pragmas(connection):
+    """Lit les PRAGMA du profil sur une connexion SQLAlchemy (pour vérification)"""
+    values = {}
+    for name in SQLITE_PRAGMAS:
+        values[name] = connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+    return values
+
+
+def check_sqlite_profile(connection):
+    """Retourne la liste des PRAGMA dont la valeur diffère du profil (vide si tout est appliqué)"""
+    current = get_sqlite_pragmas(connection)
+    return [
+        f"{name}={current[name]!r} (attendu {expected!r})"
+        for name, expected in SQLITE_PRAGMAS_EXPECTED.items()
+        if str(current[name]).lower() != str(expected).lower()
+    ]
@@ -0,0 +1,185 @@
+"""
+🎟️ DROITS D'ACCÈS UTILISATEUR - ORACXPRED
+=========================================
+Calcule en une seule requête SQL ce qu'un utilisateur a le droit de voir
+(accès payant, plan, limite quotidienne). Le résultat est mémorisé pour la
+requête HTTP en cours et mis en cache quelques secondes par utilisateur.
+Toute modification d'abonnement doit appeler invalidate_entitlement().
+"""
+
+import threading
+import time
+from datetime import datetime
+
+from flask import g, has_app_context
+from sqlalchemy.orm import joinedload
+
+from models import UserSubscription
+
+
+ENTITLEMENT_TTL_SECONDS = 30
+
+
+class Entitlement:
+    """Droits d'un utilisateur à un instant donné (objet immuable, partageable entre requêtes)"""
+
+    def __init__(self, user_id, is_admin=False, is_approved=False, is_active=True,
+                 has_paid_access=False, plan_name=None, predictions_per_day=None, valid_until=None):
+        self.user_id = user_id
+        self.is_admin = is_admin
+        self.is_approved = is_approved
+        self.is_active = is_active
+        self.has_paid_access = has_paid_access
+        self.plan_name = plan_name
+        self.predictions_per_day = predictions_per_day
+        self.valid_until = valid_until  # Expiration de l'abonnement qui donne l'accès (UTC)
+
+    @property
+    def can_view_predictions(self):
+        """Même règle que User.can_view_predictions()"""
+        if self.is_admin:
+            return True
+        if not self.is_approved or not self.is_active:
+            return False
+        return self.has_paid_access
+
+    def get_plan_limits(self):
+        """Même format que User.get_plan_limits()"""
+        if self.predictions_per_day is None:
+            return None
+        return {
+            'predictions_per_day': self.predictions_per_day,
+            'plan_name': self.plan_name
+        }
+
+    def __repr__(self) -> str:
+        return f"<Entitlement user:{self.user_id} paid:{self.has_paid_access} plan:{self.plan_name}>"
+
+
+def compute_entitlement(user):
+    """
+    Calcule les droits d'un utilisateur
+
+    Une seule requête (abonnement actif + plan en jointure) ; aucune pour un admin.
+    """
+    if user.is_admin:
+        return Entitlement(user.id, is_admin=True, is_approved=user.is_approved,
+                           is_active=user.is_active, has_paid_access=True)
+
+    now = datetime.utcnow()
+    subscription = UserSubscription.query.options(
+        joinedload(UserSubscription.plan)
+    ).filter_by(
+        user_id=user.id,
+        is_active=True
+    ).filter(
+        UserSubscription.expires_at > now
+    ).first()
+
+    has_paid_access = False
+    valid_until = None
+    if user.is_approved and user.is_active:
+        if subscription:
+            has_paid_access = True
+            valid_until = subscription.expires_at
+        elif user.subscription_status == 'active':
+            # Fallback sur l'ancien système (legacy)
+            expired = user.subscription_expires_at and user.subscription_expires_at < now
+            has_paid_access = not expired and user.subscription_plan in ['premium', 'vip']
+            valid_until = user.subscription_expires_at if has_paid_access else None
+
+    plan = subscription.plan if subscription else None
+    return Entitlement(
+        user.id,
+        is_admin=False,
+        is_approved=user.is_approved,
+        is_active=user.is_active,
+        has_paid_access=has_paid_access,
+        plan_name=plan.name if plan else None,
+        predictions_per_day=plan.predictions_per_day if plan else None,
+        valid_until=valid_until
+    )
+
+
+class EntitlementCache:
+    """Cache par utilisateur avec TTL court, borné par l'expiration de l'abonnement"""
+
+    def __init__(self, ttl=ENTITLEMENT_TTL_SECONDS):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            item = self._entries.get(user_id)
+            if item is None:
+                return None
+            entitlement, expires_at = item
+            if time.monotonic() >= expires_at:
+                del self._entries[user_id]
+                return None
+            return entitlement
+
+    def put(self, entitlement):
+        ttl = self.ttl
+        if entitlement.valid_until is not None:
+            # Ne jamais servir un accès au-delà de l'expiration de l'abonnement
+            remaining = (entitlement.valid_until - datetime.utcnow()).total_seconds()
+            ttl = max(0, min(ttl, remaining))
+        with self._lock:
+            self._entries[entitlement.user_id] = (entitlement, time.monotonic() + ttl)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+entitlement_cache = EntitlementCache()
+
+
+def _request_memo():
+    """Mémo des droits pour la requête HTTP en cours (None hors contexte Flask)"""
+    if not has_app_context():
+        return None
+    if not hasattr(g, '_oracx_entitlements'):
+        g._oracx_entitlements = {}
+    return g._oracx_entitlements
+
+
+def get_entitlement(user):
+    """Droits de l'utilisateur : mémo de requête, puis cache, puis calcul"""
+    if user is None:
+        return None
+
+    memo = _request_memo()
+    if memo is not None and user.id in memo:
+        return memo[user.id]
+
+    entitlement = entitlement_cache.get(user.id)
+    if entitlement is None:
+        entitlement = compute_entitlement(user)
+        entitlement_cache.put(entitlement)
+
+    if memo is not None:
+        memo[user.id] = entitlement
+    return entitlement
+
+
+def invalidate_entitlement(user_id):
+    """À appeler après toute modification d'abonnement, d'approbation ou d'activation"""
+    entitlement_cache.invalidate(user_id)
+    memo = _request_memo()
+    if memo is not None:
+        memo.pop(user_id, None)
+
+
+def invalidate_all_entitlements():
+    """À appeler après une modification de plan (limites partagées par plusieurs utilisateurs)"""
+    entitlement_cache.clear()
+    memo = _request_memo()
+    if memo is not None:
+        memo.clear()
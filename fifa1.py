@@ -1,4 +1,4 @@
-from flask import Flask, request, render_template_string, session, redirect, url_for
+from flask import Flask, Response, request, render_template_string, session, redirect, url_for, stream_with_context, g
 import requests
 import os
 import datetime
@@ -89,6 +89,18 @@ from oracxpred_utils import (
     get_user_from_session_token, ensure_user_unique_id, check_and_expire_subscriptions,
     cleanup_expired_sessions
 )
+from live_feed import (
+    get_feed_snapshot, detect_sport, extract_scores, extract_minute, extract_odds_1x2,
+    is_penalty_league, match_duration_minutes
+)
+from live_stream import match_publisher
+from response_cache import home_cache, get_viewer_tier, TIER_PAID
+from entitlements import get_entitlement, invalidate_entitlement
+from quota import quota_service
+from audit_log import audit_writer
+from alert_engine import alert_engine
+from stats_service import stats_service
+from db_profile import configure_database, install_sqlite_profile, check_sqlite_profile
 import uuid
 
 # Utilisation de la simulation
@@ -98,9 +110,13 @@ app = Flask(__name__)
 app.config["SQLALCHEMY_DATABASE_URI"] = os.getenv("DATABASE_URL", "sqlite:///oracxpred.db")
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 app.secret_key = 'oracxpred-metaphore-secret-key-2024'  # Clé secrète pour les sessions
+# Profil SQLite (WAL, busy_timeout, cache, mmap, pool) appliqué à chaque connexion
+SQLITE_PROFILE = configure_database(app)
 db.init_app(app)
 
 with app.app_context():
+    if SQLITE_PROFILE:
+        install_sqlite_profile(db.engine)
     # Vérifier et corriger la base de données si nécessaire
     try:
         from check_and_fix_db import check_and_fix_database
@@ -114,6 +130,16 @@ with app.app_context():
     except Exception as e:
         print(f"⚠️ Erreur lors de la création des tables: {e}")
     
+    # Vérifier que le profil SQLite est bien appliqué
+    if SQLITE_PROFILE:
+        try:
+            with db.engine.connect() as connection:
+                problems = check_sqlite_profile(connection)
+            if problems:
+                print(f"⚠️ Profil SQLite incomplet: {', '.join(problems)}")
+        except Exception as e:
+            print(f"⚠️ Erreur lors de la vérification du profil SQLite: {e}")
+    
     # Initialiser les unique_id pour les utilisateurs existants
     try:
         from oracxpred_utils import initialize_user_unique_ids
@@ -121,6 +147,13 @@ with app.app_context():
     except Exception as e:
         print(f"⚠️ Erreur lors de l'initialisation des unique_id: {e}")
     
+    # Compteurs de performance du modèle construits depuis l'archive (base existante)
+    try:
+        from performance_accumulator import ensure_buckets
+        ensure_buckets()
+    except Exception as e:
+        print(f"⚠️ Erreur lors de l'initialisation des compteurs de performance: {e}")
+    
     # Créer les plans par défaut s'ils n'existent pas
     if SubscriptionPlan.query.count() == 0:
         default_plans = [
@@ -148,6 +181,21 @@ with app.app_context():
             db.session.add(plan)
         db.session.commit()
 
+# Compteurs de consultations reconstruits depuis user_prediction_access
+try:
+    quota_service.init_app(app)
+except Exception as e:
+    print(f"⚠️ Erreur lors du chargement des quotas: {e}")
+
+# Journaux d'audit écrits par lots en arrière-plan
+audit_writer.init_app(app)
+
+# Alertes regroupées et index des alertes ouvertes
+try:
+    alert_engine.init_app(app)
+except Exception as e:
+    print(f"⚠️ Erreur lors du chargement des alertes: {e}")
+
 # Enregistrer les blueprints
 try:
     from admin_routes import admin_bp
@@ -160,10 +208,14 @@ except ImportError as e:
 # ========== FONCTIONS UTILITAIRES ==========
 
 def get_current_user():
-    """Récupère l'utilisateur actuellement connecté"""
-    if session.get('user_id'):
-        return User.query.get(session.get('user_id'))
-    return None
+    """Récupère l'utilisateur actuellement connecté (une seule requête SQL par requête HTTP)"""
+    user_id = session.get('user_id')
+    if not user_id:
+        return None
+    if getattr(g, 'current_user_id', None) != user_id:
+        g.current_user = User.query.get(user_id)
+        g.current_user_id = user_id
+    return g.current_user
 
 def require_login(f):
     """Décorateur pour exiger une connexion"""
@@ -184,228 +236,125 @@ def require_paid_access(f):
         user = get_current_user()
         if not user:
             return redirect(url_for('user_login'))
-        if not user.can_view_predictions():
+        if not get_entitlement(user).can_view_predictions:
             session['error_message'] = "Accès réservé — Un abonnement actif est requis pour voir les prédictions"
             return redirect(url_for('subscription_plans'))
         return f(*args, **kwargs)
     return decorated_function
 
+def iter_matchs_accueil(index, selected_sport, selected_league, selected_status):
+    """Générateur des entrées d'index correspondant aux filtres de la page d'accueil"""
+    for entry in index:
+        if selected_sport and entry["sport"] != selected_sport:
+            continue
+        if selected_league and entry["league"] != selected_league:
+            continue
+        if selected_status == "live" and not entry["is_live"]:
+            continue
+        if selected_status == "finished" and not entry["is_finished"]:
+            continue
+        if selected_status == "upcoming" and not entry["is_upcoming"]:
+            continue
+        yield entry
+
+def enrichir_match_accueil(entry, with_prediction=True):
+    """Enrichissement coûteux d'une ligne affichée (cotes, prédiction, météo)"""
+    match = entry["match"]
+
+    # --- Cotes ---
+    odds_data = extract_odds_1x2(match)
+    if not odds_data:
+        formatted_odds = ["Pas de cotes disponibles"]
+    else:
+        formatted_odds = [f"{od['type']}: {od['cote']}" for od in odds_data]
+
+    # Nouvelle prédiction intelligente (inutile si elle sera masquée)
+    prediction = None
+    if with_prediction:
+        try:
+            prediction = generer_prediction_intelligente(entry["team1"], entry["team2"], entry["league"], odds_data, entry["sport"])
+        except Exception as e:
+            print(f"Erreur lors de la prédiction d'un match: {e}")
+            prediction = "–"
+
+    # --- Météo --- (souvent absente dans l'API)
+    temp = "–"
+    humid = "–"
+    meteo_data = match.get("MIS", [])
+    if meteo_data and isinstance(meteo_data, list):
+        temp = next((item.get("V", "–") for item in meteo_data if item.get("K") == 9), "–")
+        humid = next((item.get("V", "–") for item in meteo_data if item.get("K") == 27), "–")
+
+    return {
+        "team1": entry["team1"],
+        "team2": entry["team2"],
+        "score1": entry["score1"],
+        "score2": entry["score2"],
+        "league": entry["league"],
+        "sport": entry["sport"],
+        "status": entry["status"],
+        "datetime": entry["datetime"],
+        "temp": temp,
+        "humid": humid,
+        "odds": formatted_odds,
+        "prediction": prediction,
+        "id": entry["id"]
+    }
+
 @app.route('/')
 def home():
     try:
         selected_sport = request.args.get("sport", "").strip()
         selected_league = request.args.get("league", "").strip()
         selected_status = request.args.get("status", "").strip()
-
-        # URL de l'API 1xbet
-        api_url = "https://1xbet.com/service-api/LiveFeed/Get1x2_VZip?sports=85&count=40&lng=fr&gr=285&mode=4&country=96&getEmpty=true&virtualSports=true&noFilterBlockEvent=true"
-        response = requests.get(api_url)
-        matches = response.json().get("Value", [])
-
-        sports_detected = set()
-        leagues_detected = set()
-        data = []
-
-        for match in matches:
-            try:
-                league = match.get("LE", "–")
-                team1 = match.get("O1", "–")
-                team2 = match.get("O2", "–")
-                sport = detect_sport(league).strip()
-                sports_detected.add(sport)
-                leagues_detected.add(league)
-
-                # --- Score --- (Structure corrigée selon l'API)
-                sc = match.get("SC", {})
-                fs = sc.get("FS", {})
-
-                # Essayer différentes structures possibles pour les scores
-                score1 = 0
-                score2 = 0
-
-                if isinstance(fs, dict):
-                    score1 = fs.get("S1", 0) or fs.get("1", 0) or 0
-                    score2 = fs.get("S2", 0) or fs.get("2", 0) or 0
-                elif isinstance(fs, list) and len(fs) >= 2:
-                    score1 = fs[0] if fs[0] is not None else 0
-                    score2 = fs[1] if fs[1] is not None else 0
-
-                # Conversion sécurisée en entier
-                try:
-                    score1 = int(score1) if score1 is not None else 0
-                except (ValueError, TypeError):
-                    score1 = 0
-                try:
-                    score2 = int(score2) if score2 is not None else 0
-                except (ValueError, TypeError):
-                    score2 = 0
-
-                # --- Minute et Statut --- (Structure corrigée selon l'API)
-                minute = None
-                sc = match.get("SC", {})
-
-                # Récupération du temps (TS = timestamp en secondes)
-                if "TS" in sc and isinstance(sc["TS"], int):
-                    minute = sc["TS"] // 60
-                elif "T" in match and isinstance(match["T"], int):
-                    minute = match["T"]
-
-                # Récupération du statut du match
-                hs = match.get("HS", 0)  # Statut principal
-                tn = match.get("TN", "").lower()
-                tns = match.get("TNS", "").lower()
-                cps = sc.get("CPS", "")  # Statut du match dans SC
-
-                # Détermination du statut
-                statut = "À venir"
-                is_live = False
-                is_finished = False
-                is_upcoming = False
-
-                # 🎮 LOGIQUE STATUTS FIFA CORRIGÉE AVEC VÉRIFICATION HEURE
-                from datetime import datetime
-
-                # Vérifier si le match est dans le futur
-                maintenant = datetime.now()
-                heure_match = None
-
-                # Extraire l'heure du match depuis match_time (déjà calculé)
-                try:
-                    if match_time and match_time != "–":
-                        # Format: "14/07/2025 23:00"
-                        heure_match = datetime.strptime(match_time, "%d/%m/%Y %H:%M")
-                except:
-                    heure_match = None
-
-                # 🕐 LOGIQUE DE STATUT AVEC VÉRIFICATION TEMPORELLE
-                if hs == 3 or "terminé" in tn or "finished" in tns.lower() or "final" in cps.lower() or (minute is not None and minute >= 90):
-                    # Match terminé
-                    statut = "TERMINÉ"
-                    is_finished = True
-                    is_live = False
-                    is_upcoming = False
-                elif heure_match and heure_match > maintenant:
-                    # 🎯 MATCH DANS LE FUTUR - PAS ENCORE DÉBUTÉ
-                    statut = "PAS DÉBUTÉ"
-                    is_upcoming = True
-                    is_live = False
-                    is_finished = False
-                elif hs == 1 or "live" in cps.lower() or (minute is not None and minute > 0):
-                    # Match en cours
-                    statut = f"EN COURS ({minute}′)" if minute else "EN COURS"
-                    is_live = True
-                    is_finished = False
-                    is_upcoming = False
-                else:
-                    # Match pas encore débuté (fallback)
-                    statut = "PAS DÉBUTÉ"
-                    is_upcoming = True
-                    is_live = False
-                    is_finished = False
-
-                if selected_sport and sport != selected_sport:
-                    continue
-                if selected_league and league != selected_league:
-                    continue
-                if selected_status == "live" and not is_live:
-                    continue
-                if selected_status == "finished" and not is_finished:
-                    continue
-                if selected_status == "upcoming" and not is_upcoming:
-                    continue
-
-                match_ts = match.get("S", 0)
-                from datetime import timezone
-                match_time = datetime.fromtimestamp(match_ts, timezone.utc).strftime('%d/%m/%Y %H:%M') if match_ts else "–"
-
-                # --- Cotes ---
-                odds_data = []
-                # 1. Chercher dans E (G=1)
-                for o in match.get("E", []):
-                    if o.get("G") == 1 and o.get("T") in [1, 2, 3] and o.get("C") is not None:
-                        odds_data.append({
-                            "type": {1: "1", 2: "2", 3: "X"}.get(o.get("T")),
-                            "cote": o.get("C")
-                        })
-                # 2. Sinon, chercher dans AE
-                if not odds_data:
-                    for ae in match.get("AE", []):
-                        if ae.get("G") == 1:
-                            for o in ae.get("ME", []):
-                                if o.get("T") in [1, 2, 3] and o.get("C") is not None:
-                                    odds_data.append({
-                                        "type": {1: "1", 2: "2", 3: "X"}.get(o.get("T")),
-                                        "cote": o.get("C")
-                                    })
-                if not odds_data:
-                    formatted_odds = ["Pas de cotes disponibles"]
-                else:
-                    formatted_odds = [f"{od['type']}: {od['cote']}" for od in odds_data]
-
-                # Nouvelle prédiction intelligente
-                prediction = generer_prediction_intelligente(team1, team2, league, odds_data, sport)
-
-                # --- Météo --- (Structure corrigée, souvent absente dans l'API)
-                # La météo n'est pas toujours disponible dans cette API
-                temp = "–"
-                humid = "–"
-
-                # Essayer de récupérer les données météo si disponibles
-                meteo_data = match.get("MIS", [])
-                if meteo_data and isinstance(meteo_data, list):
-                    temp = next((item.get("V", "–") for item in meteo_data if item.get("K") == 9), "–")
-                    humid = next((item.get("V", "–") for item in meteo_data if item.get("K") == 27), "–")
-
-                data.append({
-                    "team1": team1,
-                    "team2": team2,
-                    "score1": score1,
-                    "score2": score2,
-                    "league": league,
-                    "sport": sport,
-                    "status": statut,
-                    "datetime": match_time,
-                    "temp": temp,
-                    "humid": humid,
-                    "odds": formatted_odds,
-                    "prediction": prediction,
-                    "id": match.get("I", None)
-                })
-            except Exception as e:
-                print(f"Erreur lors du traitement d'un match: {e}")
-                continue
-
-        # --- Pagination ---
         try:
             page = int(request.args.get('page', 1))
         except:
             page = 1
+
+        # Snapshot partagé du flux 1xbet (rafraîchi au plus toutes les FEED_TTL_SECONDS)
+        snapshot = get_feed_snapshot()
+
+        # Le rendu dépend du niveau d'accès, et le bandeau de profil de l'utilisateur connecté
+        current_user = get_current_user()
+        tier = get_viewer_tier(current_user)
+        cache_key = (selected_sport, selected_league, selected_status, page, tier,
+                     current_user.id if current_user else None)
+        cached = home_cache.get(cache_key, snapshot.version)
+        if cached is not None:
+            return cached.to_response(request)
+
+        index = snapshot.get_index()
+        sports_detected = {entry["sport"] for entry in index}
+        leagues_detected = {entry["league"] for entry in index}
+
+        # --- Filtrage paresseux puis pagination : seules les lignes de la page sont enrichies ---
         per_page = 20
-        total = len(data)
+        start = (page - 1) * per_page
+        end = page * per_page
+        total = 0
+        page_entries = []
+        for entry in iter_matchs_accueil(index, selected_sport, selected_league, selected_status):
+            if start <= total < end:
+                page_entries.append(entry)
+            total += 1
         total_pages = (total + per_page - 1) // per_page
-        data_paginated = data[(page-1)*per_page:page*per_page]
 
-        # Récupérer les informations de l'utilisateur connecté
-        current_user = get_current_user()
-        can_view_predictions = False
-        
-        if current_user:
-            can_view_predictions = current_user.can_view_predictions()
-        else:
-            # Visiteur non connecté - masquer toutes les prédictions
-            can_view_predictions = False
-            # Remplacer les prédictions par un message
+        can_view_predictions = tier == TIER_PAID
+        data_paginated = [enrichir_match_accueil(entry, can_view_predictions) for entry in page_entries]
+
+        if not current_user:
+            # Visiteur non connecté - masquer toutes les prédictions et les cotes
             for match_data in data_paginated:
                 match_data['prediction'] = "🔒 Accès réservé — Connectez-vous pour voir les prédictions"
-                match_data['odds'] = ["🔒 Réservé"]  # Masquer aussi les cotes
-        
-        # Si l'utilisateur est connecté mais n'a pas d'accès payant
-        if current_user and not can_view_predictions:
+                match_data['odds'] = ["🔒 Réservé"]
+        elif not can_view_predictions:
+            # Utilisateur connecté sans accès payant
             for match_data in data_paginated:
                 match_data['prediction'] = "🔒 Accès réservé — Un abonnement actif est requis"
                 match_data['odds'] = ["🔒 Réservé"]
         
-        return render_template_string(TEMPLATE, data=data_paginated,
+        html = render_template_string(TEMPLATE, data=data_paginated,
             sports=sorted(sports_detected),
             leagues=sorted(leagues_detected),
             selected_sport=selected_sport or "Tous",
@@ -416,6 +365,7 @@ def home():
             current_user=current_user,
             can_view_predictions=can_view_predictions
         )
+        return home_cache.put(cache_key, snapshot.version, html, snapshot.changed_at).to_response(request)
 
     except Exception as e:
         return f"Erreur : {e}"
@@ -530,6 +480,7 @@ def admin_delete_user(user_id):
     username = user.username
     db.session.delete(user)
     db.session.commit()
+    invalidate_entitlement(user_id)
     log_action('admin_action', f"Utilisateur supprimé: {username}", 
                admin_id=admin_user.id if admin_user else None, user_id=user_id, severity='warning')
     return redirect(url_for('admin_dashboard'))
@@ -545,6 +496,7 @@ def admin_toggle_admin(user_id):
     old_status = user.is_admin
     user.is_admin = not user.is_admin
     db.session.commit()
+    invalidate_entitlement(user_id)
     log_action('admin_action', f"Changement statut admin pour {user.username}: {'Promu admin' if user.is_admin else 'Rétrogradé'}", 
                admin_id=admin_user.id if admin_user else None, user_id=user_id, severity='warning')
     return redirect(url_for('admin_dashboard'))
@@ -560,6 +512,7 @@ def admin_approve_user(user_id):
     admin_user = User.query.get(session.get('admin_id'))
     user.is_approved = True
     db.session.commit()
+    invalidate_entitlement(user_id)
     log_action('admin_action', f"Utilisateur approuvé: {user.username}", 
                admin_id=admin_user.id if admin_user else None, user_id=user_id, severity='info')
     return redirect(url_for('admin_dashboard'))
@@ -584,6 +537,7 @@ def admin_set_plan(user_id):
             from datetime import timedelta
             user.subscription_expires_at = datetime.datetime.utcnow() + timedelta(days=30)
         db.session.commit()
+        invalidate_entitlement(user_id)
         log_action('admin_action', f"Plan modifié pour {user.username}: {plan} ({status})", 
                    admin_id=admin_user.id if admin_user else None, user_id=user_id, severity='info')
     
@@ -630,9 +584,10 @@ def oracx_admin():
         return redirect(url_for('admin_login'))
     
     # Récupérer les statistiques
-    total_users = User.query.count()
+    users_stats = stats_service.users()
+    total_users = users_stats['total']
     active_subscriptions = User.query.filter_by(subscription_status='active').count()
-    pending_approvals = User.query.filter_by(is_approved=False).count()
+    pending_approvals = users_stats['pending_approvals']
     recent_logs = SystemLog.query.order_by(SystemLog.created_at.desc()).limit(50).all()
     
     return render_template_string(ORACX_ADMIN_TEMPLATE,
@@ -642,21 +597,6 @@ def oracx_admin():
         recent_logs=recent_logs
     )
 
-def detect_sport(league_name):
-    league = league_name.lower()
-    if any(word in league for word in ["wta", "atp", "tennis"]):
-        return "Tennis"
-    elif any(word in league for word in ["basket", "nbl", "nba", "ipbl"]):
-        return "Basketball"
-    elif "hockey" in league:
-        return "Hockey"
-    elif any(word in league for word in ["tbl", "table"]):
-        return "Table Basketball"
-    elif "cricket" in league:
-        return "Cricket"
-    else:
-        return "Football"
-
 def traduire_pari(nom, valeur=None):
     """Traduit le nom d'un pari alternatif et sa valeur en français."""
     nom_str = str(nom).lower() if nom else ""
@@ -889,65 +829,139 @@ def traduire_pari_type_groupe(type_pari, groupe, param, team1=None, team2=None,
     # Fallback avec informations de debug
     return f"Pari G{groupe}-T{type_pari}" + (f"-P{param}" if param is not None else "")
 
+def extraire_paris_alternatifs(match, team1, team2):
+    """Extrait les paris alternatifs (E et AE hors 1X2) avec une cote entre 1.499 et 3"""
+    paris_alternatifs = []
+    contexte = detecter_contexte_pari(match)
+    marches = [o for o in match.get("E", []) if o.get("G") != 1]
+    for ae in match.get("AE", []):
+        if ae.get("G") != 1:
+            marches.extend(ae.get("ME", []))
+
+    for o in marches:
+        if o.get("C") is None:
+            continue
+        type_pari = o.get("T")
+        groupe = o.get("G")
+        param = o.get("P") if "P" in o else None
+        nom_traduit = traduire_pari_type_groupe(type_pari, groupe, param, team1, team2, contexte)
+        valeur = param if param is not None else ""
+
+        # Debug info pour mieux comprendre les types
+        debug_info = ""
+        if groupe in [8, 17, 62, 5, 12]:  # Groupes Over/Under
+            debug_info = f" [G{groupe}-T{type_pari}-P{param}]"
+
+        paris_alternatifs.append({
+            "nom": nom_traduit + debug_info,
+            "valeur": valeur,
+            "cote": o.get("C"),
+            "raw_data": {"G": groupe, "T": type_pari, "P": param}  # Pour debug
+        })
+
+    # Filtrer les paris alternatifs selon la cote demandée
+    return [p for p in paris_alternatifs if 1.499 <= float(p["cote"]) <= 3]
+
+def filtrer_paris_alternatifs(paris_alternatifs):
+    """Exclut les paris corners et pair/impair du tableau principal"""
+    paris_alternatifs_filtres = []
+    for p in paris_alternatifs:
+        nom_lower = p['nom'].lower()
+        if not (('corner' in nom_lower) or ('pair' in nom_lower) or ('impair' in nom_lower)):
+            paris_alternatifs_filtres.append(p)
+    return paris_alternatifs_filtres
+
+def calculer_decision_maitre(match):
+    """Décision finale du Maître des Pronostics pour un match brut du flux (utilisée par le direct SSE)"""
+    if not BOTS_ALTERNATIFS_DISPONIBLES:
+        return {'action': 'BOTS NON DISPONIBLES'}
+
+    team1 = match.get("O1", "–")
+    team2 = match.get("O2", "–")
+    league = match.get("LE", "–")
+    score1, score2 = extract_scores(match)
+    minute = extract_minute(match) or 0
+
+    paris = []
+    for p in filtrer_paris_alternatifs(extraire_paris_alternatifs(match, team1, team2)):
+        try:
+            if 1.399 <= float(p.get('cote', 0)) <= 3.0:
+                paris.append(p)
+        except (ValueError, TypeError):
+            continue
+
+    decisions_bots = {
+        'BOT_UNIFIE': systeme_unifie_alternatifs_only(team1, team2, league, paris, score1, score2, minute),
+        'BOT_IA': systeme_ia_alternatifs_only(team1, team2, league, paris, score1, score2, minute),
+        'BOT_PROBABILITES': systeme_probabilites_alternatifs_only(paris, score1, score2, minute),
+        'BOT_VALUE': systeme_value_betting_alternatifs_only(paris, team1, team2, league),
+        'BOT_STATS': systeme_statistique_alternatifs_only(paris, team1, team2, league, score1, score2, minute)
+    }
+    contexte_maitre = {'score1': score1, 'score2': score2, 'minute': minute}
+    decision = MaitreDesPronostics().analyser_decisions_bots(decisions_bots, team1, team2, league, contexte_maitre)
+    return decision.get('decision_finale', {})
+
+match_publisher.decision_provider = calculer_decision_maitre
+
+@app.route('/stream/live')
+def stream_live():
+    """Flux SSE des changements de tous les matchs en direct (cotes réservées aux abonnés)"""
+    current_user = get_current_user()
+    include_private = bool(current_user and get_entitlement(current_user).can_view_predictions)
+    subscriber = match_publisher.subscribe(include_private=include_private)
+    return Response(stream_with_context(match_publisher.stream(subscriber)),
+                    mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/stream/match/<int:match_id>')
+@require_paid_access
+def stream_match(match_id):
+    """Flux SSE des changements d'un match (score, minute, statut, cotes, décision du Maître)"""
+    subscriber = match_publisher.subscribe(match_id=match_id, include_private=True)
+    return Response(stream_with_context(match_publisher.stream(subscriber)),
+                    mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @app.route('/match/<int:match_id>')
 @require_paid_access
 def match_details(match_id):
     # Vérifier les limitations d'accès aux prédictions
     user = get_current_user()
     if user and not user.is_admin:
-        # Vérifier si l'utilisateur peut encore voir des prédictions aujourd'hui
-        if not user.can_view_more_predictions_today():
-            plan_limits = user.get_plan_limits()
-            viewed_today = user.get_predictions_viewed_today()
-            if plan_limits:
-                return render_template_string("""
-                    <!DOCTYPE html>
-                    <html>
-                    <head>
-                        <title>Limite atteinte - ORACXPRED</title>
-                        <style>
-                            body { font-family: Arial, sans-serif; text-align: center; padding: 50px; }
-                            .error { background: #ff6b6b; color: white; padding: 20px; border-radius: 10px; max-width: 500px; margin: 0 auto; }
-                        </style>
-                    </head>
-                    <body>
-                        <div class="error">
-                            <h2>⚠️ Limite quotidienne atteinte</h2>
-                            <p>Vous avez consulté <strong>{{ viewed_today }}/{{ plan_limits.predictions_per_day }}</strong> prédictions aujourd'hui.</p>
-                            <p>Votre limite sera réinitialisée demain.</p>
-                            <a href="/" style="color: white; text-decoration: underline;">Retour à l'accueil</a>
-                        </div>
-                    </body>
-                    </html>
-                """, viewed_today=viewed_today, plan_limits=plan_limits)
-        
-        # Enregistrer l'accès à cette prédiction
-        prediction = Prediction.query.filter_by(match_id=match_id).first()
-        if prediction:
-            # Vérifier si l'accès n'a pas déjà été enregistré aujourd'hui
-            today = datetime.datetime.utcnow().date()
-            existing_access = UserPredictionAccess.query.filter_by(
-                user_id=user.id,
-                prediction_id=prediction.id,
-                access_date=today
-            ).first()
-            
-            if not existing_access:
-                access = UserPredictionAccess(
-                    user_id=user.id,
-                    prediction_id=prediction.id,
-                    access_date=today
-                )
-                db.session.add(access)
-                db.session.commit()
+        # Vérifier la limite du jour et enregistrer l'accès en une seule opération atomique
+        # (compteurs en mémoire, écriture différée dans user_prediction_access)
+        plan_limits = get_entitlement(user).get_plan_limits()
+        prediction_id = db.session.query(Prediction.id).filter_by(match_id=match_id).limit(1).scalar()
+        allowed, viewed_today = quota_service.record_view(
+            user.id, prediction_id,
+            plan_limits['predictions_per_day'] if plan_limits else None
+        )
+        if not allowed:
+            return render_template_string("""
+                <!DOCTYPE html>
+                <html>
+                <head>
+                    <title>Limite atteinte - ORACXPRED</title>
+                    <style>
+                        body { font-family: Arial, sans-serif; text-align: center; padding: 50px; }
+                        .error { background: #ff6b6b; color: white; padding: 20px; border-radius: 10px; max-width: 500px; margin: 0 auto; }
+                    </style>
+                </head>
+                <body>
+                    <div class="error">
+                        <h2>⚠️ Limite quotidienne atteinte</h2>
+                        <p>Vous avez consulté <strong>{{ viewed_today }}/{{ plan_limits.predictions_per_day }}</strong> prédictions aujourd'hui.</p>
+                        <p>Votre limite sera réinitialisée demain.</p>
+                        <a href="/" style="color: white; text-decoration: underline;">Retour à l'accueil</a>
+                    </div>
+                </body>
+                </html>
+            """, viewed_today=viewed_today, plan_limits=plan_limits)
     
     # Continuer avec le code existant
     try:
-        # Récupérer les données de l'API 1xbet
-        api_url = "https://1xbet.com/service-api/LiveFeed/Get1x2_VZip?sports=85&count=40&lng=fr&gr=285&mode=4&country=96&getEmpty=true&virtualSports=true&noFilterBlockEvent=true"
-        response = requests.get(api_url)
-        matches = response.json().get("Value", [])
-        match = next((m for m in matches if m.get("I") == match_id), None)
+        # Snapshot partagé du flux 1xbet (pas de nouvel appel réseau à chaque rechargement)
+        match = get_feed_snapshot().get_match(match_id)
         if not match:
             return f"Aucun match trouvé pour l'identifiant {match_id}"
         # Infos principales
@@ -1031,17 +1045,10 @@ def match_details(match_id):
         maintenant = datetime.now()
 
         # 🎮 DURÉES RÉELLES FIFA (CORRECTES)
-        # Détecter le type de match (normal ou penalty)
-        is_penalty_match = "penalty" in league.lower() or "pen" in league.lower() or "shootout" in league.lower()
-
-        if is_penalty_match:
-            # Match FIFA penalty : 1.5 minutes réelles
-            duree_totale_minutes_reelles = 1.5
-            ratio_temps = 1.5 / 90  # 90 minutes FIFA = 1.5 minutes réelles
-        else:
-            # Match FIFA normal : 7 minutes réelles
-            duree_totale_minutes_reelles = 7
-            ratio_temps = 7 / 90  # 90 minutes FIFA = 7 minutes réelles
+        # Détecter le type de match (normal : 7 minutes réelles, penalty : 1.5 minutes réelles)
+        is_penalty_match = is_penalty_league(league)
+        duree_totale_minutes_reelles = match_duration_minutes(league)
+        ratio_temps = duree_totale_minutes_reelles / 90  # 90 minutes FIFA = durée réelle
 
         # 🕐 SYSTÈME D'HEURE DE DÉBUT FIXE
         # Créer un ID unique pour ce match
@@ -1166,69 +1173,14 @@ def match_details(match_id):
         # Prédiction intelligente pour la page de détails
         prediction = generer_prediction_intelligente(team1, team2, league, odds_data, sport)
         # --- Paris alternatifs ---
-        paris_alternatifs = []
-        # 1. E (marchés principaux et alternatifs)
-        for o in match.get("E", []):
-            if o.get("G") != 1 and o.get("C") is not None:
-                type_pari = o.get("T")
-                groupe = o.get("G")
-                param = o.get("P") if "P" in o else None
-                # Détecter le contexte du match
-                contexte = detecter_contexte_pari(match)
-                nom_traduit = traduire_pari_type_groupe(type_pari, groupe, param, team1, team2, contexte)
-                valeur = param if param is not None else ""
-                cote = o.get("C")
-
-                # Debug info pour mieux comprendre les types
-                debug_info = ""
-                if groupe in [8, 17, 62, 5, 12]:  # Groupes Over/Under
-                    debug_info = f" [G{groupe}-T{type_pari}-P{param}]"
-
-                paris_alternatifs.append({
-                    "nom": nom_traduit + debug_info,
-                    "valeur": valeur,
-                    "cote": cote,
-                    "raw_data": {"G": groupe, "T": type_pari, "P": param}  # Pour debug
-                })
-        # 2. AE (marchés alternatifs étendus)
-        for ae in match.get("AE", []):
-            if ae.get("G") != 1:
-                for o in ae.get("ME", []):
-                    if o.get("C") is not None:
-                        type_pari = o.get("T")
-                        groupe = o.get("G")
-                        param = o.get("P") if "P" in o else None
-                        # Détecter le contexte du match
-                        contexte = detecter_contexte_pari(match)
-                        nom_traduit = traduire_pari_type_groupe(type_pari, groupe, param, team1, team2, contexte)
-                        valeur = param if param is not None else ""
-                        cote = o.get("C")
-
-                        # Debug info pour mieux comprendre les types
-                        debug_info = ""
-                        if groupe in [8, 17, 62, 5, 12]:  # Groupes Over/Under
-                            debug_info = f" [G{groupe}-T{type_pari}-P{param}]"
-
-                        paris_alternatifs.append({
-                            "nom": nom_traduit + debug_info,
-                            "valeur": valeur,
-                            "cote": cote,
-                            "raw_data": {"G": groupe, "T": type_pari, "P": param}  # Pour debug
-                        })
-        # Filtrer les paris alternatifs selon la cote demandée
-        paris_alternatifs = [p for p in paris_alternatifs if 1.499 <= float(p["cote"]) <= 3]
+        paris_alternatifs = extraire_paris_alternatifs(match, team1, team2)
 
         # DEBUG : Afficher les vrais paris extraits de l'API
         debug_vrais_paris = f"🔍 DEBUG - VRAIS PARIS EXTRAITS DE L'API ({len(paris_alternatifs)} paris) :<br>"
         for i, pari in enumerate(paris_alternatifs[:10]):  # Afficher les 10 premiers
             debug_vrais_paris += f"• {pari['nom']} | Cote: {pari['cote']} | Raw: G{pari['raw_data']['G']}-T{pari['raw_data']['T']}-P{pari['raw_data'].get('P', 'N/A')}<br>"
         # Filtrer les paris corners et pair/impair du tableau alternatif
-        paris_alternatifs_filtres = []
-        for p in paris_alternatifs:
-            nom_lower = p['nom'].lower()
-            # Exclure corners et pair/impair du tableau principal
-            if not (('corner' in nom_lower) or ('pair' in nom_lower) or ('impair' in nom_lower)):
-                paris_alternatifs_filtres.append(p)
+        paris_alternatifs_filtres = filtrer_paris_alternatifs(paris_alternatifs)
 
         # 🎯 TRANSFORMATION COMPLÈTE - TOUS LES BOTS SPÉCIALISÉS PARIS ALTERNATIFS UNIQUEMENT
         print(f"🎲 ACTIVATION DE TOUS LES BOTS POUR PARIS ALTERNATIFS UNIQUEMENT")
@@ -7227,18 +7179,17 @@ def matchs_collectes():
     matches = matches_pagination.items
     
     # Statistiques pour la page
+    collected = stats_service.collected_matches()
     stats = {
-        'total_matches': CollectedMatch.query.count(),
-        'en_attente': CollectedMatch.query.filter_by(statut='en_attente').count(),
-        'en_cours': CollectedMatch.query.filter_by(statut='en_cours').count(),
-        'termine': CollectedMatch.query.filter_by(statut='termine').count(),
-        'annule': CollectedMatch.query.filter_by(statut='annule').count(),
-        'fifa': CollectedMatch.query.filter_by(jeu='FIFA').count(),
-        'efootball': CollectedMatch.query.filter_by(jeu='eFootball').count(),
-        'fc': CollectedMatch.query.filter_by(jeu='FC').count(),
-        'last_24h': CollectedMatch.query.filter(
-            CollectedMatch.created_at >= datetime.datetime.now() - datetime.timedelta(hours=24)
-        ).count()
+        'total_matches': collected['total_matches'],
+        'en_attente': collected['by_status']['en_attente'],
+        'en_cours': collected['by_status']['en_cours'],
+        'termine': collected['by_status']['termine'],
+        'annule': collected['by_status']['annule'],
+        'fifa': collected['by_game']['FIFA'],
+        'efootball': collected['by_game']['eFootball'],
+        'fc': collected['by_game']['FC'],
+        'last_24h': collected['last_24h']
     }
     
     # Activité récente (logs)
@@ -0,0 +1,344 @@
+"""
+📡 FLUX EN DIRECT 1XBET - ORACXPRED
+===================================
+Récupération du flux LiveFeed et publication sous forme de snapshots versionnés.
+Un snapshot est partagé par toutes les requêtes tant que le flux n'a pas changé.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime
+
+import requests
+
+
+FEED_URL = "https://1xbet.com/service-api/LiveFeed/Get1x2_VZip?sports=85&count=40&lng=fr&gr=285&mode=4&country=96&getEmpty=true&virtualSports=true&noFilterBlockEvent=true"
+FEED_TTL_SECONDS = 5  # Durée de vie d'un snapshot avant nouvelle récupération
+FEED_TIMEOUT_SECONDS = 10
+
+# Durée réelle d'un match virtuel (90 minutes FIFA)
+FIFA_MATCH_MINUTES = 7
+PENALTY_MATCH_MINUTES = 1.5
+
+
+class FeedSnapshot:
+    """Snapshot immuable du flux : liste des matchs bruts + version de contenu"""
+
+    def __init__(self, matches, version, changed_at, fetched_at=None):
+        self.matches = matches
+        self.version = version  # Empreinte du contenu (identique tant que le flux ne change pas)
+        self.changed_at = changed_at  # Date (UTC) à laquelle cette version a été vue pour la première fois
+        self.fetched_at = fetched_at or time.time()
+        self._by_id = None
+        self._index = None
+        self._index_built_at = 0
+
+    def get_match(self, match_id):
+        """Retourne le match brut correspondant à l'identifiant 1xbet"""
+        if self._by_id is None:
+            self._by_id = {m.get("I"): m for m in self.matches}
+        return self._by_id.get(match_id)
+
+    def get_index(self):
+        """
+        Champs peu coûteux de chaque match (sport, ligue, statut, score), calculés une fois par snapshot
+
+        Le statut dépend aussi de l'heure : l'index est reconstruit après FEED_TTL_SECONDS
+        même si le contenu du flux n'a pas changé.
+        """
+        if self._index is None or time.time() - self._index_built_at > FEED_TTL_SECONDS:
+            self._index = build_match_index(self.matches)
+            self._index_built_at = time.time()
+        return self._index
+
+    def __repr__(self) -> str:
+        return f"<FeedSnapshot {self.version} - {len(self.matches)} matchs>"
+
+
+def compute_feed_version(matches):
+    """Calcule l'empreinte d'une liste de matchs (indépendante de l'ordre des clés)"""
+    payload = json.dumps(matches, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def fetch_feed_matches():
+    """Récupère la liste brute des matchs depuis l'API 1xbet"""
+    response = requests.get(FEED_URL, timeout=FEED_TIMEOUT_SECONDS)
+    return response.json().get("Value", [])
+
+
+_snapshot_lock = threading.Lock()
+_refresh_lock = threading.Lock()
+_current_snapshot = None
+
+
+def publish_snapshot(matches):
+    """
+    Publie une nouvelle liste de matchs comme snapshot courant
+
+    Si le contenu est identique au snapshot précédent, la version (et donc
+    tous les caches qui en dépendent) est conservée.
+    """
+    global _current_snapshot
+
+    version = compute_feed_version(matches)
+    with _snapshot_lock:
+        previous = _current_snapshot
+        if previous is not None and previous.version == version:
+            previous.fetched_at = time.time()
+            return previous
+        _current_snapshot = FeedSnapshot(matches, version, datetime.utcnow().replace(microsecond=0))
+        return _current_snapshot
+
+
+def get_feed_snapshot(max_age=FEED_TTL_SECONDS):
+    """
+    Retourne le snapshot courant, en le rafraîchissant s'il est plus vieux que max_age
+
+    En cas d'erreur réseau, le dernier snapshot connu est servi (s'il existe).
+    Si un processus collecteur publie le flux (FEED_SHARED_PATH, voir
+    shared_feed.py), son snapshot est lu au lieu d'interroger 1xbet.
+    """
+    snapshot = _current_snapshot
+    if snapshot is not None and time.time() - snapshot.fetched_at < max_age:
+        return snapshot
+
+    shared = _read_shared_snapshot(snapshot)
+    if shared is not None:
+        return shared
+
+    # Un seul thread rafraîchit le flux, les autres servent le snapshot existant
+    if not _refresh_lock.acquire(blocking=snapshot is None):
+        return snapshot
+
+    try:
+        snapshot = _current_snapshot
+        if snapshot is not None and time.time() - snapshot.fetched_at < max_age:
+            return snapshot
+        try:
+            matches = fetch_feed_matches()
+        except Exception as e:
+            if snapshot is not None:
+                print(f"⚠️ Flux 1xbet indisponible, snapshot {snapshot.version} conservé: {e}")
+                return snapshot
+            raise
+        return publish_snapshot(matches)
+    finally:
+        _refresh_lock.release()
+
+
+def _read_shared_snapshot(current):
+    """Snapshot publié par le processus collecteur, None si le partage est inactif ou le fichier périmé"""
+    global _current_snapshot
+
+    from shared_feed import get_reader
+
+    reader = get_reader()
+    if reader is None:
+        return None
+    try:
+        snapshot = reader.get_snapshot(current)
+    except Exception as e:
+        print(f"⚠️ Flux partagé illisible, récupération directe: {e}")
+        return None
+    if snapshot is not None and snapshot is not current:
+        with _snapshot_lock:
+            _current_snapshot = snapshot
+    return snapshot
+
+
+# ========== EXTRACTION DES CHAMPS D'UN MATCH ==========
+
+ODDS_TYPES_1X2 = {1: "1", 2: "2", 3: "X"}
+
+
+def detect_sport(league_name):
+    league = league_name.lower()
+    if any(word in league for word in ["wta", "atp", "tennis"]):
+        return "Tennis"
+    elif any(word in league for word in ["basket", "nbl", "nba", "ipbl"]):
+        return "Basketball"
+    elif "hockey" in league:
+        return "Hockey"
+    elif any(word in league for word in ["tbl", "table"]):
+        return "Table Basketball"
+    elif "cricket" in league:
+        return "Cricket"
+    else:
+        return "Football"
+
+
+def is_penalty_league(league_name):
+    """Ligue de tirs au but (matchs de 1.5 minutes réelles)"""
+    league = (league_name or "").lower()
+    return "penalty" in league or "pen" in league or "shootout" in league
+
+
+def match_duration_minutes(league_name):
+    """Durée réelle d'un match virtuel selon sa ligue"""
+    return PENALTY_MATCH_MINUTES if is_penalty_league(league_name) else FIFA_MATCH_MINUTES
+
+
+def extract_scores(match):
+    """Extrait le score (score1, score2) d'un match brut, 0 par défaut"""
+    fs = match.get("SC", {}).get("FS", {})
+
+    score1 = 0
+    score2 = 0
+    if isinstance(fs, dict):
+        score1 = fs.get("S1", 0) or fs.get("1", 0) or 0
+        score2 = fs.get("S2", 0) or fs.get("2", 0) or 0
+    elif isinstance(fs, list) and len(fs) >= 2:
+        score1 = fs[0] if fs[0] is not None else 0
+        score2 = fs[1] if fs[1] is not None else 0
+
+    try:
+        score1 = int(score1) if score1 is not None else 0
+    except (ValueError, TypeError):
+        score1 = 0
+    try:
+        score2 = int(score2) if score2 is not None else 0
+    except (ValueError, TypeError):
+        score2 = 0
+    return score1, score2
+
+
+def extract_minute(match):
+    """Extrait la minute de jeu (TS en secondes ou T), None si inconnue"""
+    sc = match.get("SC", {})
+    if "TS" in sc and isinstance(sc["TS"], int):
+        return sc["TS"] // 60
+    if "T" in match and isinstance(match["T"], int):
+        return match["T"]
+    return None
+
+
+def extract_start_time(match):
+    """Heure de début (datetime UTC naïf) depuis le timestamp S, None si absente"""
+    match_ts = match.get("S", 0)
+    if not match_ts:
+        return None
+    return datetime.utcfromtimestamp(match_ts)
+
+
+def extract_odds_1x2(match):
+    """Extrait les cotes 1X2 : d'abord dans E (G=1), sinon dans AE"""
+    odds_data = []
+    for o in match.get("E", []):
+        if o.get("G") == 1 and o.get("T") in ODDS_TYPES_1X2 and o.get("C") is not None:
+            odds_data.append({"type": ODDS_TYPES_1X2[o.get("T")], "cote": o.get("C")})
+    if not odds_data:
+        for ae in match.get("AE", []):
+            if ae.get("G") == 1:
+                for o in ae.get("ME", []):
+                    if o.get("T") in ODDS_TYPES_1X2 and o.get("C") is not None:
+                        odds_data.append({"type": ODDS_TYPES_1X2[o.get("T")], "cote": o.get("C")})
+    return odds_data
+
+
+def extract_status(match, minute=None, now=None):
+    """
+    Détermine le statut d'un match FIFA
+
+    Returns:
+        (statut, is_live, is_finished, is_upcoming)
+    """
+    sc = match.get("SC", {})
+    hs = match.get("HS", 0)
+    tn = match.get("TN", "").lower()
+    tns = match.get("TNS", "").lower()
+    cps = sc.get("CPS", "") or ""
+    heure_match = extract_start_time(match)
+    now = now or datetime.utcnow()
+
+    if hs == 3 or "terminé" in tn or "finished" in tns or "final" in cps.lower() or (minute is not None and minute >= 90):
+        return "TERMINÉ", False, True, False
+    if heure_match and heure_match > now:
+        # Match dans le futur - pas encore débuté
+        return "PAS DÉBUTÉ", False, False, True
+    if hs == 1 or "live" in cps.lower() or (minute is not None and minute > 0):
+        return (f"EN COURS ({minute}′)" if minute else "EN COURS"), True, False, False
+    return "PAS DÉBUTÉ", False, False, True
+
+
+def extract_match_state(match):
+    """État léger d'un match (score, minute, statut, cotes) pour la diffusion en direct"""
+    score1, score2 = extract_scores(match)
+    minute = extract_minute(match)
+    statut, is_live, is_finished, is_upcoming = extract_status(match, minute)
+    return {
+        "id": match.get("I"),
+        "team1": match.get("O1", "–"),
+        "team2": match.get("O2", "–"),
+        "league": match.get("LE", "–"),
+        "score1": score1,
+        "score2": score2,
+        "minute": minute,
+        "status": statut,
+        "is_live": is_live,
+        "is_finished": is_finished,
+        "odds": {od["type"]: od["cote"] for od in extract_odds_1x2(match)}
+    }
+
+
+def build_match_index(matches, now=None):
+    """Pré-indexe les champs de filtrage et d'affichage simples de chaque match"""
+    now = now or datetime.utcnow()
+    index = []
+    for match in matches:
+        try:
+            league = match.get("LE", "–")
+            minute = extract_minute(match)
+            statut, is_live, is_finished, is_upcoming = extract_status(match, minute, now)
+            score1, score2 = extract_scores(match)
+            start_time = extract_start_time(match)
+            index.append({
+                "match": match,
+                "id": match.get("I", None),
+                "team1": match.get("O1", "–"),
+                "team2": match.get("O2", "–"),
+                "league": league,
+                "sport": detect_sport(league).strip(),
+                "status": statut,
+                "is_live": is_live,
+                "is_finished": is_finished,
+                "is_upcoming": is_upcoming,
+                "score1": score1,
+                "score2": score2,
+                "datetime": start_time.strftime('%d/%m/%Y %H:%M') if start_time else "–"
+            })
+        except Exception as e:
+            print(f"Erreur lors de l'indexation d'un match: {e}")
+    return index
+
+
+def detect_game(league_name):
+    """Jeu virtuel d'une ligue du flux (FIFA par défaut)"""
+    league = league_name.lower()
+    if "efootball" in league:
+        return "eFootball"
+    if "fc 2" in league or league.startswith("fc "):
+        return "FC"
+    return "FIFA"
+
+
+def normalize_match(match, now=None):
+    """Match brut du flux -> dictionnaire du collecteur (format de MatchDataSource)"""
+    minute = extract_minute(match)
+    statut, is_live, is_finished, is_upcoming = extract_status(match, minute, now)
+    score1, score2 = extract_scores(match)
+    return {
+        "unique_match_id": f"1xbet_{match.get('I')}",
+        "jeu": detect_game(match.get("LE", "")),
+        "equipe_domicile": match.get("O1", "–"),
+        "equipe_exterieur": match.get("O2", "–"),
+        "heure_debut": extract_start_time(match) or now or datetime.utcnow(),
+        "heure_fin": None,
+        "score_domicile": None if is_upcoming else score1,
+        "score_exterieur": None if is_upcoming else score2,
+        "statut": "termine" if is_finished else "en_cours" if is_live else "en_attente",
+        "source_donnees": "1xbet",
+        "ligue": match.get("LE")  # Non stocké, sert à la durée prévue du match (poll_scheduler.py)
+    }
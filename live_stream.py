@@ -0,0 +1,265 @@
+"""
+📺 DIFFUSION EN DIRECT (SSE) - ORACXPRED
+========================================
+Un seul éditeur compare les snapshots successifs du flux et diffuse uniquement
+les changements (score, minute, statut, cotes, décision du Maître) à tous les abonnés.
+Chaque abonné a une file bornée : un client trop lent est déconnecté.
+Un abonné payant qui suit un match reçoit dès la connexion l'état complet,
+décision du Maître comprise (calculée à ce moment si aucun abonné ne la suivait).
+"""
+
+import json
+import queue
+import threading
+import time
+
+from live_feed import get_feed_snapshot, extract_match_state, FEED_TTL_SECONDS
+
+
+SUBSCRIBER_QUEUE_SIZE = 100  # Événements en attente max par client
+KEEPALIVE_SECONDS = 15
+RETRY_MS = 5000
+
+# Champs réservés aux abonnés payants (masqués sur le flux public)
+PRIVATE_FIELDS = ('odds', 'decision_maitre')
+
+
+def format_sse(data, event=None, event_id=None):
+    """Formate un message Server-Sent Events"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event:
+        lines.append(f"event: {event}")
+    payload = json.dumps(data, ensure_ascii=False, default=str)
+    lines.append(f"data: {payload}")
+    return "\n".join(lines) + "\n\n"
+
+
+def compute_changes(old_state, new_state):
+    """Retourne les champs modifiés entre deux états d'un match"""
+    if old_state is None:
+        return dict(new_state)
+    return {k: v for k, v in new_state.items() if old_state.get(k) != v}
+
+
+class MatchEvent:
+    """Changement d'un match, sérialisé une seule fois par variante (publique / complète)"""
+
+    def __init__(self, event_id, event_type, match_id, changes):
+        self.event_id = event_id
+        self.event_type = event_type  # 'update' ou 'removed'
+        self.match_id = match_id
+        data = {'match_id': match_id, 'changes': changes}
+        self.full_payload = format_sse(data, event_type, event_id)
+        public_changes = {k: v for k, v in changes.items() if k not in PRIVATE_FIELDS}
+        if public_changes or event_type != 'update':
+            self.public_payload = format_sse({'match_id': match_id, 'changes': public_changes}, event_type, event_id)
+        else:
+            self.public_payload = None  # Changement de cotes uniquement : rien à publier côté public
+
+
+class Subscriber:
+    """Abonné SSE : file bornée d'événements pour un match ou pour tout le direct"""
+
+    def __init__(self, match_id=None, include_private=False, queue_size=SUBSCRIBER_QUEUE_SIZE):
+        self.match_id = match_id
+        self.include_private = include_private
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.evicted = False
+        self.closed = False
+
+    def wants(self, event):
+        """Vrai si l'événement concerne cet abonné"""
+        return self.match_id is None or self.match_id == event.match_id
+
+    def offer(self, event):
+        """Ajoute un événement sans bloquer ; False si la file est pleine"""
+        payload = event.full_payload if self.include_private else event.public_payload
+        if payload is None:
+            return True
+        try:
+            self.queue.put_nowait(payload)
+            return True
+        except queue.Full:
+            return False
+
+
+class MatchEventPublisher:
+    """Éditeur unique : un calcul par changement, diffusé à N abonnés"""
+
+    def __init__(self, poll_interval=FEED_TTL_SECONDS, queue_size=SUBSCRIBER_QUEUE_SIZE,
+                 decision_provider=None):
+        self.poll_interval = poll_interval
+        self.queue_size = queue_size
+        self.decision_provider = decision_provider  # callable(match brut) -> décision du Maître
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._states = {}
+        self._matches = {}  # Match brut du dernier snapshot (pour la décision d'un nouvel abonné)
+        self._last_version = None
+        self._event_id = 0
+        self._thread = None
+        self.evicted_count = 0
+
+    # ----- Abonnements -----
+
+    def subscribe(self, match_id=None, include_private=False):
+        """Crée un abonné et démarre l'éditeur si nécessaire"""
+        subscriber = Subscriber(match_id, include_private, self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        self.start()
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        """Retire un abonné"""
+        subscriber.closed = True
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def current_states(self, match_id=None, include_private=False):
+        """État courant des matchs (pour l'événement initial d'un nouvel abonné)"""
+        with self._lock:
+            states = [s for mid, s in self._states.items() if match_id is None or mid == match_id]
+        if include_private:
+            return states
+        return [{k: v for k, v in s.items() if k not in PRIVATE_FIELDS} for s in states]
+
+    def ensure_decision(self, match_id):
+        """Calcule la décision du Maître d'un match suivi qui n'en a pas encore (nouvel abonné payant)"""
+        if self.decision_provider is None:
+            return
+        with self._lock:
+            state = self._states.get(match_id)
+            match = self._matches.get(match_id)
+        if state is None or match is None or 'decision_maitre' in state:
+            return
+        try:
+            decision = self.decision_provider(match)
+        except Exception as e:
+            print(f"⚠️ Décision du Maître indisponible pour {match_id}: {e}")
+            return
+        with self._lock:
+            # Snapshot suivant déjà traité : son état (et sa décision) prévaut
+            if self._states.get(match_id) is state:
+                self._states[match_id] = dict(state, decision_maitre=decision)
+
+    # ----- Calcul des changements -----
+
+    def _wants_decision(self, match_id):
+        """La décision du Maître n'est calculée que pour les matchs suivis individuellement par un abonné payant"""
+        with self._lock:
+            return any(s.match_id == match_id and s.include_private for s in self._subscribers)
+
+    def process_snapshot(self, snapshot):
+        """Compare un snapshot au précédent, diffuse et retourne les événements produits"""
+        if snapshot.version == self._last_version:
+            return []
+        self._last_version = snapshot.version
+
+        events = []
+        seen = set()
+        for match in snapshot.matches:
+            match_id = match.get("I")
+            if match_id is None:
+                continue
+            seen.add(match_id)
+            old_state = self._states.get(match_id)
+            new_state = extract_match_state(match)
+
+            moved = old_state is None or any(old_state.get(k) != new_state[k] for k in ('score1', 'score2', 'minute', 'status', 'odds'))
+            wants_decision = self.decision_provider is not None and self._wants_decision(match_id)
+            if wants_decision and (moved or 'decision_maitre' not in old_state):
+                try:
+                    new_state['decision_maitre'] = self.decision_provider(match)
+                except Exception as e:
+                    print(f"⚠️ Décision du Maître indisponible pour {match_id}: {e}")
+            elif not moved and 'decision_maitre' in old_state:
+                new_state['decision_maitre'] = old_state['decision_maitre']
+
+            changes = compute_changes(old_state, new_state)
+            if changes:
+                events.append(self._new_event('update', match_id, changes))
+            with self._lock:
+                self._states[match_id] = new_state
+                self._matches[match_id] = match
+
+        for match_id in list(self._states):
+            if match_id not in seen:
+                with self._lock:
+                    del self._states[match_id]
+                    self._matches.pop(match_id, None)
+                events.append(self._new_event('removed', match_id, {}))
+
+        for event in events:
+            self.dispatch(event)
+        return events
+
+    def _new_event(self, event_type, match_id, changes):
+        self._event_id += 1
+        return MatchEvent(self._event_id, event_type, match_id, changes)
+
+    def dispatch(self, event):
+        """Diffuse un événement ; les abonnés dont la file est pleine sont évincés"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            if subscriber.wants(event) and not subscriber.offer(event):
+                subscriber.evicted = True
+                self.unsubscribe(subscriber)
+                self.evicted_count += 1
+
+    # ----- Boucle de l'éditeur -----
+
+    def start(self):
+        """Démarre le thread de scrutation du flux (une seule instance)"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="match-event-publisher", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            # S'arrête de lui-même quand il n'y a plus d'abonnés ; l'état, qui ne serait plus
+            # suivi, est oublié : le prochain abonné ne reçoit pas d'anciens matchs
+            with self._lock:
+                if not self._subscribers:
+                    self._thread = None
+                    self._states = {}
+                    self._matches = {}
+                    self._last_version = None
+                    return
+            try:
+                self.process_snapshot(get_feed_snapshot(max_age=self.poll_interval))
+            except Exception as e:
+                print(f"⚠️ Erreur éditeur SSE: {e}")
+            time.sleep(self.poll_interval)
+
+    # ----- Flux SSE -----
+
+    def stream(self, subscriber):
+        """Générateur SSE pour un abonné (à servir avec mimetype text/event-stream)"""
+        try:
+            yield f"retry: {RETRY_MS}\n\n"
+            if subscriber.include_private and subscriber.match_id is not None:
+                self.ensure_decision(subscriber.match_id)
+            initial = self.current_states(subscriber.match_id, subscriber.include_private)
+            yield format_sse({'matches': initial}, 'snapshot')
+            while not subscriber.closed:
+                try:
+                    yield subscriber.queue.get(timeout=KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+            if subscriber.evicted:
+                yield format_sse({'reason': 'slow_consumer'}, 'evicted')
+        finally:
+            self.unsubscribe(subscriber)
+
+
+match_publisher = MatchEventPublisher()
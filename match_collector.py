@@ -14,6 +14,8 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 import random
 import logging
+import hashlib
+from collections import OrderedDict
 
 # Configuration du logging
 logging.basicConfig(
@@ -25,19 +27,42 @@ logger = logging.getLogger(__name__)
 # Import des modèles
 try:
     from models import db, CollectedMatch, MatchCollectionLog
-    from prediction_manager import log_action
+    from stats_service import stats_service
+    from sqlalchemy import insert, update
+    from poll_scheduler import PollScheduler
     MODELS_AVAILABLE = True
 except ImportError as e:
     logger.warning(f"Modèles non disponibles: {e}")
     MODELS_AVAILABLE = False
 
 
+UPSERT_CHUNK_SIZE = 500  # Identifiants par requête IN
+FINGERPRINT_MAX_ENTRIES = 5000
+ARCHIVE_SOURCE_PREFIX = "1xbet_"  # Seuls les matchs 1xbet ont un match_id d'archive (ID 1xbet)
+FINGERPRINT_MAX_AGE_SECONDS = 3600  # Réécriture au moins une fois par heure, même sans changement
+
+
+def _determine_gagnant(equipe_domicile, equipe_exterieur, score_domicile, score_exterieur):
+    """Équipe gagnante d'après le score (même règle que CollectedMatch.determine_gagnant)"""
+    if score_domicile is None or score_exterieur is None:
+        return None
+    if score_domicile > score_exterieur:
+        return equipe_domicile
+    elif score_exterieur > score_domicile:
+        return equipe_exterieur
+    else:
+        return "Match nul"
+
+
 class MatchDataSource:
-    """Source de données pour les matchs (API, scraper, ou simulé)"""
+    """Source de données pour les matchs (API, flux 1xbet, enregistrements, ou simulé)"""
     
-    def __init__(self, source_type: str = "simulated"):
+    def __init__(self, source_type: str = "simulated", fixtures_path: Optional[str] = None):
         self.source_type = source_type
         self.base_url = "https://api.example.com/matches"  # URL fictive pour API réelle
+        self.fixtures_path = fixtures_path  # Cycles enregistrés (source "fixtures")
+        self._fixture_cycles = None
+        self._fixture_position = 0
         
     def get_live_matches(self) -> List[Dict]:
         """Récupère les matchs en cours depuis la source"""
@@ -45,6 +70,10 @@ class MatchDataSource:
             return self._generate_simulated_matches()
         elif self.source_type == "api":
             return self._fetch_from_api()
+        elif self.source_type == "1xbet":
+            return self._fetch_from_live_feed()
+        elif self.source_type == "fixtures":
+            return self._replay_fixtures()
         else:
             return []
     
@@ -132,16 +161,101 @@ class MatchDataSource:
         except Exception as e:
             logger.error(f"Exception lors de l'appel API: {e}")
             return []
+    
+    def _fetch_from_live_feed(self) -> List[Dict]:
+        """Matchs du flux 1xbet (snapshot partagé avec le site, voir live_feed.py)"""
+        from live_feed import get_feed_snapshot, normalize_match
+        
+        snapshot = get_feed_snapshot()
+        now = datetime.utcnow()
+        return [normalize_match(match, now) for match in snapshot.matches if match.get("I") is not None]
+    
+    def _replay_fixtures(self) -> List[Dict]:
+        """
+        Rejoue des cycles enregistrés, un par appel (puis recommence au premier)
+        
+        Fichier JSON : liste de cycles, chacun une liste de matchs au format du
+        collecteur, dates au format ISO.
+        """
+        if self._fixture_cycles is None:
+            with open(self.fixtures_path, encoding="utf-8") as f:
+                cycles = json.load(f)
+            for cycle in cycles:
+                for match in cycle:
+                    for field in ("heure_debut", "heure_fin"):
+                        if match.get(field):
+                            match[field] = datetime.fromisoformat(match[field])
+                    match.setdefault("source_donnees", "fixtures")
+            self._fixture_cycles = cycles
+        if not self._fixture_cycles:
+            return []
+        cycle = self._fixture_cycles[self._fixture_position % len(self._fixture_cycles)]
+        self._fixture_position += 1
+        return [dict(match) for match in cycle]
+
+
+def archive_match_id(unique_match_id: str) -> Optional[int]:
+    """match_id de l'archive (matches_archive) d'un match collecté, None s'il n'en a pas"""
+    if not unique_match_id.startswith(ARCHIVE_SOURCE_PREFIX):
+        return None
+    suffix = unique_match_id[len(ARCHIVE_SOURCE_PREFIX):]
+    return int(suffix) if suffix.isdigit() else None
+
+
+def match_fingerprint(match_data: Dict) -> bytes:
+    """Empreinte de l'état d'un match (statut, score, heure de fin)"""
+    heure_fin = match_data.get("heure_fin")
+    state = (match_data["statut"], match_data.get("score_domicile"), match_data.get("score_exterieur"),
+             heure_fin.isoformat() if heure_fin else None)
+    return hashlib.blake2b(repr(state).encode("utf-8"), digest_size=8).digest()
+
+
+class MatchFingerprints:
+    """
+    Dernière empreinte écrite par match (LRU borné, entrées expirées après max_age)
+    
+    Un match dont l'empreinte n'a pas changé est ignoré sans accès à la base ;
+    tout changement de statut, de score ou d'heure de fin est écrit.
+    """
+    
+    def __init__(self, max_entries: int = FINGERPRINT_MAX_ENTRIES, max_age: int = FINGERPRINT_MAX_AGE_SECONDS):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._entries = OrderedDict()  # unique_match_id -> (empreinte, instant d'écriture)
+        self.hits = 0
+        self.misses = 0
+    
+    def unchanged(self, match_id: str, fingerprint: bytes) -> bool:
+        """True si le match a déjà été écrit dans cet état"""
+        entry = self._entries.get(match_id)
+        if entry is None or entry[0] != fingerprint or time.monotonic() - entry[1] > self.max_age:
+            self.misses += 1
+            return False
+        self._entries.move_to_end(match_id)
+        self.hits += 1
+        return True
+    
+    def remember(self, match_id: str, fingerprint: bytes):
+        """Enregistre l'état écrit en base (à appeler après le commit)"""
+        self._entries[match_id] = (fingerprint, time.monotonic())
+        self._entries.move_to_end(match_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def __len__(self):
+        return len(self._entries)
 
 
 class MatchCollector:
     """Collecteur principal de matchs - Cœur du système"""
     
-    def __init__(self, source_type: str = "simulated", check_interval: int = 30):
+    def __init__(self, source_type: str = "simulated", check_interval: int = 30, adaptive: bool = True):
         self.source = MatchDataSource(source_type)
-        self.check_interval = check_interval  # Secondes entre chaque vérification
+        self.check_interval = check_interval  # Secondes entre chaque vérification (intervalle de base si adaptatif)
+        # Délai calculé d'après le calendrier des matchs (serré pendant les matchs, espacé sinon)
+        self.scheduler = PollScheduler(idle_interval=check_interval) if adaptive and MODELS_AVAILABLE else None
         self.running = False
-        self.processed_matches = set()  # Pour éviter les doublons
+        self.fingerprints = MatchFingerprints()  # États déjà écrits : pas de réécriture inutile
         
         logger.info(f"Collecteur initialisé avec source: {source_type}")
         logger.info(f"Intervalle de vérification: {check_interval} secondes")
@@ -156,7 +270,7 @@ class MatchCollector:
         try:
             while self.running:
                 self._collect_and_process_matches()
-                time.sleep(self.check_interval)
+                time.sleep(self._next_poll_delay())
         except KeyboardInterrupt:
             logger.info("Arrêt manuel du collecteur")
         except Exception as e:
@@ -171,172 +285,260 @@ class MatchCollector:
         self.running = False
         logger.info("Signal d'arrêt envoyé au collecteur")
     
+    def _next_poll_delay(self) -> float:
+        """Secondes avant le prochain cycle (fixe sans planificateur)"""
+        if self.scheduler is None:
+            return self.check_interval
+        
+        if self.scheduler.calendar_due():
+            try:
+                self.scheduler.load_calendar()
+            except Exception as e:
+                logger.error(f"Erreur chargement du calendrier des matchs: {e}")
+        delay = self.scheduler.next_poll_delay()
+        logger.info(f"⏰ Prochaine collecte dans {delay:.0f} s ({self.scheduler.live_count()} matchs en cours)")
+        return delay
+    
     def _collect_and_process_matches(self):
         """Collecte et traite les matchs depuis la source"""
         try:
             start_time = time.time()
             matches = self.source.get_live_matches()
-            temps_execution = time.time() - start_time
             
             logger.info(f"📊 {len(matches)} matchs récupérés depuis la source")
             
-            processed_count = 0
-            new_matches = 0
-            updated_matches = 0
-            
-            for match_data in matches:
-                match_id = match_data["unique_match_id"]
-                
-                # Vérifier si le match a déjà été traité récemment
-                if match_id in self.processed_matches:
-                    processed_count += 1
-                    continue
-                
-                # Traiter le match
-                result = self._process_match(match_data)
-                if result == "new":
-                    new_matches += 1
-                elif result == "updated":
-                    updated_matches += 1
-                
-                # Ajouter aux matchs traités
-                self.processed_matches.add(match_id)
-            
-            # Nettoyer les anciens matchs traités (garder 1000 derniers)
-            if len(self.processed_matches) > 1000:
-                self.processed_matches = set(list(self.processed_matches)[-1000:])
-            
-            message = f"Collecte terminée: {new_matches} nouveaux, {updated_matches} mis à jour, {processed_count} déjà traités"
-            logger.info(f"✅ {message}")
-            
-            self._log_collection("collecte_success", message, "info", {
-                "temps_execution": temps_execution,
-                "total_matches": len(matches),
-                "new_matches": new_matches,
-                "updated_matches": updated_matches
-            })
+            return self.process_matches(matches, start_time)
             
         except Exception as e:
             error_msg = f"Erreur lors de la collecte: {e}"
             logger.error(error_msg)
             self._log_collection("erreur", error_msg, "error")
     
+    def process_matches(self, matches: List[Dict], start_time: Optional[float] = None) -> Dict:
+        """
+        Écrit les matchs modifiés d'un cycle (ou d'un lot du collecteur multi-sources)
+        
+        Returns:
+            Résultat de _upsert_matches, plus 'skipped' (matchs à l'empreinte inchangée)
+        """
+        start_time = start_time or time.time()
+        skipped_count = 0
+        to_process = {}
+        
+        for match_data in matches:
+            match_id = match_data["unique_match_id"]
+            fingerprint = match_fingerprint(match_data)
+            
+            # État déjà écrit en base : aucun accès à la base pour ce match
+            if self.fingerprints.unchanged(match_id, fingerprint):
+                skipped_count += 1
+                continue
+            
+            to_process[match_id] = (match_data, fingerprint)
+        
+        # Toutes les créations et mises à jour du cycle en une transaction
+        result = self._upsert_matches([match_data for match_data, _ in to_process.values()])
+        result["skipped"] = skipped_count
+        temps_execution = time.time() - start_time
+        
+        # Empreintes retenues seulement après un commit réussi
+        if not result['errors']:
+            for match_id, (_, fingerprint) in to_process.items():
+                self.fingerprints.remember(match_id, fingerprint)
+        
+        if self.scheduler is not None:
+            self.scheduler.observe(matches, bool(result['new'] or result['updated']))
+        
+        result["settled"] = self._settle_finished(result["finished"])
+        
+        message = (f"Collecte terminée: {result['new']} nouveaux, {result['updated']} mis à jour, "
+                   f"{skipped_count} inchangés ignorés")
+        logger.info(f"✅ {message}")
+        
+        # Un seul log récapitulatif par cycle (débuts et fins de matchs inclus)
+        self._log_collection("collecte_success", message, "info" if not result['errors'] else "warning", {
+            "temps_execution": temps_execution,
+            "total_matches": len(matches),
+            "new_matches": result['new'],
+            "updated_matches": result['updated'],
+            "unchanged_matches": result['unchanged'],
+            "skipped_matches": skipped_count,
+            "matches_started": result['started'],
+            "matches_ended": result['ended'],
+            "matches_settled": result['settled'],
+            "errors": result['errors']
+        })
+        return result
+    
     def _process_match(self, match_data: Dict) -> str:
         """Traite un match individuel (création ou mise à jour)"""
         if not MODELS_AVAILABLE:
             logger.warning(f"Modeles non disponibles, traitement simulé: {match_data['unique_match_id']}")
             return "simulated"
         
-        try:
-            # Vérifier si le match existe déjà
-            existing_match = CollectedMatch.query.filter_by(
-                unique_match_id=match_data["unique_match_id"]
-            ).first()
-            
-            if existing_match:
-                # Mettre à jour le match existant
-                return self._update_existing_match(existing_match, match_data)
-            else:
-                # Créer un nouveau match
-                return self._create_new_match(match_data)
-                
-        except Exception as e:
-            logger.error(f"Erreur traitement match {match_data['unique_match_id']}: {e}")
-            return "error"
+        result = self._upsert_matches([match_data])
+        for status in ("new", "updated", "unchanged"):
+            if result[status]:
+                return status
+        return "error"
     
-    def _create_new_match(self, match_data: Dict) -> str:
-        """Crée un nouveau match dans la base de données"""
+    @staticmethod
+    def _diff_match(existing: Dict, match_data: Dict) -> Dict:
+        """
+        Champs à mettre à jour pour un match existant (dict vide si rien n'a changé)
+        
+        Le statut est toujours repris de la source ; heure de fin et scores seulement s'ils sont fournis.
+        """
+        changes = {}
+        if existing["statut"] != match_data["statut"]:
+            changes["statut"] = match_data["statut"]
+        
+        if match_data.get("heure_fin") and existing["heure_fin"] != match_data["heure_fin"]:
+            changes["heure_fin"] = match_data["heure_fin"]
+        
+        for field in ("score_domicile", "score_exterieur"):
+            if match_data.get(field) is not None and existing[field] != match_data[field]:
+                changes[field] = match_data[field]
+        
+        # Recalculer le gagnant si le match est terminé
+        statut = changes.get("statut", existing["statut"])
+        score_domicile = changes.get("score_domicile", existing["score_domicile"])
+        score_exterieur = changes.get("score_exterieur", existing["score_exterieur"])
+        if statut == "termine" and score_domicile is not None:
+            gagnant = _determine_gagnant(existing["equipe_domicile"], existing["equipe_exterieur"],
+                                         score_domicile, score_exterieur)
+            if existing["equipe_gagnante"] != gagnant:
+                changes["equipe_gagnante"] = gagnant
+        return changes
+    
+    def _upsert_matches(self, matches: List[Dict]) -> Dict:
+        """
+        Crée ou met à jour les matchs d'un cycle en une seule transaction
+        
+        Une requête IN (par blocs) charge les matchs existants, les différences sont
+        calculées en mémoire, puis insertions et mises à jour groupées et un seul commit.
+        
+        Returns:
+            {'new', 'updated', 'unchanged', 'errors'}, listes 'started' / 'ended' (ID des matchs)
+            et 'finished' : (ID, score domicile, score extérieur) des matchs passés à "termine"
+        """
+        result = {"new": 0, "updated": 0, "unchanged": 0, "errors": 0, "started": [], "ended": [], "finished": []}
+        if not MODELS_AVAILABLE:
+            logger.info(f"[COLLECTION] Modèles non disponibles, {len(matches)} matchs ignorés")
+            return result
+        
+        # Un match vu plusieurs fois dans le cycle : la dernière version l'emporte
+        incoming = {match_data["unique_match_id"]: match_data for match_data in matches}
+        if not incoming:
+            return result
+        
+        columns = [CollectedMatch.id, CollectedMatch.unique_match_id, CollectedMatch.statut, CollectedMatch.heure_fin,
+                   CollectedMatch.score_domicile, CollectedMatch.score_exterieur, CollectedMatch.equipe_gagnante,
+                   CollectedMatch.equipe_domicile, CollectedMatch.equipe_exterieur, CollectedMatch.jeu,
+                   CollectedMatch.source_donnees, CollectedMatch.created_at]
+        ids = list(incoming)
+        existing = {}
         try:
-            match = CollectedMatch(
-                unique_match_id=match_data["unique_match_id"],
-                jeu=match_data["jeu"],
-                equipe_domicile=match_data["equipe_domicile"],
-                equipe_exterieur=match_data["equipe_exterieur"],
-                heure_debut=match_data["heure_debut"],
-                heure_fin=match_data.get("heure_fin"),
-                score_domicile=match_data.get("score_domicile"),
-                score_exterieur=match_data.get("score_exterieur"),
-                statut=match_data["statut"],
-                source_donnees=match_data.get("source_donnees", "unknown"),
-                collecte_par="systeme_auto"
-            )
-            
-            # Déterminer le gagnant si le match est terminé
-            if match.statut == "termine" and match.score_domicile is not None:
-                match.equipe_gagnante = match.determine_gagnant()
-            
-            db.session.add(match)
+            for start in range(0, len(ids), UPSERT_CHUNK_SIZE):
+                rows = db.session.query(*columns).filter(
+                    CollectedMatch.unique_match_id.in_(ids[start:start + UPSERT_CHUNK_SIZE])
+                ).all()
+                for row in rows:
+                    existing[row.unique_match_id] = row._asdict()
+            
+            now = datetime.utcnow()
+            inserts = []
+            updates = []
+            status_changes = []
+            for match_id, match_data in incoming.items():
+                current = existing.get(match_id)
+                if current is None:
+                    inserts.append({
+                        "unique_match_id": match_id,
+                        "jeu": match_data["jeu"],
+                        "equipe_domicile": match_data["equipe_domicile"],
+                        "equipe_exterieur": match_data["equipe_exterieur"],
+                        "heure_debut": match_data["heure_debut"],
+                        "heure_fin": match_data.get("heure_fin"),
+                        "score_domicile": match_data.get("score_domicile"),
+                        "score_exterieur": match_data.get("score_exterieur"),
+                        # Déterminer le gagnant si le match est terminé
+                        "equipe_gagnante": _determine_gagnant(
+                            match_data["equipe_domicile"], match_data["equipe_exterieur"],
+                            match_data.get("score_domicile"), match_data.get("score_exterieur")
+                        ) if match_data["statut"] == "termine" and match_data.get("score_domicile") is not None else None,
+                        "statut": match_data["statut"],
+                        "source_donnees": match_data.get("source_donnees", "unknown"),
+                        "collecte_par": "systeme_auto",
+                        "timestamp_enregistrement": now,
+                        "created_at": now,
+                        "updated_at": now,
+                    })
+                    if match_data["statut"] == "termine" and match_data.get("score_domicile") is not None:
+                        result["finished"].append((match_id, match_data["score_domicile"],
+                                                   match_data.get("score_exterieur")))
+                    continue
+                
+                changes = self._diff_match(current, match_data)
+                if not changes:
+                    result["unchanged"] += 1
+                    continue
+                updates.append({"id": current["id"], "updated_at": now, **changes})
+                if "statut" in changes:
+                    status_changes.append((current, changes["statut"]))
+                    # Débuts et fins de matchs, repris dans le log récapitulatif du cycle
+                    if current["statut"] == "en_attente" and changes["statut"] == "en_cours":
+                        result["started"].append(match_id)
+                    elif current["statut"] == "en_cours" and changes["statut"] == "termine":
+                        result["ended"].append(match_id)
+                    if changes["statut"] == "termine":
+                        score_domicile = changes.get("score_domicile", current["score_domicile"])
+                        if score_domicile is not None:
+                            result["finished"].append((match_id, score_domicile,
+                                                       changes.get("score_exterieur", current["score_exterieur"])))
+            
+            if inserts:
+                db.session.execute(insert(CollectedMatch), inserts)
+            if updates:
+                db.session.execute(update(CollectedMatch), updates)
             db.session.commit()
             
-            logger.info(f"🆕 Nouveau match créé: {match.unique_match_id} - {match.equipe_domicile} vs {match.equipe_exterieur}")
-            
-            # Logger l'action
-            if MODELS_AVAILABLE:
-                log_action("match_collecte", f"Nouveau match collecté: {match.unique_match_id}", {
-                    "match_id": match.unique_match_id,
-                    "equipes": f"{match.equipe_domicile} vs {match.equipe_exterieur}",
-                    "statut": match.statut
-                })
-            
-            return "new"
-            
         except Exception as e:
             db.session.rollback()
-            logger.error(f"Erreur création match: {e}")
-            return "error"
+            logger.error(f"Erreur écriture groupée des matchs: {e}")
+            result["errors"] = len(incoming)
+            return result
+        
+        result["new"] = len(inserts)
+        result["updated"] = len(updates)
+        for row in inserts:
+            stats_service.match_created(row["statut"], row["jeu"], row["source_donnees"], now)
+        for current, new_statut in status_changes:
+            stats_service.match_status_changed(current["statut"], new_statut, current["jeu"],
+                                               current["source_donnees"], current["created_at"])
+        return result
     
-    def _update_existing_match(self, match: CollectedMatch, match_data: Dict) -> str:
-        """Met à jour un match existant"""
+    def _settle_finished(self, finished: List[Tuple]) -> List[int]:
+        """
+        Règle en un lot les matchs archivés terminés pendant le cycle (archive_manager.settle_matches)
+        
+        Returns:
+            match_id d'archive réglés
+        """
+        results = []
+        for match_id, score_domicile, score_exterieur in finished:
+            archive_id = archive_match_id(match_id)
+            if archive_id is not None and score_exterieur is not None:
+                results.append((archive_id, score_domicile, score_exterieur))
+        if not results:
+            return []
+        
         try:
-            # Vérifier si les données ont changé
-            has_changes = False
-            
-            if match.statut != match_data["statut"]:
-                old_statut = match.statut
-                match.statut = match_data["statut"]
-                has_changes = True
-                
-                # Logger les changements de statut importants
-                if old_statut == "en_attente" and match_data["statut"] == "en_cours":
-                    self._log_collection("detection_start", f"Match commencé: {match.unique_match_id}", "info", {
-                        "match_id": match.unique_match_id
-                    })
-                elif old_statut == "en_cours" and match_data["statut"] == "termine":
-                    self._log_collection("detection_end", f"Match terminé: {match.unique_match_id}", "info", {
-                        "match_id": match.unique_match_id
-                    })
-            
-            # Mettre à jour les autres champs
-            if match_data.get("heure_fin") and match.heure_fin != match_data["heure_fin"]:
-                match.heure_fin = match_data["heure_fin"]
-                has_changes = True
-            
-            if match_data.get("score_domicile") is not None and match.score_domicile != match_data["score_domicile"]:
-                match.score_domicile = match_data["score_domicile"]
-                has_changes = True
-            
-            if match_data.get("score_exterieur") is not None and match.score_exterieur != match_data["score_exterieur"]:
-                match.score_exterieur = match_data["score_exterieur"]
-                has_changes = True
-            
-            # Recalculer le gagnant si le match est terminé
-            if match.statut == "termine" and match.score_domicile is not None:
-                new_gagnant = match.determine_gagnant()
-                if match.equipe_gagnante != new_gagnant:
-                    match.equipe_gagnante = new_gagnant
-                    has_changes = True
-            
-            if has_changes:
-                db.session.commit()
-                logger.info(f"🔄 Match mis à jour: {match.unique_match_id} - Nouveau statut: {match.statut}")
-                return "updated"
-            else:
-                return "unchanged"
-                
+            from archive_manager import settle_matches
+            return settle_matches(results)["settled"]
         except Exception as e:
-            db.session.rollback()
-            logger.error(f"Erreur mise à jour match: {e}")
-            return "error"
+            logger.error(f"Erreur règlement des matchs terminés: {e}")
+            return []
     
     def _log_collection(self, action_type: str, message: str, severity: str = "info", extra_data: Dict = None):
         """Enregistre un log de collecte"""
@@ -366,26 +568,15 @@ class MatchCollector:
             return {"error": "Modèles non disponibles"}
         
         try:
-            stats = {}
-            
-            # Total des matchs collectés
-            stats["total_matches"] = CollectedMatch.query.count()
-            
-            # Matchs par statut
-            stats["by_status"] = {}
-            for status in ["en_attente", "en_cours", "termine", "annule"]:
-                count = CollectedMatch.query.filter_by(statut=status).count()
-                stats["by_status"][status] = count
-            
-            # Matchs par jeu
-            stats["by_game"] = {}
-            games = db.session.query(CollectedMatch.jeu, db.func.count(CollectedMatch.id)).group_by(CollectedMatch.jeu).all()
-            for game, count in games:
-                stats["by_game"][game] = count
-            
-            # Matchs des dernières 24h
+            # Total, par statut, par jeu et dernières 24h (une requête groupée, en cache)
+            collected = stats_service.collected_matches()
+            stats = {
+                "total_matches": collected["total_matches"],
+                "by_status": collected["by_status"],
+                "by_game": {game: count for game, count in collected["by_game"].items() if count},
+                "last_24h": collected["last_24h"]
+            }
             yesterday = datetime.now() - timedelta(days=1)
-            stats["last_24h"] = CollectedMatch.query.filter(CollectedMatch.created_at >= yesterday).count()
             
             # Logs récents
             recent_logs = MatchCollectionLog.query.filter(
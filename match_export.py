@@ -0,0 +1,164 @@
+"""
+📤 EXPORT EN FLUX DES MATCHS COLLECTÉS - ORACXPRED
+==================================================
+Lecture par blocs avec pagination par clé (created_at, id) au lieu d'un
+.all() : chaque bloc est une requête courte sur l'index, la mémoire reste
+constante et le premier octet part avant la lecture de la dernière ligne.
+Formats CSV et NDJSON, compression gzip optionnelle à la volée.
+"""
+
+import csv
+import io
+import json
+import zlib
+from datetime import datetime, timedelta
+
+from sqlalchemy import tuple_
+
+from models import db, CollectedMatch
+
+
+EXPORT_CHUNK_SIZE = 1000
+EXPORT_BUFFER_BYTES = 64 * 1024  # Taille des morceaux envoyés au client
+
+# (en-tête CSV, clé NDJSON, colonne)
+EXPORT_COLUMNS = [
+    ('ID', 'unique_match_id', CollectedMatch.unique_match_id),
+    ('Jeu', 'jeu', CollectedMatch.jeu),
+    ('Equipe Domicile', 'equipe_domicile', CollectedMatch.equipe_domicile),
+    ('Equipe Exterieur', 'equipe_exterieur', CollectedMatch.equipe_exterieur),
+    ('Score Domicile', 'score_domicile', CollectedMatch.score_domicile),
+    ('Score Exterieur', 'score_exterieur', CollectedMatch.score_exterieur),
+    ('Equipe Gagnante', 'equipe_gagnante', CollectedMatch.equipe_gagnante),
+    ('Statut', 'statut', CollectedMatch.statut),
+    ('Heure Debut', 'heure_debut', CollectedMatch.heure_debut),
+    ('Heure Fin', 'heure_fin', CollectedMatch.heure_fin),
+    ('Source', 'source_donnees', CollectedMatch.source_donnees),
+    ('Date Creation', 'created_at', CollectedMatch.created_at),
+]
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+}
+
+
+def parse_export_filters(args):
+    """
+    Lit les filtres d'export depuis les paramètres de requête
+
+    jeu, statut, date_from et date_to (AAAA-MM-JJ, date_to incluse).
+    Lève ValueError si une date est invalide.
+    """
+    filters = {}
+    for name in ('jeu', 'statut'):
+        value = args.get(name)
+        if value and value != 'all':
+            filters[name] = value
+    if args.get('date_from'):
+        filters['date_from'] = datetime.strptime(args['date_from'], '%Y-%m-%d')
+    if args.get('date_to'):
+        filters['date_to'] = datetime.strptime(args['date_to'], '%Y-%m-%d') + timedelta(days=1)
+    return filters
+
+
+def iter_match_rows(filters=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Parcourt les matchs collectés du plus récent au plus ancien, bloc par bloc
+
+    Yields:
+        Tuples de valeurs dans l'ordre de EXPORT_COLUMNS
+    """
+    filters = filters or {}
+    columns = [column for _, _, column in EXPORT_COLUMNS]
+    base = db.session.query(CollectedMatch.id, *columns)
+    if 'jeu' in filters:
+        base = base.filter(CollectedMatch.jeu == filters['jeu'])
+    if 'statut' in filters:
+        base = base.filter(CollectedMatch.statut == filters['statut'])
+    if 'date_from' in filters:
+        base = base.filter(CollectedMatch.created_at >= filters['date_from'])
+    if 'date_to' in filters:
+        base = base.filter(CollectedMatch.created_at < filters['date_to'])
+    base = base.order_by(CollectedMatch.created_at.desc(), CollectedMatch.id.desc())
+
+    last = None
+    while True:
+        query = base
+        if last is not None:
+            # Comparaison de ligne (created_at, id) : reprise directe dans l'index
+            query = query.filter(tuple_(CollectedMatch.created_at, CollectedMatch.id) < tuple_(*last))
+        rows = query.limit(chunk_size).all()
+        if not rows:
+            return
+        for row in rows:
+            yield tuple(row[1:])
+        last = (rows[-1].created_at, rows[-1].id)
+        if len(rows) < chunk_size:
+            return
+
+
+def _format_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def iter_csv(rows):
+    """Lignes CSV encodées en UTF-8 (en-tête puis une ligne par match)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([header for header, _, _ in EXPORT_COLUMNS])
+    for row in rows:
+        writer.writerow([_format_value(value) for value in row])
+        if buffer.tell() >= EXPORT_BUFFER_BYTES:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+
+def iter_ndjson(rows):
+    """Un objet JSON par ligne"""
+    keys = [key for _, key, _ in EXPORT_COLUMNS]
+    parts = []
+    size = 0
+    for row in rows:
+        line = json.dumps(dict(zip(keys, (v.isoformat() if isinstance(v, datetime) else v for v in row))),
+                          ensure_ascii=False) + '\n'
+        parts.append(line)
+        size += len(line)
+        if size >= EXPORT_BUFFER_BYTES:
+            yield ''.join(parts).encode('utf-8')
+            parts = []
+            size = 0
+    yield ''.join(parts).encode('utf-8')
+
+
+def iter_gzip(chunks):
+    """Compresse un flux d'octets au format gzip, morceau par morceau"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31 = en-tête gzip
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_matches(fmt='csv', compress=False, filters=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Générateur d'export des matchs collectés
+
+    Returns:
+        (générateur d'octets, type MIME, extension du fichier)
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Format d'export inconnu: {fmt}")
+    mimetype, extension = EXPORT_FORMATS[fmt]
+    rows = iter_match_rows(filters, chunk_size)
+    stream = iter_csv(rows) if fmt == 'csv' else iter_ndjson(rows)
+    if compress:
+        return iter_gzip(stream), 'application/gzip', extension + '.gz'
+    return stream, mimetype, extension
@@ -0,0 +1,85 @@
+"""
+🗂️ MIGRATION DES INDEX COMPOSITES
+=================================
+Ajoute aux bases existantes les index déclarés dans models.py pour les
+requêtes fréquentes (db.create_all() ne crée pas les index des tables qui
+existent déjà), puis met à jour les statistiques de l'optimiseur (ANALYZE).
+"""
+
+from flask import Flask
+import sqlite3
+import os
+
+
+# (nom, table, colonnes) - index de models.py, concordance vérifiée par test_query_plans.py
+COMPOSITE_INDEXES = [
+    ('ix_predictions_match_id_consensus_type', 'predictions', ('match_id', 'consensus_type')),
+    ('ix_user_subscriptions_user_active_expires', 'user_subscriptions', ('user_id', 'is_active', 'expires_at')),
+    ('ix_user_prediction_access_user_date', 'user_prediction_access', ('user_id', 'access_date', 'prediction_id')),
+    ('ix_notifications_user_read_created', 'notifications', ('user_id', 'is_read', 'created_at')),
+    ('ix_notifications_global_created', 'notifications', ('is_global', 'created_at')),
+    ('ix_collected_matches_statut_created', 'collected_matches', ('statut', 'created_at')),
+    ('ix_collected_matches_jeu_created', 'collected_matches', ('jeu', 'created_at')),
+    ('ix_collected_matches_created_at', 'collected_matches', ('created_at',)),
+    ('ix_system_logs_created_at', 'system_logs', ('created_at',)),
+]
+
+
+def create_composite_indexes(cursor):
+    """
+    Crée les index manquants sur une connexion sqlite3
+
+    Les tables absentes sont ignorées : db.create_all() les créera avec leurs index.
+
+    Returns:
+        Liste des index créés
+    """
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
+    tables = {row[0] for row in cursor.fetchall()}
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='index'")
+    existing = {row[0] for row in cursor.fetchall()}
+
+    created = []
+    for name, table, columns in COMPOSITE_INDEXES:
+        if table not in tables or name in existing:
+            continue
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})")
+        created.append(name)
+
+    if created:
+        # Statistiques à jour pour que l'optimiseur choisisse les nouveaux index
+        cursor.execute("ANALYZE")
+    return created
+
+
+def migrate_indexes(db_path):
+    """Ajoute les index composites à une base SQLite existante"""
+    if not os.path.exists(db_path):
+        print("✅ Base de données n'existe pas encore, les index seront créés avec les tables")
+        return []
+
+    conn = sqlite3.connect(db_path)
+    try:
+        created = create_composite_indexes(conn.cursor())
+        conn.commit()
+    finally:
+        conn.close()
+
+    for name in created:
+        print(f"➕ Index '{name}' créé")
+    print(f"✅ Index composites vérifiés ({len(created)} créés)")
+    return created
+
+
+if __name__ == "__main__":
+    # Application Flask minimale pour résoudre le chemin de la base (instance_path)
+    app = Flask(__name__)
+    db_uri = os.getenv("DATABASE_URL", "sqlite:///oracxpred.db")
+    if not db_uri.startswith("sqlite:///"):
+        print("❌ Migration supportée uniquement pour SQLite")
+    else:
+        db_path = db_uri.replace("sqlite:///", "")
+        if not os.path.isabs(db_path):
+            db_path = os.path.join(app.instance_path, db_path)
+        print("🗂️ Migration des index composites...\n")
+        migrate_indexes(db_path)
@@ -107,6 +107,9 @@ class User(db.Model):
 class Prediction(db.Model):
     """Prédictions générées par l'IA pour les matchs"""
     __tablename__ = "predictions"
+    __table_args__ = (
+        db.Index('ix_predictions_match_id_consensus_type', 'match_id', 'consensus_type'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     match_id = db.Column(db.Integer, nullable=False, index=True)  # ID du match depuis l'API
@@ -218,7 +221,7 @@ class SystemLog(db.Model):
     severity = db.Column(db.String(20), default='info')  # info, warning, error, critical
     extra_data = db.Column(db.Text, nullable=True)  # JSON pour données supplémentaires (renommé de metadata car réservé SQLAlchemy)
     ip_address = db.Column(db.String(45), nullable=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
 
     def __repr__(self) -> str:
         return f"<SystemLog {self.action_type} - {self.created_at}>"
@@ -345,6 +348,36 @@ class ModelPerformance(db.Model):
         return f"<ModelPerformance {self.date_debut.date()} - {self.date_fin.date()} - {self.taux_reussite}%>"
 
 
+class PerformanceBucket(db.Model):
+    """Compteurs de performance par jour de finalisation, votes des modules et type de consensus"""
+    __tablename__ = "performance_buckets"
+    __table_args__ = (
+        db.UniqueConstraint('day', 'consensus_type', 'vote_statistique', 'vote_cotes', 'vote_simulation',
+                            'vote_forme', 'consensus', name='uq_performance_buckets_key'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    
+    # Clé du compartiment
+    day = db.Column(db.Date, nullable=False, index=True)  # Jour de finalisation (UTC)
+    consensus_type = db.Column(db.String(50), nullable=False)  # 1X2 ou alternatif
+    vote_statistique = db.Column(db.Boolean, nullable=False, default=False)
+    vote_cotes = db.Column(db.Boolean, nullable=False, default=False)
+    vote_simulation = db.Column(db.Boolean, nullable=False, default=False)
+    vote_forme = db.Column(db.Boolean, nullable=False, default=False)
+    consensus = db.Column(db.Boolean, nullable=False, default=False)
+    
+    # Compteurs (sommes, pour dériver taux et moyennes de n'importe quelle fenêtre)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    correctes = db.Column(db.Integer, nullable=False, default=0)
+    somme_confiance = db.Column(db.Float, nullable=False, default=0.0)
+    somme_probabilite = db.Column(db.Float, nullable=False, default=0.0)
+    somme_ecart = db.Column(db.Float, nullable=False, default=0.0)
+    
+    def __repr__(self) -> str:
+        return f"<PerformanceBucket {self.day} {self.consensus_type} - {self.correctes}/{self.total}>"
+
+
 class AnomalyLog(db.Model):
     """Logs d'anomalies détectées - Pour analyse et amélioration"""
     __tablename__ = "anomaly_logs"
@@ -405,6 +438,9 @@ class SubscriptionPlan(db.Model):
 class UserSubscription(db.Model):
     """Abonnements actifs des utilisateurs"""
     __tablename__ = "user_subscriptions"
+    __table_args__ = (
+        db.Index('ix_user_subscriptions_user_active_expires', 'user_id', 'is_active', 'expires_at'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
@@ -436,6 +472,9 @@ class UserSubscription(db.Model):
 class UserPredictionAccess(db.Model):
     """Suivi des accès aux prédictions par utilisateur (limitation par plan)"""
     __tablename__ = "user_prediction_access"
+    __table_args__ = (
+        db.Index('ix_user_prediction_access_user_date', 'user_id', 'access_date', 'prediction_id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
@@ -450,6 +489,10 @@ class UserPredictionAccess(db.Model):
 class Notification(db.Model):
     """Système de notifications (globale ou ciblée)"""
     __tablename__ = "notifications"
+    __table_args__ = (
+        db.Index('ix_notifications_user_read_created', 'user_id', 'is_read', 'created_at'),
+        db.Index('ix_notifications_global_created', 'is_global', 'created_at'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     
@@ -482,6 +525,33 @@ class Notification(db.Model):
         return f"<Notification {self.title} - {'global' if self.is_global else f'user:{self.user_id}'}>"
 
 
+class NotificationRead(db.Model):
+    """Accusés de lecture des notifications globales (une ligne par utilisateur qui l'a lue)"""
+    __tablename__ = "notification_reads"
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'notification_id', name='uq_notification_reads_user_notification'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    notification_id = db.Column(db.Integer, db.ForeignKey('notifications.id'), nullable=False, index=True)
+    read_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    def __repr__(self) -> str:
+        return f"<NotificationRead user:{self.user_id} notification:{self.notification_id}>"
+
+
+class InboxVersion(db.Model):
+    """Version des boîtes de réception (ETag du polling), partagée entre les processus"""
+    __tablename__ = "inbox_versions"
+
+    scope = db.Column(db.Integer, primary_key=True, autoincrement=False)  # ID utilisateur, 0 = notifications globales
+    version = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self) -> str:
+        return f"<InboxVersion scope:{self.scope} v{self.version}>"
+
+
 class PersistentSession(db.Model):
     """Sessions persistantes pour reconnexion automatique après redémarrage serveur"""
     __tablename__ = "persistent_sessions"
@@ -558,6 +628,10 @@ class PredictionSchedule(db.Model):
 class CollectedMatch(db.Model):
     """Matchs collectés en temps réel - Base de données vivante pour ORACXPRED"""
     __tablename__ = "collected_matches"
+    __table_args__ = (
+        db.Index('ix_collected_matches_statut_created', 'statut', 'created_at'),
+        db.Index('ix_collected_matches_jeu_created', 'jeu', 'created_at'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     
@@ -587,7 +661,7 @@ class CollectedMatch(db.Model):
     collecte_par = db.Column(db.String(50), default='systeme_auto')  # système_auto, admin
     
     # Traçabilité
-    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)  # Tri et export par date
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     
     def to_dict(self):
@@ -0,0 +1,159 @@
+"""
+🔔 NOTIFICATIONS - ORACXPRED
+============================
+Une notification globale est une seule ligne (user_id = None, is_global = True),
+quel que soit le nombre d'utilisateurs. La lecture par un utilisateur est
+enregistrée dans notification_reads ; les notifications ciblées gardent leur
+champ is_read. Comme l'ancienne diffusion (une ligne par utilisateur approuvé
+et actif au moment de l'envoi), une notification globale ne concerne que les
+comptes approuvés, actifs et inscrits avant sa création.
+
+Chaque boîte de réception a un numéro de version dans la table inbox_versions,
+incrémenté dans la transaction de la création ou de la lecture : tous les
+processus web voient le même ETag, et il survit aux redémarrages. Le polling
+répond 304 après une seule lecture par clé primaire tant qu'il ne change pas.
+"""
+
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import and_, exists, or_, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from models import db, Notification, NotificationRead, User, InboxVersion
+
+
+GLOBAL_INBOX_SCOPE = 0  # Version des notifications globales (les ID utilisateur commencent à 1)
+INBOX_POLL_SECONDS = 1  # Relecture des versions pendant une attente longue (écritures des autres processus)
+
+
+def bump_inbox_version(user_id=None):
+    """Incrémente la version d'une boîte (user_id None = notifications globales), dans la transaction en cours"""
+    table = InboxVersion.__table__
+    stmt = sqlite_insert(table).values(scope=GLOBAL_INBOX_SCOPE if user_id is None else user_id, version=1)
+    stmt = stmt.on_conflict_do_update(index_elements=['scope'], set_={'version': table.c.version + 1})
+    db.session.execute(stmt)
+
+
+def create_notification(title, message, created_by, user_id=None, priority='normal',
+                        notification_type='info', display_duration=5000):
+    """
+    Crée une notification ciblée (user_id) ou globale (user_id None) : une seule insertion
+
+    Returns:
+        Notification (non commitée)
+    """
+    notification = Notification(
+        user_id=user_id,
+        is_global=user_id is None,
+        title=title,
+        message=message,
+        priority=priority,
+        notification_type=notification_type,
+        display_duration=display_duration,
+        created_by=created_by
+    )
+    db.session.add(notification)
+    bump_inbox_version(user_id)
+    return notification
+
+
+def global_audience_filter(user_id_column):
+    """Condition SQL : l'utilisateur fait partie du public d'une notification globale"""
+    return exists().where(and_(
+        User.id == user_id_column,
+        User.is_approved == True,
+        User.is_active == True,
+        User.created_at <= Notification.created_at
+    ))
+
+
+def unread_filter(user_id):
+    """Condition SQL : notifications non lues par l'utilisateur (ciblées ou globales)"""
+    already_read = exists().where(and_(
+        NotificationRead.user_id == user_id,
+        NotificationRead.notification_id == Notification.id
+    ))
+    return or_(
+        and_(Notification.user_id == user_id, Notification.is_read == False),
+        and_(Notification.is_global == True, Notification.user_id.is_(None),
+             global_audience_filter(user_id), ~already_read)
+    )
+
+
+def get_unread_notifications(user_id, limit=50, since_id=None):
+    """Notifications non lues de l'utilisateur, les plus récentes d'abord (since_id : plus récentes que ce curseur)"""
+    query = Notification.query.filter(unread_filter(user_id))
+    if since_id:
+        query = query.filter(Notification.id > since_id)
+    return query.order_by(
+        Notification.created_at.desc(), Notification.id.desc()
+    ).limit(limit).all()
+
+
+def mark_as_read(notification, user_id):
+    """
+    Marque une notification comme lue par l'utilisateur (à commiter par l'appelant)
+
+    Returns:
+        False si la notification ne concerne pas l'utilisateur
+    """
+    if notification.user_id is None and notification.is_global:
+        already_read = db.session.query(NotificationRead.id).filter_by(
+            user_id=user_id, notification_id=notification.id
+        ).first()
+        if not already_read:
+            db.session.add(NotificationRead(user_id=user_id, notification_id=notification.id))
+            bump_inbox_version(user_id)
+        return True
+
+    if notification.user_id != user_id:
+        return False
+    if not notification.is_read:
+        bump_inbox_version(user_id)
+    notification.is_read = True
+    notification.read_at = datetime.utcnow()
+    return True
+
+
+class InboxVersions:
+    """
+    ETag des boîtes de réception, lu dans la table inbox_versions
+
+    La version d'un utilisateur combine la version globale (notifications
+    globales) et la sienne (notifications ciblées, lectures). Les attentes
+    longues sont réveillées tout de suite par les écritures du processus,
+    et au plus tard après INBOX_POLL_SECONDS pour celles des autres.
+    """
+
+    def __init__(self, poll_interval=INBOX_POLL_SECONDS):
+        self.poll_interval = poll_interval
+        self._changed = threading.Condition()
+
+    def etag(self, user_id):
+        query = select(InboxVersion.scope, InboxVersion.version).where(
+            InboxVersion.scope.in_((GLOBAL_INBOX_SCOPE, user_id)))
+        # Connexion à part : une transaction ouverte dans la session figerait la lecture pendant l'attente
+        with db.engine.connect() as connection:
+            versions = dict(connection.execute(query).all())
+        return f"{versions.get(GLOBAL_INBOX_SCOPE, 0)}-{versions.get(user_id, 0)}"
+
+    def changed(self, user_id=None):
+        """À appeler après le commit d'une création ou d'une lecture : réveille les attentes du processus"""
+        with self._changed:
+            self._changed.notify_all()
+
+    def wait_for_change(self, user_id, etag, timeout):
+        """Attend (au plus timeout secondes) que la boîte change ; retourne True si elle a changé"""
+        deadline = time.monotonic() + timeout
+        while self.etag(user_id) == etag:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            with self._changed:
+                self._changed.wait(min(remaining, self.poll_interval))
+        return True
+
+
+inbox_versions = InboxVersions()
@@ -8,11 +8,13 @@ import os
 import uuid
 import hashlib
 import json
-import shutil
 from datetime import datetime, timedelta
 from werkzeug.utils import secure_filename
 from flask import current_app
 from models import db, User, PersistentSession, BackupLog, UserSubscription
+from entitlements import invalidate_entitlement
+from session_tokens import session_token_cache, session_activity
+from db_backup import backup_database, read_delta_base, FULL_SUFFIX, DELTA_SUFFIX
 
 
 # ========== GESTION DES UPLOADS ==========
@@ -113,20 +115,25 @@ def get_user_from_session_token(token):
     Récupère l'utilisateur à partir d'un token de session
     Retourne l'utilisateur ou None
     """
-    session = PersistentSession.query.filter_by(session_token=token).first()
-    
-    if not session or session.is_expired():
-        return None
+    cached = session_token_cache.get(token)
+    if cached:
+        session_id, user_id = cached
+    else:
+        session = PersistentSession.query.filter_by(session_token=token).first()
+        if not session or session.is_expired():
+            return None
+        session_id, user_id = session.id, session.user_id
+        session_token_cache.put(token, session_id, user_id, session.expires_at)
     
-    # Mettre à jour la dernière activité
-    session.last_activity = datetime.utcnow()
-    db.session.commit()
+    # Dernière activité regroupée en mémoire (écrite par lots, pas de commit ici)
+    session_activity.touch(session_id)
     
-    return User.query.get(session.user_id)
+    return User.query.get(user_id)
 
 
 def delete_persistent_session(token):
     """Supprime une session persistante"""
+    session_token_cache.invalidate(token)
     session = PersistentSession.query.filter_by(session_token=token).first()
     if session:
         db.session.delete(session)
@@ -134,23 +141,28 @@ def delete_persistent_session(token):
 
 
 def cleanup_expired_sessions():
-    """Nettoie les sessions expirées"""
-    expired = PersistentSession.query.filter(
-        PersistentSession.expires_at < datetime.utcnow()
-    ).all()
-    
-    for session in expired:
-        db.session.delete(session)
-    
-    db.session.commit()
-    return len(expired)
+    """Nettoie les sessions expirées (suppression par lots, voir retention.py)"""
+    from retention import retention_engine
+    return retention_engine.purge(PersistentSession.__tablename__)['deleted']
 
 
 # ========== GESTION DES SAUVEGARDES ==========
 
-def create_backup(backup_type='manual', admin_id=None):
+def _last_full_backup():
+    """Chemin de la dernière sauvegarde complète réussie encore présente sur disque"""
+    logs = BackupLog.query.filter(
+        BackupLog.status == 'success', BackupLog.backup_path.like(f"%{FULL_SUFFIX}")
+    ).order_by(BackupLog.created_at.desc(), BackupLog.id.desc()).limit(10).all()
+    for log in logs:
+        if os.path.exists(log.backup_path):
+            return log.backup_path
+    return None
+
+
+def create_backup(backup_type='manual', admin_id=None, incremental=False):
     """
-    Crée une sauvegarde de la base de données
+    Crée une sauvegarde en ligne de la base de données (voir db_backup.py)
+    incremental=True : seules les pages modifiées depuis la dernière sauvegarde complète
     Retourne le chemin du fichier de sauvegarde ou None
     """
     try:
@@ -158,35 +170,29 @@ def create_backup(backup_type='manual', admin_id=None):
         backup_dir = os.path.join(current_app.root_path, 'backups')
         os.makedirs(backup_dir, exist_ok=True)
         
-        # Nom du fichier de sauvegarde
+        # Nom du fichier de sauvegarde (extension ajoutée selon le type : .db.gz ou .delta.gz)
         timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
-        backup_filename = f"oracxpred_backup_{backup_type}_{timestamp}.db"
-        backup_path = os.path.join(backup_dir, backup_filename)
+        backup_prefix = os.path.join(backup_dir, f"oracxpred_backup_{backup_type}_{timestamp}")
         
-        # Copier la base de données SQLite
-        db_path = current_app.config.get('SQLALCHEMY_DATABASE_URI', '').replace('sqlite:///', '')
-        if not db_path:
-            db_path = os.path.join(current_app.instance_path, 'oracxpred.db')
+        # Chemin résolu par le moteur (base relative = dossier instance/ avec Flask-SQLAlchemy)
+        db_path = db.engine.url.database or os.path.join(current_app.instance_path, 'oracxpred.db')
+        base_path = _last_full_backup() if incremental else None
         
-        if os.path.exists(db_path):
-            shutil.copy2(db_path, backup_path)
-            file_size = os.path.getsize(backup_path)
-            
-            # Enregistrer dans les logs
-            backup_log = BackupLog(
-                backup_type=backup_type,
-                backup_path=backup_path,
-                file_size=file_size,
-                status='success',
-                tables_backed_up=json.dumps(['all']),
-                created_by=admin_id
-            )
-            db.session.add(backup_log)
-            db.session.commit()
-            
-            return backup_path
-        else:
-            raise Exception(f"Base de données introuvable: {db_path}")
+        result = backup_database(db_path, backup_prefix, base_path=base_path)
+        
+        # Enregistrer dans les logs
+        backup_log = BackupLog(
+            backup_type=backup_type,
+            backup_path=result['path'],
+            file_size=result['file_size'],
+            status='success',
+            tables_backed_up=json.dumps(['all']),
+            created_by=admin_id
+        )
+        db.session.add(backup_log)
+        db.session.commit()
+        
+        return result['path']
             
     except Exception as e:
         # Enregistrer l'erreur
@@ -213,12 +219,25 @@ def cleanup_old_backups(keep_days=30):
     deleted_count = 0
     cutoff_date = datetime.utcnow() - timedelta(days=keep_days)
     
+    # Une sauvegarde complète reste tant qu'une sauvegarde incrémentale conservée s'appuie dessus
+    referenced = set()
+    keep_all_full = False
+    for filename in os.listdir(backup_dir):
+        filepath = os.path.join(backup_dir, filename)
+        if filename.endswith(DELTA_SUFFIX) and datetime.utcfromtimestamp(os.path.getmtime(filepath)) >= cutoff_date:
+            try:
+                referenced.add(read_delta_base(filepath))
+            except Exception as e:
+                # Base inconnue : aucune sauvegarde complète n'est supprimée, le reste est purgé
+                print(f"⚠️ Sauvegarde incrémentale illisible {filename}: {e}")
+                keep_all_full = True
+    
     for filename in os.listdir(backup_dir):
         filepath = os.path.join(backup_dir, filename)
-        if os.path.isfile(filepath):
-            file_time = datetime.utcnow() - timedelta(
-                days=os.path.getmtime(filepath) / 86400
-            )
+        if keep_all_full and filename.endswith(FULL_SUFFIX):
+            continue
+        if os.path.isfile(filepath) and filename not in referenced:
+            file_time = datetime.utcfromtimestamp(os.path.getmtime(filepath))
             if file_time < cutoff_date:
                 try:
                     os.remove(filepath)
@@ -284,4 +303,6 @@ def check_and_expire_subscriptions():
         count += 1
     
     db.session.commit()
+    for subscription in expired:
+        invalidate_entitlement(subscription.user_id)
     return count
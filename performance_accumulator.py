@@ -0,0 +1,222 @@
+"""
+📈 ACCUMULATEUR DE PERFORMANCE DU MODÈLE - ORACXPRED
+====================================================
+Compteurs par (jour de finalisation, votes des modules, type de consensus)
+mis à jour en O(1) à chaque prédiction réglée, au lieu de relire toutes les
+prédictions de la fenêtre. Les chiffres d'une fenêtre (ModelPerformance)
+sont la somme de ses compartiments ; le recalcul complet de archive_manager
+reste disponible pour le contrôle de cohérence hors ligne.
+"""
+
+from datetime import datetime, time, timedelta
+
+from sqlalchemy import case, delete, func, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from models import db, PredictionArchive, PerformanceBucket, ModelPerformance
+
+
+PERFORMANCE_WINDOW_DAYS = 30
+
+# Colonnes de la clé d'un compartiment, en plus du jour
+BUCKET_KEY = ('consensus_type', 'vote_statistique', 'vote_cotes', 'vote_simulation', 'vote_forme', 'consensus')
+BUCKET_COUNTERS = ('total', 'correctes', 'somme_confiance', 'somme_probabilite', 'somme_ecart')
+
+# Colonne de ModelPerformance -> condition sur le compartiment
+PERFORMANCE_SEGMENTS = {
+    'taux_reussite_statistique': PerformanceBucket.vote_statistique == True,
+    'taux_reussite_cotes': PerformanceBucket.vote_cotes == True,
+    'taux_reussite_simulation': PerformanceBucket.vote_simulation == True,
+    'taux_reussite_forme': PerformanceBucket.vote_forme == True,
+    'taux_reussite_consensus': PerformanceBucket.consensus == True,
+    'taux_reussite_1x2': PerformanceBucket.consensus_type == '1X2',
+    'taux_reussite_alternatifs': PerformanceBucket.consensus_type == 'alternatif',
+}
+
+
+def _rate(correctes, total):
+    return (correctes / total * 100) if total else None
+
+
+class BucketDeltas:
+    """Variations de compteurs regroupées par compartiment, écrites en une seule instruction"""
+
+    def __init__(self):
+        self.deltas = {}
+
+    def add(self, pred, sign=1):
+        """
+        Ajoute (sign=1) ou retire (sign=-1) une prédiction réglée
+
+        Sans effet si la prédiction n'a pas de résultat (prediction_correcte à None).
+        """
+        if pred.prediction_correcte is None or pred.finalized_at is None:
+            return
+        key = (pred.finalized_at.date(), pred.consensus_type, bool(pred.vote_statistique), bool(pred.vote_cotes),
+               bool(pred.vote_simulation), bool(pred.vote_forme), bool(pred.consensus))
+        counters = self.deltas.setdefault(key, [0, 0, 0.0, 0.0, 0.0])
+        counters[0] += sign
+        counters[1] += sign if pred.prediction_correcte else 0
+        counters[2] += sign * (pred.confiance or 0.0)
+        counters[3] += sign * (pred.probabilite or 0.0)
+        counters[4] += sign * (pred.ecart_probabilite or 0.0)
+
+    def apply(self):
+        """
+        INSERT ... ON CONFLICT DO UPDATE pour tous les compartiments touchés
+
+        Dans la transaction en cours (pas de commit : les compteurs sont validés avec le règlement).
+        """
+        if not self.deltas:
+            return
+        table = PerformanceBucket.__table__
+        rows = [dict(zip(('day', *BUCKET_KEY, *BUCKET_COUNTERS), (*key, *counters)))
+                for key, counters in self.deltas.items()]
+        stmt = sqlite_insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['day', *BUCKET_KEY],
+            set_={name: table.c[name] + stmt.excluded[name] for name in BUCKET_COUNTERS}
+        )
+        db.session.execute(stmt, rows)
+        self.deltas = {}
+
+
+def add_to_bucket(pred, sign=1):
+    """Ajoute (sign=1) ou retire (sign=-1) une prédiction réglée de son compartiment, en O(1)"""
+    deltas = BucketDeltas()
+    deltas.add(pred, sign)
+    deltas.apply()
+
+
+def window_bounds(days=PERFORMANCE_WINDOW_DAYS, now=None):
+    """Fenêtre alignée sur les jours : du début de (aujourd'hui - days + 1) à la fin d'aujourd'hui"""
+    today = (now or datetime.utcnow()).date()
+    return datetime.combine(today - timedelta(days=days - 1), time.min), datetime.combine(today, time.max)
+
+
+def window_performance(date_debut, date_fin):
+    """
+    Métriques de ModelPerformance pour une fenêtre, par somme des compartiments
+
+    Returns:
+        dict des colonnes de ModelPerformance, ou None si aucune prédiction réglée
+    """
+    columns = [func.sum(PerformanceBucket.total), func.sum(PerformanceBucket.correctes),
+               func.sum(PerformanceBucket.somme_confiance), func.sum(PerformanceBucket.somme_probabilite),
+               func.sum(PerformanceBucket.somme_ecart)]
+    for condition in PERFORMANCE_SEGMENTS.values():
+        columns.append(func.sum(case((condition, PerformanceBucket.total), else_=0)))
+        columns.append(func.sum(case((condition, PerformanceBucket.correctes), else_=0)))
+
+    row = db.session.execute(select(*columns).where(
+        PerformanceBucket.day >= date_debut.date(),
+        PerformanceBucket.day <= date_fin.date()
+    )).one()
+    total, correctes, somme_confiance, somme_probabilite, somme_ecart = row[:5]
+    if not total:
+        return None
+
+    metrics = {
+        'total_predictions': total,
+        'predictions_correctes': correctes,
+        'taux_reussite': _rate(correctes, total),
+        'moyenne_confiance': somme_confiance / total,
+        'moyenne_probabilite': somme_probabilite / total,
+        'ecart_moyen_probabilite': somme_ecart / total,
+    }
+    for index, name in enumerate(PERFORMANCE_SEGMENTS):
+        segment_total, segment_correctes = row[5 + 2 * index], row[6 + 2 * index]
+        metrics[name] = _rate(segment_correctes, segment_total)
+    return metrics
+
+
+def refresh_model_performance(days=PERFORMANCE_WINDOW_DAYS, now=None):
+    """
+    Met à jour la ligne ModelPerformance de la fenêtre glissante à partir des compartiments
+
+    Une ligne par jour et par taille de fenêtre (bornes alignées sur les jours).
+
+    Returns:
+        ModelPerformance object, ou None si aucune prédiction réglée
+    """
+    date_debut, date_fin = window_bounds(days, now)
+    metrics = window_performance(date_debut, date_fin)
+    if metrics is None:
+        return None
+
+    performance = ModelPerformance.query.filter_by(date_debut=date_debut, date_fin=date_fin).first()
+    if not performance:
+        performance = ModelPerformance(date_debut=date_debut, date_fin=date_fin)
+        db.session.add(performance)
+    for name, value in metrics.items():
+        setattr(performance, name, value)
+    performance.updated_at = datetime.utcnow()
+    db.session.commit()
+    return performance
+
+
+def rebuild_buckets():
+    """
+    Reconstruit tous les compartiments depuis PredictionArchive (une requête groupée)
+
+    Pour initialiser une base existante ou réparer après un écart détecté par check_consistency.
+
+    Returns:
+        Nombre de compartiments écrits
+    """
+    day = func.date(PredictionArchive.finalized_at)
+    flags = [func.coalesce(getattr(PredictionArchive, name), False) for name in BUCKET_KEY[1:]]
+    grouped = select(
+        day, PredictionArchive.consensus_type, *flags,
+        func.count(),
+        func.sum(case((PredictionArchive.prediction_correcte == True, 1), else_=0)),
+        func.sum(func.coalesce(PredictionArchive.confiance, 0.0)),
+        func.sum(func.coalesce(PredictionArchive.probabilite, 0.0)),
+        func.sum(func.coalesce(PredictionArchive.ecart_probabilite, 0.0)),
+    ).where(
+        PredictionArchive.finalized_at.isnot(None),
+        PredictionArchive.prediction_correcte.isnot(None)
+    ).group_by(day, PredictionArchive.consensus_type, *flags)
+
+    db.session.execute(delete(PerformanceBucket))
+    result = db.session.execute(
+        PerformanceBucket.__table__.insert().from_select(['day', *BUCKET_KEY, *BUCKET_COUNTERS], grouped)
+    )
+    db.session.commit()
+    return result.rowcount
+
+
+def ensure_buckets():
+    """Construit les compartiments d'une base existante (aucun compartiment mais des prédictions réglées)"""
+    if db.session.query(PerformanceBucket.id).first() is not None:
+        return 0
+    settled = db.session.query(PredictionArchive.id).filter(
+        PredictionArchive.finalized_at.isnot(None),
+        PredictionArchive.prediction_correcte.isnot(None)
+    ).first()
+    return rebuild_buckets() if settled is not None else 0
+
+
+def check_consistency(date_debut, date_fin, tolerance=1e-6):
+    """
+    Compare les compartiments au recalcul complet (contrôle hors ligne, sans écriture)
+
+    Returns:
+        Liste des écarts "colonne: compartiments=... recalcul=..." (vide si cohérent)
+    """
+    from archive_manager import compute_model_performance
+
+    expected = compute_model_performance(date_debut, date_fin)
+    actual = window_performance(date_debut, date_fin)
+    if expected is None or actual is None:
+        return [] if expected == actual else [f"fenêtre vide: compartiments={actual!r} recalcul={expected!r}"]
+
+    differences = []
+    for name, value in expected.items():
+        other = actual.get(name)
+        if value is None or other is None:
+            if value != other:
+                differences.append(f"{name}: compartiments={other!r} recalcul={value!r}")
+        elif abs(value - other) > tolerance:
+            differences.append(f"{name}: compartiments={other!r} recalcul={value!r}")
+    return differences
@@ -0,0 +1,187 @@
+"""
+⏰ PLANIFICATEUR ADAPTATIF DE LA COLLECTE - ORACXPRED
+=====================================================
+Calcule le délai avant la prochaine interrogation des sources à partir du
+calendrier des matchs (table collected_matches + matchs vus au dernier cycle) :
+- match en cours : interrogation serrée (POLL_LIVE_SECONDS) ;
+- coups d'envoi et fins prévues (7 minutes réelles, 1.5 en ligue penalty) dans
+  une file de priorité (heapq) : une interrogation est planifiée à chaque
+  événement ;
+- rien en cours : intervalle doublé à chaque cycle sans changement, de
+  l'intervalle de base jusqu'à POLL_IDLE_MAX_SECONDS.
+
+Les heures de début sont en UTC naïf (comme le flux 1xbet).
+"""
+
+import heapq
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from live_feed import FIFA_MATCH_MINUTES, match_duration_minutes
+
+
+POLL_LIVE_SECONDS = 5  # Intervalle tant qu'un match est en cours
+POLL_IDLE_MIN_SECONDS = 30
+POLL_IDLE_MAX_SECONDS = 300
+KICKOFF_LEAD_SECONDS = 10  # Interrogation juste avant le coup d'envoi
+END_GRACE_SECONDS = 5  # Délai après la fin prévue (score final publié)
+MAX_OVERRUN_SECONDS = 600  # Au-delà, un match non terminé n'est plus considéré en cours
+CALENDAR_HORIZON = timedelta(hours=6)
+CALENDAR_REFRESH_SECONDS = 600  # Relecture de la table (matchs ajoutés par d'autres processus)
+
+OPEN_STATUSES = ('en_attente', 'en_cours')
+
+KICKOFF = 'kickoff'
+EXPECTED_END = 'expected_end'
+
+
+class ScheduledMatch:
+    """Entrée du calendrier"""
+
+    __slots__ = ('match_id', 'heure_debut', 'fin_prevue', 'statut', 'version')
+
+    def __init__(self, match_id, heure_debut, duration_minutes, statut, version):
+        self.match_id = match_id
+        self.heure_debut = heure_debut
+        self.fin_prevue = heure_debut + timedelta(minutes=duration_minutes)
+        self.statut = statut
+        self.version = version  # Événements d'une version antérieure ignorés
+
+    def is_expired(self, now):
+        return now >= self.fin_prevue + timedelta(seconds=MAX_OVERRUN_SECONDS)
+
+    def is_live(self, now):
+        """En cours d'après la source, ou coup d'envoi imminent ou passé (et fin prévue pas trop dépassée)"""
+        if self.is_expired(now):
+            return False
+        return self.statut == 'en_cours' or self.heure_debut - timedelta(seconds=KICKOFF_LEAD_SECONDS) <= now
+
+
+class PollScheduler:
+    """Délai avant la prochaine collecte, d'après les matchs en cours et à venir"""
+
+    def __init__(self, idle_interval=POLL_IDLE_MIN_SECONDS, max_idle_interval=POLL_IDLE_MAX_SECONDS,
+                 live_interval=POLL_LIVE_SECONDS):
+        self.idle_interval = idle_interval
+        self.max_idle_interval = max(max_idle_interval, idle_interval)
+        self.live_interval = live_interval
+        self._matches = {}  # unique_match_id -> ScheduledMatch
+        self._events = []  # Tas de (instant, n°, type, unique_match_id, version)
+        self._counter = 0
+        self._backoff = idle_interval
+        self._calendar_loaded_at = None
+        self.polls = 0
+        self.idle_polls = 0  # Cycles sans aucun changement
+
+    # ----- Calendrier -----
+
+    def _push(self, when, kind, entry):
+        self._counter += 1
+        heapq.heappush(self._events, (when, self._counter, kind, entry.match_id, entry.version))
+
+    def schedule(self, match_id, heure_debut, statut, duration_minutes=FIFA_MATCH_MINUTES):
+        """Ajoute ou met à jour un match ; un match terminé ou annulé sort du calendrier"""
+        current = self._matches.get(match_id)
+        if statut not in OPEN_STATUSES or heure_debut is None:
+            self._matches.pop(match_id, None)
+            return
+        if current is not None and current.heure_debut == heure_debut and current.statut == statut:
+            return
+        entry = ScheduledMatch(match_id, heure_debut, duration_minutes, statut,
+                               current.version + 1 if current else 0)
+        self._matches[match_id] = entry
+        if statut == 'en_attente':
+            self._push(heure_debut - timedelta(seconds=KICKOFF_LEAD_SECONDS), KICKOFF, entry)
+        self._push(entry.fin_prevue + timedelta(seconds=END_GRACE_SECONDS), EXPECTED_END, entry)
+
+    def load_calendar(self, now=None):
+        """Charge les matchs à venir et en cours de la table collected_matches"""
+        from models import db, CollectedMatch
+
+        now = now or datetime.utcnow()
+        query = select(CollectedMatch.unique_match_id, CollectedMatch.heure_debut, CollectedMatch.statut).where(
+            CollectedMatch.statut.in_(OPEN_STATUSES),
+            CollectedMatch.heure_debut <= now + CALENDAR_HORIZON,
+            CollectedMatch.heure_debut >= now - timedelta(minutes=FIFA_MATCH_MINUTES) - timedelta(
+                seconds=MAX_OVERRUN_SECONDS)
+        )
+        # Connexion à part : pas de transaction laissée ouverte dans la session de l'appelant
+        with db.engine.connect() as connection:
+            rows = connection.execute(query).all()
+        for match_id, heure_debut, statut in rows:
+            known = self._matches.get(match_id)
+            # La durée d'une ligue penalty n'est connue que par les données de la source
+            duration = (known.fin_prevue - known.heure_debut).total_seconds() / 60 if known else FIFA_MATCH_MINUTES
+            self.schedule(match_id, heure_debut, statut, duration)
+        self._calendar_loaded_at = now
+        return len(rows)
+
+    def calendar_due(self, now=None):
+        now = now or datetime.utcnow()
+        return (self._calendar_loaded_at is None
+                or (now - self._calendar_loaded_at).total_seconds() >= CALENDAR_REFRESH_SECONDS)
+
+    def observe(self, matches, changed):
+        """
+        Met à jour le calendrier avec les matchs d'un cycle de collecte
+
+        Args:
+            matches: Matchs au format du collecteur (clé 'ligue' facultative)
+            changed: True si le cycle a créé ou modifié des matchs
+        """
+        for match_data in matches:
+            self.schedule(match_data["unique_match_id"], match_data.get("heure_debut"), match_data["statut"],
+                          match_duration_minutes(match_data.get("ligue")))
+        self.polls += 1
+        if changed:
+            self._backoff = self.idle_interval
+        else:
+            self.idle_polls += 1
+            self._backoff = min(self._backoff * 2, self.max_idle_interval)
+
+    # ----- Prochaine interrogation -----
+
+    def _next_event(self, now):
+        """Instant du prochain événement valide (les événements passés sont consommés)"""
+        due = False
+        while self._events:
+            when, _, kind, match_id, version = self._events[0]
+            entry = self._matches.get(match_id)
+            if entry is None or entry.version != version:
+                heapq.heappop(self._events)
+                continue
+            if when > now:
+                return when, due
+            heapq.heappop(self._events)
+            due = True
+        return None, due
+
+    def live_count(self, now=None):
+        now = now or datetime.utcnow()
+        return sum(1 for entry in self._matches.values() if entry.is_live(now))
+
+    def next_poll_delay(self, now=None):
+        """Secondes avant la prochaine collecte"""
+        now = now or datetime.utcnow()
+        # Matchs jamais signalés terminés par la source : retirés après MAX_OVERRUN_SECONDS
+        for match_id in [match_id for match_id, entry in self._matches.items() if entry.is_expired(now)]:
+            del self._matches[match_id]
+        next_event, due = self._next_event(now)
+        if due:
+            return 0
+        delay = self.live_interval if self.live_count(now) else self._backoff
+        if next_event is not None:
+            delay = min(delay, (next_event - now).total_seconds())
+        return max(delay, 0)
+
+    def get_stats(self, now=None):
+        now = now or datetime.utcnow()
+        return {
+            'scheduled_matches': len(self._matches),
+            'live_matches': self.live_count(now),
+            'pending_events': len(self._events),
+            'idle_interval': self._backoff,
+            'polls': self.polls,
+            'idle_polls': self.idle_polls,
+        }
@@ -8,6 +8,9 @@ from models import db, Prediction, Alert, SystemLog, AccessLog
 from datetime import datetime
 import json
 from flask import request
+from audit_log import audit_writer
+from alert_engine import alert_engine
+from stats_service import stats_service
 
 
 def get_client_ip():
@@ -85,6 +88,8 @@ def create_prediction(match_id, team1, team2, league, consensus_result, consensu
     
     try:
         db.session.commit()
+        if not existing:
+            stats_service.prediction_created()  # Nouvelle prédiction : valide et non verrouillée
         
         # Logger la création/modification
         log_action('prediction_generated', 
@@ -115,6 +120,7 @@ def invalidate_prediction(prediction_id, admin_id):
     prediction = Prediction.query.get(prediction_id)
     if not prediction:
         return False
+    was_active = prediction.is_valid and not prediction.is_locked
     
     prediction.is_valid = False
     prediction.invalidated_by = admin_id
@@ -122,6 +128,8 @@ def invalidate_prediction(prediction_id, admin_id):
     
     try:
         db.session.commit()
+        if was_active:
+            stats_service.prediction_deactivated()
         
         # Logger l'action admin
         log_action('prediction_invalidated',
@@ -149,11 +157,14 @@ def lock_prediction(prediction_id, reason="Match commencé"):
     prediction = Prediction.query.get(prediction_id)
     if not prediction:
         return False
+    was_active = prediction.is_valid and not prediction.is_locked
     
     prediction.is_locked = True
     
     try:
         db.session.commit()
+        if was_active:
+            stats_service.prediction_deactivated()
         
         log_action('prediction_locked',
                   f"Prédiction {prediction_id} verrouillée: {reason}",
@@ -234,33 +245,13 @@ def create_alert(alert_type, message, severity='warning', prediction_id=None, ma
         extra_data: Données supplémentaires (dict)
     
     Returns:
-        Alert object
+        AlertRecord (alerte nouvelle ou regroupée avec une alerte identique récente)
     """
-    alert = Alert(
-        alert_type=alert_type,
-        message=message,
-        severity=severity,
-        prediction_id=prediction_id,
-        match_id=match_id,
-        extra_data=json.dumps(extra_data) if extra_data else None
-    )
-    
-    db.session.add(alert)
-    
-    try:
-        db.session.commit()
-        
-        # Logger l'alerte
-        log_action('alert_created',
-                  f"Alerte créée: {alert_type} - {message}",
-                  severity=severity,
-                  extra_data={'alert_id': alert.id, 'alert_type': alert_type})
-        
-        return alert
-    except Exception as e:
-        db.session.rollback()
-        log_action('alert_creation_error', f"Erreur lors de la création d'alerte: {str(e)}", severity='error')
-        return None
+    # Regroupement des alertes identiques et écriture par lots (voir alert_engine)
+    record, created = alert_engine.raise_alert(alert_type, message, severity=severity,
+                                               prediction_id=prediction_id, match_id=match_id,
+                                               extra_data=extra_data)
+    return record
 
 
 def check_match_started_alert(match_id, minute):
@@ -333,21 +324,17 @@ def log_action(action_type, message, user_id=None, admin_id=None, severity='info
         severity: Niveau de sévérité
         extra_data: Données supplémentaires (dict)
     """
-    try:
-        log_entry = SystemLog(
-            action_type=action_type,
-            user_id=user_id,
-            admin_id=admin_id,
-            message=message,
-            severity=severity,
-            extra_data=json.dumps(extra_data) if extra_data else None,
-            ip_address=get_client_ip()
-        )
-        db.session.add(log_entry)
-        db.session.commit()
-    except Exception as e:
-        print(f"❌ Erreur lors de la journalisation: {e}")
-        db.session.rollback()
+    # Écriture différée par lots, hors de la session de l'appelant
+    audit_writer.submit(SystemLog, {
+        'action_type': action_type,
+        'user_id': user_id,
+        'admin_id': admin_id,
+        'message': message,
+        'severity': severity,
+        'extra_data': json.dumps(extra_data) if extra_data else None,
+        'ip_address': get_client_ip(),
+        'created_at': datetime.utcnow()
+    })
 
 
 def log_access(user_id, action_type, match_id=None, prediction_id=None, subscription_plan=None, extra_data=None):
@@ -362,18 +349,14 @@ def log_access(user_id, action_type, match_id=None, prediction_id=None, subscrip
         subscription_plan: Plan d'abonnement utilisé (optionnel)
         extra_data: Données supplémentaires (dict)
     """
-    try:
-        access_log = AccessLog(
-            user_id=user_id,
-            action_type=action_type,
-            match_id=match_id,
-            prediction_id=prediction_id,
-            subscription_plan=subscription_plan,
-            ip_address=get_client_ip(),
-            extra_data=json.dumps(extra_data) if extra_data else None
-        )
-        db.session.add(access_log)
-        db.session.commit()
-    except Exception as e:
-        print(f"❌ Erreur lors de la journalisation d'accès: {e}")
-        db.session.rollback()
+    # Écriture différée par lots, hors de la session de l'appelant
+    audit_writer.submit(AccessLog, {
+        'user_id': user_id,
+        'action_type': action_type,
+        'match_id': match_id,
+        'prediction_id': prediction_id,
+        'subscription_plan': subscription_plan,
+        'ip_address': get_client_ip(),
+        'extra_data': json.dumps(extra_data) if extra_data else None,
+        'created_at': datetime.utcnow()
+    })
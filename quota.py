@@ -0,0 +1,215 @@
+"""
+🔢 QUOTAS QUOTIDIENS DE PRÉDICTIONS - ORACXPRED
+===============================================
+Compteurs en mémoire par (utilisateur, jour) avec l'ensemble des prédictions
+déjà vues. La vérification de la limite et l'enregistrement d'une consultation
+sont atomiques (verrou du processus). Les accès sont écrits dans
+user_prediction_access par lots, en arrière-plan, et l'état est reconstruit
+depuis cette table au démarrage (ou au premier accès d'un nouveau jour).
+Un lot refusé est réécrit ligne par ligne : seules les lignes en échec sont
+remises en file, et abandonnées après QUOTA_MAX_ATTEMPTS tentatives.
+"""
+
+import atexit
+import threading
+import time
+from datetime import datetime
+
+from flask import has_app_context
+from sqlalchemy import insert
+
+from models import db, UserPredictionAccess
+
+
+QUOTA_FLUSH_SECONDS = 2  # Délai max avant écriture des accès en base
+QUOTA_BATCH_SIZE = 500  # Lignes max par INSERT groupé
+QUOTA_KEEP_DAYS = 2  # Jours conservés en mémoire (aujourd'hui + la veille)
+QUOTA_MAX_ATTEMPTS = 3  # Tentatives d'écriture d'un accès avant abandon
+QUOTA_MAX_PENDING = 50000  # Au-delà, les accès en échec les plus anciens sont abandonnés
+
+
+def _access_key(row):
+    return row['user_id'], row['prediction_id'], row['access_date']
+
+
+class QuotaService:
+    """Compteurs atomiques de consultations avec persistance différée"""
+
+    def __init__(self, flush_interval=QUOTA_FLUSH_SECONDS, batch_size=QUOTA_BATCH_SIZE):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.app = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._seen = {}  # (user_id, jour) -> set(prediction_id)
+        self._loaded_days = set()
+        self._pending = []  # Accès pas encore écrits en base
+        self._attempts = {}  # (user_id, prediction_id, jour) -> écritures déjà échouées
+        self._thread = None
+        self.flushed_count = 0
+        self.failed_flushes = 0
+        self.dropped_count = 0  # Accès abandonnés après QUOTA_MAX_ATTEMPTS échecs
+
+    def init_app(self, app):
+        """Associe l'application (pour les écritures) et recharge les accès du jour"""
+        self.app = app
+        with app.app_context():
+            self._load_day(datetime.utcnow().date())
+        atexit.register(self.flush)
+
+    # ----- État en mémoire -----
+
+    def _load_day(self, day):
+        """Reconstruit les ensembles d'un jour depuis user_prediction_access"""
+        rows = db.session.query(
+            UserPredictionAccess.user_id, UserPredictionAccess.prediction_id
+        ).filter(UserPredictionAccess.access_date == day).all()
+        with self._lock:
+            if day in self._loaded_days:
+                return
+            for user_id, prediction_id in rows:
+                self._seen.setdefault((user_id, day), set()).add(prediction_id)
+            self._loaded_days.add(day)
+            # Oublier les jours trop anciens
+            for old_day in sorted(self._loaded_days)[:-QUOTA_KEEP_DAYS]:
+                self._loaded_days.discard(old_day)
+                for key in [k for k in self._seen if k[1] == old_day]:
+                    del self._seen[key]
+
+    def _ensure_day(self, day):
+        if day not in self._loaded_days:
+            self._load_day(day)
+
+    def viewed_count(self, user_id, day=None):
+        """Nombre de prédictions distinctes consultées par l'utilisateur ce jour"""
+        day = day or datetime.utcnow().date()
+        self._ensure_day(day)
+        with self._lock:
+            return len(self._seen.get((user_id, day), ()))
+
+    def record_view(self, user_id, prediction_id=None, limit=None):
+        """
+        Vérifie la limite et enregistre la consultation en une seule opération atomique
+
+        Une prédiction déjà vue aujourd'hui reste consultable sans consommer de quota.
+
+        Args:
+            user_id: ID de l'utilisateur
+            prediction_id: ID de la prédiction consultée (None si le match n'en a pas)
+            limit: Nombre de prédictions par jour du plan (None = pas de limite)
+
+        Returns:
+            (autorisé, nombre de prédictions vues aujourd'hui)
+        """
+        now = datetime.utcnow()
+        day = now.date()
+        self._ensure_day(day)
+        with self._lock:
+            seen = self._seen.setdefault((user_id, day), set())
+            if prediction_id is not None and prediction_id in seen:
+                return True, len(seen)
+            if limit is not None and len(seen) >= limit:
+                return False, len(seen)
+            if prediction_id is not None:
+                seen.add(prediction_id)
+                self._pending.append({
+                    'user_id': user_id,
+                    'prediction_id': prediction_id,
+                    'access_date': day,
+                    'accessed_at': now
+                })
+            count = len(seen)
+        if prediction_id is not None:
+            self.start()
+        return True, count
+
+    # ----- Persistance différée -----
+
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self):
+        """Écrit les accès en attente par INSERT groupés ; retourne le nombre de lignes écrites"""
+        if self.app is None and not has_app_context():
+            return 0  # Pas de base accessible : les accès restent en file
+        with self._flush_lock:
+            with self._lock:
+                rows, self._pending = self._pending, []
+            if not rows:
+                return 0
+            if self.app is not None:
+                with self.app.app_context():
+                    failed = self._write(rows)
+            else:
+                failed = self._write(rows)
+            self._requeue(rows, failed)
+            written = len(rows) - len(failed)
+            self.flushed_count += written
+            return written
+
+    def _write(self, rows):
+        """Écrit un lot en une transaction ; lot refusé : ligne par ligne. Retourne les lignes en échec"""
+        try:
+            for start in range(0, len(rows), self.batch_size):
+                db.session.execute(insert(UserPredictionAccess), rows[start:start + self.batch_size])
+            db.session.commit()
+            return []
+        except Exception as e:
+            db.session.rollback()
+            self.failed_flushes += 1
+            print(f"⚠️ Erreur écriture des accès aux prédictions: {e}")
+        # Isoler les lignes invalides : les autres sont écrites normalement
+        failed = []
+        for row in rows:
+            try:
+                db.session.execute(insert(UserPredictionAccess), [row])
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                failed.append(row)
+        return failed
+
+    def _requeue(self, rows, failed):
+        """Remet en file les lignes en échec, sauf après QUOTA_MAX_ATTEMPTS tentatives"""
+        failed_keys = {_access_key(row) for row in failed}
+        for row in rows:
+            if _access_key(row) not in failed_keys:
+                self._attempts.pop(_access_key(row), None)
+        retry = []
+        for row in failed:
+            key = _access_key(row)
+            attempts = self._attempts.get(key, 0) + 1
+            if attempts >= QUOTA_MAX_ATTEMPTS:
+                self._attempts.pop(key, None)
+                self.dropped_count += 1
+                print(f"⚠️ Accès abandonné après {attempts} échecs: {key}")
+            else:
+                self._attempts[key] = attempts
+                retry.append(row)
+        if not retry:
+            return
+        with self._lock:
+            self._pending[:0] = retry
+            overflow = len(self._pending) - QUOTA_MAX_PENDING
+            if overflow > 0:
+                for row in self._pending[:overflow]:
+                    self._attempts.pop(_access_key(row), None)
+                del self._pending[:overflow]
+                self.dropped_count += overflow
+
+    def start(self):
+        """Démarre le thread d'écriture (une seule instance)"""
+        with self._lock:
+            if self._thread is not None or self.app is None:
+                return
+            self._thread = threading.Thread(target=self._run, name="quota-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+
+quota_service = QuotaService()
@@ -0,0 +1,121 @@
+"""
+🗜️ CACHE DE RÉPONSES HTTP - ORACXPRED
+=====================================
+Cache des pages rendues, compressées en gzip, indexées par version de snapshot.
+Un changement de version du flux invalide toutes les entrées de l'ancienne version.
+"""
+
+import gzip
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from flask import Response
+
+from entitlements import get_entitlement
+
+
+HOME_CACHE_MAX_ENTRIES = 512
+HOME_CACHE_MAX_AGE_SECONDS = 60  # Les statuts dépendent aussi de l'heure : pas d'entrée éternelle
+
+# Niveaux d'accès qui changent le rendu de la page d'accueil
+TIER_ANONYMOUS = 'anonymous'
+TIER_LOCKED = 'locked'  # Connecté sans abonnement actif
+TIER_PAID = 'paid'
+
+
+class CachedResponse:
+    """Corps de réponse compressé + en-têtes de validation"""
+
+    def __init__(self, body, version, last_modified, mimetype='text/html'):
+        raw = body.encode('utf-8')
+        self.gzip_body = gzip.compress(raw, compresslevel=6)
+        self.raw_size = len(raw)
+        self.version = version
+        self.last_modified = last_modified
+        self.mimetype = mimetype
+        self.etag = hashlib.sha1(raw).hexdigest()[:20]
+        self.created_at = time.monotonic()
+
+    def to_response(self, request):
+        """Construit la réponse Flask (gzip si accepté, 304 si le client est à jour)"""
+        if 'gzip' in request.headers.get('Accept-Encoding', ''):
+            response = Response(self.gzip_body, mimetype=self.mimetype)
+            response.headers['Content-Encoding'] = 'gzip'
+        else:
+            response = Response(gzip.decompress(self.gzip_body), mimetype=self.mimetype)
+
+        response.set_etag(self.etag)
+        response.last_modified = self.last_modified
+        response.headers['Vary'] = 'Accept-Encoding, Cookie'
+        # La page dépend de la session : pas de cache partagé, revalidation systématique
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response.make_conditional(request)
+
+
+class ResponseCache:
+    """Cache LRU de réponses, purgé à chaque changement de version du snapshot"""
+
+    def __init__(self, max_entries=HOME_CACHE_MAX_ENTRIES, max_age=HOME_CACHE_MAX_AGE_SECONDS):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._entries = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _switch_version(self, version):
+        """Supprime toutes les entrées d'une version périmée"""
+        if version != self._version:
+            self._entries.clear()
+            self._version = version
+
+    def get(self, key, version):
+        """Retourne l'entrée en cache pour (version, key) ou None"""
+        with self._lock:
+            self._switch_version(version)
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry.created_at > self.max_age:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, version, body, last_modified):
+        """Stocke le corps rendu pour (version, key) et retourne l'entrée créée"""
+        entry = CachedResponse(body, version, last_modified)
+        with self._lock:
+            self._switch_version(version)
+            self._entries[key] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        """Vide complètement le cache"""
+        with self._lock:
+            self._entries.clear()
+            self._version = None
+
+    def get_stats(self):
+        """Statistiques du cache (pour monitoring)"""
+        with self._lock:
+            return {
+                'version': self._version,
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+home_cache = ResponseCache()
+
+
+def get_viewer_tier(user):
+    """Détermine le niveau d'accès d'un visiteur pour la page d'accueil"""
+    if user is None:
+        return TIER_ANONYMOUS
+    return TIER_PAID if get_entitlement(user).can_view_predictions else TIER_LOCKED
@@ -0,0 +1,201 @@
+"""
+🧹 RÉTENTION ET PURGE DES DONNÉES - ORACXPRED
+=============================================
+Politiques de conservation par table (garder N jours, ou archiver puis
+supprimer). La purge avance par lots : sélection de N identifiants, puis
+DELETE ... WHERE id IN (...) dans une transaction courte, avec une pause
+entre deux lots pour laisser passer les autres écritures.
+
+L'archive (fichier gzip) ne peut pas être validée avec le DELETE : les id
+archivés d'un lot sont notés dans archives/<table>/pending_ids.json avant
+la suppression, et retirés une fois celle-ci validée. Si la suppression
+échoue, le passage suivant supprime ces lignes sans les archiver de nouveau.
+"""
+
+import gzip
+import json
+import os
+import threading
+import time
+from datetime import datetime, date, timedelta
+
+from flask import current_app
+from sqlalchemy import delete, select
+
+from models import (
+    db, SystemLog, AccessLog, Alert, MatchCollectionLog, UserPredictionAccess, PersistentSession
+)
+
+
+RETENTION_BATCH_SIZE = 500
+RETENTION_PAUSE_SECONDS = 0.05
+ARCHIVE_FOLDER = 'archives'  # Relatif au dossier de l'application, comme backups/
+PENDING_IDS_FILE = 'pending_ids.json'  # Lignes archivées dont la suppression n'est pas encore validée
+
+
+class RetentionPolicy:
+    """Politique de conservation d'une table"""
+
+    def __init__(self, model, date_column, keep_days, archive=False, condition=None):
+        """
+        Args:
+            model: Modèle SQLAlchemy
+            date_column: Colonne de date comparée à la limite
+            keep_days: Nombre de jours conservés (0 = tout ce qui est avant maintenant)
+            archive: Écrire les lignes dans archives/<table>/ (NDJSON gzip) avant suppression
+            condition: Condition supplémentaire sur les lignes purgeables (ex. alertes acquittées)
+        """
+        self.model = model
+        self.table = model.__table__
+        self.name = self.table.name
+        self.date_column = date_column
+        self.keep_days = keep_days
+        self.archive = archive
+        self.condition = condition
+
+    def cutoff(self, now):
+        limit = now - timedelta(days=self.keep_days)
+        # Colonne de type Date : comparer à une date
+        return limit.date() if isinstance(self.date_column.type, db.Date) else limit
+
+    def __repr__(self) -> str:
+        return f"<RetentionPolicy {self.name} {self.keep_days}j{' +archive' if self.archive else ''}>"
+
+
+RETENTION_POLICIES = [
+    RetentionPolicy(PersistentSession, PersistentSession.expires_at, 0),
+    RetentionPolicy(SystemLog, SystemLog.created_at, 90),
+    RetentionPolicy(AccessLog, AccessLog.created_at, 180, archive=True),  # Traçabilité des revenus
+    RetentionPolicy(Alert, Alert.created_at, 30, condition=Alert.is_acknowledged == True),
+    RetentionPolicy(MatchCollectionLog, MatchCollectionLog.created_at, 30),
+    RetentionPolicy(UserPredictionAccess, UserPredictionAccess.access_date, 90, archive=True),
+]
+
+
+def _json_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+class RetentionEngine:
+    """Applique les politiques de conservation par lots"""
+
+    def __init__(self, policies=None, batch_size=RETENTION_BATCH_SIZE, pause_seconds=RETENTION_PAUSE_SECONDS,
+                 archive_folder=None):
+        self.policies = {policy.name: policy for policy in (policies or RETENTION_POLICIES)}
+        self.batch_size = batch_size
+        self.pause_seconds = pause_seconds
+        self.archive_folder = archive_folder
+        self._lock = threading.Lock()  # Une seule purge à la fois
+        self.last_run = []
+        self.total_deleted = 0
+
+    def purge(self, name, now=None):
+        """
+        Purge une table selon sa politique
+
+        Returns:
+            Métriques : {'table', 'deleted', 'archived', 'batches', 'seconds'}
+        """
+        policy = self.policies[name]
+        now = now or datetime.utcnow()
+        cutoff = policy.cutoff(now)
+        table = policy.table
+        metrics = {'table': name, 'deleted': 0, 'archived': 0, 'batches': 0, 'seconds': 0.0}
+        start = time.perf_counter()
+
+        with self._lock:
+            pending = self._load_pending(name) if policy.archive else set()
+            if pending:
+                # Lignes supprimées depuis (par un autre moyen) : plus rien à protéger
+                with db.engine.connect() as connection:
+                    pending &= set(connection.execute(select(table.c.id).where(table.c.id.in_(pending))).scalars())
+            last_id = 0
+            while True:
+                query = select(table.c.id).where(policy.date_column < cutoff, table.c.id > last_id)
+                if policy.condition is not None:
+                    query = query.where(policy.condition)
+                # Parcours par id croissant : les lignes anciennes sont en tête de table
+                with db.engine.connect() as connection:
+                    ids = [row[0] for row in connection.execute(query.order_by(table.c.id).limit(self.batch_size))]
+                if not ids:
+                    break
+
+                with db.engine.begin() as connection:
+                    if policy.archive:
+                        rows = connection.execute(select(table).where(table.c.id.in_(ids))).mappings().all()
+                        # Déjà archivées par un passage dont la suppression a échoué
+                        rows = [row for row in rows if row['id'] not in pending]
+                        if rows:
+                            self._archive(name, rows, now)
+                            pending.update(row['id'] for row in rows)
+                            self._save_pending(name, pending)
+                        metrics['archived'] += len(rows)
+                    result = connection.execute(delete(table).where(table.c.id.in_(ids)))
+                if policy.archive and pending & set(ids):
+                    pending.difference_update(ids)
+                    self._save_pending(name, pending)
+                metrics['deleted'] += result.rowcount
+                metrics['batches'] += 1
+                last_id = ids[-1]
+
+                if len(ids) < self.batch_size:
+                    break
+                time.sleep(self.pause_seconds)
+
+        metrics['seconds'] = round(time.perf_counter() - start, 3)
+        self.total_deleted += metrics['deleted']
+        return metrics
+
+    def run(self, now=None):
+        """Applique toutes les politiques ; retourne la liste des métriques par table"""
+        results = []
+        for name in self.policies:
+            try:
+                results.append(self.purge(name, now))
+            except Exception as e:
+                results.append({'table': name, 'error': str(e)})
+        self.last_run = results
+
+        from prediction_manager import log_action
+        deleted = sum(r.get('deleted', 0) for r in results)
+        seconds = sum(r.get('seconds', 0) for r in results)
+        log_action('retention_purge', f"Purge de rétention: {deleted} lignes supprimées en {seconds:.1f} s",
+                   severity='warning' if any('error' in r for r in results) else 'info',
+                   extra_data={'tables': results})
+        return results
+
+    def _folder(self, name):
+        folder = os.path.join(self.archive_folder or os.path.join(current_app.root_path, ARCHIVE_FOLDER), name)
+        os.makedirs(folder, exist_ok=True)
+        return folder
+
+    def _archive(self, name, rows, now):
+        """Ajoute les lignes au fichier d'archive du jour (un membre gzip par lot)"""
+        path = os.path.join(self._folder(name), f"{name}_{now.strftime('%Y%m%d')}.ndjson.gz")
+        lines = ''.join(json.dumps({k: _json_value(v) for k, v in row.items()}, ensure_ascii=False) + '\n'
+                        for row in rows)
+        with gzip.open(path, 'at', encoding='utf-8') as f:
+            f.write(lines)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _load_pending(self, name):
+        path = os.path.join(self._folder(name), PENDING_IDS_FILE)
+        if not os.path.exists(path):
+            return set()
+        with open(path, encoding='utf-8') as f:
+            return set(json.load(f))
+
+    def _save_pending(self, name, pending):
+        """Écriture atomique (fichier .tmp puis renommage)"""
+        path = os.path.join(self._folder(name), PENDING_IDS_FILE)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(sorted(pending), f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + '.tmp', path)
+
+
+retention_engine = RetentionEngine()
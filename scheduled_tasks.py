@@ -12,14 +12,16 @@ from flask import Flask
 
 from models import db, BackupLog, UserSubscription, PersistentSession
 from oracxpred_utils import create_backup, cleanup_expired_sessions, check_and_expire_subscriptions, cleanup_old_backups
+from retention import retention_engine
+from training_export import export_training_data
 
 
 def run_daily_backup():
-    """Sauvegarde quotidienne"""
+    """Sauvegarde quotidienne (incrémentale depuis la dernière sauvegarde complète)"""
     print(f"[{datetime.now()}] Démarrage sauvegarde quotidienne...")
     try:
         with app.app_context():
-            backup_path = create_backup('daily')
+            backup_path = create_backup('daily', incremental=True)
             if backup_path:
                 print(f"[{datetime.now()}] ✅ Sauvegarde quotidienne créée: {backup_path}")
             else:
@@ -59,6 +61,38 @@ def run_cleanup_tasks():
         print(f"[{datetime.now()}] ❌ Erreur nettoyage: {e}")
 
 
+def run_retention_tasks():
+    """Purge par lots des logs, alertes acquittées et historiques (politiques de retention.py)"""
+    print(f"[{datetime.now()}] Démarrage purge de rétention...")
+    try:
+        with app.app_context():
+            results = retention_engine.run()
+            
+            print(f"[{datetime.now()}] ✅ Purge terminée:")
+            for result in results:
+                if 'error' in result:
+                    print(f"  - {result['table']}: ❌ {result['error']}")
+                else:
+                    print(f"  - {result['table']}: {result['deleted']} lignes supprimées "
+                          f"({result['archived']} archivées, {result['batches']} lots, {result['seconds']} s)")
+    except Exception as e:
+        print(f"[{datetime.now()}] ❌ Erreur purge de rétention: {e}")
+
+
+def run_training_export():
+    """Ajoute à l'export colonnaire les matchs et prédictions réglés depuis la veille"""
+    print(f"[{datetime.now()}] Démarrage export des données d'entraînement...")
+    try:
+        with app.app_context():
+            results = export_training_data()
+            
+            print(f"[{datetime.now()}] ✅ Export terminé:")
+            for result in results:
+                print(f"  - {result['table']}: +{result['appended']} lignes ({result['rows']} au total)")
+    except Exception as e:
+        print(f"[{datetime.now()}] ❌ Erreur export des données d'entraînement: {e}")
+
+
 def setup_scheduled_tasks(app_instance):
     """Configure les tâches planifiées"""
     global app
@@ -73,10 +107,18 @@ def setup_scheduled_tasks(app_instance):
     # Nettoyage quotidien à 4h du matin
     schedule.every().day.at("04:00").do(run_cleanup_tasks)
     
+    # Purge de rétention quotidienne à 4h30 (après le nettoyage)
+    schedule.every().day.at("04:30").do(run_retention_tasks)
+    
+    # Export incrémental des données d'entraînement à 5h
+    schedule.every().day.at("05:00").do(run_training_export)
+    
     print("✅ Tâches planifiées configurées:")
     print("  - Sauvegarde quotidienne: 02:00")
     print("  - Sauvegarde hebdomadaire: Dimanche 03:00")
     print("  - Nettoyage: 04:00")
+    print("  - Purge de rétention: 04:30")
+    print("  - Export des données d'entraînement: 05:00")
 
 
 def run_scheduler():
@@ -0,0 +1,143 @@
+"""
+🔑 CACHE DES SESSIONS PERSISTANTES - ORACXPRED
+==============================================
+Résolution des tokens "se souvenir de moi" sans requête SQL à chaque visite,
+et suivi de la dernière activité regroupé en mémoire : un seul UPDATE groupé
+toutes les SESSION_ACTIVITY_FLUSH_SECONDS au lieu d'un commit par requête.
+"""
+
+import atexit
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from flask import current_app, has_app_context
+from sqlalchemy import bindparam, update
+
+from models import db, PersistentSession
+
+
+SESSION_CACHE_MAX_ENTRIES = 10000
+SESSION_CACHE_TTL_SECONDS = 300  # Délai max pour voir une session supprimée par un autre processus
+SESSION_ACTIVITY_FLUSH_SECONDS = 60
+
+
+class SessionTokenCache:
+    """Cache LRU token -> (id de session, id utilisateur, expiration)"""
+
+    def __init__(self, max_entries=SESSION_CACHE_MAX_ENTRIES, ttl=SESSION_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token):
+        """Retourne (session_id, user_id) si le token est en cache et non expiré"""
+        with self._lock:
+            item = self._entries.get(token)
+            if item is None:
+                return None
+            session_id, user_id, expires_at, cached_at = item
+            if datetime.utcnow() > expires_at or time.monotonic() - cached_at > self.ttl:
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+            return session_id, user_id
+
+    def put(self, token, session_id, user_id, expires_at):
+        with self._lock:
+            self._entries[token] = (session_id, user_id, expires_at, time.monotonic())
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, token):
+        with self._lock:
+            self._entries.pop(token, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SessionActivityTracker:
+    """Dernière activité des sessions regroupée en mémoire, écrite par lots"""
+
+    def __init__(self, flush_interval=SESSION_ACTIVITY_FLUSH_SECONDS):
+        self.flush_interval = flush_interval
+        self.app = None
+        self._pending = {}  # session_id -> dernière activité
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self.flushed_count = 0
+
+    def touch(self, session_id, when=None):
+        """Note l'activité d'une session (aucune écriture en base)"""
+        with self._lock:
+            self._pending[session_id] = when or datetime.utcnow()
+        self.start()
+
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self):
+        """Écrit toutes les activités en attente en un UPDATE groupé ; retourne le nombre de sessions"""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return 0
+            rows = [{'session_id': session_id, 'activity': when} for session_id, when in pending.items()]
+            try:
+                if self.app is not None and not has_app_context():
+                    with self.app.app_context():
+                        self._write(rows)
+                else:
+                    self._write(rows)
+            except Exception as e:
+                # Conserver les activités (sans écraser une activité plus récente)
+                with self._lock:
+                    for session_id, when in pending.items():
+                        self._pending.setdefault(session_id, when)
+                print(f"⚠️ Erreur écriture de l'activité des sessions: {e}")
+                return 0
+            self.flushed_count += len(rows)
+            return len(rows)
+
+    def _write(self, rows):
+        # UPDATE au niveau table : une session supprimée entre-temps est simplement ignorée
+        table = PersistentSession.__table__
+        statement = update(table).where(
+            table.c.id == bindparam('session_id')
+        ).values(last_activity=bindparam('activity'))
+        # Connexion à part : ne commite pas (et n'échoue pas avec) la session de la requête en cours
+        with db.engine.begin() as connection:
+            connection.execute(statement, rows)
+
+    def start(self):
+        """Démarre le thread d'écriture (une seule instance, au premier appel dans l'application)"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            if self.app is None:
+                if not has_app_context():
+                    return
+                self.app = current_app._get_current_object()
+                atexit.register(self.flush)
+            self._thread = threading.Thread(target=self._run, name="session-activity-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+
+session_token_cache = SessionTokenCache()
+session_activity = SessionActivityTracker()
@@ -0,0 +1,189 @@
+"""
+🔗 FLUX PARTAGÉ ENTRE PROCESSUS - ORACXPRED
+===========================================
+Un processus collecteur autonome récupère le flux 1xbet et publie le dernier
+snapshot dans un fichier mappé en mémoire (/dev/shm par défaut) ; chaque
+worker web le lit au lieu d'interroger 1xbet : N workers = une seule
+récupération du flux, et le collecteur ne partage plus le GIL du site.
+
+Format du fichier : en-tête fixe (FILE_HEADER) puis les matchs bruts en JSON
+compact. Le processus écrit un nouveau fichier puis le renomme : un lecteur
+garde une vue cohérente de l'ancien fichier jusqu'à sa prochaine lecture.
+Les lecteurs ne lisent que l'en-tête (sans copie) tant que la version du flux
+ne change pas, et ne décodent les matchs qu'une fois par version.
+
+Activé côté web par la variable d'environnement FEED_SHARED_PATH. Si le
+fichier est absent ou trop ancien (collecteur arrêté), le worker récupère
+le flux lui-même comme avant.
+
+Usage : FEED_SHARED_PATH=/dev/shm/oracxpred_feed.bin python shared_feed.py [--collect]
+"""
+
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from datetime import datetime
+
+from live_feed import FeedSnapshot
+
+
+FILE_MAGIC = b'OXFS'
+FILE_FORMAT_VERSION = 1
+# magic, format, réservé, fetched_at, changed_at (epoch UTC), version du flux, taille des données
+FILE_HEADER = struct.Struct('<4sHHdd16sQ')
+SHARED_FEED_PATH_ENV = 'FEED_SHARED_PATH'
+SHARED_FEED_STALE_SECONDS = 30  # Au-delà, le worker récupère le flux lui-même
+
+
+class SharedFeedError(Exception):
+    """Fichier de flux partagé illisible"""
+
+
+def default_shared_path():
+    folder = '/dev/shm' if os.path.isdir('/dev/shm') else os.environ.get('TMPDIR', '/tmp')
+    return os.path.join(folder, 'oracxpred_feed.bin')
+
+
+def write_snapshot(path, snapshot):
+    """Publie un snapshot (écriture dans un fichier temporaire puis renommage atomique)"""
+    payload = json.dumps(snapshot.matches, separators=(',', ':'), ensure_ascii=False, default=str).encode('utf-8')
+    changed_at = (snapshot.changed_at - datetime(1970, 1, 1)).total_seconds()
+    header = FILE_HEADER.pack(FILE_MAGIC, FILE_FORMAT_VERSION, 0, snapshot.fetched_at, changed_at,
+                              snapshot.version.encode('ascii')[:16], len(payload))
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        f.write(payload)
+    os.replace(tmp_path, path)
+    return FILE_HEADER.size + len(payload)
+
+
+class SharedFeedReader:
+    """Lecture du fichier partagé par mmap (un lecteur par worker)"""
+
+    def __init__(self, path):
+        self.path = path
+        self._map = None
+        self._inode = None
+        self._lock = threading.Lock()
+        self.decodes = 0  # Décodages des matchs (un par version du flux)
+
+    def _remap(self):
+        """Mappe le fichier courant s'il a été remplacé ; False s'il n'existe pas"""
+        try:
+            inode = os.stat(self.path).st_ino
+        except FileNotFoundError:
+            return False
+        if inode != self._inode or self._map is None:
+            with open(self.path, 'rb') as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            if self._map is not None:
+                self._map.close()
+            self._map, self._inode = mapped, inode
+        return True
+
+    def read_header(self):
+        """(version, fetched_at, changed_at, taille) du snapshot publié, None si aucun"""
+        if not self._remap():
+            return None
+        if len(self._map) < FILE_HEADER.size:
+            raise SharedFeedError(f"En-tête tronqué dans {self.path}")
+        magic, file_format, _, fetched_at, changed_at, version, size = FILE_HEADER.unpack_from(self._map)
+        if magic != FILE_MAGIC or file_format != FILE_FORMAT_VERSION:
+            raise SharedFeedError(f"Format inconnu dans {self.path}: {magic!r} v{file_format}")
+        return version.rstrip(b'\0').decode('ascii'), fetched_at, changed_at, size
+
+    def get_snapshot(self, current=None):
+        """
+        Snapshot publié par le collecteur (current réutilisé si la version n'a pas changé)
+
+        Returns:
+            FeedSnapshot, ou None si le fichier est absent ou trop ancien
+        """
+        with self._lock:
+            header = self.read_header()
+            if header is None:
+                return None
+            version, fetched_at, changed_at, size = header
+            if time.time() - fetched_at > SHARED_FEED_STALE_SECONDS:
+                return None
+            if current is not None and current.version == version:
+                current.fetched_at = fetched_at
+                return current
+            matches = json.loads(self._map[FILE_HEADER.size:FILE_HEADER.size + size])
+            self.decodes += 1
+        changed = datetime.utcfromtimestamp(changed_at).replace(microsecond=0)
+        return FeedSnapshot(matches, version, changed, fetched_at)
+
+    def close(self):
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+            self._map = self._inode = None
+
+
+_reader = None
+_reader_path = None
+
+
+def get_reader():
+    """Lecteur du fichier désigné par FEED_SHARED_PATH (None si le partage est désactivé)"""
+    global _reader, _reader_path
+
+    path = os.environ.get(SHARED_FEED_PATH_ENV)
+    if not path:
+        return None
+    if _reader is None or _reader_path != path:
+        if _reader is not None:
+            _reader.close()
+        _reader, _reader_path = SharedFeedReader(path), path
+    return _reader
+
+
+def run_feed_process(path, interval, collect=False, once=False):
+    """Boucle du processus collecteur : récupération, publication, écriture en base (facultative)"""
+    from live_feed import fetch_feed_matches, publish_snapshot, normalize_match
+
+    collector = app = None
+    if collect:
+        from flask import Flask
+        from models import db
+        from match_collector import MatchCollector
+
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///oracxpred.db')
+        app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+        db.init_app(app)
+        collector = MatchCollector(source_type="1xbet")
+
+    while True:
+        try:
+            snapshot = publish_snapshot(fetch_feed_matches())
+            size = write_snapshot(path, snapshot)
+            print(f"🔗 Snapshot {snapshot.version} publié ({len(snapshot.matches)} matchs, {size} octets)")
+            if collector is not None:
+                with app.app_context():
+                    now = datetime.utcnow()
+                    collector.process_matches([normalize_match(match, now) for match in snapshot.matches
+                                               if match.get("I") is not None])
+        except Exception as e:
+            print(f"⚠️ Erreur du processus de flux: {e}")
+        if once:
+            return
+        time.sleep(interval)
+
+
+if __name__ == "__main__":
+    import argparse
+    from live_feed import FEED_TTL_SECONDS
+
+    parser = argparse.ArgumentParser(description="Processus collecteur : flux 1xbet partagé par mmap")
+    parser.add_argument('--path', default=os.environ.get(SHARED_FEED_PATH_ENV) or default_shared_path())
+    parser.add_argument('--interval', type=float, default=FEED_TTL_SECONDS)
+    parser.add_argument('--collect', action='store_true', help="Écrire aussi les matchs en base (collecteur)")
+    parser.add_argument('--once', action='store_true')
+    args = parser.parse_args()
+    run_feed_process(args.path, args.interval, args.collect, args.once)
@@ -0,0 +1,231 @@
+"""
+📊 SERVICE DE STATISTIQUES - ORACXPRED
+======================================
+Compteurs des tableaux de bord calculés en une seule requête groupée par
+table et gardés en mémoire :
+- matchs collectés et prédictions : tenus à jour par le collecteur et les
+  écritures de prédictions, recalculés en entier toutes les resync_interval
+  secondes (écritures d'autres processus, fenêtres 24h / 7 jours) ;
+- utilisateurs, abonnements, notifications : recalculés au plus toutes les
+  ttl secondes.
+"""
+
+import copy
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, case, exists, func
+
+from models import db, CollectedMatch, Prediction, User, UserSubscription, Notification, NotificationRead
+
+
+STATS_TTL_SECONDS = 5
+STATS_RESYNC_SECONDS = 60
+
+MATCH_STATUSES = ['en_attente', 'en_cours', 'termine', 'annule']
+MATCH_GAMES = ['FIFA', 'eFootball', 'FC']
+
+
+def _window_flags(created_at, now):
+    """(dans les 24h, dans les 7 jours) pour une date de création"""
+    created_at = created_at or now
+    return int(created_at >= now - timedelta(hours=24)), int(created_at >= now - timedelta(days=7))
+
+
+class StatsService:
+    """Agrégats groupés en cache, mis à jour de façon incrémentale"""
+
+    def __init__(self, ttl=STATS_TTL_SECONDS, resync_interval=STATS_RESYNC_SECONDS):
+        self.ttl = ttl
+        self.resync_interval = resync_interval
+        self._lock = threading.Lock()
+        self._entries = {}  # nom -> (calculé à (monotonic), données)
+        self._generations = Counter()  # nom -> mises à jour incrémentales reçues
+        self.queries = 0  # Requêtes d'agrégat exécutées (diagnostic)
+
+    def _get(self, name, compute, max_age):
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None and time.monotonic() - entry[0] < max_age:
+                return copy.deepcopy(entry[1])
+            generation = self._generations[name]
+        data = compute()
+        self.queries += 1
+        with self._lock:
+            # Mise à jour reçue pendant le calcul : le résultat l'inclut peut-être, peut-être pas ;
+            # il n'est pas gardé en cache et le prochain appel recalcule
+            if self._generations[name] == generation:
+                self._entries[name] = (time.monotonic(), data)
+        return copy.deepcopy(data)
+
+    def _apply(self, name, update):
+        """Applique une mise à jour incrémentale si l'agrégat est en cache (sinon le prochain calcul l'inclura)"""
+        with self._lock:
+            self._generations[name] += 1
+            entry = self._entries.get(name)
+            if entry is not None:
+                update(entry[1])
+
+    def invalidate(self, name=None):
+        """Force le recalcul d'un agrégat (ou de tous)"""
+        with self._lock:
+            if name is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(name, None)
+
+    # ----- Matchs collectés -----
+
+    def _compute_collected_matches(self):
+        now = datetime.utcnow()
+        rows = db.session.query(
+            CollectedMatch.statut,
+            CollectedMatch.jeu,
+            CollectedMatch.source_donnees,
+            func.count(CollectedMatch.id),
+            func.sum(case((CollectedMatch.created_at >= now - timedelta(hours=24), 1), else_=0)),
+            func.sum(case((CollectedMatch.created_at >= now - timedelta(days=7), 1), else_=0))
+        ).group_by(CollectedMatch.statut, CollectedMatch.jeu, CollectedMatch.source_donnees).all()
+        # (statut, jeu, source) -> [total, dernières 24h, 7 derniers jours]
+        return {(statut, jeu, source): [count, last_24h or 0, last_7d or 0]
+                for statut, jeu, source, count, last_24h, last_7d in rows}
+
+    def collected_matches(self):
+        """Statistiques des matchs collectés (total, par statut, par jeu, par source, 24h, 7 jours)"""
+        groups = self._get('collected_matches', self._compute_collected_matches, self.resync_interval)
+        by_status = Counter({status: 0 for status in MATCH_STATUSES})
+        by_game = Counter({game: 0 for game in MATCH_GAMES})
+        by_source = Counter()
+        stats = {'total_matches': 0, 'last_24h': 0, 'last_7d': 0}
+        for (statut, jeu, source), (count, last_24h, last_7d) in groups.items():
+            if count <= 0:
+                continue
+            by_status[statut] += count
+            by_game[jeu] += count
+            by_source[source or 'unknown'] += count
+            stats['total_matches'] += count
+            stats['last_24h'] += last_24h
+            stats['last_7d'] += last_7d
+        stats['by_status'] = dict(by_status)
+        stats['by_game'] = dict(by_game)
+        stats['by_source'] = dict(by_source)
+        return stats
+
+    def match_created(self, statut, jeu, source, created_at=None):
+        """À appeler après l'insertion d'un match collecté"""
+        flags = _window_flags(created_at, datetime.utcnow())
+
+        def update(groups):
+            counts = groups.setdefault((statut, jeu, source), [0, 0, 0])
+            counts[0] += 1
+            counts[1] += flags[0]
+            counts[2] += flags[1]
+        self._apply('collected_matches', update)
+
+    def match_deleted(self, statut, jeu, source, created_at=None):
+        """À appeler après la suppression d'un match collecté"""
+        flags = _window_flags(created_at, datetime.utcnow())
+
+        def update(groups):
+            counts = groups.setdefault((statut, jeu, source), [0, 0, 0])
+            counts[0] -= 1
+            counts[1] -= flags[0]
+            counts[2] -= flags[1]
+        self._apply('collected_matches', update)
+
+    def match_status_changed(self, old_statut, new_statut, jeu, source, created_at=None):
+        """À appeler après un changement de statut d'un match collecté"""
+        if old_statut == new_statut:
+            return
+        self.match_deleted(old_statut, jeu, source, created_at)
+        self.match_created(new_statut, jeu, source, created_at)
+
+    # ----- Prédictions -----
+
+    def _compute_predictions(self):
+        total, active = db.session.query(
+            func.count(Prediction.id),
+            func.sum(case(((Prediction.is_valid == True) & (Prediction.is_locked == False), 1), else_=0))
+        ).one()
+        return {'total': total, 'active': active or 0}
+
+    def predictions(self):
+        """Nombre de prédictions (total, actives = valides et non verrouillées)"""
+        return self._get('predictions', self._compute_predictions, self.resync_interval)
+
+    def prediction_created(self, active=True):
+        """À appeler après l'insertion d'une prédiction"""
+        def update(data):
+            data['total'] += 1
+            data['active'] += int(active)
+        self._apply('predictions', update)
+
+    def prediction_deactivated(self):
+        """À appeler quand une prédiction active est invalidée ou verrouillée"""
+        def update(data):
+            data['active'] -= 1
+        self._apply('predictions', update)
+
+    # ----- Tables d'administration -----
+
+    def _compute_users(self):
+        total, pending = db.session.query(
+            func.count(User.id),
+            func.sum(case((User.is_approved == False, 1), else_=0))
+        ).one()
+        return {'total': total, 'pending_approvals': pending or 0}
+
+    def users(self):
+        """Nombre d'utilisateurs et d'inscriptions en attente d'approbation"""
+        return self._get('users', self._compute_users, self.ttl)
+
+    def _compute_subscriptions(self):
+        now = datetime.utcnow()
+        active, recently_expired = db.session.query(
+            func.sum(case(((UserSubscription.is_active == True) & (UserSubscription.expires_at > now), 1), else_=0)),
+            func.sum(case(((UserSubscription.is_active == False)
+                           & (UserSubscription.expires_at > now - timedelta(days=7)), 1), else_=0))
+        ).one()
+        return {'active': active or 0, 'recently_expired': recently_expired or 0}
+
+    def subscriptions(self):
+        """Abonnements actifs et expirés depuis moins de 7 jours"""
+        return self._get('subscriptions', self._compute_subscriptions, self.ttl)
+
+    def _compute_notifications(self):
+        targeted = db.session.query(func.count(Notification.id)).filter(
+            Notification.user_id.isnot(None), Notification.is_read == False
+        ).scalar()
+        # Globales : une par destinataire (approuvé, actif, inscrit avant l'envoi) sans accusé de lecture
+        global_unread = db.session.query(func.count()).select_from(Notification).join(User, and_(
+            User.is_approved == True, User.is_active == True, User.created_at <= Notification.created_at
+        )).filter(
+            Notification.is_global == True, Notification.user_id.is_(None),
+            ~exists().where(and_(NotificationRead.user_id == User.id,
+                                 NotificationRead.notification_id == Notification.id))
+        ).scalar()
+        return {'unread': targeted + global_unread}
+
+    def notifications(self):
+        """Notifications non lues (tous utilisateurs)"""
+        return self._get('notifications', self._compute_notifications, self.ttl)
+
+    def dashboard(self):
+        """Compteurs du tableau de bord admin"""
+        users = self.users()
+        subscriptions = self.subscriptions()
+        predictions = self.predictions()
+        return {
+            'total_users': users['total'],
+            'pending_approvals': users['pending_approvals'],
+            'active_subscriptions': subscriptions['active'],
+            'recently_expired': subscriptions['recently_expired'],
+            'total_predictions': predictions['total'],
+            'active_predictions': predictions['active'],
+            'unread_notifications': self.notifications()['unread']
+        }
+
+
+stats_service = StatsService()
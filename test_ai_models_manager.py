@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+🤖 TEST DU REGISTRE DE MODÈLES IA
+=================================
+Vérifie le chargement paresseux mis en cache, la détection des fichiers
+modifiés, l'épinglage de version, l'éviction LRU et les poids lus par mmap
+"""
+
+import array
+import os
+import pickle
+import shutil
+import tempfile
+
+from flask import Flask
+
+
+def test_registre_de_modeles():
+    """🤖 TEST CACHE, VERSIONS ET POIDS"""
+
+    print("🤖 TEST REGISTRE DE MODÈLES")
+    print("=" * 40)
+
+    from ai_models_manager import (
+        save_model, load_model, load_weights, pin_model_version, delete_model, list_models, get_registry
+    )
+
+    tmp = tempfile.mkdtemp()
+    try:
+        app = Flask(__name__, root_path=tmp)
+        app.config['AI_MODELS_CACHE_MAX_BYTES'] = 4096
+        with app.app_context():
+            registry = get_registry()
+            weights = array.array('d', (i / 7 for i in range(1000)))
+            save_model({'seuil': 0.6}, 'prediction_1x2', version='1', weights={'w': weights, 'biais': [0.5]})
+            save_model({'seuil': 0.7}, 'prediction_1x2', version='2')
+
+            # Chargement paresseux, puis servi depuis le cache
+            assert load_model('prediction_1x2') == {'seuil': 0.7}
+            assert load_model('prediction_1x2') == {'seuil': 0.7}
+            assert (registry.loads, registry.hits) == (1, 1)
+
+            # Version épinglée
+            pin_model_version('prediction_1x2', '1')
+            assert load_model('prediction_1x2') == {'seuil': 0.6}
+            mapped = load_weights('prediction_1x2')
+            assert mapped['w'].format == 'd' and list(mapped['w']) == list(weights)
+            assert list(mapped['biais']) == [0.5]
+            assert mapped['w'].readonly
+            pin_model_version('prediction_1x2', None)
+
+            # Fichier remplacé par un autre processus : détecté au stat, rechargé
+            path = os.path.join(tmp, 'ai_models', 'prediction_1x2_v2.pkl')
+            with open(path + '.new', 'wb') as f:
+                pickle.dump({'seuil': 0.9}, f)
+            os.replace(path + '.new', path)
+            assert load_model('prediction_1x2') == {'seuil': 0.9}
+
+            # Éviction LRU selon la taille
+            for n in range(10):
+                save_model({'donnees': 'x' * 1000, 'n': n}, f"modele_{n}", version='1')
+                assert load_model(f"modele_{n}")['n'] == n
+            stats = registry.get_stats()
+            print(f"📊 {stats}")
+            assert stats['total_bytes'] <= 4096 and len(stats['models']) < 10
+
+            # Index écrit de façon atomique, sans fichier temporaire restant
+            models_dir = os.path.join(tmp, 'ai_models')
+            assert not [f for f in os.listdir(models_dir) if f.endswith('.tmp')]
+            assert delete_model('prediction_1x2', '1')
+            assert not os.path.exists(os.path.join(models_dir, 'prediction_1x2_v1.weights'))
+            assert list(list_models()['prediction_1x2']) == ['2']
+            assert load_model('prediction_1x2', '1') is None
+            assert load_model('inconnu') is None
+    finally:
+        shutil.rmtree(tmp)
+    print("✅ Cache, versions, éviction et poids mappés")
+
+
+if __name__ == "__main__":
+    test_registre_de_modeles()
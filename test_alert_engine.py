@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+🚨 TEST DU MOTEUR D'ALERTES
+===========================
+Vérifie le regroupement des alertes identiques, l'écriture par lots et l'index
+"""
+
+import json
+
+
+def test_regroupement_match_volatil(make_app):
+    """🌪️ TEST MATCH VOLATIL : UNE ALERTE, N OCCURRENCES"""
+
+    print("🌪️ TEST REGROUPEMENT DES ALERTES")
+    print("=" * 40)
+
+    from models import db, Alert
+    from alert_engine import AlertEngine
+
+    app = make_app()
+    engine = AlertEngine(window_seconds=600)
+    engine.init_app(app, start_thread=False)
+
+    # Un match volatil : la prédiction est recalculée 200 fois
+    for i in range(200):
+        engine.raise_alert('low_confidence', f"Confiance faible ({30 + i % 5}%)",
+                           match_id=42, extra_data={'confidence': 30 + i % 5})
+        engine.raise_alert('no_votes', "Aucun vote", severity='error', match_id=42)
+    engine.raise_alert('low_confidence', "Confiance faible", match_id=43)
+
+    with app.app_context():
+        assert Alert.query.count() == 0, "Écriture différée"
+        engine.flush()
+        alerts = Alert.query.order_by(Alert.id).all()
+        print(f"📊 Alertes en base: {len(alerts)} / regroupées: {engine.coalesced_count}")
+        assert len(alerts) == 3
+        assert json.loads(alerts[0].extra_data)['occurrences'] == 200
+
+        # Nouvelles occurrences après écriture : mise à jour du compteur, pas de nouvelle ligne
+        engine.raise_alert('low_confidence', "Confiance faible", match_id=42)
+        assert engine.flush() == 1
+        assert Alert.query.count() == 3
+        db.session.expire_all()
+        assert json.loads(Alert.query.get(alerts[0].id).extra_data)['occurrences'] == 201
+
+    counts = engine.get_open_counts()
+    print(f"📊 Index: {counts}")
+    assert counts['total'] == 3 and counts['by_type']['low_confidence'] == 2
+    assert counts['by_severity']['error'] == 1
+    print("✅ Un match volatil ne produit plus qu'une alerte par type")
+
+
+def test_index_et_acquittement(make_app):
+    """✔️ TEST INDEX RECONSTRUIT ET ACQUITTEMENT"""
+
+    print("\n✔️ TEST INDEX ET ACQUITTEMENT")
+    print("=" * 40)
+
+    from models import db, Alert
+    from alert_engine import AlertEngine
+
+    app = make_app()
+    engine = AlertEngine()
+    engine.init_app(app, start_thread=False)
+    engine.raise_alert('odds_change', "Cote 1 : 1.8 -> 2.6", match_id=7)
+    engine.raise_alert('prediction_invalidated', "Invalidée")
+    engine.raise_alert('prediction_invalidated', "Invalidée")
+
+    with app.app_context():
+        engine.flush()
+        assert Alert.query.count() == 3, "Les alertes sans match ne sont pas regroupées"
+
+        # Redémarrage : compteurs et fenêtre de regroupement rechargés
+        restarted = AlertEngine()
+        restarted.init_app(app, start_thread=False)
+        assert restarted.get_open_counts()['total'] == 3
+        assert restarted.raise_alert('odds_change', "Cote 1 : 2.6 -> 3.1", match_id=7)[1] is False
+
+        alert = Alert.query.filter_by(alert_type='odds_change').first()
+        alert.is_acknowledged = True
+        db.session.commit()
+        restarted.acknowledged(alert)
+        assert restarted.get_open_counts()['total'] == 2
+        assert restarted.raise_alert('odds_change', "Cote 1 : 3.1 -> 1.5", match_id=7)[1] is True, \
+            "Après acquittement, une nouvelle occurrence crée une nouvelle alerte"
+    print("✅ Index reconstruit et tenu à jour sans lire la table")
+
+
+if __name__ == "__main__":
+    from conftest import create_test_app
+
+    test_regroupement_match_volatil(create_test_app)
+    test_index_et_acquittement(create_test_app)
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+📝 TEST DU JOURNAL D'AUDIT ASYNCHRONE
+=====================================
+Vérifie l'écriture par lots, la contre-pression et l'isolation de la session appelante
+"""
+
+
+def test_ecriture_par_lots(make_app):
+    """📦 TEST ÉCRITURE PAR LOTS"""
+
+    print("📦 TEST ÉCRITURE PAR LOTS")
+    print("=" * 40)
+
+    from models import SystemLog, AccessLog
+    from audit_log import AuditWriter
+
+    app = make_app()
+    writer = AuditWriter(batch_size=100)
+    writer.init_app(app, start_thread=False)
+
+    for i in range(250):
+        writer.submit(SystemLog, {'action_type': 'test', 'message': f"Action {i}", 'severity': 'info'})
+    writer.submit(AccessLog, {'user_id': 1, 'action_type': 'view_prediction', 'match_id': 42})
+    # Entrée invalide (message obligatoire) : seule elle est perdue
+    writer.submit(SystemLog, {'action_type': 'test', 'message': None})
+
+    with app.app_context():
+        assert SystemLog.query.count() == 0, "Rien n'est écrit avant le flush"
+        written = writer.flush()
+        stats = writer.get_stats()
+        print(f"📊 Stats: {stats}")
+        assert written == 251
+        assert SystemLog.query.count() == 250 and AccessLog.query.count() == 1
+        assert stats['dropped']['system_logs'] == 1
+    print("✅ Entrées écrites par lots, entrée invalide isolée")
+
+
+def test_contre_pression(make_app):
+    """🚧 TEST FILE PLEINE"""
+
+    print("\n🚧 TEST CONTRE-PRESSION")
+    print("=" * 40)
+
+    from models import SystemLog
+    from audit_log import AuditWriter
+
+    app = make_app()
+    writer = AuditWriter(queue_size=5, put_timeout=0.01)
+    writer.init_app(app, start_thread=False)
+
+    accepted = [writer.submit(SystemLog, {'action_type': 'test', 'message': str(i)}) for i in range(8)]
+    print(f"📊 Acceptées: {sum(accepted)} / abandonnées: {writer.dropped['system_logs']}")
+    assert sum(accepted) == 5 and writer.dropped['system_logs'] == 3
+    assert writer.flush() == 5
+    print("✅ File bornée, abandons comptés")
+
+
+def test_echec_sans_effet_sur_appelant(make_app):
+    """🛡️ TEST ISOLATION DE LA SESSION APPELANTE"""
+
+    print("\n🛡️ TEST ISOLATION")
+    print("=" * 40)
+
+    import os
+    import tempfile
+
+    from models import db, User
+    from prediction_manager import log_action
+    from audit_log import audit_writer
+
+    # Base fichier : l'écrivain utilise réellement une autre connexion que la session
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    app = make_app(f"sqlite:///{path}")
+    with app.app_context():
+        user = User(username="auditeur", password="x")
+        db.session.add(user)
+        # Journal invalide : ne doit ni lever d'exception ni annuler le travail en cours
+        previous_app = audit_writer.app
+        audit_writer.app = None
+        try:
+            log_action('test', None)
+        finally:
+            audit_writer.app = previous_app
+        db.session.commit()
+        assert User.query.filter_by(username="auditeur").count() == 1
+        db.session.remove()
+        db.engine.dispose()
+    os.remove(path)
+
+    # Sans application associée ni contexte : abandon compté, sans exception ni file
+    audit_writer.app, dropped = None, audit_writer.dropped['system_logs']
+    try:
+        log_action("test", "hors contexte")
+        assert audit_writer.dropped['system_logs'] == dropped + 1
+        assert audit_writer.flush() == 0
+    finally:
+        audit_writer.app = previous_app
+    print("✅ Un échec de journalisation n'annule plus le travail de l'appelant")
+
+
+if __name__ == "__main__":
+    from conftest import create_test_app
+
+    test_ecriture_par_lots(create_test_app)
+    test_contre_pression(create_test_app)
+    test_echec_sans_effet_sur_appelant(create_test_app)
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+🛰️ TEST DU COLLECTEUR MULTI-SOURCES ASYNCHRONE
+===============================================
+Vérifie qu'une source lente est coupée par son délai sans bloquer les autres,
+que la file bornée abandonne les mises à jour les plus anciennes, et que les
+cycles enregistrés sont écrits par lots
+"""
+
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+
+from benchmark_collector import make_matches
+
+
+def write_fixtures(path):
+    cycles = [make_matches(3), make_matches(3, live=True)]
+    for cycle in cycles:
+        for match in cycle:
+            match["heure_debut"] = match["heure_debut"].isoformat()
+            del match["source_donnees"]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(cycles, f)
+
+
+def test_sources_concurrentes(make_app):
+    """🛰️ TEST SOURCES LENTES, FILE BORNÉE ET ÉCRITURE PAR LOTS"""
+
+    print("🛰️ TEST COLLECTEUR MULTI-SOURCES")
+    print("=" * 40)
+
+    from models import CollectedMatch
+    from match_collector import MatchDataSource
+    from collector_async import AsyncMatchCollector, SourceSpec
+
+    logging.getLogger('match_collector').setLevel(logging.ERROR)
+    logging.getLogger('collector_async').setLevel(logging.ERROR)
+    app = make_app()
+    fd, fixtures_path = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    try:
+        write_fixtures(fixtures_path)
+        burst = [dict(match, unique_match_id=f"burst_{i}") for i, match in enumerate(make_matches(20))]
+        sources = [
+            SourceSpec("lente", lambda: time.sleep(1) or [], interval=0.05, timeout=0.1),
+            SourceSpec("rafale", lambda: burst, interval=10, timeout=1),
+            SourceSpec("fixtures", MatchDataSource("fixtures", fixtures_path).get_live_matches,
+                       interval=0.1, timeout=1),
+        ]
+        collector = AsyncMatchCollector(app, sources, queue_size=8, batch_size=4, flush_interval=0.05)
+        asyncio.run(collector.run(duration=0.6))
+        metrics = collector.get_metrics()
+        print(f"📊 {metrics}")
+
+        slow, fixtures = metrics['sources']['lente'], metrics['sources']['fixtures']
+        assert slow['timeouts'] >= 1 and slow['lag_seconds'] is None
+        assert slow['skipped'] >= 1, "Appel précédent encore en cours : tour sauté"
+        assert fixtures['polls'] >= 3, "Les autres sources ne sont pas bloquées"
+        assert metrics['dropped'] >= 12, "Rafale de 20 matchs dans une file de 8"
+        assert metrics['queue_depth'] == 0 and metrics['failed_batches'] == 0
+
+        with app.app_context():
+            assert CollectedMatch.query.filter(CollectedMatch.unique_match_id.like("burst_%")).count() <= 8
+            fixture_match = CollectedMatch.query.filter_by(unique_match_id="bench_1").one()
+            assert fixture_match.statut == "en_cours" and fixture_match.source_donnees == "fixtures"
+    finally:
+        os.remove(fixtures_path)
+    print("✅ Sources indépendantes, file bornée, écriture par lots")
+
+
+def test_elements_mal_formes(make_app):
+    """🧯 TEST ÉLÉMENTS MAL FORMÉS ET LOT EN ÉCHEC"""
+
+    print("\n🧯 TEST ROBUSTESSE DE L'ÉCRIVAIN")
+    print("=" * 40)
+
+    from models import CollectedMatch
+    from collector_async import AsyncMatchCollector, SourceSpec
+
+    logging.getLogger('match_collector').setLevel(logging.CRITICAL)
+    logging.getLogger('collector_async').setLevel(logging.CRITICAL)
+    app = make_app()
+    sources = [
+        SourceSpec("invalide", lambda: [{'foo': 1}, "texte", dict(make_matches(1)[0], heure_debut="2025-01-01")],
+                   interval=0.05, timeout=1),
+        SourceSpec("valide", lambda: make_matches(3), interval=0.05, timeout=1),
+    ]
+    collector = AsyncMatchCollector(app, sources, flush_interval=0.05)
+    calls = []
+    original = collector.writer.process_matches
+
+    def fail_once(batch):
+        calls.append(len(batch))
+        if len(calls) == 1:
+            raise KeyError('unique_match_id')
+        return original(batch)
+
+    collector.writer.process_matches = fail_once
+    asyncio.run(collector.run(duration=0.4))
+    metrics = collector.get_metrics()
+    print(f"📊 {metrics['sources']['invalide']}, lots écrits: {metrics['written_batches']}, "
+          f"en échec: {metrics['failed_batches']}")
+    assert metrics['sources']['invalide']['invalid'] >= 3 and metrics['sources']['invalide']['matches'] == 0
+    assert metrics['failed_batches'] == 1 and metrics['written_batches'] >= 1, "L'écrivain survit à un échec"
+    assert metrics['dropped'] == 0
+    with app.app_context():
+        assert CollectedMatch.query.count() == 3
+    print("✅ Éléments invalides ignorés, écrivain toujours actif")
+
+
+def test_normalisation_flux():
+    """📡 TEST MATCH DU FLUX -> FORMAT DU COLLECTEUR"""
+
+    from datetime import datetime
+    from live_feed import normalize_match
+
+    now = datetime(2025, 1, 1, 12, 0)
+    raw = {"I": 42, "LE": "FIFA 24. Premier League", "O1": "A", "O2": "B", "S": 1735732800 - 600,
+           "SC": {"FS": {"S1": 2}, "TS": 600}}
+    match = normalize_match(raw, now)
+    assert match["unique_match_id"] == "1xbet_42" and match["jeu"] == "FIFA"
+    assert (match["statut"], match["score_domicile"], match["score_exterieur"]) == ("en_cours", 2, 0)
+
+    raw.update(S=1735732800 + 600, SC={})
+    assert normalize_match(raw, now)["statut"] == "en_attente"
+    assert normalize_match(raw, now)["score_domicile"] is None
+    print("✅ Normalisation du flux 1xbet")
+
+
+if __name__ == "__main__":
+    from conftest import create_test_app
+
+    test_sources_concurrentes(create_test_app)
+    test_elements_mal_formes(create_test_app)
+    test_normalisation_flux()
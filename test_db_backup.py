@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+💾 TEST DES SAUVEGARDES EN LIGNE
+================================
+Vérifie la sauvegarde par l'API SQLite pendant des écritures concurrentes,
+la compression, la sauvegarde incrémentale, la restauration et la copie en
+une étape quand la base change plus vite qu'elle n'est copiée
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+
+def count_logs(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM system_logs").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_sauvegarde_complete_et_incrementale(make_app):
+    """💾 TEST SAUVEGARDE EN LIGNE, DELTA ET RESTAURATION"""
+
+    print("💾 TEST SAUVEGARDES EN LIGNE")
+    print("=" * 40)
+
+    from models import db, SystemLog, BackupLog
+    from oracxpred_utils import create_backup, cleanup_old_backups
+    from db_backup import restore_backup, integrity_check, FULL_SUFFIX, DELTA_SUFFIX
+
+    tmp = tempfile.mkdtemp()
+    try:
+        app = make_app(f"sqlite:///{os.path.join(tmp, 'live.db')}", sqlite_profile=True, root_path=tmp)
+        with app.app_context():
+            db.session.execute(SystemLog.__table__.insert(), [
+                {'action_type': 'test', 'message': f"log {i} " + 'x' * 200, 'severity': 'info'} for i in range(5000)
+            ])
+            db.session.commit()
+
+            # Écritures concurrentes pendant la sauvegarde : ni blocage ni copie incohérente
+            stop = threading.Event()
+            written = []
+
+            def writer():
+                with app.app_context():
+                    while not stop.is_set():
+                        db.session.add(SystemLog(action_type='pendant', message='écriture', severity='info'))
+                        db.session.commit()
+                        written.append(1)
+                        time.sleep(0.001)
+                    db.session.remove()
+
+            thread = threading.Thread(target=writer)
+            thread.start()
+            full_path = create_backup('weekly')
+            stop.set()
+            thread.join()
+
+            assert full_path and full_path.endswith(FULL_SUFFIX), full_path
+            assert written, "L'écrivain n'a pas été bloqué pendant la sauvegarde"
+            full_size = os.path.getsize(full_path)
+            print(f"📦 Complète: {full_size} octets compressés, {len(written)} écritures pendant la copie")
+
+            db.session.execute(SystemLog.__table__.insert(), [
+                {'action_type': 'apres', 'message': f"nouveau {i}", 'severity': 'info'} for i in range(50)
+            ])
+            db.session.commit()
+            expected = SystemLog.query.count()
+
+            delta_path = create_backup('daily', incremental=True)
+            assert delta_path and delta_path.endswith(DELTA_SUFFIX), delta_path
+            assert os.path.getsize(delta_path) < full_size
+            print(f"🧩 Incrémentale: {os.path.getsize(delta_path)} octets")
+
+            restored = os.path.join(tmp, 'restored.db')
+            restore_backup(delta_path, restored)
+            assert integrity_check(restored) == []
+            assert count_logs(restored) == expected
+
+            restored_full = os.path.join(tmp, 'restored_full.db')
+            restore_backup(full_path, restored_full)
+            assert 5000 <= count_logs(restored_full) <= 5000 + len(written)
+
+            # La complète vieillie reste tant que l'incrémentale s'appuie dessus
+            old = time.time() - 40 * 86400
+            os.utime(full_path, (old, old))
+            assert cleanup_old_backups(keep_days=30) == 0 and os.path.exists(full_path)
+            os.utime(delta_path, (old, old))
+            assert cleanup_old_backups(keep_days=30) == 2
+
+            # Incrémentale récente tronquée : les complètes sont gardées, le reste est purgé
+            backup_dir = os.path.dirname(full_path)
+            kept_full = os.path.join(backup_dir, 'ancienne' + FULL_SUFFIX)
+            expired_delta = os.path.join(backup_dir, 'ancienne' + DELTA_SUFFIX)
+            for path in (kept_full, expired_delta):
+                with open(path, 'wb') as f:
+                    f.write(b'x')
+                os.utime(path, (old, old))
+            with open(os.path.join(backup_dir, 'tronquee' + DELTA_SUFFIX), 'wb') as f:
+                f.write(b'\x1f\x8b')
+            assert cleanup_old_backups(keep_days=30) == 1
+            assert os.path.exists(kept_full) and not os.path.exists(expired_delta)
+
+            assert BackupLog.query.filter_by(status='success').count() == 2
+            db.engine.dispose()
+    finally:
+        shutil.rmtree(tmp)
+    print("✅ Copie en ligne vérifiée, delta restauré, purge cohérente (même avec un delta illisible)")
+
+
+def test_redemarrages_bornes():
+    """🔁 TEST ÉCRITURES CONTINUES PENDANT LA COPIE"""
+
+    print("\n🔁 TEST REDÉMARRAGES BORNÉS")
+    print("=" * 40)
+
+    from db_backup import online_copy, integrity_check
+
+    tmp = tempfile.mkdtemp()
+    try:
+        source_path = os.path.join(tmp, 'source.db')
+        conn = sqlite3.connect(source_path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("CREATE TABLE system_logs (id INTEGER PRIMARY KEY, message TEXT)")
+        conn.executemany("INSERT INTO system_logs (message) VALUES (?)", [('x' * 500,)] * 2000)
+        conn.commit()
+        conn.close()
+
+        # Sans écriture : copie par étapes, jamais redémarrée
+        quiet = online_copy(source_path, os.path.join(tmp, 'quiet.db'), pages=20, pause=0)
+        assert (quiet['restarts'], quiet['single_step']) == (0, False) and quiet['steps'] > 1
+
+        stop = threading.Event()
+
+        def writer():
+            conn = sqlite3.connect(source_path, timeout=10)
+            while not stop.is_set():
+                conn.execute("INSERT INTO system_logs (message) VALUES ('y')")
+                conn.commit()
+                time.sleep(0.001)
+            conn.close()
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        try:
+            copy = online_copy(source_path, os.path.join(tmp, 'busy.db'), pages=5, pause=0.005, max_restarts=2)
+        finally:
+            stop.set()
+            thread.join()
+        print(f"📊 Au calme: {quiet} / sous écritures: {copy}")
+        assert copy['single_step'] and copy['restarts'] == 3, "Copie terminée en une étape après 2 redémarrages"
+        assert integrity_check(os.path.join(tmp, 'busy.db')) == []
+        assert count_logs(os.path.join(tmp, 'busy.db')) >= 2000
+    finally:
+        shutil.rmtree(tmp)
+    print("✅ Copie terminée malgré un flux d'écritures continu")
+
+
+if __name__ == "__main__":
+    from conftest import create_test_app
+
+    test_sauvegarde_complete_et_incrementale(create_test_app)
+    test_redemarrages_bornes()
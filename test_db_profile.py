@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+🗄️ TEST DU PROFIL SQLITE
+========================
+Vérifie que chaque PRAGMA est appliqué et que lectures et écritures
+concurrentes ne produisent plus "database is locked"
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+
+from flask import Flask
+
+
+def test_pragmas_appliques(make_app):
+    """🔧 TEST PRAGMA VÉRIFIABLES"""
+
+    print("🔧 TEST PRAGMA")
+    print("=" * 40)
+
+    from models import db
+    from db_profile import check_sqlite_profile, get_sqlite_pragmas, configure_database
+
+    tmp = tempfile.mkdtemp()
+    try:
+        app = make_app(f"sqlite:///{os.path.join(tmp, 'profil.db')}", sqlite_profile=True)
+        with app.app_context():
+            with db.engine.connect() as connection:
+                print(f"📊 PRAGMA: {get_sqlite_pragmas(connection)}")
+                assert check_sqlite_profile(connection) == []
+            assert db.engine.pool.size() == 10
+            db.engine.dispose()
+
+        memory_app = Flask(__name__)
+        memory_app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        assert not configure_database(memory_app), "Pas de profil pour une base en mémoire"
+    finally:
+        shutil.rmtree(tmp)
+    print("✅ WAL, synchronous, busy_timeout, cache, mmap appliqués")
+
+
+def test_lectures_ecritures_concurrentes(make_app):
+    """🧵 TEST THREADS LECTEURS / ÉCRIVAINS"""
+
+    print("\n🧵 TEST CONCURRENCE")
+    print("=" * 40)
+
+    from models import db, SystemLog
+
+    tmp = tempfile.mkdtemp()
+    try:
+        app = make_app(f"sqlite:///{os.path.join(tmp, 'concurrence.db')}", sqlite_profile=True)
+        errors = []
+
+        def writer(n):
+            with app.app_context():
+                try:
+                    for i in range(50):
+                        db.session.add(SystemLog(action_type='bench', message=f"{n}-{i}"))
+                        db.session.commit()
+                except Exception as e:
+                    errors.append(e)
+                finally:
+                    db.session.remove()
+
+        def reader():
+            with app.app_context():
+                try:
+                    for _ in range(50):
+                        SystemLog.query.filter_by(action_type='bench').count()
+                except Exception as e:
+                    errors.append(e)
+                finally:
+                    db.session.remove()
+
+        threads = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+        threads += [threading.Thread(target=reader) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        with app.app_context():
+            total = SystemLog.query.count()
+            db.engine.dispose()
+        print(f"📊 Lignes écrites: {total} / erreurs: {len(errors)}")
+        assert not errors, f"Erreurs de concurrence: {errors[:3]}"
+        assert total == 200
+    finally:
+        shutil.rmtree(tmp)
+    print("✅ Aucune erreur 'database is locked'")
+
+
+if __name__ == "__main__":
+    from conftest import create_test_app
+
+    test_pragmas_appliques(create_test_app)
+    test_lectures_ecritures_concurrentes(create_test_app)
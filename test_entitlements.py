@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+🎟️ TEST DES DROITS D'ACCÈS PAR REQUÊTE
+======================================
+Vérifie le calcul en une requête, le cache par utilisateur et l'invalidation
+"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+
+def count_queries(db):
+    """Compteur de requêtes SQL exécutées sur le moteur courant"""
+    queries = []
+    event.listen(db.engine, "before_cursor_execute", lambda *args: queries.append(args[2]))
+    return queries
+
+
+def test_droits_une_requete(make_app):
+    """🎟️ TEST DROITS CALCULÉS UNE FOIS"""
+
+    print("🎟️ TEST DROITS CALCULÉS UNE FOIS")
+    print("=" * 40)
+
+    from models import db, User, SubscriptionPlan, UserSubscription
+    from entitlements import get_entitlement, invalidate_entitlement, entitlement_cache
+
+    app = make_app()
+    entitlement_cache.clear()
+
+    with app.app_context():
+        admin = User(username="admin", password="x", is_admin=True, is_approved=True)
+        user = User(username="joueur", password="x", is_approved=True)
+        db.session.add_all([admin, user])
+        db.session.commit()
+        plan = SubscriptionPlan(name="Semaine", predictions_per_day=5, duration_days=7,
+                                duration_type="week", price_fcfa=1000, created_by=admin.id)
+        db.session.add(plan)
+        db.session.commit()
+        db.session.add(UserSubscription(user_id=user.id, plan_id=plan.id,
+                                        expires_at=datetime.utcnow() + timedelta(days=7)))
+        db.session.commit()
+        user_id = user.id
+        queries = count_queries(db)
+
+    with app.test_request_context("/match/1"):
+        user = db.session.get(User, user_id)
+        del queries[:]
+        entitlement = get_entitlement(user)
+        assert get_entitlement(user) is entitlement
+        assert entitlement.can_view_predictions
+        assert entitlement.get_plan_limits() == {'predictions_per_day': 5, 'plan_name': 'Semaine'}
+        print(f"📊 Requêtes au premier calcul: {len(queries)}")
+        assert len(queries) == 1, "Abonnement et plan doivent être lus en une seule requête"
+
+    with app.test_request_context("/"):
+        user = db.session.get(User, user_id)
+        del queries[:]
+        assert get_entitlement(user).can_view_predictions
+        assert len(queries) == 0, "Les droits doivent venir du cache sur la requête suivante"
+
+        # Expiration de l'abonnement + invalidation explicite
+        UserSubscription.query.filter_by(user_id=user_id).update({'is_active': False})
+        db.session.commit()
+        invalidate_entitlement(user_id)
+        assert not get_entitlement(user).can_view_predictions
+        assert get_entitlement(user).get_plan_limits() is None
+
+    print("✅ Droits calculés en une requête, mis en cache et invalidés")
+
+
+def test_cache_borne_par_expiration():
+    """⏳ TEST CACHE BORNÉ PAR L'EXPIRATION DE L'ABONNEMENT"""
+
+    print("\n⏳ TEST EXPIRATION DU CACHE")
+    print("=" * 40)
+
+    from entitlements import Entitlement, EntitlementCache
+
+    cache = EntitlementCache(ttl=30)
+    cache.put(Entitlement(1, is_approved=True, has_paid_access=True,
+                          valid_until=datetime.utcnow() - timedelta(seconds=1)))
+    assert cache.get(1) is None, "Un accès expiré ne doit jamais être servi depuis le cache"
+
+    cache.put(Entitlement(2, is_approved=True, has_paid_access=True,
+                          valid_until=datetime.utcnow() + timedelta(days=1)))
+    assert cache.get(2).can_view_predictions
+    cache.invalidate(2)
+    assert cache.get(2) is None
+    print("✅ Le cache ne dépasse jamais la fin de l'abonnement")
+
+
+if __name__ == "__main__":
+    from conftest import create_test_app
+
+    test_droits_une_requete(create_test_app)
+    test_cache_borne_par_expiration()
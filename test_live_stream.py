@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+📺 TEST DE LA DIFFUSION EN DIRECT (SSE)
+=======================================
+Vérifie le calcul des changements, la diffusion, l'éviction des clients lents
+et l'état initial envoyé à un abonné payant
+"""
+
+from live_feed import FeedSnapshot, compute_feed_version
+
+
+def make_snapshot(matches):
+    return FeedSnapshot(matches, compute_feed_version(matches), None)
+
+
+def make_match(match_id, s1, s2, ts, cote1=1.8):
+    return {
+        "I": match_id, "LE": "FIFA 24. Cyber League", "O1": "Arsenal", "O2": "Chelsea",
+        "SC": {"FS": {"S1": s1, "S2": s2}, "TS": ts},
+        "E": [{"G": 1, "T": 1, "C": cote1}, {"G": 1, "T": 2, "C": 2.4}, {"G": 1, "T": 3, "C": 3.1}]
+    }
+
+
+def test_changements_uniquement():
+    """🔄 TEST DIFFUSION DES CHANGEMENTS UNIQUEMENT"""
+
+    print("🔄 TEST DIFFUSION DES CHANGEMENTS")
+    print("=" * 40)
+
+    from live_stream import MatchEventPublisher, Subscriber
+
+    publisher = MatchEventPublisher()
+    watcher = Subscriber(match_id=1, include_private=True)
+    public = Subscriber()
+    publisher._subscribers.update({watcher, public})
+
+    events = publisher.process_snapshot(make_snapshot([make_match(1, 0, 0, 600), make_match(2, 1, 0, 1200)]))
+    assert len(events) == 2, "Premier snapshot : un événement par match"
+    assert watcher.queue.qsize() == 1 and public.queue.qsize() == 2
+
+    # Même contenu : aucun calcul, aucun événement
+    assert publisher.process_snapshot(make_snapshot([make_match(1, 0, 0, 600), make_match(2, 1, 0, 1200)])) == []
+
+    # Seul le score du match 1 change
+    events = publisher.process_snapshot(make_snapshot([make_match(1, 1, 0, 660), make_match(2, 1, 0, 1200)]))
+    assert len(events) == 1
+    changes = events[0].full_payload
+    print(f"📨 Événement: {changes.strip()}")
+    assert '"score1": 1' in changes and "team1" not in changes
+
+    # Mouvement de cote uniquement : rien côté public
+    events = publisher.process_snapshot(make_snapshot([make_match(1, 1, 0, 660, cote1=1.6), make_match(2, 1, 0, 1200)]))
+    assert len(events) == 1 and events[0].public_payload is None
+    assert '"odds"' in events[0].full_payload
+
+    # Match disparu du flux
+    events = publisher.process_snapshot(make_snapshot([make_match(1, 1, 0, 660, cote1=1.6)]))
+    assert [e.event_type for e in events] == ["removed"]
+    print("✅ Seuls les changements sont diffusés")
+
+
+def test_eviction_client_lent():
+    """🐢 TEST ÉVICTION D'UN CLIENT LENT"""
+
+    print("\n🐢 TEST ÉVICTION CLIENT LENT")
+    print("=" * 40)
+
+    from live_stream import MatchEventPublisher, Subscriber
+
+    publisher = MatchEventPublisher(queue_size=2)
+    slow = Subscriber(queue_size=2)
+    publisher._subscribers.add(slow)
+
+    for minute in range(1, 5):
+        publisher.process_snapshot(make_snapshot([make_match(1, 0, 0, minute * 60)]))
+
+    print(f"📊 Clients évincés: {publisher.evicted_count}")
+    assert slow.evicted and slow.closed
+    assert publisher.subscriber_count() == 0
+    assert publisher.evicted_count == 1
+
+    stream = publisher.stream(slow)
+    messages = list(stream)
+    assert messages[-1].startswith("event: evicted")
+    print("✅ Client lent évincé sans bloquer l'éditeur")
+
+
+def test_decision_maitre_calculee_une_fois():
+    """🎯 TEST DÉCISION DU MAÎTRE CALCULÉE UNE FOIS PAR CHANGEMENT"""
+
+    print("\n🎯 TEST DÉCISION DU MAÎTRE")
+    print("=" * 40)
+
+    from live_stream import MatchEventPublisher, Subscriber
+
+    calls = []
+
+    def decision_provider(match):
+        calls.append(match["I"])
+        return {"action": "MISE", "cote": 1.8}
+
+    publisher = MatchEventPublisher(decision_provider=decision_provider)
+    watchers = [Subscriber(match_id=1, include_private=True) for _ in range(50)]
+    publisher._subscribers.update(watchers)
+
+    publisher.process_snapshot(make_snapshot([make_match(1, 0, 0, 60), make_match(2, 0, 0, 60)]))
+    assert calls == [1], "Décision calculée une seule fois, uniquement pour le match suivi"
+    assert all('"decision_maitre"' in w.queue.get_nowait() for w in watchers)
+    print(f"✅ 1 calcul pour {len(watchers)} abonnés")
+
+
+def test_etat_initial_abonne_payant():
+    """💳 TEST ÉTAT INITIAL D'UN NOUVEL ABONNÉ PAYANT"""
+
+    print("\n💳 TEST ÉTAT INITIAL")
+    print("=" * 40)
+
+    import json
+    from live_stream import MatchEventPublisher, Subscriber
+
+    calls = []
+
+    def decision_provider(match):
+        calls.append(match["I"])
+        return {"action": "MISE", "cote": 1.8}
+
+    publisher = MatchEventPublisher(decision_provider=decision_provider)
+    publisher._subscribers.add(Subscriber())  # Direct public : pas de décision calculée
+    publisher.process_snapshot(make_snapshot([make_match(1, 0, 0, 60)]))
+    assert calls == []
+
+    # Abonnement au match sans nouveau snapshot : la décision est envoyée dès la connexion
+    subscriber = Subscriber(match_id=1, include_private=True)
+    publisher._subscribers.add(subscriber)
+    stream = publisher.stream(subscriber)
+    next(stream)
+    initial = json.loads(next(stream).split("data: ", 1)[1])
+    state = initial['matches'][0]
+    print(f"📊 État initial: {sorted(state)}")
+    assert state['decision_maitre'] == {"action": "MISE", "cote": 1.8} and 'odds' in state
+    assert calls == [1]
+
+    # Le snapshot suivant sans mouvement réutilise la décision
+    publisher.process_snapshot(make_snapshot([make_match(1, 0, 0, 60), make_match(2, 0, 0, 60)]))
+    assert calls == [1]
+    public = publisher.current_states(1)[0]
+    assert 'decision_maitre' not in public and 'odds' not in public
+    stream.close()
+    print("✅ Décision et cotes envoyées à la connexion")
+
+
+def test_etat_oublie_a_l_arret():
+    """🧹 TEST ÉTAT OUBLIÉ QUAND LE DERNIER ABONNÉ PART"""
+
+    print("\n🧹 TEST ARRÊT DE L'ÉDITEUR")
+    print("=" * 40)
+
+    import time
+    import live_stream
+    from live_stream import MatchEventPublisher
+
+    snapshot = make_snapshot([make_match(1, 0, 0, 60)])
+    real_get = live_stream.get_feed_snapshot
+    live_stream.get_feed_snapshot = lambda max_age=None: snapshot
+    try:
+        publisher = MatchEventPublisher(poll_interval=0.01)
+        subscriber = publisher.subscribe()
+        deadline = time.monotonic() + 2
+        while not publisher.current_states() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert len(publisher.current_states()) == 1
+
+        publisher.unsubscribe(subscriber)
+        while publisher._thread is not None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert publisher._thread is None
+        print(f"📊 États après arrêt: {publisher.current_states()}")
+        assert publisher.current_states() == [] and publisher._last_version is None
+    finally:
+        live_stream.get_feed_snapshot = real_get
+    print("✅ Aucun état périmé pour le prochain abonné")
+
+
+def test_index_snapshot():
+    """🗂️ TEST INDEX DES CHAMPS DE FILTRAGE"""
+
+    print("\n🗂️ TEST INDEX DU SNAPSHOT")
+    print("=" * 40)
+
+    import time
+    from datetime import datetime
+
+    futur = make_match(3, 0, 0, 0)
+    futur["S"] = int(time.time()) + 3600
+    termine = make_match(4, 2, 1, 5400)
+    snapshot = make_snapshot([make_match(1, 1, 0, 600), futur, termine])
+
+    index = snapshot.get_index()
+    assert snapshot.get_index() is index, "L'index doit être calculé une seule fois par snapshot"
+    statuts = {entry["id"]: (entry["is_live"], entry["is_upcoming"], entry["is_finished"]) for entry in index}
+    print(f"📊 Statuts: {statuts}")
+    assert statuts[1] == (True, False, False)
+    assert statuts[3] == (False, True, False), "Un match dans le futur n'a pas encore débuté"
+    assert statuts[4] == (False, False, True)
+    assert index[1]["datetime"] == datetime.utcfromtimestamp(futur["S"]).strftime('%d/%m/%Y %H:%M')
+    assert all(entry["sport"] == "Football" for entry in index)
+    print("✅ Index pré-calculé correct")
+
+
+if __name__ == "__main__":
+    test_changements_uniquement()
+    test_eviction_client_lent()
+    test_decision_maitre_calculee_une_fois()
+    test_etat_initial_abonne_payant()
+    test_etat_oublie_a_l_arret()
+    test_index_snapshot()
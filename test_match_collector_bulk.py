@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+📥 TEST DE L'ÉCRITURE GROUPÉE DU COLLECTEUR
+============================================
+Vérifie qu'un cycle de collecte lit les matchs existants en une requête IN,
+écrit créations et mises à jour en un seul commit et un seul log récapitulatif,
+et ignore sans accès à la base les matchs dont l'empreinte n'a pas changé
+"""
+
+import json
+import logging
+
+from sqlalchemy import event
+
+from benchmark_collector import make_matches
+
+
+def test_cycle_groupe(make_app):
+    """📥 TEST CYCLE EN UNE TRANSACTION"""
+
+    print("📥 TEST ÉCRITURE GROUPÉE DU COLLECTEUR")
+    print("=" * 40)
+
+    from models import db, CollectedMatch, MatchCollectionLog
+    from match_collector import MatchCollector
+
+    logging.getLogger('match_collector').setLevel(logging.WARNING)
+    app = make_app()
+    with app.app_context():
+        collector = MatchCollector(source_type="simulated")
+        first = collector._upsert_matches(make_matches(40))
+        assert (first['new'], first['updated']) == (40, 0)
+
+        # Second cycle : 20 matchs démarrent, 1 se termine, 19 inchangés, 5 nouveaux
+        matches = make_matches(45, live=True)[:20] + make_matches(45)[20:]
+        matches[0].update(statut="termine", score_domicile=3, score_exterieur=1)
+        collector.source.get_live_matches = lambda: matches
+
+        statements = []
+        commits = []
+        on_statement = lambda conn, cursor, statement, *args: statements.append(statement)
+        on_commit = lambda session: commits.append(1)
+        event.listen(db.engine, 'before_cursor_execute', on_statement)
+        event.listen(db.session, 'after_commit', on_commit)
+        result = collector._collect_and_process_matches()
+        event.remove(db.session, 'after_commit', on_commit)
+        event.remove(db.engine, 'before_cursor_execute', on_statement)
+
+        reads = [s for s in statements if s.lstrip().startswith('SELECT') and 'FROM collected_matches' in s]
+        print(f"📊 {result['new']} nouveaux, {result['updated']} mis à jour, {result['unchanged']} inchangés, "
+              f"{len(statements)} requêtes, {len(commits)} commits")
+        assert (result['new'], result['updated'], result['unchanged']) == (5, 20, 20)
+        assert len(reads) == 1, "Une seule requête IN pour les matchs existants"
+        assert len(commits) == 2, "Matchs du cycle, puis log récapitulatif"
+        assert result['started'] == [f"bench_{i}" for i in range(1, 20)]
+
+        match = CollectedMatch.query.filter_by(unique_match_id="bench_0").one()
+        assert (match.statut, match.score_domicile, match.equipe_gagnante) == ("termine", 3, match.equipe_domicile)
+        assert CollectedMatch.query.filter_by(statut="en_cours").count() == 19
+        assert CollectedMatch.query.count() == 45
+
+        logs = MatchCollectionLog.query.all()
+        assert len(logs) == 1, "Un seul log récapitulatif par cycle"
+        assert json.loads(logs[0].extra_data)['updated_matches'] == 20
+    print("✅ Une requête IN et un commit par cycle")
+
+
+def test_empreintes(make_app):
+    """🔎 TEST DÉTECTION DES CHANGEMENTS PAR EMPREINTE"""
+
+    print("\n🔎 TEST EMPREINTES DES MATCHS")
+    print("=" * 40)
+
+    from models import db, CollectedMatch
+    from match_collector import MatchCollector, MatchFingerprints
+
+    logging.getLogger('match_collector').setLevel(logging.WARNING)
+    app = make_app()
+    with app.app_context():
+        collector = MatchCollector(source_type="simulated")
+        matches = make_matches(10)
+        collector.source.get_live_matches = lambda: matches
+        collector._collect_and_process_matches()
+
+        # Même état au cycle suivant : aucune requête sur collected_matches
+        statements = []
+        on_statement = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', on_statement)
+        collector._collect_and_process_matches()
+        event.remove(db.engine, 'before_cursor_execute', on_statement)
+        assert not [s for s in statements if 'collected_matches' in s], "Matchs inchangés ignorés"
+
+        # Un match vu en attente puis démarré est toujours mis à jour
+        matches[3] = make_matches(10, live=True)[3]
+        result = collector._collect_and_process_matches()
+        print(f"📊 {result['updated']} mis à jour, {collector.fingerprints.hits} empreintes inchangées")
+        assert (result['new'], result['updated']) == (0, 1)
+        assert CollectedMatch.query.filter_by(unique_match_id="bench_3").one().statut == "en_cours"
+
+    # LRU borné et expiration
+    fingerprints = MatchFingerprints(max_entries=2, max_age=60)
+    for match_id in ("a", "b", "c"):
+        fingerprints.remember(match_id, b"x")
+    assert len(fingerprints) == 2 and not fingerprints.unchanged("a", b"x")
+    assert fingerprints.unchanged("c", b"x") and not fingerprints.unchanged("c", b"y")
+    fingerprints.max_age = -1
+    assert not fingerprints.unchanged("c", b"x"), "Entrée expirée"
+    print("✅ Seuls les matchs modifiés sont écrits")
+
+
+if __name__ == "__main__":
+    from conftest import create_test_app
+
+    test_cycle_groupe(create_test_app)
+    test_empreintes(create_test_app)
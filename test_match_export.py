@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+📤 TEST DE L'EXPORT EN FLUX DES MATCHS COLLECTÉS
+================================================
+Vérifie la pagination par clé (aucun doublon, aucun oubli même avec des dates
+identiques), les formats CSV / NDJSON / gzip et les filtres
+"""
+
+import csv
+import gzip
+import io
+import json
+from datetime import datetime, timedelta
+
+
+def fill(n):
+    from models import db, CollectedMatch
+
+    base = datetime(2026, 1, 1)
+    rows = []
+    for i in range(n):
+        created = base + timedelta(minutes=i // 7)  # 7 matchs par minute : dates identiques
+        rows.append({
+            'unique_match_id': f"m{i}", 'jeu': ['FIFA', 'eFootball', 'FC'][i % 3],
+            'equipe_domicile': "Équipe, A", 'equipe_exterieur': 'B "B"',
+            'heure_debut': created, 'score_domicile': i % 4, 'score_exterieur': 0,
+            'statut': 'termine' if i % 2 else 'en_cours', 'source_donnees': 'api',
+            'timestamp_enregistrement': created, 'created_at': created, 'updated_at': created
+        })
+    db.session.execute(CollectedMatch.__table__.insert(), rows)
+    db.session.commit()
+
+
+def test_pagination_par_cle(make_app):
+    """🔑 TEST BLOCS SANS DOUBLON NI OUBLI"""
+
+    print("🔑 TEST PAGINATION PAR CLÉ")
+    print("=" * 40)
+
+    from match_export import iter_match_rows
+
+    app = make_app()
+    with app.app_context():
+        fill(2503)
+        ids = [row[0] for row in iter_match_rows(chunk_size=100)]
+        print(f"📊 Lignes exportées: {len(ids)}")
+        assert len(ids) == 2503 and len(set(ids)) == 2503
+        assert ids[0] == "m2502", "Du plus récent au plus ancien"
+    print("✅ Toutes les lignes, une seule fois")
+
+
+def test_formats_et_filtres(make_app):
+    """📄 TEST CSV, NDJSON, GZIP ET FILTRES"""
+
+    print("\n📄 TEST FORMATS")
+    print("=" * 40)
+
+    from match_export import export_matches, parse_export_filters
+
+    app = make_app()
+    with app.app_context():
+        fill(300)
+
+        stream, mimetype, extension = export_matches('csv', chunk_size=50)
+        rows = list(csv.reader(io.StringIO(b''.join(stream).decode('utf-8'))))
+        assert mimetype == 'text/csv' and extension == 'csv'
+        assert rows[0][0] == 'ID' and len(rows) == 301
+        assert rows[1][2] == "Équipe, A" and rows[1][3] == 'B "B"'
+        assert rows[-1][4] == '0', "Un score nul est exporté (0), pas vide"
+
+        stream, mimetype, _ = export_matches('ndjson', chunk_size=50)
+        lines = b''.join(stream).decode('utf-8').splitlines()
+        first = json.loads(lines[0])
+        assert mimetype == 'application/x-ndjson' and len(lines) == 300
+        assert first['unique_match_id'] == 'm299' and first['created_at'].startswith('2026-01-01T00:42')
+
+        stream, mimetype, extension = export_matches('csv', compress=True)
+        assert mimetype == 'application/gzip' and extension == 'csv.gz'
+        assert len(gzip.decompress(b''.join(stream)).decode('utf-8').splitlines()) == 301
+
+        filters = parse_export_filters({'jeu': 'FIFA', 'statut': 'termine', 'date_from': '2026-01-01',
+                                        'date_to': '2026-01-01'})
+        stream, _, _ = export_matches('ndjson', filters=filters)
+        matches = [json.loads(line) for line in b''.join(stream).decode('utf-8').splitlines()]
+        print(f"📊 Filtre FIFA/termine: {len(matches)}")
+        assert len(matches) == 50
+        assert all(m['jeu'] == 'FIFA' and m['statut'] == 'termine' for m in matches)
+
+        filters = parse_export_filters({'date_from': '2026-01-02'})
+        assert b''.join(export_matches('ndjson', filters=filters)[0]) == b''
+        try:
+            parse_export_filters({'date_from': '01/01/2026'})
+            assert False, "Date invalide acceptée"
+        except ValueError:
+            pass
+    print("✅ CSV, NDJSON, gzip et filtres")
+
+
+if __name__ == "__main__":
+    from conftest import create_test_app
+
+    test_pagination_par_cle(create_test_app)
+    test_formats_et_filtres(create_test_app)
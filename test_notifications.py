@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+🔔 TEST DES NOTIFICATIONS GLOBALES
+==================================
+Vérifie qu'une diffusion globale n'écrit qu'une ligne, que les lectures
+sont suivies par utilisateur et que l'ETag du polling est partagé entre processus
+"""
+
+
+def add_users(n):
+    from models import db, User
+
+    users = [User(username=f"user{i}", password="x", is_approved=True) for i in range(n)]
+    db.session.add_all(users)
+    db.session.commit()
+    return users
+
+
+def test_diffusion_une_ligne(make_app):
+    """📣 TEST DIFFUSION GLOBALE = UNE INSERTION"""
+
+    print("📣 TEST DIFFUSION GLOBALE")
+    print("=" * 40)
+
+    from models import db, Notification, NotificationRead
+    from notifications import create_notification, get_unread_notifications, mark_as_read
+
+    app = make_app()
+    with app.app_context():
+        admin, alice, bob = add_users(500)[:3]
+        globale = create_notification("Maintenance", "Ce soir", admin.id)
+        ciblee = create_notification("Abonnement", "Expire demain", admin.id, user_id=alice.id)
+        db.session.commit()
+
+        print(f"📊 Lignes pour 500 utilisateurs: {Notification.query.count()}")
+        assert Notification.query.count() == 2
+        assert globale.is_global and globale.user_id is None and not ciblee.is_global
+
+        assert [n.id for n in get_unread_notifications(alice.id)] == [ciblee.id, globale.id]
+        assert [n.id for n in get_unread_notifications(bob.id)] == [globale.id]
+
+        # Alice lit la notification globale : Bob la voit toujours
+        assert mark_as_read(globale, alice.id)
+        assert mark_as_read(globale, alice.id), "Relecture sans doublon"
+        db.session.commit()
+        assert NotificationRead.query.count() == 1
+        assert [n.id for n in get_unread_notifications(alice.id)] == [ciblee.id]
+        assert [n.id for n in get_unread_notifications(bob.id)] == [globale.id]
+
+        # Une notification ciblée ne peut être lue que par son destinataire
+        assert not mark_as_read(ciblee, bob.id)
+        assert mark_as_read(ciblee, alice.id)
+        db.session.commit()
+        assert get_unread_notifications(alice.id) == []
+    print("✅ Une ligne par diffusion, un accusé de lecture par utilisateur")
+
+
+def test_public_des_diffusions(make_app):
+    """👥 TEST PUBLIC D'UNE NOTIFICATION GLOBALE"""
+
+    print("\n👥 TEST PUBLIC DES DIFFUSIONS")
+    print("=" * 40)
+
+    from datetime import timedelta
+    from models import db, User
+    from notifications import create_notification, get_unread_notifications, mark_as_read
+    from stats_service import StatsService
+
+    app = make_app()
+    with app.app_context():
+        admin, alice, bob, carol = add_users(4)
+        bob.is_approved = False
+        carol.is_active = False
+        globale = create_notification("Maintenance", "Ce soir", admin.id)
+        db.session.commit()
+        dave = User(username="dave", password="x", is_approved=True,
+                    created_at=globale.created_at + timedelta(seconds=1))
+        db.session.add(dave)
+        db.session.commit()
+
+        assert [n.id for n in get_unread_notifications(alice.id)] == [globale.id]
+        for user in (bob, carol, dave):
+            assert get_unread_notifications(user.id) == [], "Non approuvé, inactif ou inscrit après l'envoi"
+
+        # Compteur admin : admin et alice, puis seulement admin après lecture par alice
+        assert StatsService(ttl=0).notifications()['unread'] == 2
+        mark_as_read(globale, alice.id)
+        db.session.commit()
+        assert StatsService(ttl=0).notifications()['unread'] == 1
+    print("✅ Seuls les comptes approuvés, actifs et déjà inscrits la reçoivent")
+
+
+def test_polling_etag_et_curseur(make_app):
+    """🔁 TEST POLLING : 304 PAR CLÉ PRIMAIRE, CURSEUR, ATTENTE LONGUE"""
+
+    print("\n🔁 TEST POLLING DES NOTIFICATIONS")
+    print("=" * 40)
+
+    import threading
+    import time
+    from sqlalchemy import event
+    from models import db
+    from notifications import create_notification, inbox_versions, InboxVersions
+    from user_routes import user_bp
+
+    app = make_app()
+    app.secret_key = 'test'
+    app.register_blueprint(user_bp)
+    with app.app_context():
+        admin, alice = add_users(2)
+        first = create_notification("Bienvenue", "Bonjour", admin.id)
+        db.session.commit()
+        inbox_versions.changed(None)
+        admin_id, alice_id, first_id = admin.id, alice.id, first.id
+        engine = db.engine
+
+    statements = []
+    event.listen(engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+
+    client = app.test_client()
+    with client.session_transaction() as s:
+        s['user_id'] = alice_id
+
+    response = client.get('/notifications')
+    etag = response.headers['ETag']
+    assert response.status_code == 200 and response.json['cursor'] == first_id
+
+    # Boîte inchangée : 304 après une seule lecture de inbox_versions
+    statements.clear()
+    response = client.get('/notifications', headers={'If-None-Match': etag})
+    print(f"📊 Polling inchangé: {response.status_code}, requêtes SQL: {len(statements)}")
+    assert response.status_code == 304 and len(statements) == 1 and 'FROM inbox_versions' in statements[0]
+
+    # Nouvelle notification ciblée : nouvel ETag, le curseur ne renvoie que la nouveauté
+    with app.app_context():
+        second = create_notification("Abonnement", "Expire demain", admin_id, user_id=alice_id)
+        db.session.commit()
+        second_id = second.id
+    inbox_versions.changed(alice_id)
+    response = client.get(f'/notifications?since={first_id}', headers={'If-None-Match': etag})
+    assert response.status_code == 200 and response.headers['ETag'] != etag
+    assert [n['id'] for n in response.json['notifications']] == [second_id]
+    assert response.json['cursor'] == second_id
+    etag = response.headers['ETag']
+
+    # Lecture : la version de la boîte change
+    assert client.post(f'/notification/{second_id}/read').json['success']
+    response = client.get('/notifications', headers={'If-None-Match': etag})
+    assert response.status_code == 200 and [n['id'] for n in response.json['notifications']] == [first_id]
+    etag = response.headers['ETag']
+
+    # Attente longue : réveillée par une nouvelle notification globale
+    def broadcast():
+        time.sleep(0.2)
+        with app.app_context():
+            create_notification("Maintenance", "Ce soir", admin_id)
+            db.session.commit()
+        inbox_versions.changed(None)
+
+    thread = threading.Thread(target=broadcast)
+    start = time.monotonic()
+    thread.start()
+    response = client.get('/notifications?wait=5', headers={'If-None-Match': etag})
+    thread.join()
+    elapsed = time.monotonic() - start
+    print(f"📊 Attente longue: {response.status_code} après {elapsed:.2f} s")
+    assert response.status_code == 200 and elapsed < 4
+    assert len(response.json['notifications']) == 2
+
+    etag = response.headers['ETag']
+    response = client.get('/notifications?wait=0.2', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+
+    # Autre processus (ou redémarrage) : même ETag, et il voit les écritures des autres
+    other_worker = InboxVersions(poll_interval=0.05)
+    with app.app_context():
+        assert f'"{other_worker.etag(alice_id)}"' == etag
+        create_notification("Autre worker", "Créée ailleurs", admin_id)
+        db.session.commit()
+        assert other_worker.wait_for_change(alice_id, etag.strip('"'), 0.5), "Réveil sans changed() local"
+    response = client.get('/notifications', headers={'If-None-Match': etag})
+    assert response.status_code == 200, "Notification d'un autre worker : plus de 304"
+    print("✅ 304 par clé primaire, ETag partagé, curseur et attente longue")
+
+
+if __name__ == "__main__":
+    from conftest import create_test_app
+
+    test_diffusion_une_ligne(create_test_app)
+    test_public_des_diffusions(create_test_app)
+    test_polling_etag_et_curseur(create_test_app)
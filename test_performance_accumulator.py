@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+📈 TEST DE L'ACCUMULATEUR DE PERFORMANCE
+========================================
+Vérifie que les compartiments mis à jour au règlement donnent les mêmes
+chiffres que le recalcul complet, sans relire l'archive des prédictions
+"""
+
+import random
+from datetime import datetime
+
+from sqlalchemy import event
+
+
+def archive_matches(count, rng):
+    """Archive count matchs avec une prédiction 1X2 et une alternative chacun"""
+    from archive_manager import archive_match_before, archive_prediction_before
+
+    for match_id in range(1, count + 1):
+        archive_match_before(match_id, 'FIFA', 'Ligue', f"A{match_id}", f"B{match_id}", datetime.utcnow())
+        for consensus_type, choix in (('1X2', rng.choice(['1 - Victoire A', 'X - Nul', '2 - Victoire B'])),
+                                      ('alternatif', 'Plus de 2.5 buts')):
+            archive_prediction_before(match_id, None, consensus_type, choix,
+                                      probabilite=rng.uniform(40, 90), confiance=rng.uniform(40, 90),
+                                      vote_statistique=rng.random() < 0.5, vote_cotes=rng.random() < 0.5,
+                                      vote_simulation=rng.random() < 0.5, vote_forme=rng.random() < 0.5,
+                                      consensus=rng.random() < 0.3)
+
+
+def test_compartiments_egaux_au_recalcul(make_app):
+    """🧮 TEST COMPARTIMENTS = RECALCUL COMPLET"""
+
+    print("🧮 TEST ACCUMULATEUR DE PERFORMANCE")
+    print("=" * 40)
+
+    from models import PerformanceBucket, ModelPerformance
+    from archive_manager import update_match_after, update_predictions_after_match, compute_model_performance
+    from performance_accumulator import (
+        window_bounds, window_performance, check_consistency, rebuild_buckets
+    )
+
+    app = make_app()
+    rng = random.Random(3)
+    with app.app_context():
+        archive_matches(40, rng)
+        for match_id in range(1, 41):
+            resultat = rng.choice(['1', 'X', '2'])
+            update_match_after(match_id, 1, 0, resultat)
+
+        date_debut, date_fin = window_bounds()
+        metrics = window_performance(date_debut, date_fin)
+        print(f"📊 {metrics['predictions_correctes']}/{metrics['total_predictions']} "
+              f"({metrics['taux_reussite']:.1f}%), {PerformanceBucket.query.count()} compartiments")
+        assert metrics['total_predictions'] == 40, "Seules les prédictions 1X2 ont un résultat"
+        assert check_consistency(date_debut, date_fin) == []
+
+        # Une seule ligne ModelPerformance pour la fenêtre du jour, à jour
+        performance = ModelPerformance.query.one()
+        assert (performance.date_debut, performance.date_fin) == (date_debut, date_fin)
+        assert performance.total_predictions == 40
+        assert performance.taux_reussite == compute_model_performance(date_debut, date_fin)['taux_reussite']
+
+        # Nouveau règlement d'un match : l'ancienne contribution est retirée
+        update_predictions_after_match(1, 'X')
+        update_predictions_after_match(1, '2')
+        assert check_consistency(date_debut, date_fin) == []
+        assert window_performance(date_debut, date_fin)['total_predictions'] == 40
+
+        # La reconstruction depuis l'archive donne les mêmes compartiments
+        before = window_performance(date_debut, date_fin)
+        rebuild_buckets()
+        after = window_performance(date_debut, date_fin)
+        assert all(abs(after[name] - value) < 1e-6 for name, value in before.items() if value is not None)
+    print("✅ Compartiments cohérents avec le recalcul complet")
+
+
+def test_reglement_sans_relecture(make_app):
+    """⚡ TEST RÈGLEMENT EN O(1)"""
+
+    print("\n⚡ TEST RÈGLEMENT SANS RELECTURE")
+    print("=" * 40)
+
+    from models import db
+    from archive_manager import update_match_after
+
+    app = make_app()
+    with app.app_context():
+        archive_matches(30, random.Random(5))
+        for match_id in range(1, 30):
+            update_match_after(match_id, 2, 1, '1')
+
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        update_match_after(30, 0, 0, 'X')
+        event.remove(db.engine, 'before_cursor_execute', listener)
+
+        window_reads = [s for s in statements if 'FROM predictions_archive' in s and 'finalized_at >=' in s]
+        print(f"📊 {len(statements)} requêtes, {len(window_reads)} lecture de la fenêtre de predictions_archive")
+        assert not window_reads, "Seules les prédictions du match réglé sont lues"
+    print("✅ Performance mise à jour sans relire la fenêtre")
+
+
+if __name__ == "__main__":
+    from conftest import create_test_app
+
+    test_compartiments_egaux_au_recalcul(create_test_app)
+    test_reglement_sans_relecture(create_test_app)
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+⏰ TEST DU PLANIFICATEUR ADAPTATIF DE LA COLLECTE
+=================================================
+Vérifie l'espacement des collectes sans match, le réveil au coup d'envoi
+et à la fin prévue (7 minutes, 1.5 en ligue penalty) et le chargement du
+calendrier depuis collected_matches
+"""
+
+from datetime import datetime, timedelta
+
+
+NOW = datetime(2025, 1, 1, 12, 0)
+
+
+def match(match_id, debut, statut, ligue=None):
+    return {"unique_match_id": match_id, "heure_debut": debut, "statut": statut, "ligue": ligue}
+
+
+def test_evenements_et_espacement():
+    """⏰ TEST COUP D'ENVOI, FIN PRÉVUE ET ESPACEMENT"""
+
+    print("⏰ TEST PLANIFICATEUR ADAPTATIF")
+    print("=" * 40)
+
+    from poll_scheduler import PollScheduler
+
+    scheduler = PollScheduler(idle_interval=30, max_idle_interval=300)
+    assert scheduler.next_poll_delay(NOW) == 30
+    for expected in (60, 120, 240, 300, 300):
+        scheduler.observe([], changed=False)
+        assert scheduler.next_poll_delay(NOW) == expected, "Espacement sans changement"
+
+    # Coup d'envoi dans 2 minutes : réveil 10 s avant
+    kickoff = NOW + timedelta(minutes=2)
+    scheduler.observe([match("a", kickoff, "en_attente")], changed=False)
+    assert scheduler.next_poll_delay(NOW) == 110
+    assert scheduler.next_poll_delay(kickoff - timedelta(seconds=10)) == 0
+    assert scheduler.next_poll_delay(kickoff) == 5, "Match en cours : collecte serrée"
+
+    # Match penalty : fin prévue 1.5 minute après le coup d'envoi
+    scheduler.observe([match("a", kickoff, "en_cours", "FIFA Penalty League")], changed=True)
+    end = kickoff + timedelta(minutes=1.5, seconds=5)
+    assert scheduler.next_poll_delay(end - timedelta(seconds=2)) == 2
+    assert scheduler.next_poll_delay(end) == 0
+
+    # Match terminé : plus rien en cours, intervalle de base après un changement
+    scheduler.observe([match("a", kickoff, "termine")], changed=True)
+    assert scheduler.next_poll_delay(end) == 30
+    print(f"📊 {scheduler.get_stats(end)}")
+    print("✅ Réveils sur événements, espacement quand rien ne se passe")
+
+
+def test_journee_simulee():
+    """📅 TEST UNE HEURE DE CALENDRIER"""
+
+    from poll_scheduler import PollScheduler
+
+    kickoffs = [NOW + timedelta(minutes=minutes) for minutes in (10, 30, 50)]
+
+    def source(now):
+        matches = []
+        for i, kickoff in enumerate(kickoffs):
+            if now < kickoff:
+                matches.append(match(f"m{i}", kickoff, "en_attente"))
+            elif now < kickoff + timedelta(minutes=7):
+                matches.append(match(f"m{i}", kickoff, "en_cours"))
+            else:
+                matches.append(match(f"m{i}", kickoff, "termine"))
+        return matches
+
+    scheduler = PollScheduler(idle_interval=30, max_idle_interval=300)
+    now, polls, previous, max_live_gap, last_states = NOW, 0, None, 0, None
+    while now < NOW + timedelta(hours=1):
+        matches = source(now)
+        states = [m["statut"] for m in matches]
+        polls += 1
+        if previous is not None and "en_cours" in states:
+            max_live_gap = max(max_live_gap, (now - previous).total_seconds())
+        scheduler.observe(matches, changed=states != last_states)
+        previous, last_states = now, states
+        now += timedelta(seconds=max(scheduler.next_poll_delay(now), 1))
+
+    print(f"📊 {polls} collectes en 1 h (720 à intervalle fixe de 5 s), écart max en direct: {max_live_gap:.0f} s")
+    assert polls < 720 / 2, "Collectes espacées entre les matchs"
+    assert max_live_gap <= 10, "Collecte serrée pendant les matchs"
+    print("✅ Moins de collectes et données plus fraîches pendant les matchs")
+
+
+def test_calendrier_depuis_la_table(make_app):
+    """🗓️ TEST CHARGEMENT DU CALENDRIER"""
+
+    from models import db, CollectedMatch
+    from poll_scheduler import PollScheduler
+
+    app = make_app()
+    with app.app_context():
+        for match_id, offset, statut in (("soon", 5, "en_attente"), ("live", -3, "en_cours"),
+                                         ("done", -3, "termine"), ("far", 60 * 24, "en_attente"),
+                                         ("stale", -120, "en_cours")):
+            db.session.add(CollectedMatch(unique_match_id=match_id, jeu="FIFA", equipe_domicile="A",
+                                          equipe_exterieur="B", heure_debut=NOW + timedelta(minutes=offset),
+                                          statut=statut))
+        db.session.commit()
+
+        scheduler = PollScheduler()
+        assert scheduler.load_calendar(NOW) == 2, "Seuls les matchs à venir et en cours proches"
+        assert not scheduler.calendar_due(NOW + timedelta(minutes=1))
+        assert scheduler.live_count(NOW) == 1 and scheduler.next_poll_delay(NOW) == 5
+    print("✅ Calendrier chargé depuis collected_matches")
+
+
+if __name__ == "__main__":
+    from conftest import create_test_app
+
+    test_evenements_et_espacement()
+    test_journee_simulee()
+    test_calendrier_depuis_la_table(create_test_app)
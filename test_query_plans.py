@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+🗂️ TEST DES PLANS DE REQUÊTE
+============================
+Vérifie avec EXPLAIN QUERY PLAN que les requêtes fréquentes utilisent un
+index (pas de parcours complet de table ni de tri temporaire), et que la
+migration recrée les index composites sur une base existante
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+from datetime import datetime, date, timedelta
+
+from flask import Flask
+from sqlalchemy import tuple_
+
+
+def explain(query):
+    """Retourne les lignes 'detail' d'EXPLAIN QUERY PLAN pour une requête ORM"""
+    from models import db
+
+    compiled = query.statement.compile(dialect=db.engine.dialect)
+    params = []
+    for name in compiled.positiontup:
+        value = compiled.params[name]
+        if isinstance(value, (datetime, date)):
+            value = value.isoformat(' ') if isinstance(value, datetime) else value.isoformat()
+        params.append(value)
+    with db.engine.connect() as connection:
+        rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", tuple(params)).fetchall()
+    return [row[-1] for row in rows]
+
+
+def assert_indexed(label, query, *index_names, allow_sort=False):
+    """allow_sort : tri temporaire accepté quand il ne porte que sur les lignes trouvées par index"""
+    details = explain(query)
+    print(f"📋 {label}: {' | '.join(details)}")
+    for detail in details:
+        assert not (detail.startswith('SCAN') and 'USING' not in detail), f"{label}: parcours complet ({detail})"
+        assert allow_sort or 'TEMP B-TREE' not in detail, f"{label}: tri temporaire ({detail})"
+    for index_name in index_names:
+        assert any(index_name in detail for detail in details), f"{label}: index {index_name} non utilisé"
+
+
+def test_requetes_frequentes_indexees(make_app):
+    """📋 TEST EXPLAIN QUERY PLAN DES REQUÊTES FRÉQUENTES"""
+
+    print("📋 TEST PLANS DE REQUÊTE")
+    print("=" * 40)
+
+    from models import (db, Prediction, UserSubscription, UserPredictionAccess,
+                        Notification, CollectedMatch, SystemLog)
+    from notifications import unread_filter
+
+    app = make_app()
+    now = datetime.utcnow()
+    with app.app_context():
+        assert_indexed("Prédiction d'un match",
+                       Prediction.query.filter_by(match_id=42, consensus_type='1X2'),
+                       'ix_predictions_match_id_consensus_type')
+        assert_indexed("Abonnement actif",
+                       UserSubscription.query.filter(UserSubscription.user_id == 1,
+                                                     UserSubscription.is_active == True,
+                                                     UserSubscription.expires_at > now),
+                       'ix_user_subscriptions_user_active_expires')
+        assert_indexed("Quota du jour",
+                       db.session.query(UserPredictionAccess.prediction_id).filter(
+                           UserPredictionAccess.user_id == 1,
+                           UserPredictionAccess.access_date == date.today()),
+                       'ix_user_prediction_access_user_date')
+        assert_indexed("Notifications non lues",
+                       Notification.query.filter_by(user_id=1, is_read=False).order_by(
+                           Notification.created_at.desc()).limit(20),
+                       'ix_notifications_user_read_created')
+        assert_indexed("Notifications non lues (ciblées + globales)",
+                       Notification.query.filter(unread_filter(1)).order_by(
+                           Notification.created_at.desc()).limit(50),
+                       'ix_notifications_user_read_created', 'ix_notifications_global_created',
+                       'sqlite_autoindex_notification_reads_1', allow_sort=True)
+        assert_indexed("Matchs collectés par statut",
+                       CollectedMatch.query.filter_by(statut='termine').order_by(
+                           CollectedMatch.created_at.desc()).limit(50),
+                       'ix_collected_matches_statut_created')
+        assert_indexed("Matchs collectés par jeu",
+                       CollectedMatch.query.filter_by(jeu='FIFA').order_by(
+                           CollectedMatch.created_at.desc()).limit(50),
+                       'ix_collected_matches_jeu_created')
+        assert_indexed("Export des matchs (bloc suivant)",
+                       db.session.query(CollectedMatch.id, CollectedMatch.unique_match_id).filter(
+                           tuple_(CollectedMatch.created_at, CollectedMatch.id) < tuple_(now, 1000)
+                       ).order_by(CollectedMatch.created_at.desc(), CollectedMatch.id.desc()).limit(1000),
+                       'ix_collected_matches_created_at')
+        assert_indexed("Derniers logs",
+                       SystemLog.query.order_by(SystemLog.created_at.desc()).limit(20),
+                       'ix_system_logs_created_at')
+        assert_indexed("Logs expirés",
+                       db.session.query(SystemLog.id).filter(SystemLog.created_at < now - timedelta(days=30)),
+                       'ix_system_logs_created_at')
+    print("✅ Aucune requête fréquente ne parcourt sa table")
+
+
+def test_migration_index():
+    """🗂️ TEST MIGRATION SUR UNE BASE EXISTANTE"""
+
+    print("\n🗂️ TEST MIGRATION DES INDEX")
+    print("=" * 40)
+
+    from models import db
+    from migrate_indexes import COMPOSITE_INDEXES, migrate_indexes
+
+    # La liste de la migration correspond aux index déclarés dans les modèles
+    declared = {}
+    composites = set()
+    for table in db.metadata.tables.values():
+        for index in table.indexes:
+            declared[index.name] = (table.name, tuple(column.name for column in index.columns))
+            if len(index.columns) > 1 and not index.unique:
+                composites.add(index.name)
+    for name, table, columns in COMPOSITE_INDEXES:
+        assert declared.get(name) == (table, columns), f"{name} absent ou différent dans models.py"
+    # Et inversement : tout index composite des modèles est ajouté aux bases existantes
+    missing = composites - {name for name, _, _ in COMPOSITE_INDEXES}
+    assert not missing, f"Index composites absents de migrate_indexes.py : {sorted(missing)}"
+
+    tmp = tempfile.mkdtemp()
+    try:
+        db_path = os.path.join(tmp, "ancienne.db")
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{db_path}"
+        app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+        db.init_app(app)
+        with app.app_context():
+            db.create_all()
+            db.engine.dispose()
+
+        # Base créée avant les index : on les supprime
+        conn = sqlite3.connect(db_path)
+        for name, _, _ in COMPOSITE_INDEXES:
+            conn.execute(f"DROP INDEX {name}")
+        conn.commit()
+        conn.close()
+
+        created = migrate_indexes(db_path)
+        assert sorted(created) == sorted(name for name, _, _ in COMPOSITE_INDEXES)
+        assert migrate_indexes(db_path) == [], "Migration idempotente"
+
+        conn = sqlite3.connect(db_path)
+        names = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='index'")}
+        analyzed = conn.execute("SELECT name FROM sqlite_master WHERE name='sqlite_stat1'").fetchone()
+        conn.close()
+        assert all(name in names for name, _, _ in COMPOSITE_INDEXES)
+        assert analyzed, "ANALYZE exécuté après création"
+    finally:
+        shutil.rmtree(tmp)
+    print("✅ Index recréés une seule fois, statistiques à jour")
+
+
+if __name__ == "__main__":
+    from conftest import create_test_app
+
+    test_requetes_frequentes_indexees(create_test_app)
+    test_migration_index()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+🔢 TEST DES QUOTAS QUOTIDIENS
+=============================
+Vérifie l'atomicité de la limite, l'écriture différée, la reconstruction et
+l'isolement des lignes refusées par la base
+"""
+
+import threading
+
+
+def test_limite_atomique(make_app):
+    """🔒 TEST LIMITE ATOMIQUE SOUS CONCURRENCE"""
+
+    print("🔒 TEST LIMITE ATOMIQUE")
+    print("=" * 40)
+
+    from quota import QuotaService
+
+    app = make_app()
+    service = QuotaService()
+    service.init_app(app)
+    service.app = None  # Pas de thread d'écriture : flush manuel
+
+    results = []
+
+    def view(prediction_id):
+        with app.app_context():
+            results.append(service.record_view(7, prediction_id, limit=3))
+
+    # 20 onglets ouvrent 10 prédictions différentes en même temps
+    threads = [threading.Thread(target=view, args=(pid % 10 + 1,)) for pid in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    with app.app_context():
+        print(f"📊 Vues: {service.viewed_count(7)} / en attente: {service.pending_count()}")
+        assert service.viewed_count(7) == 3, "La limite ne doit jamais être dépassée"
+        assert service.pending_count() == 3, "Une seule ligne par prédiction vue"
+        assert sum(1 for allowed, _ in results if allowed) >= 3
+
+        # Une prédiction déjà vue reste consultable, une nouvelle est refusée
+        seen = service._pending[0]['prediction_id']
+        assert service.record_view(7, seen, limit=3)[0]
+        assert service.record_view(7, 99, limit=3) == (False, 3)
+        assert service.flush() == 3
+    print("✅ Limite respectée sous accès concurrents")
+
+
+def test_ecriture_differee_et_reconstruction(make_app):
+    """💾 TEST ÉCRITURE PAR LOTS ET RECONSTRUCTION"""
+
+    print("\n💾 TEST ÉCRITURE DIFFÉRÉE")
+    print("=" * 40)
+
+    from models import UserPredictionAccess
+    from quota import QuotaService
+
+    app = make_app()
+    service = QuotaService(batch_size=2)
+    service.init_app(app)
+    service.app = None
+
+    with app.app_context():
+        for pid in (1, 2, 3, 2):
+            service.record_view(5, pid)
+        assert UserPredictionAccess.query.count() == 0, "Aucune écriture dans le chemin de la requête"
+        assert service.flush() == 3
+        assert UserPredictionAccess.query.filter_by(user_id=5).count() == 3
+
+    # Redémarrage : l'état est reconstruit depuis la table
+    restarted = QuotaService()
+    restarted.init_app(app)
+    with app.app_context():
+        assert restarted.viewed_count(5) == 3
+        assert restarted.record_view(5, 4, limit=3) == (False, 3)
+        assert restarted.record_view(5, 2, limit=3)[0]
+    print("✅ Accès écrits par lots et rechargés au démarrage")
+
+
+def test_ligne_refusee_isolee(make_app):
+    """🧱 TEST LIGNE REFUSÉE PAR LA BASE"""
+
+    print("\n🧱 TEST LIGNE REFUSÉE")
+    print("=" * 40)
+
+    from datetime import datetime
+    from models import UserPredictionAccess
+    from quota import QuotaService, QUOTA_MAX_ATTEMPTS
+
+    app = make_app()
+    service = QuotaService()
+    service.init_app(app)
+    service.app = None
+
+    with app.app_context():
+        for pid in (1, 2):
+            service.record_view(8, pid)
+        # Ligne invalide (user_id NOT NULL) au milieu du lot
+        service._pending.insert(1, {'user_id': None, 'prediction_id': 3, 'access_date': datetime.utcnow().date(),
+                                    'accessed_at': datetime.utcnow()})
+
+        assert service.flush() == 2, "Les lignes valides sont écrites malgré la ligne refusée"
+        assert service.pending_count() == 1
+        service.record_view(8, 4)
+        for _ in range(QUOTA_MAX_ATTEMPTS - 1):
+            service.flush()
+        print(f"📊 Écrites: {service.flushed_count} / abandonnées: {service.dropped_count} "
+              f"/ en attente: {service.pending_count()}")
+        assert UserPredictionAccess.query.filter_by(user_id=8).count() == 3
+        assert service.dropped_count == 1 and service.pending_count() == 0
+        assert not service._attempts
+
+    # Sans application ni contexte : rien n'est tenté, les accès restent en file
+    with app.app_context():
+        service.record_view(8, 5)
+    assert service.flush() == 0 and service.pending_count() == 1
+    print("✅ Ligne refusée isolée puis abandonnée, les autres écrites")
+
+
+if __name__ == "__main__":
+    from conftest import create_test_app
+
+    test_limite_atomique(create_test_app)
+    test_ecriture_differee_et_reconstruction(create_test_app)
+    test_ligne_refusee_isolee(create_test_app)
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+🗜️ TEST DU CACHE DE LA PAGE D'ACCUEIL
+=====================================
+Vérifie la version des snapshots, l'éviction par version et les en-têtes HTTP
+"""
+
+import gzip
+from datetime import datetime
+
+from flask import Flask, request
+
+
+def test_snapshot_version_stable():
+    """📡 TEST VERSION DE SNAPSHOT"""
+
+    print("📡 TEST VERSION DE SNAPSHOT")
+    print("=" * 40)
+
+    import live_feed
+
+    matches = [{"I": 1, "O1": "Arsenal", "O2": "Chelsea", "SC": {"FS": {"S1": 1}}}]
+    snap1 = live_feed.publish_snapshot(matches)
+    snap2 = live_feed.publish_snapshot([dict(m) for m in matches])
+    print(f"🆔 Version 1: {snap1.version} / Version 2: {snap2.version}")
+    assert snap1 is snap2, "Un flux identique doit conserver le même snapshot"
+
+    snap3 = live_feed.publish_snapshot([{"I": 1, "O1": "Arsenal", "O2": "Chelsea", "SC": {"FS": {"S1": 2}}}])
+    assert snap3.version != snap1.version, "Un changement de score doit changer la version"
+    assert snap3.get_match(1)["SC"]["FS"]["S1"] == 2
+    print("✅ Version stable tant que le flux ne change pas")
+
+
+def test_cache_eviction_par_version():
+    """🧹 TEST ÉVICTION PAR VERSION"""
+
+    print("\n🧹 TEST ÉVICTION PAR VERSION")
+    print("=" * 40)
+
+    from response_cache import ResponseCache
+
+    cache = ResponseCache(max_entries=2)
+    now = datetime.utcnow().replace(microsecond=0)
+    key = ("", "", "live", 1, "anonymous", None)
+
+    assert cache.get(key, "v1") is None
+    cache.put(key, "v1", "<html>page v1</html>", now)
+    assert cache.get(key, "v1") is not None
+    assert cache.get(key, "v2") is None, "Une nouvelle version doit vider le cache"
+
+    for page in range(1, 4):
+        cache.put(("", "", "", page, "paid", 7), "v2", f"page {page}", now)
+    stats = cache.get_stats()
+    print(f"📊 Stats: {stats}")
+    assert stats["entries"] == 2, "Le cache doit rester borné (LRU)"
+    assert cache.get(("", "", "", 1, "paid", 7), "v2") is None
+    print("✅ Éviction par version et LRU fonctionnelles")
+
+
+def test_reponse_gzip_et_304():
+    """🌐 TEST EN-TÊTES HTTP (GZIP, ETAG, 304)"""
+
+    print("\n🌐 TEST EN-TÊTES HTTP")
+    print("=" * 40)
+
+    from response_cache import CachedResponse
+
+    app = Flask(__name__)
+    entry = CachedResponse("<html>Bonjour ⚽</html>", "v1", datetime(2025, 7, 14, 23, 0, 0))
+
+    with app.test_request_context("/", headers={"Accept-Encoding": "gzip, deflate"}):
+        response = entry.to_response(request)
+        assert response.status_code == 200
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert gzip.decompress(response.get_data()).decode("utf-8") == "<html>Bonjour ⚽</html>"
+        assert response.headers["ETag"] == f'"{entry.etag}"'
+        assert "Last-Modified" in response.headers
+
+    with app.test_request_context("/"):
+        response = entry.to_response(request)
+        assert "Content-Encoding" not in response.headers
+        assert response.get_data(as_text=True) == "<html>Bonjour ⚽</html>"
+
+    with app.test_request_context("/", headers={"If-None-Match": f'"{entry.etag}"'}):
+        response = entry.to_response(request)
+        assert response.status_code == 304, "Un client à jour doit recevoir 304"
+
+    print("✅ gzip, ETag, Last-Modified et 304 corrects")
+
+
+if __name__ == "__main__":
+    test_snapshot_version_stable()
+    test_cache_eviction_par_version()
+    test_reponse_gzip_et_304()
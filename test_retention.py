@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+🧹 TEST DE LA PURGE DE RÉTENTION
+================================
+Vérifie la suppression par lots selon la politique de chaque table,
+l'archivage avant suppression, les métriques et la reprise sans doublon
+d'archive après un échec de la suppression
+"""
+
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+
+
+def test_purge_par_lots(make_app):
+    """🧹 TEST POLITIQUES, LOTS ET ARCHIVES"""
+
+    print("🧹 TEST PURGE DE RÉTENTION")
+    print("=" * 40)
+
+    from models import db, User, SystemLog, AccessLog, Alert, PersistentSession
+    from retention import RetentionEngine
+
+    tmp = tempfile.mkdtemp()
+    try:
+        app = make_app(f"sqlite:///{os.path.join(tmp, 'retention.db')}")
+        now = datetime.utcnow()
+        with app.app_context():
+            user = User(username="u", password="x")
+            db.session.add(user)
+            db.session.commit()
+
+            logs = [{'action_type': 'test', 'message': f"log {i}", 'severity': 'info',
+                     'created_at': now - timedelta(days=200 if i < 1200 else 1)} for i in range(1500)]
+            db.session.execute(SystemLog.__table__.insert(), logs)
+            db.session.execute(AccessLog.__table__.insert(), [
+                {'user_id': user.id, 'action_type': 'view_prediction', 'created_at': now - timedelta(days=400)},
+                {'user_id': user.id, 'action_type': 'view_prediction', 'created_at': now},
+            ])
+            db.session.execute(Alert.__table__.insert(), [
+                {'alert_type': 'a', 'message': 'vue', 'is_acknowledged': True, 'created_at': now - timedelta(days=60)},
+                {'alert_type': 'a', 'message': 'ouverte', 'is_acknowledged': False, 'created_at': now - timedelta(days=60)},
+            ])
+            db.session.execute(PersistentSession.__table__.insert(), [
+                {'user_id': user.id, 'session_token': 'expiree', 'expires_at': now - timedelta(hours=1),
+                 'last_activity': now, 'created_at': now},
+                {'user_id': user.id, 'session_token': 'valide', 'expires_at': now + timedelta(days=1),
+                 'last_activity': now, 'created_at': now},
+            ])
+            db.session.commit()
+
+            engine = RetentionEngine(batch_size=250, pause_seconds=0, archive_folder=os.path.join(tmp, "archives"))
+            results = {r['table']: r for r in engine.run(now)}
+            for result in results.values():
+                print(f"📊 {result}")
+
+            assert results['system_logs']['deleted'] == 1200 and results['system_logs']['batches'] == 5
+            assert SystemLog.query.filter_by(action_type='test').count() == 300
+            assert results['access_logs'] == {**results['access_logs'], 'deleted': 1, 'archived': 1}
+            assert [a.message for a in Alert.query.all()] == ['ouverte'], "Les alertes ouvertes sont gardées"
+            assert [s.session_token for s in PersistentSession.query.all()] == ['valide']
+
+            archive = os.path.join(tmp, "archives", "access_logs", f"access_logs_{now.strftime('%Y%m%d')}.ndjson.gz")
+            with gzip.open(archive, 'rt', encoding='utf-8') as f:
+                archived = [json.loads(line) for line in f]
+            assert len(archived) == 1 and archived[0]['action_type'] == 'view_prediction'
+
+            # Deuxième passage : plus rien à purger
+            assert sum(r['deleted'] for r in engine.run(now)) == 0
+            assert engine.total_deleted == 1203
+            db.engine.dispose()
+    finally:
+        shutil.rmtree(tmp)
+    print("✅ Purge par lots, alertes ouvertes gardées, archive écrite")
+
+
+def test_archive_idempotente(make_app):
+    """🔁 TEST SUPPRESSION EN ÉCHEC PUIS REPRISE"""
+
+    print("\n🔁 TEST ARCHIVE IDEMPOTENTE")
+    print("=" * 40)
+
+    import retention
+    from models import db, User, AccessLog
+    from retention import RetentionEngine, RetentionPolicy
+
+    tmp = tempfile.mkdtemp()
+    try:
+        app = make_app(f"sqlite:///{os.path.join(tmp, 'retention.db')}")
+        now = datetime.utcnow()
+        with app.app_context():
+            user = User(username="u", password="x")
+            db.session.add(user)
+            db.session.commit()
+            db.session.execute(AccessLog.__table__.insert(), [
+                {'user_id': user.id, 'action_type': f"vue {i}", 'created_at': now - timedelta(days=400)}
+                for i in range(10)
+            ])
+            db.session.commit()
+
+            engine = RetentionEngine([RetentionPolicy(AccessLog, AccessLog.created_at, 180, archive=True)],
+                                     batch_size=4, pause_seconds=0, archive_folder=os.path.join(tmp, "archives"))
+
+            # Le DELETE du deuxième lot échoue après l'écriture de son archive
+            statements = []
+            real_delete = retention.delete
+
+            def failing_delete(table):
+                statements.append(table)
+                if len(statements) == 2:
+                    raise RuntimeError("base verrouillée")
+                return real_delete(table)
+
+            retention.delete = failing_delete
+            try:
+                first = engine.run(now)[0]
+            finally:
+                retention.delete = real_delete
+            assert 'error' in first and AccessLog.query.count() == 6
+
+            second = engine.run(now)[0]
+            print(f"📊 {first} / {second}")
+            assert (second['deleted'], second['archived']) == (6, 2), "Le lot déjà archivé n'est pas réécrit"
+            assert AccessLog.query.count() == 0
+
+            folder = os.path.join(tmp, "archives", "access_logs")
+            with gzip.open(os.path.join(folder, f"access_logs_{now.strftime('%Y%m%d')}.ndjson.gz"), 'rt',
+                           encoding='utf-8') as f:
+                archived = [json.loads(line)['id'] for line in f]
+            assert sorted(archived) == list(range(1, 11)), "Chaque ligne archivée une seule fois"
+            with open(os.path.join(folder, retention.PENDING_IDS_FILE)) as f:
+                assert json.load(f) == []
+            db.engine.dispose()
+    finally:
+        shutil.rmtree(tmp)
+    print("✅ Aucune ligne archivée deux fois après un échec")
+
+
+if __name__ == "__main__":
+    from conftest import create_test_app
+
+    test_purge_par_lots(create_test_app)
+    test_archive_idempotente(create_test_app)
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+🔑 TEST DU CACHE DES SESSIONS PERSISTANTES
+==========================================
+Vérifie qu'une visite authentifiée ne génère plus d'écriture et que
+l'activité est écrite par lots
+"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+
+def test_lecture_sans_ecriture(make_app):
+    """🔑 TEST RÉSOLUTION DE TOKEN SANS ÉCRITURE"""
+
+    print("🔑 TEST RÉSOLUTION DE TOKEN")
+    print("=" * 40)
+
+    from models import db, User, PersistentSession
+    from oracxpred_utils import create_persistent_session, get_user_from_session_token, delete_persistent_session
+    from session_tokens import session_token_cache, session_activity
+
+    app = make_app()
+    session_token_cache.clear()
+
+    with app.app_context():
+        user = User(username="fidele", password="x", is_approved=True)
+        db.session.add(user)
+        db.session.commit()
+        token = create_persistent_session(user.id)
+        old_activity = PersistentSession.query.filter_by(session_token=token).first().last_activity
+
+        statements = []
+        event.listen(db.engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+        for _ in range(20):
+            assert get_user_from_session_token(token).username == "fidele"
+        writes = [s for s in statements if s.lstrip().upper().startswith(("UPDATE", "INSERT", "DELETE"))]
+        tokens_lookups = [s for s in statements if "persistent_sessions" in s]
+        print(f"📊 Requêtes: {len(statements)} / écritures: {len(writes)}")
+        assert not writes, "Une visite authentifiée ne doit plus écrire en base"
+        assert len(tokens_lookups) == 1, "Le token doit être résolu une seule fois"
+        assert session_activity.pending_count() == 1, "Activités regroupées par session"
+
+        del statements[:]
+        assert session_activity.flush() == 1
+        assert len([s for s in statements if s.lstrip().upper().startswith("UPDATE")]) == 1
+        db.session.expire_all()
+        assert PersistentSession.query.filter_by(session_token=token).first().last_activity > old_activity
+
+        # Déconnexion : le token ne doit plus être servi depuis le cache
+        delete_persistent_session(token)
+        assert get_user_from_session_token(token) is None
+    print("✅ Aucune écriture par requête, un UPDATE groupé par lot")
+
+
+def test_ecriture_hors_session_de_la_requete(make_app):
+    """🧱 TEST ÉCRITURE SUR UNE CONNEXION SÉPARÉE"""
+
+    print("\n🧱 TEST ISOLATION DE L'ÉCRITURE D'ACTIVITÉ")
+    print("=" * 40)
+
+    import os
+    import tempfile
+    from models import db, User, PersistentSession
+    from oracxpred_utils import create_persistent_session
+    from session_tokens import SessionActivityTracker
+
+    # Base fichier : l'écriture passe réellement par une autre connexion que la session
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    app = make_app(f"sqlite:///{path}")
+    try:
+        with app.app_context():
+            user = User(username="isole", password="x", is_approved=True)
+            db.session.add(user)
+            db.session.commit()
+            token = create_persistent_session(user.id)
+            session_id = PersistentSession.query.filter_by(session_token=token).one().id
+            db.session.commit()
+
+            # Travail en cours de la requête : ni commité ni perdu par le flush
+            db.session.add(User(username="en_attente", password="x"))
+            tracker = SessionActivityTracker()
+            activity = datetime(2030, 1, 1)
+            tracker.touch(session_id, activity)
+            assert tracker.flush() == 1
+            db.session.rollback()
+
+            assert User.query.filter_by(username="en_attente").count() == 0
+            assert PersistentSession.query.get(session_id).last_activity == activity
+            db.session.remove()
+            db.engine.dispose()
+    finally:
+        os.remove(path)
+    print("✅ L'activité est écrite sans commiter la session de la requête")
+
+
+def test_cache_respecte_expiration():
+    """⏳ TEST EXPIRATION DU TOKEN EN CACHE"""
+
+    print("\n⏳ TEST EXPIRATION DU TOKEN")
+    print("=" * 40)
+
+    from session_tokens import SessionTokenCache
+
+    cache = SessionTokenCache(max_entries=2)
+    cache.put("expire", 1, 1, datetime.utcnow() - timedelta(seconds=1))
+    assert cache.get("expire") is None, "Un token expiré ne doit pas être servi"
+
+    for i in range(3):
+        cache.put(f"t{i}", i, i, datetime.utcnow() + timedelta(days=1))
+    assert len(cache) == 2 and cache.get("t0") is None, "Le cache doit rester borné (LRU)"
+    assert cache.get("t2") == (2, 2)
+    print("✅ Expiration et bornage respectés")
+
+
+if __name__ == "__main__":
+    from conftest import create_test_app
+
+    test_lecture_sans_ecriture(create_test_app)
+    test_ecriture_hors_session_de_la_requete(create_test_app)
+    test_cache_respecte_expiration()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+🏁 TEST DU RÈGLEMENT EN LOT
+===========================
+Vérifie que settle_matches() donne le même résultat que le règlement match
+par match, en une requête IN et une seule transaction, et que le collecteur
+règle les matchs terminés d'un cycle en un seul appel
+"""
+
+import random
+
+from sqlalchemy import event
+
+from test_performance_accumulator import archive_matches
+from benchmark_collector import make_matches
+
+
+def snapshot():
+    """État réglé de l'archive (prédictions, anomalies, performance)"""
+    from models import PredictionArchive, AnomalyLog, MatchArchive
+    from performance_accumulator import window_bounds, window_performance
+
+    predictions = [(p.match_id, p.consensus_type, p.resultat_reel, p.prediction_correcte, p.ecart_probabilite)
+                   for p in PredictionArchive.query.order_by(PredictionArchive.id)]
+    anomalies = sorted((a.match_id, a.prediction_archive_id) for a in AnomalyLog.query.filter_by(
+        anomaly_type='consensus_incoherent'))
+    locked = MatchArchive.query.filter_by(is_locked=True).count()
+    return predictions, anomalies, locked, window_performance(*window_bounds())
+
+
+def test_lot_identique_au_reglement_unitaire(make_app):
+    """🏁 TEST LOT = MATCH PAR MATCH"""
+
+    print("🏁 TEST RÈGLEMENT EN LOT")
+    print("=" * 40)
+
+    from models import db
+    from archive_manager import update_match_after, settle_matches, resultat_from_score
+
+    rng = random.Random(11)
+    results = [(match_id, rng.randint(0, 4), rng.randint(0, 4)) for match_id in range(1, 61)]
+
+    app = make_app()
+    with app.app_context():
+        archive_matches(60, random.Random(2))
+        for match_id, score_1, score_2 in results:
+            update_match_after(match_id, score_1, score_2, resultat_from_score(score_1, score_2))
+        expected = snapshot()
+
+    app = make_app()
+    with app.app_context():
+        archive_matches(60, random.Random(2))
+        statements = []
+        commits = []
+        on_statement = lambda conn, cursor, statement, *args: statements.append(statement)
+        on_commit = lambda session: commits.append(1)
+        event.listen(db.engine, 'before_cursor_execute', on_statement)
+        event.listen(db.session, 'after_commit', on_commit)
+        summary = settle_matches(results + [(999, 1, 0)])
+        event.remove(db.session, 'after_commit', on_commit)
+        event.remove(db.engine, 'before_cursor_execute', on_statement)
+        actual = snapshot()
+
+        archive_reads = [s for s in statements if 'FROM predictions_archive' in s]
+        print(f"📊 {len(summary['settled'])} matchs, {summary['predictions']} prédictions, "
+              f"{summary['anomalies']} anomalies, {len(statements)} requêtes, {len(commits)} commits")
+        assert summary['missing'] == [999]
+        assert len(archive_reads) == 1, "Une seule requête IN pour les prédictions archivées"
+        assert len(commits) == 2, "Règlements + anomalies, puis performance"
+
+        assert actual[:3] == expected[:3]
+        assert all(abs(actual[3][name] - value) < 1e-6 for name, value in expected[3].items() if value is not None)
+
+        # Matchs déjà réglés : verrouillés, rien n'est réécrit
+        again = settle_matches(results[:5])
+        assert again['locked'] == [match_id for match_id, _, _ in results[:5]] and again['predictions'] == 0
+    print("✅ Mêmes règlements, anomalies et performance en une transaction")
+
+
+def test_reglement_depuis_le_collecteur(make_app):
+    """🏁 TEST FIN DE MATCH DU COLLECTEUR"""
+
+    print("🏁 TEST RÈGLEMENT PAR LE COLLECTEUR")
+    print("=" * 40)
+
+    import archive_manager
+    from models import MatchArchive
+    from match_collector import MatchCollector, archive_match_id
+
+    assert archive_match_id("1xbet_42") == 42
+    assert archive_match_id("bench_42") is None and archive_match_id("1xbet_abc") is None
+
+    app = make_app()
+    with app.app_context():
+        archive_matches(3, random.Random(5))
+        collector = MatchCollector(source_type="1xbet")
+        matches = make_matches(4, live=True)
+        for i, match_data in enumerate(matches, start=1):
+            match_data["unique_match_id"] = f"1xbet_{i}"
+        collector.process_matches(matches)
+
+        # 1, 2 et 4 se terminent (4 n'a pas d'archive), 3 est toujours en cours
+        for match_data, (score_1, score_2) in zip(matches[:2] + matches[3:], [(2, 1), (0, 0), (1, 3)]):
+            match_data.update(statut="termine", score_domicile=score_1, score_exterieur=score_2)
+
+        calls = []
+        settle_matches = archive_manager.settle_matches
+        archive_manager.settle_matches = lambda results, **kwargs: calls.append(results) or settle_matches(results, **kwargs)
+        try:
+            result = collector.process_matches(matches)
+        finally:
+            archive_manager.settle_matches = settle_matches
+
+        print(f"📊 {len(calls)} appel(s), réglés: {result['settled']}")
+        assert calls == [[(1, 2, 1), (2, 0, 0), (4, 1, 3)]], "Un seul règlement en lot par cycle"
+        assert sorted(result['settled']) == [1, 2]
+        archive = {m.match_id: (m.is_locked, m.resultat_reel) for m in MatchArchive.query}
+        assert archive[1][0] and archive[2][0] and not archive[3][0]
+        assert archive[2][1] == archive_manager.resultat_from_score(0, 0)
+
+        # Cycle suivant sans changement : rien à régler
+        assert collector.process_matches(matches)['settled'] == []
+    print("✅ Matchs terminés réglés en un appel par cycle")
+
+
+if __name__ == "__main__":
+    from conftest import create_test_app
+
+    test_lot_identique_au_reglement_unitaire(create_test_app)
+    test_reglement_depuis_le_collecteur(create_test_app)
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+🔗 TEST DU FLUX PARTAGÉ ENTRE PROCESSUS
+=======================================
+Vérifie qu'un worker lit le snapshot publié par le processus collecteur
+sans interroger 1xbet, ne décode les matchs qu'une fois par version, et
+reprend la récupération directe si le fichier est périmé
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+
+def reset(live_feed):
+    live_feed._current_snapshot = None
+
+
+def test_lecture_partagee():
+    """🔗 TEST LECTURE DU SNAPSHOT PUBLIÉ"""
+
+    print("🔗 TEST FLUX PARTAGÉ")
+    print("=" * 40)
+
+    import live_feed
+    import shared_feed
+    from live_feed import FeedSnapshot, compute_feed_version
+
+    folder = tempfile.mkdtemp()
+    path = os.path.join(folder, "feed.bin")
+    matches = [{"I": 1, "O1": "Arsenal", "O2": "Chelsea", "LE": "FIFA 24", "SC": {"FS": {"S1": 1}}}]
+    snapshot = FeedSnapshot(matches, compute_feed_version(matches), datetime(2025, 1, 1, 12, 0))
+    shared_feed.write_snapshot(path, snapshot)
+
+    def no_fetch():
+        raise AssertionError("Le worker ne doit pas interroger 1xbet")
+
+    original_fetch = live_feed.fetch_feed_matches
+    os.environ[shared_feed.SHARED_FEED_PATH_ENV] = path
+    live_feed.fetch_feed_matches = no_fetch
+    try:
+        reset(live_feed)
+        shared = live_feed.get_feed_snapshot(max_age=0)
+        reader = shared_feed.get_reader()
+        assert shared.version == snapshot.version and shared.get_match(1)["O1"] == "Arsenal"
+        assert shared.changed_at == snapshot.changed_at
+
+        # Même version republiée : en-tête relu, matchs non redécodés
+        snapshot.fetched_at = time.time()
+        shared_feed.write_snapshot(path, snapshot)
+        assert live_feed.get_feed_snapshot(max_age=0) is shared and reader.decodes == 1
+
+        # Nouvelle version : décodée une fois
+        matches = [dict(matches[0], SC={"FS": {"S1": 2}})]
+        shared_feed.write_snapshot(path, FeedSnapshot(matches, compute_feed_version(matches), datetime.utcnow()))
+        assert live_feed.get_feed_snapshot(max_age=0).get_match(1)["SC"]["FS"]["S1"] == 2
+        assert reader.decodes == 2
+
+        # Autre processus : même snapshot, sans récupération du flux
+        code = ("import live_feed; live_feed.fetch_feed_matches = None; "
+                "print(live_feed.get_feed_snapshot().version)")
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), env=dict(os.environ))
+        assert output.stdout.strip() == compute_feed_version(matches)
+
+        # Collecteur arrêté : fichier périmé, récupération directe
+        stale = FeedSnapshot(matches, "stale", datetime(2025, 1, 1), fetched_at=time.time() - 3600)
+        shared_feed.write_snapshot(path, stale)
+        live_feed.fetch_feed_matches = lambda: [{"I": 7}]
+        reset(live_feed)
+        assert live_feed.get_feed_snapshot(max_age=0).get_match(7) == {"I": 7}
+        print(f"📊 {reader.decodes} décodages, {os.path.getsize(path)} octets")
+    finally:
+        live_feed.fetch_feed_matches = original_fetch
+        del os.environ[shared_feed.SHARED_FEED_PATH_ENV]
+        reset(live_feed)
+        os.remove(path)
+        os.rmdir(folder)
+    print("✅ Un seul fetch pour tous les workers, repli si le collecteur s'arrête")
+
+
+if __name__ == "__main__":
+    test_lecture_partagee()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+📊 TEST DU SERVICE DE STATISTIQUES
+==================================
+Vérifie que les agrégats groupés donnent les mêmes chiffres que les count()
+séparés, que les mises à jour incrémentales évitent de relire les tables et
+qu'une mise à jour reçue pendant un recalcul n'est pas perdue
+"""
+
+import random
+from datetime import datetime, timedelta
+
+
+def add_match(n, statut, jeu, source, age_hours=0):
+    from models import db, CollectedMatch
+
+    created = datetime.utcnow() - timedelta(hours=age_hours)
+    match = CollectedMatch(unique_match_id=f"m{n}", jeu=jeu, equipe_domicile="A", equipe_exterieur="B",
+                           heure_debut=created, statut=statut, source_donnees=source, created_at=created)
+    db.session.add(match)
+    return match
+
+
+def test_agregat_identique_aux_comptages(make_app):
+    """🧮 TEST UNE REQUÊTE GROUPÉE = DIX COUNT()"""
+
+    print("🧮 TEST AGRÉGAT GROUPÉ")
+    print("=" * 40)
+
+    from models import db, CollectedMatch
+    from stats_service import StatsService
+
+    app = make_app()
+    rng = random.Random(7)
+    with app.app_context():
+        for n in range(300):
+            add_match(n, rng.choice(['en_attente', 'en_cours', 'termine', 'annule']),
+                      rng.choice(['FIFA', 'eFootball', 'FC']), rng.choice(['api', 'simulated', None]),
+                      age_hours=rng.randint(0, 24 * 10))
+        db.session.commit()
+
+        service = StatsService()
+        stats = service.collected_matches()
+        print(f"📊 {stats}")
+
+        now = datetime.utcnow()
+        assert stats['total_matches'] == CollectedMatch.query.count() == 300
+        for status, count in stats['by_status'].items():
+            assert count == CollectedMatch.query.filter_by(statut=status).count()
+        for game, count in stats['by_game'].items():
+            assert count == CollectedMatch.query.filter_by(jeu=game).count()
+        assert stats['by_source']['unknown'] == CollectedMatch.query.filter_by(source_donnees=None).count()
+        assert stats['last_24h'] == CollectedMatch.query.filter(
+            CollectedMatch.created_at >= now - timedelta(hours=24)).count()
+        assert stats['last_7d'] == CollectedMatch.query.filter(
+            CollectedMatch.created_at >= now - timedelta(days=7)).count()
+        assert service.queries == 1
+    print("✅ Mêmes chiffres en une seule requête")
+
+
+def test_mises_a_jour_incrementales(make_app):
+    """➕ TEST COLLECTEUR ET PRÉDICTIONS SANS RELECTURE"""
+
+    print("\n➕ TEST INCRÉMENTAL")
+    print("=" * 40)
+
+    from models import db, CollectedMatch, Prediction
+    from stats_service import StatsService
+
+    app = make_app()
+    with app.app_context():
+        service = StatsService(ttl=0, resync_interval=3600)
+        assert service.collected_matches()['total_matches'] == 0
+        assert service.predictions() == {'total': 0, 'active': 0}
+
+        for n in range(50):
+            match = add_match(n, 'en_attente', 'FIFA', 'api')
+            db.session.commit()
+            service.match_created(match.statut, match.jeu, match.source_donnees, match.created_at)
+        for match in CollectedMatch.query.limit(20).all():
+            match.statut = 'termine'
+            service.match_status_changed('en_attente', 'termine', match.jeu, match.source_donnees, match.created_at)
+        old = add_match(99, 'annule', 'FC', 'api', age_hours=24 * 30)
+        db.session.commit()
+        service.match_created(old.statut, old.jeu, old.source_donnees, old.created_at)
+        db.session.delete(old)
+        db.session.commit()
+        service.match_deleted('annule', 'FC', 'api', old.created_at)
+
+        for n in range(10):
+            db.session.add(Prediction(match_id=n, team1="A", team2="B", league="L", consensus_type='1X2',
+                                      consensus_result="1", consensus_probability=60, confidence=70,
+                                      recommended_action="MISE"))
+            service.prediction_created()
+        db.session.commit()
+        service.prediction_deactivated()
+
+        stats = service.collected_matches()
+        print(f"📊 Incrémental: {stats} / requêtes: {service.queries}")
+        assert service.queries == 2, "Aucune requête d'agrégat supplémentaire"
+        assert stats['total_matches'] == 50 and stats['last_24h'] == 50
+        assert stats['by_status']['termine'] == 20 and stats['by_status']['en_attente'] == 30
+        assert stats['by_status']['annule'] == 0
+        assert service.predictions() == {'total': 10, 'active': 9}
+
+        # Le recalcul complet retrouve les mêmes chiffres
+        service.invalidate()
+        assert service.collected_matches() == stats
+    print("✅ Compteurs tenus à jour sans relire les tables")
+
+
+def test_mise_a_jour_pendant_le_calcul(make_app):
+    """⏱️ TEST MISE À JOUR PENDANT UN RECALCUL"""
+
+    print("\n⏱️ TEST CONCURRENCE RECALCUL / INCRÉMENTAL")
+    print("=" * 40)
+
+    from models import db
+    from stats_service import StatsService
+
+    app = make_app()
+    with app.app_context():
+        service = StatsService(resync_interval=3600)
+        compute = service._compute_collected_matches
+
+        def compute_then_write():
+            # Un autre worker écrit un match juste après la lecture de la table
+            groups = compute()
+            match = add_match(1, 'en_attente', 'FIFA', 'api')
+            db.session.commit()
+            service.match_created(match.statut, match.jeu, match.source_donnees, match.created_at)
+            return groups
+
+        service._compute_collected_matches = compute_then_write
+        assert service.collected_matches()['total_matches'] == 0
+        service._compute_collected_matches = compute
+
+        stats = service.collected_matches()
+        print(f"📊 Après le recalcul concurrent: {stats['total_matches']} match(s), requêtes: {service.queries}")
+        assert stats['total_matches'] == 1 and service.queries == 2, "Résultat concurrent non gardé : recalcul"
+        assert service.collected_matches()['total_matches'] == 1 and service.queries == 2
+    print("✅ Aucune mise à jour perdue pendant un recalcul")
+
+
+def test_tableau_de_bord_en_cache(make_app):
+    """⏱️ TEST CACHE DU TABLEAU DE BORD"""
+
+    print("\n⏱️ TEST CACHE")
+    print("=" * 40)
+
+    from models import db, User
+    from stats_service import StatsService
+
+    app = make_app()
+    with app.app_context():
+        db.session.add(User(username="u1", email="u1@x", password="x", is_approved=False))
+        db.session.commit()
+
+        service = StatsService(ttl=60)
+        first = service.dashboard()
+        for _ in range(100):
+            assert service.dashboard() == first
+        print(f"📊 {first} / requêtes: {service.queries}")
+        assert first['total_users'] == 1 and first['pending_approvals'] == 1
+        assert service.queries == 4, "Une requête par table, puis le cache"
+    print("✅ 101 chargements, 4 requêtes")
+
+
+if __name__ == "__main__":
+    from conftest import create_test_app
+
+    test_agregat_identique_aux_comptages(create_test_app)
+    test_mises_a_jour_incrementales(create_test_app)
+    test_mise_a_jour_pendant_le_calcul(create_test_app)
+    test_tableau_de_bord_en_cache(create_test_app)
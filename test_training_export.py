@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+🧠 TEST DE L'EXPORT COLONNAIRE D'ENTRAÎNEMENT
+=============================================
+Vérifie les colonnes typées lues par mmap, l'ajout incrémental des matchs
+réglés, la reprise après un export interrompu, la dernière version d'une
+ligne réexportée et le refus de modifier une ligne réglée
+"""
+
+import os
+import random
+import shutil
+import tempfile
+
+from test_performance_accumulator import archive_matches
+
+
+def test_export_incremental(make_app):
+    """🧠 TEST EXPORT, AJOUT ET LECTURE MMAP"""
+
+    print("🧠 TEST EXPORT COLONNAIRE")
+    print("=" * 40)
+
+    from models import MatchArchive, PredictionArchive
+    from models import db
+    from archive_manager import (
+        settle_matches, update_predictions_after_match, archive_match_before, archive_prediction_before
+    )
+    from training_export import export_training_data, TrainingDataset
+
+    tmp = tempfile.mkdtemp()
+    app = make_app()
+    try:
+        with app.app_context():
+            archive_matches(30, random.Random(4))
+            settle_matches([(match_id, match_id % 3, 1) for match_id in range(1, 21)])
+
+            results = export_training_data(tmp, chunk_size=7)
+            print(f"📊 {results}")
+            assert [r['appended'] for r in results] == [20, 40]
+            assert results[0]['chunks'] == 3
+
+            with TrainingDataset(os.path.join(tmp, 'matches_archive')) as matches:
+                expected = MatchArchive.query.filter_by(is_locked=True).order_by(
+                    MatchArchive.updated_at, MatchArchive.id).all()
+                assert list(matches.column('match_id')) == [m.match_id for m in expected]
+                assert matches.decoded('resultat_reel') == [m.resultat_reel for m in expected]
+                assert matches.decoded('date_heure_match') == [m.date_heure_match for m in expected]
+                assert matches.decoded('cote_1') == [None] * 20, "Cotes absentes = NaN"
+                assert matches.column('cote_1').format == 'd'
+
+            # Nouveaux règlements : seules les nouvelles lignes sont ajoutées
+            settle_matches([(match_id, 0, 2) for match_id in range(21, 31)])
+            assert [r['appended'] for r in export_training_data(tmp)] == [10, 20]
+            assert [r['appended'] for r in export_training_data(tmp)] == [0, 0]
+
+            # Export interrompu : octets écrits au-delà du manifeste ignorés puis tronqués
+            with open(os.path.join(tmp, 'predictions_archive', 'confiance.bin'), 'ab') as f:
+                f.write(b'\x00' * 13)
+            with TrainingDataset(os.path.join(tmp, 'predictions_archive')) as predictions:
+                assert predictions.rows == 60
+                correct = predictions.decoded('prediction_correcte')
+                expected = PredictionArchive.query.order_by(PredictionArchive.finalized_at, PredictionArchive.id).all()
+                assert correct == [p.prediction_correcte for p in expected]
+                assert predictions.decoded('choix') == [p.choix for p in expected]
+                assert len(predictions.categories('consensus_type')) == 2
+            export_training_data(tmp)
+            assert os.path.getsize(os.path.join(tmp, 'predictions_archive', 'confiance.bin')) == 60 * 8
+
+            # Prédictions du match 1 réglées de nouveau : nouvelle version ajoutée, l'ancienne remplacée
+            update_predictions_after_match(1, 'X')
+            assert [r['appended'] for r in export_training_data(tmp)] == [0, 2]
+            with TrainingDataset(os.path.join(tmp, 'predictions_archive')) as predictions:
+                assert predictions.rows == 62 and len(predictions.current_positions()) == 60
+                assert list(predictions.superseded()).count(1) == 2
+                expected = PredictionArchive.query.order_by(PredictionArchive.finalized_at, PredictionArchive.id).all()
+                assert predictions.decoded('id') == [p.id for p in expected]
+                assert predictions.decoded('resultat_reel')[-2:] == ['X', 'X']
+                view = predictions.column('confiance')
+            assert len(view) == 62, "Vue encore utilisée : close() ne lève pas d'erreur"
+            view.release()
+
+            # Lignes réglées figées : le réarchivage est refusé, rien n'est réexporté
+            locked = MatchArchive.query.filter_by(match_id=2).one()
+            updated_at = locked.updated_at
+            assert archive_match_before(2, 'FIFA', 'Ligue', 'Autre', 'B2', locked.date_heure_match) is locked
+            assert (locked.equipe_1, locked.updated_at) == ('A2', updated_at)
+            settled = PredictionArchive.query.filter_by(match_id=2, consensus_type='1X2').one()
+            choix = settled.choix
+            archive_prediction_before(2, None, '1X2', 'X - Nul' if choix != 'X - Nul' else '2 - Victoire B', 99, 99)
+            assert settled.choix == choix
+            assert [r['appended'] for r in export_training_data(tmp)] == [0, 0]
+
+            # Correction manuelle d'un match verrouillé : réexporté, seule la dernière version est lue
+            locked.cote_1 = 1.9
+            db.session.commit()
+            assert [r['appended'] for r in export_training_data(tmp)] == [1, 0]
+            with TrainingDataset(os.path.join(tmp, 'matches_archive')) as matches:
+                assert matches.rows == 31
+                ids = matches.decoded('match_id')
+                assert sorted(ids) == list(range(1, 31)) and ids[-1] == 2
+                assert matches.decoded('cote_1')[-1] == 1.9
+    finally:
+        shutil.rmtree(tmp)
+    print("✅ Colonnes typées, ajout incrémental et reprise")
+
+
+if __name__ == "__main__":
+    from conftest import create_test_app
+
+    test_export_incremental(create_test_app)
@@ -0,0 +1,410 @@
+"""
+🧠 EXPORT COLONNAIRE DES DONNÉES D'ENTRAÎNEMENT - ORACXPRED
+===========================================================
+Écrit les matchs et prédictions réglés de l'archive dans un format en
+colonnes typées, lisible par mmap sans repasser par SQLite :
+- un fichier binaire par colonne (valeurs de largeur fixe du module array :
+  float64, int64, int8 ; les textes répétés sont codés en int32 avec un
+  dictionnaire <colonne>.dict.json) ;
+- manifest.json : nombre de lignes, types, ordre des octets, clé de reprise.
+
+Lecture par blocs avec pagination par clé (date de règlement, id) ; chaque
+export ajoute seulement les lignes réglées depuis le précédent. Le manifeste
+est réécrit de façon atomique après chaque bloc : une colonne plus longue
+que le manifeste (export interrompu) est tronquée au prochain export.
+
+Une ligne exportée peut être réécrite (prédiction réglée de nouveau, match
+modifié après verrouillage) : sa nouvelle version est ajoutée et l'ancienne
+marquée remplacée dans superseded.bin (int8, recalculé depuis la colonne clé
+de la table). TrainingDataset.decoded() ne renvoie que la dernière version.
+"""
+
+import array
+import json
+import math
+import mmap
+import os
+import sys
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, tuple_
+
+from models import db, MatchArchive, PredictionArchive
+
+
+EXPORT_CHUNK_SIZE = 5000
+TRAINING_EXPORT_FOLDER = os.path.join('exports', 'training')  # Relatif au dossier de l'application
+MANIFEST_VERSION = 1
+
+# Type logique -> code du module array
+COLUMN_TYPECODES = {
+    'float': 'd',  # NaN = valeur absente
+    'int': 'q',  # NULL_INT = valeur absente
+    'timestamp': 'q',  # Microsecondes depuis 1970-01-01 (UTC)
+    'bool': 'b',  # 1 / 0, NULL_BOOL = valeur absente
+    'category': 'i',  # Indice dans le dictionnaire, NULL_CATEGORY = valeur absente
+}
+NULL_INT = -2 ** 63
+NULL_BOOL = -1
+NULL_CATEGORY = -1
+EPOCH = datetime(1970, 1, 1)
+
+
+class TableSpec:
+    """Description d'une table exportée"""
+
+    def __init__(self, model, settled_column, settled_filter, columns, version_key):
+        """
+        Args:
+            model: Modèle SQLAlchemy
+            settled_column: Date de règlement, première partie de la clé de reprise
+            settled_filter: Condition des lignes réglées (les seules exportées)
+            columns: Liste de (nom de colonne, type logique)
+            version_key: Colonne exportée identifiant une ligne : seule sa dernière version est lue
+        """
+        self.model = model
+        self.name = model.__tablename__
+        self.settled_column = settled_column
+        self.settled_filter = settled_filter
+        self.columns = columns
+        self.version_key = version_key
+
+
+TRAINING_TABLES = [
+    # Un match verrouillé n'est plus modifié par l'archive ; une correction manuelle (updated_at) le réexporte
+    TableSpec(MatchArchive, MatchArchive.updated_at, MatchArchive.is_locked == True, [
+        ('match_id', 'int'),
+        ('jeu', 'category'),
+        ('mode', 'category'),
+        ('ligue', 'category'),
+        ('equipe_1', 'category'),
+        ('equipe_2', 'category'),
+        ('date_heure_match', 'timestamp'),
+        ('cote_1', 'float'),
+        ('cote_X', 'float'),
+        ('cote_2', 'float'),
+        ('score_final_equipe_1', 'int'),
+        ('score_final_equipe_2', 'int'),
+        ('resultat_reel', 'category'),
+        ('statut_final', 'category'),
+        ('updated_at', 'timestamp'),
+    ], version_key='match_id'),
+    # Une prédiction peut être réglée de nouveau (correction du score) : nouvelle finalized_at
+    TableSpec(PredictionArchive, PredictionArchive.finalized_at, PredictionArchive.finalized_at.isnot(None), [
+        ('id', 'int'),
+        ('match_id', 'int'),
+        ('consensus_type', 'category'),
+        ('choix', 'category'),
+        ('probabilite', 'float'),
+        ('confiance', 'float'),
+        ('vote_statistique', 'bool'),
+        ('vote_cotes', 'bool'),
+        ('vote_simulation', 'bool'),
+        ('vote_forme', 'bool'),
+        ('consensus', 'bool'),
+        ('resultat_reel', 'category'),
+        ('prediction_correcte', 'bool'),
+        ('ecart_probabilite', 'float'),
+        ('created_at', 'timestamp'),
+        ('finalized_at', 'timestamp'),
+    ], version_key='id'),
+]
+SUPERSEDED_FILE = 'superseded.bin'  # 1 = ligne remplacée par une version plus récente
+
+
+def _encode(value, kind, dictionary, index):
+    """Valeur Python -> valeur de la colonne typée"""
+    if kind == 'float':
+        return math.nan if value is None else float(value)
+    if kind == 'int':
+        return NULL_INT if value is None else int(value)
+    if kind == 'timestamp':
+        if value is None:
+            return NULL_INT
+        delta = value - EPOCH
+        return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+    if kind == 'bool':
+        return NULL_BOOL if value is None else int(bool(value))
+    if value is None:
+        return NULL_CATEGORY
+    code = index.get(value)
+    if code is None:
+        code = index[value] = len(dictionary)
+        dictionary.append(value)
+    return code
+
+
+def _write_json(path, data):
+    """Écriture atomique (fichier .tmp puis renommage)"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _write_bytes(path, data):
+    """Écriture atomique d'un fichier binaire"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        data.tofile(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _superseded_mask(folder, rows, version_key):
+    """
+    Marque des lignes remplacées, recalculée depuis la colonne clé
+
+    Returns:
+        (array int8 de rows valeurs, dict id -> position de la dernière version)
+    """
+    ids = array.array('q')
+    if rows:
+        with open(os.path.join(folder, f"{version_key}.bin"), 'rb') as f:
+            ids.fromfile(f, rows)
+    superseded = array.array('b', bytes(rows))
+    positions = {}
+    for position, row_id in enumerate(ids):
+        previous = positions.get(row_id)
+        if previous is not None:
+            superseded[previous] = 1
+        positions[row_id] = position
+    return superseded, positions
+
+
+def _read_json(path, default):
+    if not os.path.exists(path):
+        return default
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def export_table(spec, output_dir, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Ajoute au jeu de données les lignes réglées depuis le dernier export
+
+    Returns:
+        {'table', 'appended', 'rows', 'chunks'}
+    """
+    folder = os.path.join(output_dir, spec.name)
+    os.makedirs(folder, exist_ok=True)
+    manifest_path = os.path.join(folder, 'manifest.json')
+    manifest = _read_json(manifest_path, None) or {
+        'version': MANIFEST_VERSION,
+        'table': spec.name,
+        'byteorder': sys.byteorder,
+        'rows': 0,
+        'last_key': None,
+        'columns': [{'name': name, 'type': kind, 'typecode': COLUMN_TYPECODES[kind], 'file': f"{name}.bin"}
+                    for name, kind in spec.columns],
+    }
+    if manifest['byteorder'] != sys.byteorder:
+        raise ValueError(f"Jeu de données {spec.name} écrit en {manifest['byteorder']}-endian")
+    manifest['superseded_file'] = SUPERSEDED_FILE
+
+    rows = manifest['rows']
+    dictionaries = {}
+    indexes = {}
+    for name, kind in spec.columns:
+        if kind == 'category':
+            dictionaries[name] = _read_json(os.path.join(folder, f"{name}.dict.json"), [])
+            indexes[name] = {value: code for code, value in enumerate(dictionaries[name])}
+
+    # Colonnes plus longues que le manifeste (export interrompu) : retour au dernier état validé
+    files = {}
+    for name, kind in spec.columns:
+        path = os.path.join(folder, f"{name}.bin")
+        f = open(path, 'ab')
+        f.truncate(rows * array.array(COLUMN_TYPECODES[kind]).itemsize)
+        files[name] = f
+
+    # Recalculé à chaque export : reprend aussi un export interrompu ou antérieur à la marque
+    superseded, positions = _superseded_mask(folder, rows, spec.version_key)
+    _write_bytes(os.path.join(folder, SUPERSEDED_FILE), superseded)
+    key_position = 2 + [name for name, _ in spec.columns].index(spec.version_key)
+
+    key_id = spec.model.id
+    columns = [getattr(spec.model, name) for name, _ in spec.columns]
+    base = select(spec.settled_column, key_id, *columns).where(spec.settled_filter) \
+        .order_by(spec.settled_column, key_id)
+    last = manifest['last_key']
+    last = (datetime.fromisoformat(last[0]), last[1]) if last else None
+    appended = chunks = 0
+    try:
+        while True:
+            query = base
+            if last is not None:
+                query = query.where(tuple_(spec.settled_column, key_id) > tuple_(*last))
+            # Connexion à part : pas de transaction laissée ouverte dans la session de l'appelant
+            with db.engine.connect() as connection:
+                result = connection.execute(query.limit(chunk_size)).all()
+            if not result:
+                break
+
+            for position, (name, kind) in enumerate(spec.columns, start=2):
+                values = array.array(COLUMN_TYPECODES[kind], (
+                    _encode(row[position], kind, dictionaries.get(name), indexes.get(name)) for row in result
+                ))
+                values.tofile(files[name])
+                files[name].flush()
+
+            # Nouvelle version d'une ligne déjà exportée : l'ancienne est marquée remplacée
+            for position, row in enumerate(result, start=rows):
+                previous = positions.get(row[key_position])
+                if previous is not None:
+                    superseded[previous] = 1
+                positions[row[key_position]] = position
+                superseded.append(0)
+            _write_bytes(os.path.join(folder, SUPERSEDED_FILE), superseded)
+
+            for name, dictionary in dictionaries.items():
+                _write_json(os.path.join(folder, f"{name}.dict.json"), dictionary)
+            last = (result[-1][0], result[-1][1])
+            rows += len(result)
+            appended += len(result)
+            chunks += 1
+            manifest['rows'] = rows
+            manifest['last_key'] = [last[0].isoformat(), last[1]]
+            manifest['updated_at'] = datetime.utcnow().isoformat()
+            _write_json(manifest_path, manifest)
+
+            if len(result) < chunk_size:
+                break
+    finally:
+        for f in files.values():
+            f.close()
+
+    return {'table': spec.name, 'appended': appended, 'rows': rows, 'chunks': chunks}
+
+
+def export_training_data(output_dir=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Export incrémental de toutes les tables d'entraînement
+
+    Returns:
+        Liste des métriques par table
+    """
+    if output_dir is None:
+        from flask import current_app
+        output_dir = os.path.join(current_app.root_path, TRAINING_EXPORT_FOLDER)
+    return [export_table(spec, output_dir, chunk_size) for spec in TRAINING_TABLES]
+
+
+class TrainingDataset:
+    """
+    Lecture d'une table exportée par mmap (pages partagées entre processus)
+
+    Usage :
+        with TrainingDataset('exports/training/predictions_archive') as data:
+            confiance = data.column('confiance')  # memoryview de float64 (toutes les versions)
+            choix = data.decoded('choix')  # liste de textes (dernière version de chaque ligne)
+
+    Les vues renvoyées par column() doivent être libérées avant close() pour que
+    les projections soient fermées ; sinon elles le sont avec la dernière vue.
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.manifest = _read_json(os.path.join(folder, 'manifest.json'), None)
+        if self.manifest is None:
+            raise FileNotFoundError(f"Aucun manifeste dans {folder}")
+        if self.manifest['byteorder'] != sys.byteorder:
+            raise ValueError(f"Jeu de données écrit en {self.manifest['byteorder']}-endian")
+        self.rows = self.manifest['rows']
+        self.columns = {column['name']: column for column in self.manifest['columns']}
+        self._maps = {}
+        self._current = None
+
+    def column(self, name):
+        """Colonne typée en lecture seule (memoryview sur le fichier mappé)"""
+        column = self.columns[name]
+        if self.rows == 0:
+            return memoryview(array.array(column['typecode']))
+        return self._map(name, column['file'], column['typecode'])
+
+    def _map(self, name, file_name, typecode):
+        if name not in self._maps:
+            length = self.rows * array.array(typecode).itemsize
+            with open(os.path.join(self.folder, file_name), 'rb') as f:
+                self._maps[name] = mmap.mmap(f.fileno(), length, access=mmap.ACCESS_READ)
+        return memoryview(self._maps[name]).cast(typecode)
+
+    def superseded(self):
+        """Marque des lignes remplacées (memoryview int8), None pour un export antérieur à la marque"""
+        file_name = self.manifest.get('superseded_file')
+        if file_name is None:
+            return None
+        if self.rows == 0:
+            return memoryview(array.array('b'))
+        return self._map(file_name, file_name, 'b')
+
+    def current_positions(self):
+        """Positions de la dernière version de chaque ligne"""
+        if self._current is None:
+            mask = self.superseded()
+            if mask is None:
+                self._current = range(self.rows)
+            else:
+                self._current = [position for position, replaced in enumerate(mask) if not replaced]
+                mask.release()
+        return self._current
+
+    def categories(self, name):
+        """Dictionnaire d'une colonne catégorielle (indice -> texte)"""
+        return _read_json(os.path.join(self.folder, f"{name}.dict.json"), [])
+
+    def decoded(self, name):
+        """Colonne décodée en valeurs Python (None pour les valeurs absentes), dernière version de chaque ligne"""
+        column = self.columns[name]
+        view = self.column(name)
+        positions = self.current_positions()
+        values = view.tolist() if len(positions) == self.rows else [view[position] for position in positions]
+        view.release()
+        kind = column['type']
+        if kind == 'category':
+            dictionary = self.categories(name)
+            return [None if code == NULL_CATEGORY else dictionary[code] for code in values]
+        if kind == 'timestamp':
+            return [None if value == NULL_INT else EPOCH + timedelta(microseconds=value) for value in values]
+        if kind == 'bool':
+            return [None if value == NULL_BOOL else bool(value) for value in values]
+        if kind == 'int':
+            return [None if value == NULL_INT else value for value in values]
+        return [None if math.isnan(value) else value for value in values]
+
+    def close(self):
+        for mapped in self._maps.values():
+            try:
+                mapped.close()
+            except BufferError:
+                pass  # Une vue est encore utilisée : la projection sera libérée avec elle
+        self._maps = {}
+        self._current = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == "__main__":
+    import argparse
+    from flask import Flask
+
+    parser = argparse.ArgumentParser(description="Export colonnaire incrémental de l'archive (données d'entraînement)")
+    parser.add_argument('--output', help="Dossier de sortie (par défaut exports/training/)")
+    parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///oracxpred.db')
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    with app.app_context():
+        for result in export_training_data(args.output, args.chunk_size):
+            print(f"🧠 {result['table']}: +{result['appended']} lignes ({result['rows']} au total, "
+                  f"{result['chunks']} blocs)")
@@ -4,7 +4,7 @@
 Gestion des utilisateurs : inscription, connexion, notifications, etc.
 """
 
-from flask import Blueprint, request, render_template_string, session, redirect, url_for, jsonify, send_from_directory
+from flask import Blueprint, request, render_template_string, session, redirect, url_for, jsonify, send_from_directory, make_response
 from datetime import datetime
 import os
 
@@ -17,9 +17,13 @@ from oracxpred_utils import (
     get_user_from_session_token, ensure_user_unique_id
 )
 from prediction_manager import log_action
+from quota import quota_service
+from notifications import get_unread_notifications, mark_as_read, inbox_versions
 
 user_bp = Blueprint('user', __name__)
 
+NOTIFICATIONS_MAX_WAIT_SECONDS = 25  # Attente longue maximale du polling des notifications
+
 
 @user_bp.route('/register', methods=['GET', 'POST'])
 def user_register():
@@ -164,23 +168,37 @@ def user_logout():
 
 @user_bp.route('/notifications')
 def user_notifications():
-    """Notifications de l'utilisateur"""
+    """
+    Notifications de l'utilisateur
+    
+    Paramètres : since (id de la dernière notification reçue), wait (attente longue en secondes).
+    Si l'ETag envoyé correspond à la version de la boîte (table inbox_versions, partagée entre
+    processus) : 304 après une seule lecture par clé primaire.
+    """
     user_id = session.get('user_id')
     if not user_id:
         return redirect(url_for('user.user_login'))
     
+    # Boîte inchangée : 304 immédiat, ou après attente longue si wait est demandé
+    etag = inbox_versions.etag(user_id)
+    if etag in request.if_none_match:
+        wait = min(request.args.get('wait', 0, type=float), NOTIFICATIONS_MAX_WAIT_SECONDS)
+        if wait <= 0 or not inbox_versions.wait_for_change(user_id, etag, wait):
+            response = make_response('', 304)
+            response.set_etag(etag)
+            return response
+        etag = inbox_versions.etag(user_id)
+    
     user = User.query.get(user_id)
     if not user:
         return redirect(url_for('user.user_login'))
     
-    # Récupérer les notifications non lues et récentes
-    notifications = Notification.query.filter(
-        (Notification.user_id == user_id) | (Notification.is_global == True)
-    ).filter(
-        Notification.is_read == False
-    ).order_by(Notification.created_at.desc()).limit(50).all()
+    # Récupérer les notifications non lues et récentes (ciblées + globales sans accusé de lecture)
+    since_id = request.args.get('since', type=int)
+    notifications = get_unread_notifications(user_id, limit=50, since_id=since_id)
     
-    return jsonify({
+    response = jsonify({
+        'cursor': max([n.id for n in notifications], default=since_id or 0),
         'notifications': [{
             'id': n.id,
             'title': n.title,
@@ -191,6 +209,9 @@ def user_notifications():
             'created_at': n.created_at.isoformat()
         } for n in notifications]
     })
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
 
 
 @user_bp.route('/notification/<int:notification_id>/read', methods=['POST'])
@@ -203,12 +224,10 @@ def mark_notification_read(notification_id):
     notification = Notification.query.get_or_404(notification_id)
     
     # Vérifier que la notification appartient à l'utilisateur ou est globale
-    if notification.user_id != user_id and not notification.is_global:
+    if not mark_as_read(notification, user_id):
         return jsonify({'error': 'Non autorisé'}), 403
-    
-    notification.is_read = True
-    notification.read_at = datetime.utcnow()
     db.session.commit()
+    inbox_versions.changed(user_id)
     
     return jsonify({'success': True})
 
@@ -241,10 +260,7 @@ def user_profile():
         }
     
     # Statistiques
-    predictions_viewed_today = UserPredictionAccess.query.filter_by(
-        user_id=user_id,
-        access_date=datetime.utcnow().date()
-    ).count()
+    predictions_viewed_today = quota_service.viewed_count(user_id)  # Inclut les accès pas encore écrits
     
     return render_template_string(USER_PROFILE_TEMPLATE,
         user=user,